@@ -345,7 +345,7 @@ class LLMModelAdmin(admin.ModelAdmin):
 class LLMRequestLogAdmin(admin.ModelAdmin):
     list_display = [
         'id', 'conversation', 'model', 'request_type', 'status',
-        'latency_ms', 'total_tokens', 'created_at'
+        'latency_ms', 'total_tokens', 'cache_hits', 'cache_misses', 'created_at'
     ]
     list_filter = ['request_type', 'status', 'created_at']
     search_fields = ['conversation__title', 'error_message']
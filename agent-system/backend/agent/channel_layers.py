@@ -0,0 +1,207 @@
+"""
+Shared channel layer backends
+
+InMemoryChannelLayer only reaches consumers in the same process. For
+multi-worker deployments point CHANNEL_LAYER_URL at a shared store:
+
+  - redis://...   -> channels_redis.pubsub.RedisPubSubChannelLayer
+  - sqlite:///... -> SQLiteChannelLayer (below; single host / tests)
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from channels.exceptions import ChannelFull
+from channels.layers import BaseChannelLayer
+
+
+def channel_layers_from_url(url):
+    """Build the CHANNEL_LAYERS setting from a URL (empty -> in-memory)."""
+    url = (url or '').strip()
+    if url.startswith(('redis://', 'rediss://')):
+        return {
+            'default': {
+                'BACKEND': 'channels_redis.pubsub.RedisPubSubChannelLayer',
+                'CONFIG': {'hosts': [url]},
+            }
+        }
+    if url.startswith('sqlite://'):
+        path = url[len('sqlite:///'):] if url.startswith('sqlite:///') else url[len('sqlite://'):]
+        return {
+            'default': {
+                'BACKEND': 'agent.channel_layers.SQLiteChannelLayer',
+                'CONFIG': {'path': path},
+            }
+        }
+    return {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer'
+        }
+    }
+
+
+class SQLiteChannelLayer(BaseChannelLayer):
+    """
+    Channel layer over a shared SQLite file.
+
+    Messages are rows; receive() polls its channel at `poll_interval`.
+    group_send() fans out to all members with one batched INSERT.
+    """
+
+    extensions = ['groups', 'flush']
+
+    def __init__(self, path='channel_layer.sqlite3', expiry=60, group_expiry=86400,
+                 capacity=100, channel_capacity=None, poll_interval=0.05, **kwargs):
+        super().__init__(expiry=expiry, capacity=capacity, channel_capacity=channel_capacity, **kwargs)
+        self.path = os.path.abspath(path)
+        self.group_expiry = group_expiry
+        self.poll_interval = poll_interval
+        self._local = threading.local()
+        self._db(lambda conn: conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS layer_messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                channel TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                expires REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS layer_messages_channel ON layer_messages (channel, id);
+            CREATE TABLE IF NOT EXISTS layer_groups (
+                grp TEXT NOT NULL,
+                channel TEXT NOT NULL,
+                expires REAL NOT NULL,
+                PRIMARY KEY (grp, channel)
+            );
+            """
+        ))
+
+    # -------------------------
+    # sqlite helpers (run in a worker thread)
+    # -------------------------
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            parent = os.path.dirname(self.path)
+            if parent:
+                os.makedirs(parent, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _db(self, fn):
+        return fn(self._conn())
+
+    async def _run(self, fn):
+        return await asyncio.to_thread(self._db, fn)
+
+    # -------------------------
+    # channel API
+    # -------------------------
+    async def send(self, channel, message):
+        assert isinstance(message, dict), 'message is not a dict'
+        assert self.valid_channel_name(channel), 'Channel name not valid'
+        payload = json.dumps(message)
+        capacity = self.get_capacity(channel)
+
+        def _send(conn):
+            now = time.time()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                conn.execute('DELETE FROM layer_messages WHERE channel = ? AND expires < ?', (channel, now))
+                count = conn.execute('SELECT COUNT(*) FROM layer_messages WHERE channel = ?', (channel,)).fetchone()[0]
+                if count >= capacity:
+                    conn.execute('ROLLBACK')
+                    return False
+                conn.execute(
+                    'INSERT INTO layer_messages (channel, payload, expires) VALUES (?, ?, ?)',
+                    (channel, payload, now + self.expiry),
+                )
+                conn.execute('COMMIT')
+                return True
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+
+        if not await self._run(_send):
+            raise ChannelFull(channel)
+
+    async def receive(self, channel):
+        assert self.valid_channel_name(channel)
+
+        def _pop(conn):
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = conn.execute(
+                    'SELECT id, payload FROM layer_messages WHERE channel = ? AND expires >= ? ORDER BY id LIMIT 1',
+                    (channel, time.time()),
+                ).fetchone()
+                if row:
+                    conn.execute('DELETE FROM layer_messages WHERE id = ?', (row[0],))
+                conn.execute('COMMIT')
+                return row[1] if row else None
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+
+        while True:
+            payload = await self._run(_pop)
+            if payload is not None:
+                return json.loads(payload)
+            await asyncio.sleep(self.poll_interval)
+
+    async def new_channel(self, prefix='specific'):
+        return f'{prefix}.sqlite!{uuid.uuid4().hex}'
+
+    # -------------------------
+    # groups
+    # -------------------------
+    async def group_add(self, group, channel):
+        assert self.valid_group_name(group), 'Group name not valid'
+        assert self.valid_channel_name(channel), 'Channel name not valid'
+        await self._run(lambda conn: conn.execute(
+            'INSERT OR REPLACE INTO layer_groups (grp, channel, expires) VALUES (?, ?, ?)',
+            (group, channel, time.time() + self.group_expiry),
+        ))
+
+    async def group_discard(self, group, channel):
+        assert self.valid_group_name(group), 'Group name not valid'
+        assert self.valid_channel_name(channel), 'Channel name not valid'
+        await self._run(lambda conn: conn.execute(
+            'DELETE FROM layer_groups WHERE grp = ? AND channel = ?', (group, channel)
+        ))
+
+    async def group_send(self, group, message):
+        assert isinstance(message, dict), 'Message is not a dict'
+        assert self.valid_group_name(group), 'Group name not valid'
+        payload = json.dumps(message)
+
+        def _fanout(conn):
+            now = time.time()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                conn.execute('DELETE FROM layer_groups WHERE expires < ?', (now,))
+                channels = [r[0] for r in conn.execute(
+                    'SELECT channel FROM layer_groups WHERE grp = ?', (group,)
+                ).fetchall()]
+                conn.executemany(
+                    'INSERT INTO layer_messages (channel, payload, expires) VALUES (?, ?, ?)',
+                    [(ch, payload, now + self.expiry) for ch in channels],
+                )
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+
+        await self._run(_fanout)
+
+    async def flush(self):
+        await self._run(lambda conn: conn.executescript(
+            'DELETE FROM layer_messages; DELETE FROM layer_groups;'
+        ))
@@ -2,9 +2,12 @@
 WebSocket consumers for real-time chat
 """
 
+import asyncio
 import json
 import logging
 import time
+from channels.exceptions import StopConsumer
+from channels.generic.http import AsyncHttpConsumer
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from asgiref.sync import sync_to_async
@@ -17,10 +20,15 @@ from agent.knowledge.crs_documentation import (
     get_crs_documentation_context
 )
 from llm.router import get_llm_router
+from llm.prompt_budget import PromptBudget, Section
+from llm.streaming import astream_client
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from agent.services.agent_runner import AgentRunner
 from agent.services.knowledge_agent import RepositoryKnowledgeAgent
+from agent.services.intent_classifier import get_intent_classifier
+from agent.services.context_files import conversation_file_parts
 User = get_user_model()
 
 logger = logging.getLogger(__name__)
@@ -143,6 +151,7 @@ class BaseChatConsumer(AsyncWebsocketConsumer):
 
         request_started = time.monotonic()
         last_usage = None
+        cache_counts = {'hit': 0, 'miss': 0}
         model_info = {'provider': conversation.model_provider or 'local', 'model': None}
 
         if is_inventory and artifact_kind:
@@ -187,15 +196,16 @@ class BaseChatConsumer(AsyncWebsocketConsumer):
                     {'role': 'user', 'content': f"User asked: {user_message}\n\nTool Results:\n{result}\n\nPlease format this as a clear answer."}
                 ]
 
-                chunks = await sync_to_async(lambda: list(client.query_stream(format_messages)))()
-                last_usage = getattr(client, 'last_usage', None)
-                formatted_answer = ''.join(chunks)
-
-                for chunk in chunks:
+                formatted_answer = ''
+                outcome = {}
+                async for chunk in astream_client(client, format_messages, outcome=outcome):
+                    formatted_answer += chunk
                     await self.send_json({
                         'type': 'assistant_message_chunk',
                         'chunk': chunk
                     })
+                last_usage = outcome.get('usage')
+                self._count_cache(cache_counts, outcome)
 
                 await self.send_json({
                     'type': 'assistant_message_complete',
@@ -214,7 +224,8 @@ class BaseChatConsumer(AsyncWebsocketConsumer):
                     request_type='stream',
                     status='success',
                     latency_ms=self._calculate_latency_ms(request_started),
-                    usage=last_usage
+                    usage=last_usage,
+                    cache=cache_counts
                 )
 
                 logger.info(f"Server-side inventory routing succeeded for {artifact_kind}")
@@ -228,6 +239,7 @@ class BaseChatConsumer(AsyncWebsocketConsumer):
                     status='error',
                     latency_ms=self._calculate_latency_ms(request_started),
                     usage=last_usage,
+                    cache=cache_counts,
                     error=str(e)
                 ) """
                 logger.error(f"Server-side inventory routing failed: {e}")
@@ -295,12 +307,10 @@ class BaseChatConsumer(AsyncWebsocketConsumer):
                         'content': f"REMINDER: You are the code repository assistant. You just received tool results. Use them to answer the user's question: '{user_message}'.\n\nDO NOT simulate a conversation. DO NOT generate 'User:' or 'Assistant:' lines. Just provide the answer."
                      })
 
-                # Get LLM response (still buffered for now, TODO: fix streaming)
-                chunks = await sync_to_async(lambda: list(client.query_stream(messages)))()
-                last_usage = getattr(client, 'last_usage', None) or last_usage
-
+                # Get LLM response, forwarding chunks as the model produces them
                 iteration_response = ""
-                for text_chunk in chunks:
+                outcome = {}
+                async for text_chunk in astream_client(client, messages, outcome=outcome):
                     iteration_response += text_chunk
 
                     # Send chunk to frontend (assistant thinking/planning)
@@ -308,6 +318,8 @@ class BaseChatConsumer(AsyncWebsocketConsumer):
                         'type': 'assistant_message_chunk',
                         'chunk': text_chunk
                     })
+                last_usage = outcome.get('usage') or last_usage
+                self._count_cache(cache_counts, outcome)
                 
                 logger.info(f"LLM Response (Iteration {iteration+1}): {iteration_response[:200]}...")
 
@@ -453,7 +465,8 @@ class BaseChatConsumer(AsyncWebsocketConsumer):
                 request_type='stream',
                 status='success',
                 latency_ms=self._calculate_latency_ms(request_started),
-                usage=last_usage
+                usage=last_usage,
+                cache=cache_counts
             )
 
             logger.info(f"Tool trace: {' -> '.join(debug_trace)}")
@@ -466,6 +479,7 @@ class BaseChatConsumer(AsyncWebsocketConsumer):
                 status='error',
                 latency_ms=self._calculate_latency_ms(request_started),
                 usage=last_usage,
+                cache=cache_counts,
                 error=str(e)
             ) """
             logger.error(f"LLM streaming error: {e}", exc_info=True)
@@ -489,6 +503,12 @@ class BaseChatConsumer(AsyncWebsocketConsumer):
             return None
         return int((time.monotonic() - started_at) * 1000)
 
+    def _count_cache(self, counts, outcome):
+        """Tally one call's LLM-cache outcome (astream_client outcome; no 'cache' when caching is off)"""
+        cache = outcome.get('cache')
+        if cache in counts:
+            counts[cache] += 1
+
     def _extract_token_counts(self, usage):
         if not usage:
             return {}
@@ -523,25 +543,22 @@ class BaseChatConsumer(AsyncWebsocketConsumer):
         status,
         latency_ms,
         usage,
+        cache=None,
         error=None
     ):
         token_counts = self._extract_token_counts(usage)
-        provider = model_info.get('provider') or 'unknown'
-        model = model_info.get('model') or ''
-        print(model_info)
-        return True
+        cache = cache or {}
         return LLMRequestLog.objects.create(
-            user=conversation.user,
             conversation=conversation,
-            provider=provider,
-            model=model,
             request_type=request_type,
             status=status,
             latency_ms=latency_ms,
             prompt_tokens=token_counts.get('prompt_tokens'),
             completion_tokens=token_counts.get('completion_tokens'),
             total_tokens=token_counts.get('total_tokens'),
-            error=error or ''
+            cache_hits=cache.get('hit', 0),
+            cache_misses=cache.get('miss', 0),
+            error_message=error or None
         )
 
     @database_sync_to_async
@@ -1090,42 +1107,45 @@ class RepositoryChatConsumer(BaseChatConsumer):
     async def _classify_intent(self, user_message):
         """
         Classify user intent: 'CHAT' vs 'TASK'
-        
-        Simple heuristic + fast LLM check.
+
+        ✅ NEW: local rules + hashed n-gram model (agent.services.intent_classifier);
+        the LLM is only consulted, asynchronously, when the local decision is
+        not confident. Decisions are cached per normalized message.
         """
-        # Fast heuristics
-        lower_msg = user_message.lower()
-        if any(w in lower_msg for w in ['create', 'implement', 'refactor', 'fix', 'change', 'update', 'delete', 'add']):
-            # Likely a task, but verify with LLM to avoid false positives on "How do I create..."
-            # For now, let's trust the router if configured, otherwise default to CHAT if ambiguous
-            pass
+        decision = await get_intent_classifier().classify(
+            user_message,
+            llm_fallback=self._llm_classify_intent if settings.INTENT_LLM_FALLBACK else None,
+            llm_timeout=settings.INTENT_LLM_TIMEOUT,
+        )
+        logger.debug(
+            "Intent %s (confidence=%.2f, source=%s)", decision.intent, decision.confidence, decision.source
+        )
+        return decision.intent
 
-        try:
-            # Use small/fast model for classification
-            router = get_llm_router()
-            
-            messages = [
-                {"role": "system", "content": "You are a classifier. Output ONLY valid JSON."},
-                {"role": "user", "content": f"""Classify this message into one of two categories:
+    async def _llm_classify_intent(self, user_message):
+        """Low-confidence fallback: one small async LLM call, off the event loop"""
+        router = await sync_to_async(get_llm_router)()
+
+        messages = [
+            {"role": "system", "content": "You are a classifier. Output ONLY valid JSON."},
+            {"role": "user", "content": f"""Classify this message into one of two categories:
 1. CHAT: The user is asking a question, asking for explanation, or general conversation.
 2. TASK: The user is explicitly asking for files to be created, modified, code to be written/refactored, or an action to be performed on the codebase.
 
 User message: "{user_message}"
 
 Output ONLY the JSON: {{"intent": "CHAT" | "TASK"}}"""}
-            ]
-            
-            response = router.query(messages, json_mode=True)
-            content = response.get('content', '')
-            
-            # Basic parsing
-            if '"intent": "TASK"' in content or "'intent': 'TASK'" in content:
-                return 'TASK'
-            return 'CHAT'
+        ]
 
-        except Exception as e:
-            logger.warning(f"Intent classification failed: {e}. Defaulting to CHAT.")
+        response = await router.aquery(messages, json_mode=True, max_tokens=20)
+        content = response.get('content', '')
+
+        # Basic parsing
+        if '"intent": "TASK"' in content or "'intent': 'TASK'" in content:
+            return 'TASK'
+        if '"intent": "CHAT"' in content or "'intent': 'CHAT'" in content:
             return 'CHAT'
+        return None
 
     async def get_crs_context(self, query):
         """
@@ -1177,6 +1197,7 @@ Output ONLY the JSON: {{"intent": "CHAT" | "TASK"}}"""}
 
         # Get tool definitions from agent profile (not hardcoded)
         tool_definitions = ""
+        configured_tools = []
         
         # Check if conversation is linked to an agent profile
         agent_profile = None
@@ -1225,31 +1246,12 @@ This gives you context on what data is available.
             except Exception as e:
                 logger.warning(f"Could not load CRS summary: {e}")
 
-        # Fetch uploaded context files
-        context_files = await sync_to_async(list)(
-            ContextFile.objects.filter(conversation=conversation)
-        )
-        
-        uploaded_context_prompt = ""
-        if context_files:
-            uploaded_context_prompt = "\n\n# User Uploaded Context Files:\n"
-            for cf in context_files:
-                try:
-                    # Read file content
-                    path = await sync_to_async(lambda: cf.file.path)()
-                    
-                    # Async file read
-                    def read_file():
-                        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
-                            return f.read()
-
-                    content = await sync_to_async(read_file)()
-                    
-                    uploaded_context_prompt += f"\n## File: {cf.name}\n```\n{content[:20000]} # Truncated if too long\n```\n"
-                except Exception as e:
-                    logger.error(f"Failed to read context file {cf.id}: {e}")
+        # ✅ NEW: uploaded files are extracted once at upload; this only assembles
+        # the prepared chunks (cached per conversation, agent.services.context_files)
+        file_parts = await sync_to_async(conversation_file_parts)(conversation.id)
 
         # Build tool-first system prompt with router
+        knowledge_parts = []
         
         # Check if conversation is linked to an Agent Profile
         agent_profile = None
@@ -1264,7 +1266,6 @@ This gives you context on what data is available.
                     ContextFile.objects.filter(agent_profile=agent_profile)
                 )
                 if agent_files:
-                    uploaded_context_prompt += f"\n\n# Agent Knowledge Base ({agent_profile.name}):\n"
                     for af in agent_files:
                         try:
                             # Prefer analysis if available, otherwise content
@@ -1272,7 +1273,7 @@ This gives you context on what data is available.
                             # If content is small, maybe include raw? For now, trust analysis.
                             # Or read file if analysis is empty?
                             
-                            uploaded_context_prompt += f"\n## Knowledge: {af.name}\nAnalysis/Summary:\n{content_to_use}\n"
+                            knowledge_parts.append(f"\n## Knowledge: {af.name}\nAnalysis/Summary:\n{content_to_use}\n")
                             
                             # Optional: Read raw content if critical
                         except Exception as e:
@@ -1281,55 +1282,53 @@ This gives you context on what data is available.
             except Exception as e:
                 logger.error(f"Failed to load Agent Profile: {e}")
 
-        # Build system prompt based on agent configuration
+        # Agent's custom system prompt with {{tools}} expanded; the generic
+        # assistant prompt is built by _render_system_prompt
+        base_prompt = ""
         if agent_profile:
-            # Use agent's custom system prompt
-            system_prompt_base = agent_profile.system_prompt_template
-            
-            # Inject knowledge context if agent has files
-            if uploaded_context_prompt:
-                knowledge_section = f"\n\n# KNOWLEDGE CONTEXT\n{uploaded_context_prompt}"
+            base_prompt = agent_profile.system_prompt_template
+            if configured_tools:
+                tools_description = "\n".join([
+                    f"- {tool.name}: {tool.description}"
+                    for tool in configured_tools
+                ])
+                base_prompt = base_prompt.replace('{{tools}}', f"Available Tools:\n{tools_description}")
             else:
-                knowledge_section = ""
-            
-            # Build tools list if agent has configured tools
-            try:
-                configured_tools = list(agent_profile.tools.all())
-                if configured_tools:
-                    tools_description = "\n".join([
-                        f"- {tool.name}: {tool.description}" 
-                        for tool in configured_tools
-                    ])
-                    system_prompt_base = system_prompt_base.replace('{{tools}}', f"Available Tools:\n{tools_description}")
-                    print(system_prompt_base)
-                else:
-                    system_prompt_base = system_prompt_base.replace('{{tools}}', 'No tools configured.')
-            except:
-                system_prompt_base = system_prompt_base.replace('{{tools}}', 'No tools available.')
-                
-            base_system_prompt = f"{system_prompt_base}{knowledge_section}"
-                
-        else:
-            # No agent profile: Generic assistant
-            base_system_prompt = f"""You are a helpful AI assistant.
-
-{uploaded_context_prompt if uploaded_context_prompt else ''}
-
-Answer the user's questions to the best of your ability."""
-
-        # Only include tool definitions if tools exist
-        if tool_definitions and tool_definitions.strip():
-            system_prompt = f"""{base_system_prompt}
-
----
-
-{tool_definitions}
-
----
-
-Use the available tools to help answer the user's question."""
-        else:
-            system_prompt = base_system_prompt
+                base_prompt = base_prompt.replace('{{tools}}', 'No tools configured.')
+
+        # ✅ NEW: fit every section into the model's token budget (llm.prompt_budget).
+        # The required system section is the fixed text that will actually be
+        # sent: the rendered prompt with the headers and separators of every
+        # section that has content, but none of that content.
+        system_frame = self._render_system_prompt(
+            agent_profile,
+            base_prompt,
+            tools='' if tool_definitions.strip() else None,
+            crs='' if crs_status_context.strip() else None,
+            files='' if file_parts else None,
+            knowledge='' if knowledge_parts else None,
+        )
+        recent = [msg for msg in history[-5:] if msg.content]
+        packed = await self._pack_prompt(conversation, [
+            Section('system', system_frame, required=True),
+            Section('user', user_message, required=True),
+            Section('tools', tool_definitions, weight=3, min_tokens=200),
+            Section('history', [msg.content for msg in recent], weight=2, strategy='oldest'),
+            Section('crs', crs_status_context, weight=2),
+            Section('knowledge', knowledge_parts, weight=1.5, strategy='each', min_tokens=100),
+            Section('files', file_parts, weight=1, strategy='each', min_tokens=200),
+        ])
+        tool_definitions = packed.text('tools')
+        crs_status_context = packed.text('crs')
+
+        system_prompt = self._render_system_prompt(
+            agent_profile,
+            base_prompt,
+            tools=tool_definitions if tool_definitions.strip() else None,
+            crs=crs_status_context if crs_status_context.strip() else None,
+            files=''.join(packed.items('files')) if packed.items('files') else None,
+            knowledge=''.join(packed.items('knowledge')) if packed.items('knowledge') else None,
+        )
 
         # REMOVED: Hardcoded CRS override that ignored agent configuration
         # if status_message:
@@ -1342,11 +1341,12 @@ Use the available tools to help answer the user's question."""
             }
         ]
 
-        # Add conversation history (last 5 messages for context)
-        for msg in history[-5:]:
+        # Add conversation history (last 5 messages, oldest dropped first when over budget)
+        kept_history = packed.items('history')
+        for msg, content in zip(recent[len(recent) - len(kept_history):], kept_history):
             messages.append({
                 'role': msg.role,
-                'content': msg.content
+                'content': content
             })
 
         # Add current user message
@@ -1358,6 +1358,59 @@ Use the available tools to help answer the user's question."""
         logger.info(f"Built tool-first prompt with {len(system_prompt)} chars")
         return messages
 
+    @staticmethod
+    def _render_system_prompt(agent_profile, base_prompt, tools=None, crs=None, files=None, knowledge=None):
+        """
+        System prompt around the budgeted sections. A section passed as None is
+        left out together with its header; '' renders only its header and
+        separators, which is the fixed part counted against the budget.
+        """
+        uploaded_context_prompt = ""
+        if files is not None:
+            uploaded_context_prompt = "\n\n# User Uploaded Context Files:\n" + files
+        if knowledge is not None:
+            uploaded_context_prompt += f"\n\n# Agent Knowledge Base ({agent_profile.name}):\n" + knowledge
+
+        if agent_profile:
+            # Inject knowledge context if agent has files
+            knowledge_section = f"\n\n# KNOWLEDGE CONTEXT\n{uploaded_context_prompt}" if uploaded_context_prompt else ""
+            system_prompt = f"{base_prompt}{knowledge_section}"
+        else:
+            # No agent profile: Generic assistant
+            system_prompt = f"""You are a helpful AI assistant.
+
+{uploaded_context_prompt}
+
+Answer the user's questions to the best of your ability."""
+
+        if crs is not None:
+            system_prompt = f"{system_prompt}\n{crs}"
+
+        # Only include tool definitions if tools exist
+        if tools is not None:
+            system_prompt = f"""{system_prompt}
+
+---
+
+{tools}
+
+---
+
+Use the available tools to help answer the user's question."""
+        return system_prompt
+
+    async def _pack_prompt(self, conversation, sections):
+        """Pack prompt sections for the conversation's model; logs tokens per section"""
+        llm_config = await self.get_llm_config(conversation)
+        if llm_config:
+            config = llm_config['config']
+            provider, model, reserve = config.provider, config.model, config.max_tokens
+        else:
+            provider, model, reserve = conversation.model_provider or 'ollama', None, 4000
+        packed = PromptBudget.for_model(provider, model, reserve=reserve).pack(sections)
+        packed.log(f"repository chat prompt ({provider}:{model or 'default'})")
+        return packed
+
     @database_sync_to_async
     def get_conversation_history(self, conversation, limit=10):
         """Get recent conversation history"""
@@ -2076,3 +2129,170 @@ class AgentRunnerConsumer(AsyncWebsocketConsumer):
     async def agent_event(self, event):
         """Handle agent execution events from group"""
         await self.send_json(event)
+
+
+class CRSEventStreamConsumer(AsyncHttpConsumer):
+    """
+    Native async SSE stream for CRS pipeline events
+
+    GET /api/systems/{system_id}/repositories/{repo_id}/crs/events/
+
+    - Awaits the broadcaster (no worker thread held per open tab)
+    - Resumes from the Last-Event-ID header (or ?last_event_id= / legacy ?since=)
+    - Sends keepalive comments on a timer
+    - Cancels the stream task as soon as the client disconnects
+    """
+
+    keepalive_interval = 15.0
+    retry_ms = 3000
+
+    async def http_request(self, message):
+        # Unlike the base class, do not stop the consumer once handle() returns:
+        # the stream keeps running in a task until http.disconnect arrives.
+        if "body" in message:
+            self.body.append(message["body"])
+        if not message.get("more_body"):
+            await self.handle(b"".join(self.body))
+
+    async def handle(self, body):
+        kwargs = self.scope['url_route']['kwargs']
+        request = self._django_request(body)
+        cors_headers = self._cors_headers(request)
+
+        user, error = await self.authenticate(request)
+        if error is not None:
+            await self._reject(error.status_code, str(error.detail).encode('utf-8'), cors_headers)
+            return
+        if not user or not user.is_authenticated:
+            await self._reject(403, b'Authentication credentials were not provided.', cors_headers)
+            return
+
+        repository = await self.get_repository(kwargs.get('system_pk'), kwargs.get('pk'), user)
+        if repository is None:
+            await self._reject(404, b'Not found.', cors_headers)
+            return
+
+        from core.events import get_broadcaster
+        broadcaster = get_broadcaster()
+
+        await self.send_headers(headers=[
+            (b'Content-Type', b'text/event-stream'),
+            (b'Cache-Control', b'no-cache'),
+            (b'X-Accel-Buffering', b'no'),
+            *cors_headers,
+        ])
+        await self.send_body(f"retry: {self.retry_ms}\n\n".encode('utf-8'), more_body=True)
+
+        self._stream_task = asyncio.ensure_future(self._stream(broadcaster, repository.id))
+
+    async def _reject(self, status, message, extra_headers=()):
+        await self.send_response(
+            status, message, headers=[(b'Content-Type', b'text/plain'), *extra_headers]
+        )
+        raise StopConsumer()
+
+    def _django_request(self, body):
+        """Wrap the ASGI scope in a Django request (for DRF auth and corsheaders)"""
+        import io
+        from django.contrib.auth.models import AnonymousUser
+        from django.core.handlers.asgi import ASGIRequest
+
+        request = ASGIRequest(self.scope, io.BytesIO(body))
+        # what AuthenticationMiddleware would set; AuthMiddlewareStack resolved it from the session
+        request.user = self.scope.get('user') or AnonymousUser()
+        return request
+
+    @database_sync_to_async
+    def authenticate(self, request):
+        """
+        Run the project's DRF authentication classes, as RepositoryViewSet does.
+        Returns (user, None) or (None, APIException).
+        """
+        from rest_framework.exceptions import APIException
+        from rest_framework.request import Request
+        from rest_framework.settings import api_settings
+
+        drf_request = Request(
+            request,
+            authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES],
+        )
+        try:
+            return drf_request.user, None
+        except APIException as e:
+            return None, e
+
+    @staticmethod
+    def _cors_headers(request):
+        """CORS headers from the corsheaders settings (same rules as CorsMiddleware)"""
+        from corsheaders.middleware import CorsMiddleware
+        from django.http import HttpResponse
+
+        response = CorsMiddleware(lambda r: None).add_response_headers(request, HttpResponse())
+        return [
+            (name.encode('latin-1'), value.encode('latin-1'))
+            for name, value in response.items()
+            if name.lower().startswith('access-control-') or name.lower() == 'vary'
+        ]
+
+    def _query_param(self, key):
+        from urllib.parse import parse_qs
+        qs = parse_qs((self.scope.get('query_string') or b'').decode('utf-8', errors='ignore'))
+        values = qs.get(key)
+        return values[0] if values else None
+
+    def _last_event_id(self):
+        for name, value in self.scope.get('headers') or []:
+            if name.lower() == b'last-event-id':
+                return value.decode('utf-8', errors='ignore')
+        return self._query_param('last_event_id')
+
+    async def _stream(self, broadcaster, repository_id):
+        try:
+            last_event_id = self._last_event_id()
+            since = self._query_param('since')
+            if last_event_id and last_event_id.strip().isdigit():
+                after_seq = int(last_event_id.strip())
+            elif since:
+                try:
+                    since = float(since)
+                except (TypeError, ValueError):
+                    since = None
+                after_seq = await broadcaster.alast_seq(repository_id)
+                if since is not None:
+                    # broadcaster reads can hit the shared store: keep them off the event loop
+                    past = await asyncio.to_thread(broadcaster.get_events, repository_id, since=since)
+                    if past:
+                        await self.send_body(''.join(e.to_sse() for e in past).encode('utf-8'), more_body=True)
+                        after_seq = past[-1].seq
+            else:
+                after_seq = await broadcaster.alast_seq(repository_id)
+
+            while True:
+                events = await broadcaster.aget_events(
+                    repository_id, after_seq=after_seq, timeout=self.keepalive_interval
+                )
+                if not events:
+                    await self.send_body(b": keepalive\n\n", more_body=True)
+                    continue
+                await self.send_body(''.join(e.to_sse() for e in events).encode('utf-8'), more_body=True)
+                after_seq = events[-1].seq
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"CRS event stream failed: {e}", exc_info=True)
+
+    async def disconnect(self):
+        task = getattr(self, '_stream_task', None)
+        if task and not task.done():
+            task.cancel()
+            # let the stream unregister its broadcaster waiter before we stop
+            await asyncio.gather(task, return_exceptions=True)
+
+    @database_sync_to_async
+    def get_repository(self, system_id, repository_id, user):
+        """Same visibility rule as RepositoryViewSet.get_queryset"""
+        return Repository.objects.filter(
+            id=repository_id,
+            system_id=system_id,
+            system__user=user
+        ).first()
@@ -10,6 +10,8 @@ from typing import Dict, List, Any, Optional
 from pathlib import Path
 from agent.rag import CRSRetriever
 from agent.services.crs_runner import get_crs_summary, load_crs_payload
+from agent.services.crs_daemon_client import run_crs_op
+from agent.services.crs_search import blueprint_path
 import logging
 
 logger = logging.getLogger(__name__)
@@ -276,6 +278,13 @@ Step 2: Get details using the EXACT artifact_id from Step 1 output
             logger.error(f"Error executing tool {tool_name}: {e}", exc_info=True)
             return f"❌ Error executing {tool_name}: {str(e)}"
 
+    def _query(self, op: str, **args) -> Any:
+        """Run a CRS query op (via the CRS daemon when configured) and return its result"""
+        resp = run_crs_op(self.repository, op, args)
+        if not resp.get('ok'):
+            raise RuntimeError(resp.get('error') or f"CRS query {op} failed")
+        return resp.get('result')
+
     # ==================== TOOL IMPLEMENTATIONS ====================
 
     def _crs_status(self) -> str:
@@ -312,11 +321,8 @@ Step 2: Get details using the EXACT artifact_id from Step 1 output
             return "❌ Missing 'kind' parameter. Valid kinds: django_model, drf_serializer, drf_viewset, drf_apiview, url_pattern, admin_register, celery_task, redis_client, django_app_config, django_settings, requirement"
 
         try:
-            self.retriever._load_crs_data()
-            all_artifacts = self.retriever._artifacts.get('artifacts', [])
-
-            # Filter by type
-            filtered = [a for a in all_artifacts if a.get('type', '').lower() == kind.lower()]
+            # Filter by type (served from the warm index)
+            filtered = self._query('find_artifacts', type=kind.lower(), limit=100000) or []
             if kind.lower() != "admin_register":
                 filtered = [
                     a for a in filtered
@@ -408,15 +414,7 @@ Step 2: Get details using the EXACT artifact_id from Step 1 output
             return "❌ Missing 'artifact_id' parameter"
 
         try:
-            self.retriever._load_crs_data()
-            all_artifacts = self.retriever._artifacts.get('artifacts', [])
-
-            # Find exact match
-            artifact = None
-            for a in all_artifacts:
-                if a.get('artifact_id') == artifact_id:
-                    artifact = a
-                    break
+            artifact = self._query('get_artifact', artifact_id=artifact_id)
 
             if not artifact:
                 return f"❌ Artifact not found: {artifact_id}"
@@ -483,10 +481,9 @@ Step 2: Get details using the EXACT artifact_id from Step 1 output
             if blueprints:
                 result.append(f"**📁 Files ({len(blueprints)}):**")
                 for bp in blueprints:
-                    path = bp.get('path', 'unknown')
-                    purpose = bp.get('purpose', 'No purpose')
-                    result.append(f"  • {path}")
-                    result.append(f"    {purpose}")
+                    result.append(f"  • {blueprint_path(bp) or 'unknown'}")
+                    if bp.get('purpose'):
+                        result.append(f"    {bp['purpose']}")
                 result.append("")
 
             # Show artifact matches (code elements)
@@ -521,16 +518,15 @@ Step 2: Get details using the EXACT artifact_id from Step 1 output
             return "❌ Missing 'artifact_id' parameter"
 
         try:
-            self.retriever._load_crs_data()
-            all_relationships = self.retriever._relationships.get('relationships', [])
+            found = self._query('neighbors', artifact_id=artifact_id, direction='both', limit=1000) or {}
 
-            # Find relationships involving this artifact
+            # Relationships involving this artifact
             incoming = []  # Things that use this artifact
             outgoing = []  # Things this artifact uses
 
-            for rel in all_relationships:
-                source = rel.get('source', '')
-                target = rel.get('target', '')
+            for rel in found.get('relationships', []):
+                source = (rel.get('from') or {}).get('artifact_id') or (rel.get('from') or {}).get('name', '')
+                target = (rel.get('to') or {}).get('artifact_id') or (rel.get('to') or {}).get('name', '')
                 rel_type = rel.get('type', 'unknown')
 
                 if source == artifact_id:
@@ -0,0 +1,36 @@
+"""
+Run the CRS job scheduler outside the web process.
+
+    python manage.py crs_worker --workers 8
+
+Use with CRS_SCHEDULER_MODE=external. Several workers (on one or more
+hosts sharing the database) may run at once; per-repository exclusion is
+enforced by the database.
+"""
+
+import signal
+
+from django.core.management.base import BaseCommand
+
+from agent.services.crs_scheduler import CRSJobScheduler
+
+
+class Command(BaseCommand):
+    help = "Run the CRS job scheduler (process pool worker)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, help='Pool size (default: CRS_SCHEDULER_WORKERS or CPU count)')
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='Seconds between queue polls')
+
+    def handle(self, *args, **options):
+        scheduler = CRSJobScheduler(max_workers=options['workers'], poll_interval=options['poll_interval'])
+
+        def _stop(signum, frame):
+            self.stdout.write("Stopping CRS scheduler (waiting for running jobs)...")
+            scheduler.stop(wait=False)
+
+        signal.signal(signal.SIGINT, _stop)
+        signal.signal(signal.SIGTERM, _stop)
+
+        self.stdout.write(f"CRS scheduler {scheduler.worker_id}: {scheduler.max_workers} workers")
+        scheduler.run_forever()
@@ -0,0 +1,73 @@
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agent', '0022_alter_task_task_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='repository',
+            name='crs_status',
+            field=models.CharField(blank=True, default='pending', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='repository',
+            name='last_crs_run',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='repository',
+            name='artifacts_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='repository',
+            name='relationships_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='CRSJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_id', models.UUIDField(db_index=True, default=uuid.uuid4, editable=False, unique=True)),
+                ('kind', models.CharField(choices=[('pipeline', 'Full pipeline'), ('step', 'Single step')], default='pipeline', max_length=20)),
+                ('step_name', models.CharField(blank=True, max_length=100)),
+                ('force', models.BooleanField(default=False)),
+                ('priority', models.IntegerField(default=0, help_text='Lower runs first')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed'), ('cancelled', 'Cancelled')], default='queued', max_length=20)),
+                ('coalesced_count', models.IntegerField(default=0, help_text='Duplicate requests merged into this job')),
+                ('attempts', models.IntegerField(default=0)),
+                ('worker_id', models.CharField(blank=True, max_length=200)),
+                ('result', models.JSONField(blank=True, null=True)),
+                ('error_message', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('heartbeat_at', models.DateTimeField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('repository', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='crs_jobs', to='agent.repository')),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='agent.user')),
+            ],
+            options={
+                'db_table': 'crs_jobs',
+                'ordering': ['-created_at'],
+                'indexes': [
+                    models.Index(fields=['status', 'priority', 'created_at'], name='crs_jobs_queue_idx'),
+                    models.Index(fields=['repository', '-created_at'], name='crs_jobs_repo_idx'),
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='crsjob',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'running')), fields=('repository',), name='crs_job_one_running_per_repo'),
+        ),
+        migrations.AddConstraint(
+            model_name='crsjob',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'queued')), fields=('repository', 'kind', 'step_name'), name='crs_job_one_queued_per_target'),
+        ),
+    ]
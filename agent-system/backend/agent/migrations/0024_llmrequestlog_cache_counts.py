@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agent', '0023_repository_crs_fields_crsjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='llmrequestlog',
+            name='cache_hits',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='llmrequestlog',
+            name='cache_misses',
+            field=models.IntegerField(default=0),
+        ),
+    ]
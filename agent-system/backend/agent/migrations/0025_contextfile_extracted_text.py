@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agent', '0024_llmrequestlog_cache_counts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contextfile',
+            name='content_hash',
+            field=models.CharField(blank=True, help_text='sha256 of the uploaded bytes', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='contextfile',
+            name='text_chunks',
+            field=models.JSONField(blank=True, default=list, help_text='Normalized text, split into chunks'),
+        ),
+        migrations.AddField(
+            model_name='contextfile',
+            name='extracted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
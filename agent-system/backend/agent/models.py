@@ -155,6 +155,10 @@ class LLMRequestLog(models.Model):
     latency_ms = models.IntegerField(help_text='Response time in milliseconds',null=True)
     error_message = models.TextField(null=True, blank=True)
 
+    # LLM response cache (llm.cache): calls answered from / missing the cache
+    cache_hits = models.IntegerField(default=0)
+    cache_misses = models.IntegerField(default=0)
+
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -247,6 +251,12 @@ class Repository(models.Model):
         ]
     )
     error_message = models.TextField(blank=True)
+
+    # CRS results (written by agent.services.crs_runner)
+    crs_status = models.CharField(max_length=50, default='pending', blank=True)
+    last_crs_run = models.DateTimeField(null=True, blank=True)
+    artifacts_count = models.IntegerField(default=0)
+    relationships_count = models.IntegerField(default=0)
     
     # Analysis results
     analysis = models.JSONField(default=dict, blank=True)
@@ -1084,6 +1094,11 @@ class ContextFile(models.Model):
     name = models.CharField(max_length=255)
     description = models.TextField(blank=True)
     analysis = models.TextField(blank=True, help_text="AI Analysis/Summary of the file")
+
+    # Extracted once at upload (agent.services.context_files)
+    content_hash = models.CharField(max_length=64, blank=True, help_text="sha256 of the uploaded bytes")
+    text_chunks = models.JSONField(default=list, blank=True, help_text="Normalized text, split into chunks")
+    extracted_at = models.DateTimeField(null=True, blank=True)
     
     created_at = models.DateTimeField(auto_now_add=True)
     
@@ -1095,3 +1110,77 @@ class ContextFile(models.Model):
         if self.agent_profile:
             return f"Agent {self.agent_profile.name}: {self.name}"
         return f"Conv {self.conversation_id}: {self.name}"
+
+
+class CRSJob(models.Model):
+    """
+    Queued CRS work for one repository (full pipeline or a single step).
+
+    Executed by agent.services.crs_scheduler: jobs run in a process pool,
+    at most one job per repository at a time (enforced by a partial unique
+    constraint), lowest `priority` first. Enqueueing work that is already
+    queued for the same repository/kind/step coalesces into the queued job.
+    """
+
+    PRIORITY_INTERACTIVE = 0
+    PRIORITY_BULK = 100
+
+    KIND_CHOICES = [
+        ('pipeline', 'Full pipeline'),
+        ('step', 'Single step'),
+    ]
+
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+        ('cancelled', 'Cancelled'),
+    ]
+
+    job_id = models.UUIDField(default=uuid.uuid4, unique=True, db_index=True, editable=False)
+    repository = models.ForeignKey(Repository, on_delete=models.CASCADE, related_name='crs_jobs')
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, default='pipeline')
+    step_name = models.CharField(max_length=100, blank=True)
+    force = models.BooleanField(default=False)
+    priority = models.IntegerField(default=PRIORITY_INTERACTIVE, help_text='Lower runs first')
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    coalesced_count = models.IntegerField(default=0, help_text='Duplicate requests merged into this job')
+    attempts = models.IntegerField(default=0)
+    worker_id = models.CharField(max_length=200, blank=True)
+
+    result = models.JSONField(null=True, blank=True)
+    error_message = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'crs_jobs'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'priority', 'created_at'], name='crs_jobs_queue_idx'),
+            models.Index(fields=['repository', '-created_at'], name='crs_jobs_repo_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['repository'],
+                condition=models.Q(status='running'),
+                name='crs_job_one_running_per_repo',
+            ),
+            models.UniqueConstraint(
+                fields=['repository', 'kind', 'step_name'],
+                condition=models.Q(status='queued'),
+                name='crs_job_one_queued_per_target',
+            ),
+        ]
+
+    def __str__(self):
+        target = self.step_name if self.kind == 'step' else self.kind
+        return f"CRSJob {self.job_id} | {self.repository_id}:{target} | {self.status}"
@@ -6,7 +6,9 @@ Context retrieval and search functions
 
 import json
 from typing import List, Dict, Any, Tuple
-from agent.services.crs_runner import load_crs_payload
+from agent.services.crs_embeddings import hybrid_search
+from agent.services.crs_runner import load_crs_index, load_crs_payload, load_crs_semantic_index
+from agent.services.crs_search import blueprint_items, blueprint_path
 import logging
 
 logger = logging.getLogger(__name__)
@@ -51,73 +53,52 @@ class CRSRetriever:
     def search_blueprints(self, query: str, limit: int = 5) -> List[Dict]:
         """
         Search for blueprints relevant to the query
-        Uses simple keyword matching (can be enhanced with embeddings later)
+        BM25 over path, purpose, segment names and components (see crs_search),
+        merged with embedding similarity when semantic search is on
         """
         if not self.repository:
             return []
 
         self._load_crs_data()
-        keywords = self._extract_keywords(query)
-
-        files = self._blueprints.get("files", [])
-
-        # Score each blueprint
-        scored = []
-        for blueprint in files:
-            score = self._score_blueprint(blueprint, keywords)
-            if score > 0:
-                scored.append((score, blueprint))
+        if not blueprint_items(self._blueprints):
+            return []
 
-        # Sort by score and return top N
-        scored.sort(reverse=True, key=lambda x: x[0])
-        return [bp for score, bp in scored[:limit]]
+        index = load_crs_index(self.repository, "blueprints", "bm25")
+        return [index.items[doc] for doc, score in self._rank(index, "blueprints", query, limit)]
 
     def search_artifacts(self, query: str, limit: int = 10) -> List[Dict]:
         """
         Search for artifacts relevant to the query
+        BM25 over name, type, file path and meta strings (see crs_search),
+        merged with embedding similarity when semantic search is on
         """
         if not self.repository:
             logger.warning("No repository set for artifact search")
             return []
 
         self._load_crs_data()
-        keywords = self._extract_keywords(query)
+        if not self._artifacts.get("artifacts"):
+            return []
 
-        artifacts = self._artifacts.get("artifacts", [])
-        query_lower = query.lower()
-        if "admin" not in query_lower:
-            artifacts = [
-                a for a in artifacts
-                if "admin.py" not in (a.get("file_path") or a.get("file") or "").lower()
-            ]
-        logger.info(f"Searching {len(artifacts)} artifacts for keywords: {keywords}")
+        keywords = self._extract_keywords(query)
+        skip_admin = "admin" not in query.lower()
+        logger.info(f"Searching artifacts for keywords: {keywords}")
 
         # Special handling for "models" query - look for Django Model classes
         if "models" in keywords or "model" in keywords:
-            model_artifacts = []
-            for artifact in artifacts:
-                artifact_type = artifact.get("type", "").lower()
-                name = artifact.get("name", "").lower()
-                file_path = (artifact.get("file_path") or artifact.get("file") or "").lower()
-
-                # Look for Model classes or models.py files
-                if (artifact_type == "class" and "model" in name) or "models.py" in file_path:
-                    model_artifacts.append(artifact)
-
+            model_artifacts = load_crs_index(self.repository, "artifacts", "models")
+            if skip_admin:
+                model_artifacts = [
+                    a for a in model_artifacts
+                    if "admin.py" not in (a.get("file_path") or a.get("file") or "").lower()
+                ]
             if model_artifacts:
                 logger.info(f"Found {len(model_artifacts)} Django model artifacts")
                 return model_artifacts[:limit]
 
-        # Score each artifact
-        scored = []
-        for artifact in artifacts:
-            score = self._score_artifact(artifact, keywords)
-            if score > 0:
-                scored.append((score, artifact))
-
-        # Sort by score and return top N
-        scored.sort(reverse=True, key=lambda x: x[0])
-        results = [artifact for score, artifact in scored[:limit]]
+        index = load_crs_index(self.repository, "artifacts", "bm25")
+        ranked = self._rank(index, "artifacts", query, limit, exclude=index.admin if skip_admin else None)
+        results = [index.items[doc] for doc, score in ranked]
 
         logger.info(f"RAG search returned {len(results)} artifacts")
         return results
@@ -134,12 +115,14 @@ class CRSRetriever:
 
         if artifacts:
             # Filter to relationships involving these artifacts
-            artifact_names = [a.get("name") for a in artifacts]
+            artifact_names = {a.get("name") for a in artifacts}
             filtered = []
             for rel in relationships:
                 if rel.get("source") in artifact_names or rel.get("target") in artifact_names:
                     filtered.append(rel)
-            return filtered[:limit]
+                    if len(filtered) >= limit:
+                        break
+            return filtered
 
         return relationships[:limit]
 
@@ -182,7 +165,8 @@ class CRSRetriever:
             prompt_parts.append("## Files (Blueprints)\n\n")
             for bp in context['blueprints']:
                 prompt_parts.append(f"**File**: `{bp['path']}`\n")
-                prompt_parts.append(f"**Purpose**: {bp['purpose']}\n")
+                if bp.get('purpose'):
+                    prompt_parts.append(f"**Purpose**: {bp['purpose']}\n")
                 if bp.get('key_components'):
                     components_str = ', '.join(str(c) for c in bp['key_components'])
                     prompt_parts.append(f"**Components**: {components_str}\n")
@@ -218,6 +202,17 @@ class CRSRetriever:
 
     # Helper methods
 
+    def _rank(self, index, payload_type: str, query: str, limit: int, exclude=None):
+        """Keyword ranking, fused with the embedding index when available"""
+        try:
+            semantic = load_crs_semantic_index(self.repository, payload_type)
+        except Exception as e:
+            logger.warning(f"Semantic {payload_type} index unavailable: {e}")
+            semantic = None
+        if semantic is None:
+            return index.search(query, k=limit, exclude=exclude)
+        return hybrid_search(index, semantic, query, k=limit, exclude=exclude)
+
     def _extract_keywords(self, query: str) -> List[str]:
         """Extract searchable keywords from query"""
         # Simple tokenization (can be enhanced with NLP)
@@ -229,68 +224,16 @@ class CRSRetriever:
         keywords = [w.strip('?.,!') for w in words if w not in stop_words]
         return keywords
 
-    def _score_blueprint(self, blueprint: Dict, keywords: List[str]) -> float:
-        """Score a blueprint based on keyword matches"""
-        score = 0.0
-
-        # Search in path (high weight)
-        path = blueprint.get("path", "").lower()
-        for keyword in keywords:
-            if keyword in path:
-                score += 2.0
-
-        # Search in purpose
-        purpose = blueprint.get("purpose", "").lower()
-        for keyword in keywords:
-            if keyword in purpose:
-                score += 1.5
-
-        # Search in key components
-        components = blueprint.get("key_components", [])
-        for comp in components:
-            comp_lower = str(comp).lower()
-            for keyword in keywords:
-                if keyword in comp_lower:
-                    score += 1.0
-
-        return score
-
-    def _score_artifact(self, artifact: Dict, keywords: List[str]) -> float:
-        """Score an artifact based on keyword matches"""
-        score = 0.0
-
-        # Search in name (high weight)
-        name = artifact.get("name", "").lower()
-        for keyword in keywords:
-            if keyword in name:
-                score += 2.0
-
-        # Search in type
-        artifact_type = artifact.get("type", "").lower()
-        for keyword in keywords:
-            if keyword in artifact_type:
-                score += 1.5
-
-        # Search in file path
-        file_path = artifact.get("file", "").lower()
-        for keyword in keywords:
-            if keyword in file_path:
-                score += 1.0
-
-        # Search in source code if available
-        source = artifact.get("source", "").lower()
-        for keyword in keywords:
-            if keyword in source:
-                score += 0.5
-
-        return score
-
     def _format_blueprint(self, blueprint: Dict) -> Dict[str, Any]:
         """Format blueprint for context"""
         return {
-            'path': blueprint.get('path', ''),
+            'path': blueprint_path(blueprint),
             'purpose': blueprint.get('purpose', ''),
-            'key_components': blueprint.get('key_components', []),
+            # builder blueprints list top-level classes/functions as segments
+            'key_components': blueprint.get('key_components') or [
+                s['name'] for s in blueprint.get('segments') or []
+                if isinstance(s, dict) and s.get('kind') in ('class_def', 'func_def') and s.get('name')
+            ],
             'dependencies': blueprint.get('dependencies', []),
             'used_by': blueprint.get('used_by', [])
         }
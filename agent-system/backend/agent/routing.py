@@ -1,8 +1,9 @@
 """
-WebSocket routing for Agent System
+WebSocket (and streaming HTTP) routing for Agent System
 """
 
 from django.urls import re_path
+from channels.auth import AuthMiddlewareStack
 from agent import consumers
 
 websocket_urlpatterns = [
@@ -36,3 +37,12 @@ websocket_urlpatterns = [
         consumers.AgentRunnerConsumer.as_asgi()
     ),
 ]
+
+# Async HTTP endpoints served by Channels before falling through to Django
+http_urlpatterns = [
+    # CRS pipeline events (SSE): /api/systems/{system_id}/repositories/{repo_id}/crs/events/
+    re_path(
+        r'^api/systems/(?P<system_pk>\d+)/repositories/(?P<pk>\d+)/crs/events/?$',
+        AuthMiddlewareStack(consumers.CRSEventStreamConsumer.as_asgi())
+    ),
+]
@@ -10,7 +10,8 @@ from agent.models import (
     SystemKnowledge, Task, AgentMemory,
     SystemDocumentation,
     ChatConversation, ChatMessage, LLMProvider, LLMModel,
-    AgentSession, BenchmarkRun, ToolDefinition, AgentProfile, ContextFile
+    AgentSession, BenchmarkRun, ToolDefinition, AgentProfile, ContextFile,
+    CRSJob
 )
 
 User = get_user_model()
@@ -512,3 +513,17 @@ class AgentProfileSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
 
+
+class CRSJobSerializer(serializers.ModelSerializer):
+    """Queued/running CRS work for a repository"""
+    repository_name = serializers.CharField(source='repository.name', read_only=True)
+
+    class Meta:
+        model = CRSJob
+        fields = [
+            'job_id', 'repository', 'repository_name', 'kind', 'step_name', 'force',
+            'priority', 'status', 'coalesced_count', 'attempts', 'worker_id',
+            'result', 'error_message',
+            'created_at', 'started_at', 'heartbeat_at', 'completed_at',
+        ]
+        read_only_fields = fields
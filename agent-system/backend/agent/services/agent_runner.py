@@ -58,9 +58,10 @@ class AgentRunner:
 
     @property
     def patch_engine(self):
+        # core.patch_engine is function based (apply_patch(fs, state, payload))
         if self._patch_engine is None:
-            from core.patch_engine import PatchEngine
-            self._patch_engine = PatchEngine(self.fs)
+            from core import patch_engine
+            self._patch_engine = patch_engine
         return self._patch_engine
 
     @property
@@ -290,6 +291,15 @@ class AgentRunner:
                             
                             step_record['data'] = res
                                 
+                        elif name == 'EVALUATE_PATCH':
+                            # Score candidate patch(es) on an in-memory overlay (no disk writes)
+                            candidates = params.get('candidates') if isinstance(params.get('candidates'), list) else [params]
+                            res = self._evaluate_patches(candidates, suite_id=params.get('suite_id'))
+                            result_str = json.dumps(res)
+                            observer.log("PATCH_EVALUATION", res)
+
+                            step_record['data'] = res
+
                         elif name == 'VERIFY':
                             # Core Action: Verify
                             res = self._run_verification()
@@ -411,6 +421,68 @@ class AgentRunner:
             logger.error(f"Patch failed: {e}")
             return {'status': 'error', 'error': str(e)}
 
+    def _default_suite_id(self) -> Optional[str]:
+        try:
+            suites = self.verification_engine.load_spec().get('suites', [])
+        except Exception:
+            return None
+        return suites[0].get('id') if suites else None
+
+    def _evaluate_patches(self, candidates: List[Dict[str, Any]], suite_id: Optional[str] = None,
+                          max_workers: int = 4) -> Dict[str, Any]:
+        """
+        Evaluate candidate patches speculatively (overlay fs, nothing touches disk).
+        Candidates run in parallel; the best one can then be applied via PATCH.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        from crs_main import evaluate_patch
+
+        if not self.fs:
+            return {'status': 'error', 'error': 'No CRS workspace for this repository.'}
+
+        suite_id = suite_id or self._default_suite_id()
+
+        def _one(index_payload):
+            index, payload = index_payload
+            if not isinstance(payload, dict) or 'changes' not in payload:
+                return {'index': index, 'status': 'error', 'error': "Invalid patch: missing 'changes' list."}
+            try:
+                res = evaluate_patch(self.fs, payload, suite_id=suite_id)
+            except Exception as e:
+                return {'index': index, 'status': 'error', 'error': str(e)}
+
+            impact_summary = (res.get('impact') or {}).get('summary') or {}
+            verification = res.get('verification') or {}
+            v_summary = verification.get('summary') or {}
+            patch_summary = res.get('patch_summary') or {}
+            return {
+                'index': index,
+                'status': 'evaluated',
+                'ok': res.get('ok'),
+                'patch_errors': patch_summary.get('errors', 0),
+                'verification': v_summary,
+                'impact': impact_summary,
+                # lower is better: failed checks dominate, then patch errors, then blast radius
+                'score': (
+                    int(v_summary.get('failed', 0)) * 1000
+                    + int(patch_summary.get('errors', 0)) * 100
+                    + int(impact_summary.get('affected_artifacts', 0))
+                ),
+            }
+
+        workers = max(1, min(max_workers, len(candidates)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_one, enumerate(candidates)))
+
+        scored = [r for r in results if r.get('status') == 'evaluated']
+        best = min(scored, key=lambda r: r['score']) if scored else None
+        return {
+            'status': 'evaluated' if scored else 'error',
+            'suite_id': suite_id,
+            'candidates': results,
+            'best_index': best['index'] if best else None,
+        }
+
     def _run_verification(self) -> Dict[str, Any]:
         """Run verification using VerificationEngine"""
         try:
@@ -0,0 +1,206 @@
+"""
+Pre-extracted context file text for chat prompts.
+
+Uploaded ContextFiles are extracted once (at upload, or lazily for rows that
+predate this) into normalized text chunks stored on the row together with a
+sha256 of the raw bytes:
+
+  - text files: decoded (utf-8, latin-1 fallback), newlines normalized,
+    capped at CONTEXT_FILE_MAX_CHARS and split at line boundaries
+  - PDFs: page text via the optional `pypdf` package
+  - other binary files: a one-line placeholder instead of mojibake
+
+Chat turns then only assemble prepared chunks. The assembled prompt parts
+are cached in memory per conversation; ContextFileViewSet invalidates the
+entry on upload/delete, and every lookup also checks a cheap (id, hash)
+signature so other workers' uploads are picked up.
+"""
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from django.utils import timezone
+
+from agent.models import ContextFile
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pypdf
+    PYPDF_AVAILABLE = True
+except ImportError:
+    PYPDF_AVAILABLE = False
+
+CONTEXT_FILE_MAX_CHARS = 20000
+CHUNK_CHARS = 4000
+
+# bytes inspected to decide text vs binary
+_SNIFF_BYTES = 8192
+_READ_BLOCK = 1 << 16
+
+_CACHE_MAX_CONVERSATIONS = 256
+
+
+# ----------------------------------------------------------------------
+# Extraction
+# ----------------------------------------------------------------------
+def _looks_binary(head: bytes) -> bool:
+    if b'\x00' in head:
+        return True
+    if not head:
+        return False
+    control = sum(1 for b in head if b < 32 and b not in (9, 10, 12, 13))
+    return control / len(head) > 0.1
+
+
+def _decode(data: bytes, truncated: bool = False) -> str:
+    try:
+        return data.decode('utf-8-sig')
+    except UnicodeDecodeError as e:
+        # a character cut at the read limit is not an encoding problem
+        if truncated and e.start >= len(data) - 3:
+            return data[:e.start].decode('utf-8-sig', errors='replace')
+    return data.decode('latin-1')
+
+
+def _normalize(text: str) -> str:
+    text = text.replace('\r\n', '\n').replace('\r', '\n').replace('\x00', '')
+    return '\n'.join(line.rstrip() for line in text.split('\n')).strip('\n')
+
+
+def chunk_text(text: str, size: int = CHUNK_CHARS) -> List[str]:
+    """Split at line boundaries into chunks of about `size` characters"""
+    chunks, current, length = [], [], 0
+    for line in text.split('\n'):
+        while len(line) > size:  # one very long line
+            if current:
+                chunks.append('\n'.join(current))
+                current, length = [], 0
+            chunks.append(line[:size])
+            line = line[size:]
+        if length + len(line) + 1 > size and current:
+            chunks.append('\n'.join(current))
+            current, length = [], 0
+        current.append(line)
+        length += len(line) + 1
+    if current:
+        chunks.append('\n'.join(current))
+    return chunks
+
+
+def _pdf_text(path: str) -> Optional[str]:
+    if not PYPDF_AVAILABLE:
+        return None
+    try:
+        reader = pypdf.PdfReader(path)
+        pages = []
+        total = 0
+        for page in reader.pages:
+            text = page.extract_text() or ''
+            pages.append(text)
+            total += len(text)
+            if total >= CONTEXT_FILE_MAX_CHARS:
+                break
+        return '\n\n'.join(pages)
+    except Exception as e:
+        logger.warning(f"PDF extraction failed for {path}: {e}")
+        return None
+
+
+def extract_text(path: str, name: str = '') -> Tuple[str, str]:
+    """(sha256 of the file, normalized text capped at CONTEXT_FILE_MAX_CHARS)"""
+    digest = hashlib.sha256()
+    kept = bytearray()
+    size = 0
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(_READ_BLOCK)
+            if not block:
+                break
+            digest.update(block)
+            size += len(block)
+            # utf-8 needs at most 4 bytes per character
+            if len(kept) < CONTEXT_FILE_MAX_CHARS * 4:
+                kept.extend(block)
+
+    head = bytes(kept[:_SNIFF_BYTES])
+    if head.startswith(b'%PDF'):
+        text = _pdf_text(path)
+        if text is None:
+            text = f"[PDF file {name or path}: {size} bytes; text extraction unavailable]"
+    elif _looks_binary(head):
+        text = f"[Binary file {name or path}: {size} bytes; not included]"
+    else:
+        text = _decode(bytes(kept), truncated=size > len(kept))
+    return digest.hexdigest(), _normalize(text)[:CONTEXT_FILE_MAX_CHARS]
+
+
+def extract_context_file(context_file: ContextFile, save: bool = True) -> ContextFile:
+    """Fill content_hash/text_chunks from the stored file (no-op if unchanged)"""
+    try:
+        content_hash, text = extract_text(context_file.file.path, context_file.name)
+    except Exception as e:
+        logger.error(f"Failed to extract context file {context_file.id}: {e}")
+        content_hash, text = '', f"[File {context_file.name} could not be read]"
+
+    if content_hash and content_hash == context_file.content_hash and context_file.extracted_at:
+        return context_file
+    context_file.content_hash = content_hash
+    context_file.text_chunks = chunk_text(text) if text else []
+    context_file.extracted_at = timezone.now()
+    if save and context_file.pk:
+        context_file.save(update_fields=['content_hash', 'text_chunks', 'extracted_at'])
+    return context_file
+
+
+# ----------------------------------------------------------------------
+# Per-conversation cache of prompt parts
+# ----------------------------------------------------------------------
+_cache: "OrderedDict[int, Tuple[tuple, List[str]]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def invalidate_conversation(conversation_id: Optional[int]) -> None:
+    if conversation_id is None:
+        return
+    with _cache_lock:
+        _cache.pop(conversation_id, None)
+
+
+def format_context_file(context_file: ContextFile) -> str:
+    text = '\n'.join(context_file.text_chunks or [])
+    return f"\n## File: {context_file.name}\n```\n{text}\n```\n"
+
+
+def conversation_file_parts(conversation_id: int) -> List[str]:
+    """
+    Prompt parts ('## File: ...' blocks) for a conversation's uploads,
+    extracting any file not prepared yet.
+    """
+    signature = tuple(
+        ContextFile.objects.filter(conversation_id=conversation_id)
+        .order_by('-created_at')
+        .values_list('id', 'content_hash')
+    )
+    with _cache_lock:
+        hit = _cache.get(conversation_id)
+        if hit is not None and hit[0] == signature:
+            _cache.move_to_end(conversation_id)
+            return hit[1]
+
+    files = list(ContextFile.objects.filter(conversation_id=conversation_id).order_by('-created_at'))
+    for context_file in files:
+        if context_file.extracted_at is None:
+            extract_context_file(context_file)
+    parts = [format_context_file(context_file) for context_file in files]
+    signature = tuple((context_file.id, context_file.content_hash) for context_file in files)
+
+    with _cache_lock:
+        _cache[conversation_id] = (signature, parts)
+        _cache.move_to_end(conversation_id)
+        while len(_cache) > _CACHE_MAX_CONVERSATIONS:
+            _cache.popitem(last=False)
+    return parts
@@ -7,7 +7,8 @@ from typing import List, Dict, Any, Optional
 from pathlib import Path
 
 from agent.models import Repository
-from agent.services.crs_runner import load_crs_payload
+from agent.services.crs_runner import load_crs_index, load_crs_payload
+from agent.services.crs_search import blueprint_items, blueprint_path
 
 logger = logging.getLogger(__name__)
 
@@ -48,13 +49,21 @@ class CRSContext:
             logger.warning(f"Failed to load relationships: {e}")
             self._relationships = {}
 
+    def _index(self, payload_type: str, name: str, default):
+        """Shared lookup index over a cached payload (see crs_payload_cache)"""
+        try:
+            return load_crs_index(self.repository, payload_type, name)
+        except Exception as e:
+            logger.warning(f"Failed to load {payload_type} index {name}: {e}")
+            return default
+
     def has_payloads(self) -> bool:
         """Check if any CRS payloads have usable data."""
         if self._blueprints is None or self._artifacts is None or self._relationships is None:
             self.load_all()
 
         return any([
-            bool(self._blueprints and self._blueprints.get("files")),
+            bool(self._blueprints and blueprint_items(self._blueprints)),
             bool(self._artifacts and self._artifacts.get("artifacts")),
             bool(self._relationships and self._relationships.get("relationships")),
         ])
@@ -64,19 +73,11 @@ class CRSContext:
         if not self._blueprints:
             self.load_all()
 
-        files = self._blueprints.get("files", [])
-        return [f.get("path", "") for f in files if f.get("path")]
+        return [path for path in map(blueprint_path, blueprint_items(self._blueprints)) if path]
 
     def get_file_blueprint(self, file_path: str) -> Optional[Dict[str, Any]]:
         """Get blueprint for specific file"""
-        if not self._blueprints:
-            self.load_all()
-
-        files = self._blueprints.get("files", [])
-        for f in files:
-            if f.get("path") == file_path:
-                return f
-        return None
+        return self._index("blueprints", "by_path", {}).get(file_path)
 
     def search_artifacts(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
         """
@@ -88,12 +89,10 @@ class CRSContext:
             self.load_all()
 
         query_lower = query.lower()
-        artifacts = self._artifacts.get("artifacts", [])
-        if "admin" not in query_lower:
-            artifacts = [
-                a for a in artifacts
-                if "admin.py" not in (a.get("file_path") or a.get("file") or "").lower()
-            ]
+        if "admin" in query_lower:
+            artifacts = self._artifacts.get("artifacts", [])
+        else:
+            artifacts = self._index("artifacts", "non_admin", [])
 
         matches = []
         for artifact in artifacts:
@@ -109,14 +108,7 @@ class CRSContext:
 
     def get_artifact_by_name(self, name: str) -> Optional[Dict[str, Any]]:
         """Get specific artifact by exact name"""
-        if not self._artifacts:
-            self.load_all()
-
-        artifacts = self._artifacts.get("artifacts", [])
-        for artifact in artifacts:
-            if artifact.get("name") == name:
-                return artifact
-        return None
+        return self._index("artifacts", "by_name", {}).get(name)
 
     def get_artifact_relationships(self, artifact_name: str) -> Dict[str, List[str]]:
         """
@@ -129,44 +121,27 @@ class CRSContext:
                 "used_by": [...]
             }
         """
-        if not self._relationships:
-            self.load_all()
-
-        relationships = self._relationships.get("relationships", [])
-
         result = {
             "imports": [],
             "calls": [],
             "used_by": []
         }
 
-        for rel in relationships:
+        for rel in self._index("relationships", "by_source", {}).get(artifact_name, []):
             rel_type = rel.get("type", "")
-            source = rel.get("source", "")
-            target = rel.get("target", "")
-
-            # Check if this artifact is involved
-            if source == artifact_name:
-                if rel_type == "imports":
-                    result["imports"].append(target)
-                elif rel_type == "calls":
-                    result["calls"].append(target)
+            if rel_type == "imports":
+                result["imports"].append(rel.get("target", ""))
+            elif rel_type == "calls":
+                result["calls"].append(rel.get("target", ""))
 
-            if target == artifact_name:
-                result["used_by"].append(source)
+        for rel in self._index("relationships", "by_target", {}).get(artifact_name, []):
+            result["used_by"].append(rel.get("source", ""))
 
         return result
 
     def get_artifact_type_counts(self) -> Dict[str, int]:
         """Get counts of artifacts by type."""
-        if not self._artifacts:
-            self.load_all()
-
-        artifacts = self._artifacts.get("artifacts", []) if self._artifacts else []
-        artifacts = [
-            a for a in artifacts
-            if "admin.py" not in (a.get("file_path") or a.get("file") or "").lower()
-        ]
+        artifacts = self._index("artifacts", "non_admin", [])
         artifact_types: Dict[str, int] = {}
         for artifact in artifacts:
             art_type = artifact.get("type", "unknown")
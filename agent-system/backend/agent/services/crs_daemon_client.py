@@ -0,0 +1,167 @@
+"""
+Thin client for the CRS query daemon (crs_daemon.py / `crs daemon`).
+
+With CRS_DAEMON_URL set (unix:///path/crs.sock or http://host:port), queries
+go to the daemon over a per-thread persistent connection. Without it, or
+while the daemon is unreachable, they run against an in-process
+WorkspaceRegistry, so callers see the same response shape either way.
+"""
+
+import http.client
+import json
+import logging
+import socket
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+from django.conf import settings
+
+from agent.models import Repository
+from agent.services.crs_runner import _build_crs_workspace
+
+from crs_daemon import WorkspaceRegistry, encode
+
+logger = logging.getLogger(__name__)
+
+
+class CRSDaemonUnavailable(Exception):
+    pass
+
+
+class CRSDaemonClient:
+    """One connection per thread, reused across requests (reconnects once on failure)."""
+
+    def __init__(self, url: str, timeout: float = 10.0):
+        self.url = url
+        self.timeout = timeout
+        u = urlparse(url)
+        self._scheme = u.scheme or 'unix'
+        if self._scheme == 'http':
+            self._host, self._port = u.hostname or '127.0.0.1', u.port or 8765
+        elif self._scheme == 'unix':
+            self._path = u.path if u.scheme else url
+        else:
+            raise ValueError(f"Unsupported CRS daemon URL: {url}")
+        self._local = threading.local()
+        self._next_id = 0
+
+    # -------------------------
+    # transport
+    # -------------------------
+    def _connect(self):
+        if self._scheme == 'http':
+            return http.client.HTTPConnection(self._host, self._port, timeout=self.timeout)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self._path)
+        return sock, sock.makefile('rb')
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        self._local.conn = None
+        if conn is None:
+            return
+        try:
+            if self._scheme == 'http':
+                conn.close()
+            else:
+                conn[1].close()
+                conn[0].close()
+        except OSError:
+            pass
+
+    def _roundtrip(self, body: bytes) -> bytes:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        if self._scheme == 'http':
+            conn.request('POST', '/query', body=body, headers={'Content-Type': 'application/json'})
+            resp = conn.getresponse()
+            data = resp.read()
+            if resp.status != 200:
+                raise CRSDaemonUnavailable(f"HTTP {resp.status}: {data[:200]!r}")
+            return data
+        sock, rfile = conn
+        sock.sendall(body + b'\n')
+        line = rfile.readline()
+        if not line:
+            raise ConnectionResetError("CRS daemon closed the connection")
+        return line
+
+    def request(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        self._next_id += 1
+        payload = {**payload, 'id': self._next_id}
+        body = encode(payload)
+        for attempt in (1, 2):
+            try:
+                return json.loads(self._roundtrip(body))
+            except (OSError, http.client.HTTPException) as e:
+                self.close()
+                if attempt == 2:
+                    raise CRSDaemonUnavailable(f"{type(e).__name__}: {e}") from e
+
+    # -------------------------
+    # API
+    # -------------------------
+    def ping(self) -> bool:
+        return bool(self.request({'op': 'ping'}).get('ok'))
+
+    def run_op(self, config_path: str, op: str, args: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return self.request({'ws': config_path, 'op': op, 'args': args or {}})
+
+    def run_ops(self, config_path: str, ops: List[Dict[str, Any]], stop_on_error: bool = False) -> Dict[str, Any]:
+        return self.request({'ws': config_path, 'ops': ops, 'stop_on_error': stop_on_error})
+
+
+# -------------------------
+# module-level helpers
+# -------------------------
+_client: Optional[CRSDaemonClient] = None
+_client_lock = threading.Lock()
+_daemon_down_until = 0.0
+_local_registry: Optional[WorkspaceRegistry] = None
+
+
+def get_daemon_client() -> Optional[CRSDaemonClient]:
+    global _client
+    url = getattr(settings, 'CRS_DAEMON_URL', '')
+    if not url:
+        return None
+    with _client_lock:
+        if _client is None or _client.url != url:
+            _client = CRSDaemonClient(url, timeout=getattr(settings, 'CRS_DAEMON_TIMEOUT', 10.0))
+        return _client
+
+
+def _local() -> WorkspaceRegistry:
+    global _local_registry
+    with _client_lock:
+        if _local_registry is None:
+            _local_registry = WorkspaceRegistry(max_workspaces=4)
+        return _local_registry
+
+
+def _call(method: str, config_path: str, *args, **kwargs) -> Dict[str, Any]:
+    global _daemon_down_until
+    client = get_daemon_client()
+    if client is not None and time.monotonic() >= _daemon_down_until:
+        try:
+            return getattr(client, method)(config_path, *args, **kwargs)
+        except CRSDaemonUnavailable as e:
+            _daemon_down_until = time.monotonic() + 30
+            logger.warning(f"CRS daemon unavailable ({e}); querying in-process for 30s")
+    return getattr(_local(), method)(config_path, *args, **kwargs)
+
+
+def run_crs_op(repository: Repository, op: str, args: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """CRSQueryRunner.run_op for the repository's workspace: {"ok", "op", "result"|"error", "gen"}."""
+    paths = _build_crs_workspace(repository)
+    return _call('run_op', str(paths.config_path), op, args or {})
+
+
+def run_crs_ops(repository: Repository, ops: List[Dict[str, Any]], stop_on_error: bool = False) -> Dict[str, Any]:
+    """Batch of ops in one round trip: {"ok", "summary", "results", "gen"}."""
+    paths = _build_crs_workspace(repository)
+    return _call('run_ops', str(paths.config_path), ops, stop_on_error=stop_on_error)
@@ -0,0 +1,563 @@
+"""
+CPU-only semantic retrieval over CRS artifacts and blueprints.
+
+Complements the BM25 keyword index (crs_search). Every artifact / blueprint
+is embedded once per content hash; the vectors live in a float32 NumPy
+matrix persisted under the CRS workspace (<workspace>/embeddings) and
+memory-mapped on load. Queries are ranked by dot product (vectors are
+L2-normalized): brute force for small repositories, an IVF partition
+(spherical k-means lists, the CRS_IVF_NPROBE closest scanned) from
+CRS_IVF_MIN_ROWS rows on. hybrid_search() merges cosine similarity with
+normalized BM25 scores, so natural-language questions find code whose
+identifiers do not literally match, without any LLM call.
+
+Embedders (CRS_EMBEDDER):
+  hashed    default; deterministic signed feature hashing of identifier
+            tokens, token bigrams and character trigrams - no model files
+  onnx      local ONNX sentence-embedding model; CRS_EMBEDDING_MODEL is a
+            directory holding model.onnx and tokenizer.json (optional
+            `onnxruntime`, mean pooling over token embeddings)
+  sentence  local sentence-transformers model (optional package);
+            CRS_EMBEDDING_MODEL is a model directory or a locally cached
+            name - the hub is kept offline
+
+Vectors are stored per embedder, so switching embedders never mixes vector
+spaces, and unchanged artifacts keep their vectors across CRS runs - only
+new or edited ones are embedded. Requires the optional `numpy` package;
+without it (or with CRS_SEMANTIC_SEARCH off) retrieval stays keyword-only.
+"""
+
+import hashlib
+import heapq
+import logging
+import math
+import os
+import re
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Callable, Container, Dict, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+
+from agent.services.crs_search import BM25Index, artifact_fields, blueprint_fields, blueprint_items, tokenize
+
+logger = logging.getLogger(__name__)
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+try:
+    import onnxruntime
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ONNXRUNTIME_AVAILABLE = False
+
+try:
+    from tokenizers import Tokenizer
+    TOKENIZERS_AVAILABLE = True
+except ImportError:
+    TOKENIZERS_AVAILABLE = False
+
+DEFAULT_DIM = 384
+DEFAULT_SEMANTIC_WEIGHT = 0.4
+DEFAULT_IVF_MIN_ROWS = 50000
+DEFAULT_IVF_NPROBE = 8
+
+# texts embedded per model call
+_BATCH = 64
+_MAX_SEQ_TOKENS = 256
+
+# hashed embedder memo sizes (features, tokens, words), per process
+_FEATURE_CACHE_SIZE = 500000
+
+# k-means training for the IVF partition
+_IVF_TRAIN_SAMPLE = 20000
+_IVF_ITERATIONS = 8
+# rows assigned per matrix product (bounds temporary memory)
+_ASSIGN_CHUNK = 16384
+
+# keyword / semantic candidates considered per query, per side
+_MIN_POOL = 50
+
+
+# ----------------------------------------------------------------------
+# Embedders
+# ----------------------------------------------------------------------
+def _normalize(vectors: "np.ndarray") -> "np.ndarray":
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return (vectors / np.maximum(norms, 1e-12)).astype(np.float32, copy=False)
+
+
+class HashedEmbedder:
+    """Signed feature hashing (crc32) - deterministic across processes and runs"""
+
+    def __init__(self, dim: int = DEFAULT_DIM):
+        self.dim = dim
+        self.name = f"hashed-{dim}"
+        self._columns: Dict[str, Tuple[int, float]] = {}
+        self._tokens: Dict[str, Tuple[List[int], List[float]]] = {}
+        self._words: Dict[str, Tuple[str, ...]] = {}
+
+    def _column(self, feature: str) -> Tuple[int, float]:
+        hit = self._columns.get(feature)
+        if hit is None:
+            h = zlib.crc32(feature.encode("utf-8"))
+            hit = (h % self.dim, 1.0 if h & 0x80000000 else -1.0)
+            if len(self._columns) >= _FEATURE_CACHE_SIZE:
+                self._columns.clear()
+            self._columns[feature] = hit
+        return hit
+
+    def _token(self, token: str) -> Tuple[List[int], List[float]]:
+        """Columns/values of one token: the token itself plus its character trigrams"""
+        hit = self._tokens.get(token)
+        if hit is None:
+            column, sign = self._column("w:" + token)
+            columns, values = [column], [sign]
+            # character trigrams: "serial" still lands near "serializer"
+            if len(token) >= 4:
+                padded = f"#{token}#"
+                for i in range(len(padded) - 2):
+                    column, sign = self._column("c:" + padded[i:i + 3])
+                    columns.append(column)
+                    values.append(0.2 * sign)
+            if len(self._tokens) >= _FEATURE_CACHE_SIZE:
+                self._tokens.clear()
+            hit = self._tokens[token] = (columns, values)
+        return hit
+
+    def embed(self, texts: Sequence[str]) -> "np.ndarray":
+        if len(self._words) >= _FEATURE_CACHE_SIZE:
+            self._words.clear()
+        columns: List[int] = []
+        values: List[float] = []
+        counts: List[int] = []
+        token_features, column_of = self._token, self._column
+        for text in texts:
+            start = len(columns)
+            tokens = tokenize(text, self._words)
+            for token in tokens:
+                token_columns, token_values = token_features(token)
+                columns.extend(token_columns)
+                values.extend(token_values)
+            for a, b in zip(tokens, tokens[1:]):
+                column, sign = column_of("b:" + a + " " + b)
+                columns.append(column)
+                values.append(0.5 * sign)
+            counts.append(len(columns) - start)
+        # one bincount over (row * dim + column) for the whole batch
+        flat = np.asarray(columns, dtype=np.int64)
+        flat += np.repeat(np.arange(len(texts), dtype=np.int64) * self.dim, counts)
+        out = np.bincount(flat, weights=np.asarray(values, dtype=np.float64), minlength=len(texts) * self.dim)
+        return _normalize(out.reshape(len(texts), self.dim))
+
+
+class OnnxEmbedder:
+    """Local ONNX sentence-embedding model (model.onnx + tokenizer.json)"""
+
+    def __init__(self, model_dir: str):
+        if not (ONNXRUNTIME_AVAILABLE and TOKENIZERS_AVAILABLE):
+            raise RuntimeError("onnx embedder requires the onnxruntime and tokenizers packages")
+        directory = Path(model_dir)
+        model_path = directory / "model.onnx"
+        self.tokenizer = Tokenizer.from_file(str(directory / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=_MAX_SEQ_TOKENS)
+        self.tokenizer.enable_padding()
+        self.session = onnxruntime.InferenceSession(str(model_path), providers=["CPUExecutionProvider"])
+        self.inputs = {i.name for i in self.session.get_inputs()}
+        # a replaced model file must not reuse the old vectors
+        self.name = f"onnx-{_slug(directory.name)}-{model_path.stat().st_size}"
+        self.dim = self.embed(["dimension probe"]).shape[1]
+
+    def embed(self, texts: Sequence[str]) -> "np.ndarray":
+        batches = []
+        for start in range(0, len(texts), _BATCH):
+            encodings = self.tokenizer.encode_batch(list(texts[start:start + _BATCH]))
+            ids = np.array([e.ids for e in encodings], dtype=np.int64)
+            mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+            feed = {"input_ids": ids, "attention_mask": mask, "token_type_ids": np.zeros_like(ids)}
+            output = self.session.run(None, {k: v for k, v in feed.items() if k in self.inputs})[0]
+            if output.ndim == 3:
+                # token embeddings -> mean over the real (unpadded) tokens
+                weights = mask[..., None].astype(np.float32)
+                output = (output * weights).sum(axis=1) / np.maximum(weights.sum(axis=1), 1e-9)
+            batches.append(output.astype(np.float32))
+        if not batches:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return _normalize(np.vstack(batches))
+
+
+class SentenceEmbedder:
+    """Local sentence-transformers model on CPU"""
+
+    def __init__(self, model: str):
+        # never download: only local directories / already cached models
+        os.environ.setdefault("HF_HUB_OFFLINE", "1")
+        # imports torch, so only loaded when this embedder is selected
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model, device="cpu")
+        self.name = f"sentence-{_slug(Path(model).name)}"
+        self.dim = self.model.get_sentence_embedding_dimension()
+
+    def embed(self, texts: Sequence[str]) -> "np.ndarray":
+        vectors = self.model.encode(
+            list(texts),
+            batch_size=_BATCH,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
+        return vectors.astype(np.float32, copy=False).reshape(len(texts), self.dim)
+
+
+def _slug(value: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", value) or "model"
+
+
+_embedder = None
+_embedder_loaded = False
+_embedder_lock = threading.Lock()
+
+
+def get_embedder():
+    """Configured embedder, or None when the semantic layer is off / numpy is missing"""
+    global _embedder, _embedder_loaded
+    if _embedder_loaded:
+        return _embedder
+    with _embedder_lock:
+        if _embedder_loaded:
+            return _embedder
+        embedder = None
+        if NUMPY_AVAILABLE and getattr(settings, "CRS_SEMANTIC_SEARCH", True):
+            kind = getattr(settings, "CRS_EMBEDDER", "hashed")
+            model = getattr(settings, "CRS_EMBEDDING_MODEL", "")
+            try:
+                if kind == "onnx":
+                    embedder = OnnxEmbedder(model)
+                elif kind == "sentence":
+                    embedder = SentenceEmbedder(model)
+            except Exception as e:
+                logger.warning(f"Embedder '{kind}' unavailable ({e}); using hashed embeddings")
+            if embedder is None:
+                embedder = HashedEmbedder(int(getattr(settings, "CRS_EMBEDDING_DIM", DEFAULT_DIM)))
+            logger.info(f"CRS semantic search using {embedder.name} ({embedder.dim} dims)")
+        _embedder, _embedder_loaded = embedder, True
+        return _embedder
+
+
+# ----------------------------------------------------------------------
+# Persistent vector store
+# ----------------------------------------------------------------------
+def _save_npy(path: Path, array: "np.ndarray") -> None:
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as handle:
+        np.save(handle, array)
+    os.replace(tmp, path)
+
+
+def _keys_digest(keys: "np.ndarray") -> str:
+    return hashlib.blake2b(keys.tobytes(), digest_size=16).hexdigest()
+
+
+class VectorStore:
+    """
+    Row-per-document vectors of one embedder with their content hashes,
+    as .npy files (the matrix is memory-mapped when loaded).
+
+    The matrix file is named after the digest of its keys and written before
+    the keys file, both atomically: the keys on disk always lead to the
+    matrix written for them, even after a crash between the two writes or
+    with several workers syncing the same store.
+    """
+
+    def __init__(self, directory: Path, prefix: str, embedder):
+        self.embedder = embedder
+        self.directory = directory
+        self.stem = f"{prefix}.{embedder.name}"
+        self.keys_path = directory / f"{self.stem}.keys.npy"
+        self.ivf_path = directory / f"{self.stem}.ivf.npz"
+        self.keys: "np.ndarray" = np.zeros(0, dtype="U32")
+        self.vectors: "np.ndarray" = np.zeros((0, embedder.dim), dtype=np.float32)
+        self._load()
+
+    def vectors_path(self, digest: str) -> Path:
+        return self.directory / f"{self.stem}.{digest}.vectors.npy"
+
+    def _load(self) -> None:
+        if not self.keys_path.exists():
+            return
+        try:
+            keys = np.load(self.keys_path)
+            vectors = np.load(self.vectors_path(_keys_digest(keys)), mmap_mode="r")
+            if vectors.shape != (len(keys), self.embedder.dim):
+                raise ValueError(f"shape {vectors.shape} does not match {len(keys)} keys")
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable vector store {self.keys_path}: {e}")
+            return
+        self.keys, self.vectors = keys, vectors
+
+    def _remove_stale(self, current: Path) -> None:
+        """Matrices no keys file points at any more (a reader that mapped one keeps it)"""
+        for path in self.directory.glob(f"{self.stem}.*vectors.npy"):
+            if path != current:
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+    def sync(self, keys: List[str], texts: List[str]) -> int:
+        """
+        Make row i hold the vector of texts[i] (content hash keys[i]); only
+        hashes not in the store are embedded. Returns the number embedded.
+        """
+        new_keys = np.array(keys, dtype="U32")
+        if np.array_equal(new_keys, self.keys):
+            return 0
+
+        known = {key: row for row, key in enumerate(self.keys.tolist())}
+        matrix = np.empty((len(keys), self.embedder.dim), dtype=np.float32)
+        reuse_rows, reuse_from = [], []
+        missing: Dict[str, List[int]] = {}
+        for row, key in enumerate(keys):
+            old = known.get(key)
+            if old is not None:
+                reuse_rows.append(row)
+                reuse_from.append(old)
+            else:
+                missing.setdefault(key, []).append(row)
+        if reuse_rows:
+            matrix[reuse_rows] = self.vectors[reuse_from]
+
+        if missing:
+            pending = list(missing.items())
+            for start in range(0, len(pending), _BATCH * 16):
+                batch = pending[start:start + _BATCH * 16]
+                vectors = self.embedder.embed([texts[rows[0]] for _, rows in batch])
+                for (_, rows), vector in zip(batch, vectors):
+                    matrix[rows] = vector
+
+        self.keys, self.vectors = new_keys, matrix
+        vectors_path = self.vectors_path(_keys_digest(new_keys))
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            _save_npy(vectors_path, matrix)
+            _save_npy(self.keys_path, new_keys)
+            self.vectors = np.load(vectors_path, mmap_mode="r")
+            self._remove_stale(vectors_path)
+        except OSError as e:
+            logger.warning(f"Could not persist vectors to {vectors_path}: {e}")
+        return len(missing)
+
+
+# ----------------------------------------------------------------------
+# IVF partition
+# ----------------------------------------------------------------------
+def _assign(vectors: "np.ndarray", centroids: "np.ndarray") -> "np.ndarray":
+    labels = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), _ASSIGN_CHUNK):
+        block = np.asarray(vectors[start:start + _ASSIGN_CHUNK])
+        labels[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return labels
+
+
+class IVFPartition:
+    """Rows grouped by nearest centroid; a query scans its nprobe closest lists"""
+
+    def __init__(self, centroids: "np.ndarray", labels: "np.ndarray", trained_rows: int):
+        self.centroids = centroids
+        self.trained_rows = trained_rows
+        self.order = np.argsort(labels, kind="stable").astype(np.int32)
+        self.offsets = np.searchsorted(labels[self.order], np.arange(len(centroids) + 1)).astype(np.int64)
+        self.labels = labels
+
+    @classmethod
+    def train(cls, vectors: "np.ndarray", seed: int = 0) -> "IVFPartition":
+        n = len(vectors)
+        nlist = max(16, int(math.sqrt(n)))
+        rng = np.random.default_rng(seed)
+        sample = np.asarray(vectors[np.sort(rng.choice(n, size=min(n, _IVF_TRAIN_SAMPLE), replace=False))])
+        # CRS_IVF_MIN_ROWS may be set below 16: never ask for more centroids than rows
+        nlist = min(nlist, len(sample))
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+        for _ in range(_IVF_ITERATIONS):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            empty = np.bincount(labels, minlength=nlist) == 0
+            sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()))]
+            centroids = _normalize(sums)
+        return cls(centroids, _assign(vectors, centroids), n)
+
+    def candidates(self, query: "np.ndarray", nprobe: int) -> "np.ndarray":
+        nprobe = min(nprobe, len(self.centroids))
+        closest = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        return np.concatenate([self.order[self.offsets[c]:self.offsets[c + 1]] for c in closest])
+
+    def save(self, path: Path, keys_digest: str) -> None:
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp, "wb") as handle:
+            np.savez(handle, centroids=self.centroids, labels=self.labels,
+                     trained_rows=self.trained_rows, keys_digest=keys_digest)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load_or_build(cls, path: Path, vectors: "np.ndarray", keys_digest: str) -> "IVFPartition":
+        """
+        Reuse the saved partition when built for these rows; keep its
+        centroids and only reassign rows when the repository changed
+        moderately; retrain when it grew past twice the training size.
+        """
+        n = len(vectors)
+        centroids = None
+        try:
+            with np.load(path) as saved:
+                if str(saved["keys_digest"]) == keys_digest:
+                    return cls(saved["centroids"], saved["labels"], int(saved["trained_rows"]))
+                if saved["centroids"].shape[1] == vectors.shape[1] and n <= 2 * int(saved["trained_rows"]):
+                    centroids, trained_rows = saved["centroids"], int(saved["trained_rows"])
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable IVF partition {path}: {e}")
+
+        partition = cls(centroids, _assign(vectors, centroids), trained_rows) if centroids is not None else cls.train(vectors)
+        try:
+            partition.save(path, keys_digest)
+        except OSError as e:
+            logger.warning(f"Could not persist IVF partition to {path}: {e}")
+        return partition
+
+
+# ----------------------------------------------------------------------
+# Index over one payload
+# ----------------------------------------------------------------------
+def _content_hash(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def artifact_text(artifact: Dict[str, Any]) -> str:
+    fields = artifact_fields(artifact)
+    return " ".join(v for v in (fields["type"], fields["name"], fields["path"], fields["meta"]) if v)
+
+
+def blueprint_text(blueprint: Dict[str, Any]) -> str:
+    fields = blueprint_fields(blueprint)
+    return " ".join(v for v in (fields["path"], fields["purpose"], fields["segments"], fields["components"]) if v)
+
+
+class SemanticIndex:
+    """Embedding of every item of a payload; doc id == row == position in items"""
+
+    def __init__(self, items: Sequence[Dict[str, Any]], text: Callable[[Dict[str, Any]], str],
+                 store_dir: Path, prefix: str, embedder):
+        started = time.perf_counter()
+        self.items = items
+        self.embedder = embedder
+        self.nprobe = int(getattr(settings, "CRS_IVF_NPROBE", DEFAULT_IVF_NPROBE))
+        self.ivf: Optional[IVFPartition] = None
+
+        if not items:
+            # a missing/empty state file must not wipe the persisted vectors
+            self.vectors = np.zeros((0, embedder.dim), dtype=np.float32)
+            return
+
+        texts = [text(item) for item in items]
+        keys = [_content_hash(t) for t in texts]
+        store = VectorStore(store_dir, prefix, embedder)
+        embedded = store.sync(keys, texts)
+        self.vectors = store.vectors
+
+        if len(items) >= int(getattr(settings, "CRS_IVF_MIN_ROWS", DEFAULT_IVF_MIN_ROWS)):
+            self.ivf = IVFPartition.load_or_build(store.ivf_path, self.vectors, _keys_digest(store.keys))
+
+        logger.info(
+            "Semantic %s index: %d rows (%d embedded, %s) in %.0fms",
+            prefix, len(items), embedded, "ivf" if self.ivf else "brute force",
+            (time.perf_counter() - started) * 1000,
+        )
+
+    def embed_query(self, query: str) -> "np.ndarray":
+        return self.embedder.embed([query])[0]
+
+    def similarity(self, query_vector: "np.ndarray", docs: Sequence[int]) -> "np.ndarray":
+        if not len(docs):
+            return np.zeros(0, dtype=np.float32)
+        return np.asarray(self.vectors[np.asarray(docs)]) @ query_vector
+
+    def search_vector(self, query_vector: "np.ndarray", k: int,
+                      exclude: Optional[Container[int]] = None) -> List[Tuple[int, float]]:
+        """Top-k (doc id, cosine), best first"""
+        if not len(self.vectors) or k <= 0:
+            return []
+        if self.ivf is not None:
+            rows = self.ivf.candidates(query_vector, self.nprobe)
+            scores = self.similarity(query_vector, rows)
+        else:
+            rows = None
+            scores = np.asarray(self.vectors @ query_vector)
+
+        # over-fetch so excluded docs do not leave the result short
+        fetch = min(len(scores), k + (len(exclude) if exclude else 0))
+        top = np.argpartition(-scores, fetch - 1)[:fetch] if fetch < len(scores) else np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        results = []
+        for i in top.tolist():
+            doc = int(rows[i]) if rows is not None else i
+            if exclude and doc in exclude:
+                continue
+            results.append((doc, float(scores[i])))
+            if len(results) >= k:
+                break
+        return results
+
+    def search(self, query: str, k: int = 10, exclude: Optional[Container[int]] = None) -> List[Tuple[int, float]]:
+        return self.search_vector(self.embed_query(query), k, exclude)
+
+
+def build_semantic_index(payload_type: str, payload: Dict[str, Any], store_dir: Path, embedder) -> SemanticIndex:
+    if payload_type == "artifacts":
+        return SemanticIndex(payload.get("artifacts", []), artifact_text, store_dir, "artifacts", embedder)
+    if payload_type == "blueprints":
+        return SemanticIndex(blueprint_items(payload), blueprint_text, store_dir, "blueprints", embedder)
+    raise ValueError(f"No semantic index for CRS payload type: {payload_type}")
+
+
+# ----------------------------------------------------------------------
+# Keyword + semantic fusion
+# ----------------------------------------------------------------------
+def hybrid_search(keyword: BM25Index, semantic: SemanticIndex, query: str, k: int = 10,
+                  exclude: Optional[Container[int]] = None,
+                  weight: Optional[float] = None) -> List[Tuple[int, float]]:
+    """
+    Top-k (doc id, fused score): (1 - weight) * BM25 / best BM25 + weight *
+    cosine, over the union of both sides' top candidates.
+    """
+    if weight is None:
+        weight = float(getattr(settings, "CRS_SEMANTIC_WEIGHT", DEFAULT_SEMANTIC_WEIGHT))
+    pool = max(k * 5, _MIN_POOL)
+
+    keyword_scores = keyword.scores(query)
+    if exclude:
+        keyword_scores = {d: s for d, s in keyword_scores.items() if d not in exclude}
+    best = max(keyword_scores.values(), default=0.0)
+
+    query_vector = semantic.embed_query(query)
+    candidates = {d for d, _ in heapq.nlargest(pool, keyword_scores.items(), key=lambda item: item[1])}
+    candidates.update(d for d, _ in semantic.search_vector(query_vector, pool, exclude))
+    if not candidates:
+        return []
+
+    docs = sorted(candidates)
+    cosine = semantic.similarity(query_vector, docs)
+    fused = [
+        (doc, (1 - weight) * (keyword_scores.get(doc, 0.0) / best if best else 0.0) + weight * max(float(sim), 0.0))
+        for doc, sim in zip(docs, cosine)
+    ]
+    return heapq.nlargest(k, fused, key=lambda item: (item[1], -item[0]))
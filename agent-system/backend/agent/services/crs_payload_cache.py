@@ -0,0 +1,218 @@
+"""
+Process-wide cache of parsed CRS payloads (blueprints / artifacts / relationships).
+
+CRSRetriever, CRSContext, CRSTools and the CRS API views all go through
+load_crs_payload(); with this cache every web worker parses each payload
+once per state instead of once per chat message / request.
+
+Entries are keyed by (repository id, payload type) and validated on every
+lookup against a fingerprint of the state file - (mtime_ns, size) - plus a
+per-repository version that invalidate_repository() bumps when a pipeline
+run or step completes in this process (runs in other processes are caught
+by the fingerprint). Derived indexes (blueprint by path, artifacts by name,
+relationships by endpoint, BM25 search indexes from crs_search, ...) are
+built lazily and live with the entry.
+
+Memory is bounded by CRS_PAYLOAD_CACHE_MB, charged as the payloads' JSON
+size on disk; least recently used entries are evicted across repositories.
+Cached payloads are shared: callers must treat them as read-only.
+"""
+
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from django.conf import settings
+
+from agent.services.crs_search import build_artifact_index, build_blueprint_index, blueprint_items
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_MB = 512
+
+
+# ----------------------------------------------------------------------
+# Derived indexes: (payload type, name) -> builder(payload)
+# ----------------------------------------------------------------------
+def _is_admin(artifact: Dict[str, Any]) -> bool:
+    return "admin.py" in (artifact.get("file_path") or artifact.get("file") or "").lower()
+
+
+def _is_model(artifact: Dict[str, Any]) -> bool:
+    # Django model classes, or anything declared in a models.py
+    file_path = (artifact.get("file_path") or artifact.get("file") or "").lower()
+    is_model_class = (artifact.get("type") or "").lower() == "class" and "model" in (artifact.get("name") or "").lower()
+    return is_model_class or "models.py" in file_path
+
+
+def _first_by(items, key: str) -> Dict[str, Any]:
+    index: Dict[str, Any] = {}
+    for item in items:
+        value = item.get(key)
+        if value and value not in index:
+            index[value] = item
+    return index
+
+
+def _group_by(items, key: str) -> Dict[str, list]:
+    index = defaultdict(list)
+    for item in items:
+        value = item.get(key)
+        if value:
+            index[value].append(item)
+    return dict(index)
+
+
+INDEX_BUILDERS: Dict[Tuple[str, str], Callable[[Dict[str, Any]], Any]] = {
+    ("blueprints", "by_path"): lambda p: _first_by(blueprint_items(p), "file_path"),
+    ("artifacts", "by_name"): lambda p: _first_by(p.get("artifacts", []), "name"),
+    ("artifacts", "non_admin"): lambda p: [a for a in p.get("artifacts", []) if not _is_admin(a)],
+    ("artifacts", "models"): lambda p: [a for a in p.get("artifacts", []) if _is_model(a)],
+    ("artifacts", "bm25"): build_artifact_index,
+    ("blueprints", "bm25"): build_blueprint_index,
+    ("relationships", "by_source"): lambda p: _group_by(p.get("relationships", []), "source"),
+    ("relationships", "by_target"): lambda p: _group_by(p.get("relationships", []), "target"),
+}
+
+
+@dataclass
+class _Entry:
+    fingerprint: Tuple
+    payload: Dict[str, Any]
+    size: int
+    indexes: Dict[str, Any] = field(default_factory=dict)
+
+
+class CRSPayloadCache:
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[int, str], _Entry]" = OrderedDict()
+        self._versions: Dict[int, int] = defaultdict(int)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._load_locks: Dict[Tuple[int, str], threading.Lock] = defaultdict(threading.Lock)
+        self.hits = 0
+        self.misses = 0
+
+    def _fingerprint(self, repository_id: int, path: Path) -> Optional[Tuple]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (self._versions[repository_id], str(path), st.st_mtime_ns, st.st_size)
+
+    def _lookup(self, key, fingerprint) -> Optional[_Entry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.fingerprint == fingerprint:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+        return None
+
+    def entry(self, repository_id: int, payload_type: str, path: Path) -> Optional[_Entry]:
+        key = (repository_id, payload_type)
+        fingerprint = self._fingerprint(repository_id, path)
+        if fingerprint is None:
+            self._drop(key)
+            return None
+        entry = self._lookup(key, fingerprint)
+        if entry is not None:
+            return entry
+
+        # one parse per key at a time; others wait and reuse it
+        with self._load_locks[key]:
+            fingerprint = self._fingerprint(repository_id, path)
+            if fingerprint is None:
+                return None
+            entry = self._lookup(key, fingerprint)
+            if entry is not None:
+                return entry
+            with open(path, "r", encoding="utf-8") as handle:
+                payload = json.load(handle)
+            entry = _Entry(fingerprint=fingerprint, payload=payload, size=fingerprint[-1])
+            with self._lock:
+                self.misses += 1
+                self._store(key, entry)
+        return entry
+
+    def _store(self, key, entry: _Entry) -> None:
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old.size
+        if entry.size > self.max_bytes:
+            logger.info("CRS payload %s (%d bytes) exceeds the cache cap; not cached", key, entry.size)
+            return
+        self._entries[key] = entry
+        self._bytes += entry.size
+        while self._bytes > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+
+    def _drop(self, key) -> None:
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size
+
+    def payload(self, repository_id: int, payload_type: str, path: Path) -> Dict[str, Any]:
+        entry = self.entry(repository_id, payload_type, path)
+        return entry.payload if entry is not None else {}
+
+    def index(self, repository_id: int, payload_type: str, path: Path, name: str) -> Any:
+        return self.derived(repository_id, payload_type, path, name, INDEX_BUILDERS[(payload_type, name)])
+
+    def derived(self, repository_id: int, payload_type: str, path: Path, name: str,
+                builder: Callable[[Dict[str, Any]], Any]) -> Any:
+        """Like index() with an explicit builder (e.g. one bound to a workspace path)"""
+        entry = self.entry(repository_id, payload_type, path)
+        if entry is None:
+            return builder({})
+        index = entry.indexes.get(name)
+        if index is None:
+            # search indexes take a while on large repositories; build each once
+            with self._load_locks[(repository_id, payload_type)]:
+                index = entry.indexes.get(name)
+                if index is None:
+                    index = entry.indexes[name] = builder(entry.payload)
+        return index
+
+    def invalidate_repository(self, repository_id: int) -> None:
+        with self._lock:
+            self._versions[repository_id] += 1
+            for key in [k for k in self._entries if k[0] == repository_id]:
+                self._bytes -= self._entries.pop(key).size
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+_cache: Optional[CRSPayloadCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_payload_cache() -> CRSPayloadCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                mb = getattr(settings, "CRS_PAYLOAD_CACHE_MB", DEFAULT_CACHE_MB)
+                _cache = CRSPayloadCache(max_bytes=int(mb * 1024 * 1024))
+    return _cache
+
+
+def invalidate_repository(repository_id: int) -> None:
+    """Drop a repository's cached payloads (call when a CRS run/step has written new state)."""
+    get_payload_cache().invalidate_repository(repository_id)
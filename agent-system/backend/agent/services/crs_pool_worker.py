@@ -0,0 +1,68 @@
+"""
+Entry points for CRS scheduler pool processes
+
+The pool uses the "spawn" start method, so a worker process starts from a
+fresh interpreter and imports whatever module the pickled callables live
+in before Django is configured. This module therefore imports nothing
+from Django apps at module level: init_pool_worker() runs django.setup()
+first, and execute_crs_job() imports models and the scheduler lazily.
+"""
+
+import json
+import logging
+import os
+import time
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+
+def init_pool_worker(event_queue: Any) -> None:
+    """ProcessPoolExecutor initializer: configure Django, then the event relay."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    import django
+
+    django.setup()
+    if event_queue is not None:
+        from core.event_bus import QueueRelayBroadcaster
+        from core.events import set_broadcaster
+
+        set_broadcaster(QueueRelayBroadcaster(event_queue))
+
+
+def execute_crs_job(job_pk: int) -> Dict[str, Any]:
+    """Run one claimed job. Called in a pool worker process."""
+    from django.db import close_old_connections
+
+    from agent.models import CRSJob
+    from agent.services.crs_runner import run_crs_pipeline, run_crs_step
+    from agent.services.crs_scheduler import _emit_job_event, _finish_job, _job_run_id
+    from core.events import EventType
+
+    close_old_connections()
+    job = CRSJob.objects.select_related("repository").get(pk=job_pk)
+    repository = job.repository
+    started = time.time()
+    _emit_job_event(job, EventType.JOB_STARTED, {"pid": os.getpid()})
+
+    try:
+        if job.kind == "pipeline":
+            repository.status = "crs_running"
+            repository.save(update_fields=["status"])
+            result = run_crs_pipeline(repository, force=job.force)
+        else:
+            result = run_crs_step(repository, job.step_name, force=job.force, run_id=_job_run_id(job))
+    except Exception as e:
+        logger.error("CRS job %s failed: %s", job.job_id, e, exc_info=True)
+        if job.kind == "pipeline":
+            repository.status = "error"
+            repository.error_message = str(e)
+            repository.save(update_fields=["status", "error_message"])
+        _finish_job(job, "failed", error=f"{type(e).__name__}: {e}")
+        return {"ok": False, "error": str(e)}
+    finally:
+        close_old_connections()
+
+    result = json.loads(json.dumps(result, default=str))
+    _finish_job(job, "completed", result=result)
+    return {"ok": True, "duration": time.time() - started}
@@ -1,5 +1,5 @@
 import json
-import os
+import logging
 import sys
 from dataclasses import dataclass
 from pathlib import Path
@@ -9,6 +9,8 @@ from django.conf import settings
 from django.utils import timezone
 
 from agent.models import Repository
+from agent.services.crs_embeddings import build_semantic_index, get_embedder
+from agent.services.crs_payload_cache import get_payload_cache, invalidate_repository
 
 # Add CRS directory to Python path
 _crs_dir = Path(settings.BASE_DIR).parent / "crs"
@@ -20,6 +22,8 @@ from core.fs import WorkspaceFS
 from core.step_runner import CRSStepRunner
 from core.events import CRSEventEmitter, get_broadcaster
 
+logger = logging.getLogger(__name__)
+
 
 @dataclass
 class CRSWorkspacePaths:
@@ -46,6 +50,11 @@ def _workspace_base_dirs() -> Dict[str, Path]:
     }
 
 
+# (repository id, clone path, name, system id, user id) -> paths; the
+# workspace dirs/config.json are only (re)written when these change
+_workspace_paths: Dict[tuple, CRSWorkspacePaths] = {}
+
+
 def _build_crs_workspace(repository: Repository) -> CRSWorkspacePaths:
     # Validate clone_path exists
     if not repository.clone_path:
@@ -66,6 +75,17 @@ def _build_crs_workspace(repository: Repository) -> CRSWorkspacePaths:
             f"Repository clone path is not a directory: {clone_path}"
         )
 
+    memo_key = (
+        repository.id,
+        str(clone_path.absolute()),
+        repository.name,
+        repository.system_id,
+        repository.system.user_id,
+    )
+    paths = _workspace_paths.get(memo_key)
+    if paths is not None and paths.config_path.exists():
+        return paths
+
     base_dirs = _workspace_base_dirs()
     crs_workspace_root = (
         base_dirs["crs_root"]
@@ -101,9 +121,15 @@ def _build_crs_workspace(repository: Repository) -> CRSWorkspacePaths:
             "store_lines": True,
         },
     }
-    config_path.write_text(json.dumps(config, indent=2))
+    config_text = json.dumps(config, indent=2)
+    try:
+        unchanged = config_path.read_text() == config_text
+    except OSError:
+        unchanged = False
+    if not unchanged:
+        config_path.write_text(config_text)
 
-    return CRSWorkspacePaths(
+    paths = _workspace_paths[memo_key] = CRSWorkspacePaths(
         workspace_root=crs_workspace_root,
         config_path=config_path,
         state_dir=state_dir,
@@ -112,24 +138,33 @@ def _build_crs_workspace(repository: Repository) -> CRSWorkspacePaths:
         artifacts_path=artifacts_path,
         relationships_path=relationships_path,
     )
+    return paths
+
+
+def _broadcasting_emitter(repository: Repository, run_id: str) -> CRSEventEmitter:
+    """Emitter whose events are pushed to the repository's SSE broadcaster."""
+    emitter = CRSEventEmitter(run_id=run_id, repository_id=repository.id)
+    broadcaster = get_broadcaster()
 
+    def broadcast_callback(event):
+        broadcaster.broadcast(repository.id, event)
 
-def run_crs_pipeline(repository: Repository) -> Dict[str, Any]:
+    emitter.register_callback(broadcast_callback)
+    return emitter
+
+
+def run_crs_pipeline(repository: Repository, force: bool = False) -> Dict[str, Any]:
     if not repository.clone_path or not Path(repository.clone_path).is_dir():
         raise RuntimeError("Repository clone not found. Clone the repository before running CRS.")
     paths = _build_crs_workspace(repository)
-    original_config = os.environ.get("CRS_CONFIG")
-    os.environ["CRS_CONFIG"] = str(paths.config_path)
-    try:
-        run_pipeline()
-    finally:
-        if original_config is None:
-            os.environ.pop("CRS_CONFIG", None)
-        else:
-            os.environ["CRS_CONFIG"] = original_config
+    fs = WorkspaceFS(config_path=str(paths.config_path))
+    run_id = fs.new_run_id(prefix="pipeline")
+    emitter = _broadcasting_emitter(repository, run_id)
+    run_pipeline(fs, emitter=emitter, run_id=run_id, profile=getattr(settings, 'CRS_PROFILE', False), force=force)
+    invalidate_repository(repository.id)
 
-    artifacts_payload = _load_payload(paths.artifacts_path)
-    relationships_payload = _load_payload(paths.relationships_path)
+    artifacts_payload = load_crs_payload(repository, "artifacts")
+    relationships_payload = load_crs_payload(repository, "relationships")
 
     artifacts_count = len(artifacts_payload.get("artifacts", [])) if isinstance(artifacts_payload, dict) else 0
     relationships_count = len(relationships_payload.get("relationships", [])) if isinstance(relationships_payload, dict) else 0
@@ -148,6 +183,7 @@ def run_crs_pipeline(repository: Repository) -> Dict[str, Any]:
             "status",
         ]
     )
+    warm_semantic_index(repository)
 
     return {
         "artifacts_count": artifacts_count,
@@ -158,14 +194,7 @@ def run_crs_pipeline(repository: Repository) -> Dict[str, Any]:
     }
 
 
-def _load_payload(path: Path) -> Dict[str, Any]:
-    if not path.exists():
-        return {}
-    with path.open("r", encoding="utf-8") as handle:
-        return json.load(handle)
-
-
-def load_crs_payload(repository: Repository, payload_type: str) -> Dict[str, Any]:
+def _payload_path(repository: Repository, payload_type: str) -> Path:
     paths = _build_crs_workspace(repository)
     payload_map = {
         "blueprints": paths.blueprints_path,
@@ -175,14 +204,47 @@ def load_crs_payload(repository: Repository, payload_type: str) -> Dict[str, Any
     target_path = payload_map.get(payload_type)
     if not target_path:
         raise ValueError(f"Unknown CRS payload type: {payload_type}")
-    return _load_payload(target_path)
+    return target_path
+
+
+def load_crs_payload(repository: Repository, payload_type: str) -> Dict[str, Any]:
+    """Parsed payload, shared via the process-wide cache (treat as read-only)."""
+    return get_payload_cache().payload(repository.id, payload_type, _payload_path(repository, payload_type))
+
+
+def load_crs_index(repository: Repository, payload_type: str, name: str) -> Any:
+    """Prebuilt index over a cached payload, e.g. ("artifacts", "by_name") (read-only)."""
+    return get_payload_cache().index(repository.id, payload_type, _payload_path(repository, payload_type), name)
+
+
+def load_crs_semantic_index(repository: Repository, payload_type: str) -> Any:
+    """Embedding index over artifacts/blueprints, or None when semantic search is off."""
+    embedder = get_embedder()
+    if embedder is None:
+        return None
+    store_dir = _build_crs_workspace(repository).workspace_root / "embeddings"
+    return get_payload_cache().derived(
+        repository.id,
+        payload_type,
+        _payload_path(repository, payload_type),
+        f"semantic:{embedder.name}",
+        lambda payload: build_semantic_index(payload_type, payload, store_dir, embedder),
+    )
+
+
+def warm_semantic_index(repository: Repository) -> None:
+    """Embed new/changed artifacts now rather than on the first chat query."""
+    for payload_type in ("artifacts", "blueprints"):
+        try:
+            load_crs_semantic_index(repository, payload_type)
+        except Exception as e:
+            logger.warning(f"Semantic index for {payload_type} failed: {e}")
 
 
 def get_crs_summary(repository: Repository) -> Dict[str, Any]:
-    paths = _build_crs_workspace(repository)
-    blueprints_payload = _load_payload(paths.blueprints_path)
-    artifacts_payload = _load_payload(paths.artifacts_path)
-    relationships_payload = _load_payload(paths.relationships_path)
+    blueprints_payload = load_crs_payload(repository, "blueprints")
+    artifacts_payload = load_crs_payload(repository, "artifacts")
+    relationships_payload = load_crs_payload(repository, "relationships")
 
     return {
         "status": repository.status,
@@ -218,63 +280,44 @@ def run_crs_step(
 
     paths = _build_crs_workspace(repository)
 
-    # Set up environment
-    original_config = os.environ.get("CRS_CONFIG")
-    os.environ["CRS_CONFIG"] = str(paths.config_path)
-
-    try:
-        # Create event emitter
-        if run_id is None:
-            import time
-            run_id = f"step_{int(time.time())}"
-
-        emitter = CRSEventEmitter(run_id=run_id, repository_id=repository.id)
-
-        # Set up broadcaster callback
-        broadcaster = get_broadcaster()
-
-        def broadcast_callback(event):
-            broadcaster.broadcast(repository.id, event)
-
-        emitter.register_callback(broadcast_callback)
-
-        # Create step runner
-        fs = WorkspaceFS(config_path=str(paths.config_path))
-        runner = CRSStepRunner(fs, emitter)
-
-        # Run the requested step
-        if step_name == "blueprints":
-            result = runner.run_blueprints(force=force)
-        elif step_name == "artifacts":
-            result = runner.run_artifacts(force=force)
-        elif step_name == "relationships":
-            result = runner.run_relationships(force=force)
-        elif step_name == "impact":
-            result = runner.run_impact()
-        elif step_name.startswith("verification_"):
-            suite_id = step_name.replace("verification_", "")
-            result = runner.run_verification(suite_id)
-        else:
-            raise ValueError(f"Unknown step: {step_name}")
-
-        # Update repository stats if not skipped
-        if not result.get("skipped"):
-            repository.last_crs_run = timezone.now()
-            repository.save(update_fields=["last_crs_run"])
+    # Create event emitter
+    if run_id is None:
+        import time
+        run_id = f"step_{int(time.time())}"
+
+    emitter = _broadcasting_emitter(repository, run_id)
+
+    # Create step runner (workspace passed explicitly; no process-wide CRS_CONFIG)
+    fs = WorkspaceFS(config_path=str(paths.config_path))
+    runner = CRSStepRunner(fs, emitter)
+
+    # Run the requested step
+    if step_name == "blueprints":
+        result = runner.run_blueprints(force=force)
+    elif step_name == "artifacts":
+        result = runner.run_artifacts(force=force)
+    elif step_name == "relationships":
+        result = runner.run_relationships(force=force)
+    elif step_name == "impact":
+        result = runner.run_impact()
+    elif step_name.startswith("verification_"):
+        suite_id = step_name.replace("verification_", "")
+        result = runner.run_verification(suite_id)
+    else:
+        raise ValueError(f"Unknown step: {step_name}")
+
+    # Update repository stats if not skipped
+    if not result.get("skipped"):
+        invalidate_repository(repository.id)
+        repository.last_crs_run = timezone.now()
+        repository.save(update_fields=["last_crs_run"])
 
-        return {
-            "run_id": run_id,
-            "step": step_name,
-            "result": result,
-            "events_count": len(emitter.get_events())
-        }
-
-    finally:
-        # Restore environment
-        if original_config is None:
-            os.environ.pop("CRS_CONFIG", None)
-        else:
-            os.environ["CRS_CONFIG"] = original_config
+    return {
+        "run_id": run_id,
+        "step": step_name,
+        "result": result,
+        "events_count": len(emitter.get_events())
+    }
 
 
 def get_crs_step_status(repository: Repository) -> Dict[str, Any]:
@@ -290,17 +333,6 @@ def get_crs_step_status(repository: Repository) -> Dict[str, Any]:
         }
 
     paths = _build_crs_workspace(repository)
-    original_config = os.environ.get("CRS_CONFIG")
-    os.environ["CRS_CONFIG"] = str(paths.config_path)
-
-    try:
-        fs = WorkspaceFS(config_path=str(paths.config_path))
-        runner = CRSStepRunner(fs, emitter=None)
-        status = runner.get_step_status()
-        return status
-
-    finally:
-        if original_config is None:
-            os.environ.pop("CRS_CONFIG", None)
-        else:
-            os.environ["CRS_CONFIG"] = original_config
+    fs = WorkspaceFS(config_path=str(paths.config_path))
+    runner = CRSStepRunner(fs, emitter=None)
+    return runner.get_step_status()
@@ -0,0 +1,392 @@
+"""
+CRS job scheduler
+
+CRS runs used to execute inside the HTTP request: two requests could index
+the same repository at once and a system re-index ran one repository at a
+time. Work is now queued as CRSJob rows and executed by a process pool:
+
+  - enqueue_crs_job(): queue a pipeline/step job; a request for work that
+    is already queued (same repository/kind/step) coalesces into that job
+  - claim_next_job(): lowest priority value first, then FIFO; repositories
+    with a running job are skipped (one running job per repository is also
+    enforced by a partial unique constraint, so several dispatchers are safe)
+  - CRSJobScheduler: dispatcher thread + ProcessPoolExecutor; the pool
+    runs crs_pool_worker.execute_crs_job (importable before django.setup())
+
+Modes (settings.CRS_SCHEDULER_MODE):
+  - "embedded": the web process starts a dispatcher on first enqueue
+  - "external": jobs are picked up by `python manage.py crs_worker`
+
+Job lifecycle is reported through the CRS event broadcaster
+(job_queued/job_started/job_complete/job_failed) next to the pipeline's
+own step events.
+"""
+
+import logging
+import multiprocessing
+import os
+import queue as queue_module
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from agent.models import CRSJob, Repository, User
+from agent.services.crs_pool_worker import execute_crs_job, init_pool_worker
+from agent.services.crs_runner import _broadcasting_emitter
+from core.event_bus import QueueRelayBroadcaster, SharedEventBroadcaster
+from core.events import EventType, get_broadcaster
+
+logger = logging.getLogger(__name__)
+
+
+def _job_run_id(job: CRSJob) -> str:
+    return f"job_{job.job_id}"
+
+
+def _job_summary(job: CRSJob) -> Dict[str, Any]:
+    return {
+        "kind": job.kind,
+        "step_name": job.step_name,
+        "priority": job.priority,
+        "status": job.status,
+        "coalesced_count": job.coalesced_count,
+        "attempts": job.attempts,
+    }
+
+
+def _emit_job_event(job: CRSJob, event_type: EventType, extra: Optional[Dict[str, Any]] = None) -> None:
+    try:
+        emitter = _broadcasting_emitter(job.repository, _job_run_id(job))
+        emitter.emit_job_event(event_type, str(job.job_id), {**_job_summary(job), **(extra or {})})
+    except Exception as e:
+        logger.warning("Failed to emit %s for job %s: %s", event_type.value, job.job_id, e)
+
+
+# -------------------------
+# queue operations
+# -------------------------
+def enqueue_crs_job(
+    repository: Repository,
+    *,
+    kind: str = "pipeline",
+    step_name: str = "",
+    force: bool = False,
+    priority: int = CRSJob.PRIORITY_INTERACTIVE,
+    user: Optional[User] = None,
+) -> Tuple[CRSJob, bool]:
+    """
+    Queue CRS work for a repository. Returns (job, created).
+
+    If the same work is already queued it is coalesced: the queued job keeps
+    its place but takes the more urgent priority and `force` if requested.
+    """
+    if kind == "pipeline":
+        step_name = ""
+
+    job: Optional[CRSJob] = None
+    created = False
+    for _ in range(3):
+        try:
+            with transaction.atomic():
+                job = (
+                    CRSJob.objects.select_for_update()
+                    .filter(repository=repository, kind=kind, step_name=step_name, status="queued")
+                    .first()
+                )
+                if job is not None:
+                    CRSJob.objects.filter(pk=job.pk).update(
+                        priority=min(job.priority, priority),
+                        force=job.force or force,
+                        coalesced_count=F("coalesced_count") + 1,
+                        updated_at=timezone.now(),
+                    )
+                    job.refresh_from_db()
+                    created = False
+                else:
+                    job = CRSJob.objects.create(
+                        repository=repository,
+                        requested_by=user,
+                        kind=kind,
+                        step_name=step_name,
+                        force=force,
+                        priority=priority,
+                    )
+                    created = True
+            break
+        except IntegrityError:
+            # lost a race with another enqueue of the same work: coalesce on retry
+            continue
+
+    if job is None:
+        raise RuntimeError(f"Could not enqueue CRS {kind} job for repository {repository.pk}")
+
+    job.repository = repository
+    _emit_job_event(job, EventType.JOB_QUEUED, {"coalesced": not created})
+    transaction.on_commit(_notify_scheduler)
+    return job, created
+
+
+def claim_next_job(worker_id: str, limit: int = 20) -> Optional[CRSJob]:
+    """
+    Atomically move the most urgent runnable job to 'running'.
+    Repositories that already have a running job are skipped.
+    """
+    busy = CRSJob.objects.filter(status="running").values("repository_id")
+    candidates = list(
+        CRSJob.objects.filter(status="queued")
+        .exclude(repository_id__in=busy)
+        .order_by("priority", "created_at")
+        .values_list("pk", flat=True)[:limit]
+    )
+    for pk in candidates:
+        now = timezone.now()
+        try:
+            with transaction.atomic():
+                claimed = CRSJob.objects.filter(pk=pk, status="queued").update(
+                    status="running",
+                    worker_id=worker_id,
+                    started_at=now,
+                    heartbeat_at=now,
+                    attempts=F("attempts") + 1,
+                    updated_at=now,
+                )
+        except IntegrityError:
+            # another dispatcher started a job for this repository first
+            continue
+        if claimed:
+            return CRSJob.objects.select_related("repository").get(pk=pk)
+    return None
+
+
+def recover_stale_jobs(stale_after: float) -> int:
+    """
+    Requeue running jobs whose dispatcher stopped heartbeating (crashed
+    worker). Jobs past CRS_JOB_MAX_ATTEMPTS are failed instead.
+    """
+    cutoff = timezone.now() - timedelta(seconds=stale_after)
+    max_attempts = getattr(settings, "CRS_JOB_MAX_ATTEMPTS", 3)
+    recovered = 0
+    for job in CRSJob.objects.filter(status="running", heartbeat_at__lt=cutoff).select_related("repository"):
+        if job.attempts >= max_attempts:
+            _finish_job(job, "failed", error=f"Worker lost after {job.attempts} attempts")
+            continue
+        try:
+            with transaction.atomic():
+                CRSJob.objects.filter(pk=job.pk, status="running").update(
+                    status="queued", worker_id="", updated_at=timezone.now()
+                )
+            recovered += 1
+        except IntegrityError:
+            # the same work was queued again meanwhile; that job supersedes this one
+            _finish_job(job, "cancelled", error="Worker lost; superseded by queued job")
+    return recovered
+
+
+def cancel_crs_job(job: CRSJob) -> bool:
+    """Cancel a queued job (running jobs are left to finish)."""
+    cancelled = CRSJob.objects.filter(pk=job.pk, status="queued").update(
+        status="cancelled", completed_at=timezone.now(), updated_at=timezone.now()
+    )
+    if cancelled:
+        job.refresh_from_db()
+        _emit_job_event(job, EventType.JOB_FAILED, {"error": "cancelled"})
+    return bool(cancelled)
+
+
+def wait_for_job(job: CRSJob, timeout: float, poll_interval: float = 0.5) -> CRSJob:
+    """Block until the job leaves queued/running or `timeout` seconds pass."""
+    deadline = time.monotonic() + timeout
+    while True:
+        job.refresh_from_db()
+        if job.status not in ("queued", "running") or time.monotonic() >= deadline:
+            return job
+        time.sleep(poll_interval)
+
+
+def _finish_job(job: CRSJob, status: str, *, result: Any = None, error: str = "") -> None:
+    now = timezone.now()
+    CRSJob.objects.filter(pk=job.pk).update(
+        status=status,
+        result=result,
+        error_message=error,
+        completed_at=now,
+        heartbeat_at=now,
+        updated_at=now,
+    )
+    job.status = status
+    event = EventType.JOB_COMPLETE if status == "completed" else EventType.JOB_FAILED
+    _emit_job_event(job, event, {"error": error} if error else None)
+
+
+# -------------------------
+# dispatcher
+# -------------------------
+class CRSJobScheduler:
+    """
+    Dispatcher thread feeding a process pool.
+
+    Keeps up to `max_workers` jobs in flight (one per repository), heartbeats
+    them, and requeues jobs left running by dead dispatchers.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        poll_interval: float = 2.0,
+        heartbeat_interval: float = 10.0,
+        worker_id: Optional[str] = None,
+    ):
+        self.max_workers = max_workers or getattr(settings, "CRS_SCHEDULER_WORKERS", None) or os.cpu_count() or 2
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+        self._inflight: Dict[int, Future] = {}
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_broken = False
+        self._events: Any = None
+        self._relay_thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> "CRSJobScheduler":
+        with self._start_lock:
+            if self.running:
+                return self
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self.run_forever, name="crs-scheduler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, wait: bool = True) -> None:
+        self._stopped.set()
+        self._wake.set()
+        if wait and self._thread and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def run_forever(self) -> None:
+        logger.info("CRS scheduler %s starting with %s workers", self.worker_id, self.max_workers)
+        self._pool = self._make_pool()
+        last_heartbeat = 0.0
+        try:
+            while not self._stopped.is_set():
+                self._wake.clear()
+                try:
+                    close_old_connections()
+                    if time.monotonic() - last_heartbeat >= self.heartbeat_interval:
+                        self._heartbeat()
+                        recover_stale_jobs(stale_after=self.heartbeat_interval * 6)
+                        last_heartbeat = time.monotonic()
+                    self._dispatch()
+                except Exception as e:
+                    logger.error("CRS scheduler loop error: %s", e, exc_info=True)
+                self._wake.wait(self.poll_interval)
+        finally:
+            self._pool.shutdown(wait=True, cancel_futures=False)
+            close_old_connections()
+            logger.info("CRS scheduler %s stopped", self.worker_id)
+
+    def _make_pool(self) -> ProcessPoolExecutor:
+        # Children relay events to this process unless a shared bus already
+        # reaches every process (CRS_EVENT_BUS_URL).
+        mp_context = multiprocessing.get_context("spawn")
+        if not isinstance(get_broadcaster(), SharedEventBroadcaster) and self._events is None:
+            self._events = mp_context.Queue()
+            self._relay_thread = threading.Thread(target=self._relay_events, name="crs-scheduler-events", daemon=True)
+            self._relay_thread.start()
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=mp_context,
+            initializer=init_pool_worker,
+            initargs=(self._events,),
+        )
+
+    def _relay_events(self) -> None:
+        broadcaster = get_broadcaster()
+        while not self._stopped.is_set():
+            try:
+                item = self._events.get(timeout=1.0)
+            except queue_module.Empty:
+                continue
+            except (EOFError, OSError):
+                return
+            try:
+                QueueRelayBroadcaster.relay_to(broadcaster, item)
+            except Exception as e:
+                logger.warning("CRS event relay failed: %s", e)
+
+    def _dispatch(self) -> None:
+        if self._pool_broken:
+            self._pool.shutdown(wait=False)
+            self._pool = self._make_pool()
+            self._pool_broken = False
+        while len(self._inflight) < self.max_workers and not self._stopped.is_set():
+            job = claim_next_job(self.worker_id)
+            if job is None:
+                return
+            future = self._pool.submit(execute_crs_job, job.pk)
+            self._inflight[job.pk] = future
+            future.add_done_callback(lambda f, pk=job.pk: self._on_done(pk, f))
+
+    def _on_done(self, job_pk: int, future: Future) -> None:
+        self._inflight.pop(job_pk, None)
+        exc = None if future.cancelled() else future.exception()
+        if exc is not None:
+            # the worker died or the job could not be unpickled: fail it here
+            logger.error("CRS job %s crashed its worker: %s", job_pk, exc)
+            try:
+                job = CRSJob.objects.select_related("repository").get(pk=job_pk)
+                if job.status == "running":
+                    _finish_job(job, "failed", error=f"{type(exc).__name__}: {exc}")
+            except Exception as e:
+                logger.error("Failed to record crash of CRS job %s: %s", job_pk, e)
+            finally:
+                close_old_connections()
+            if isinstance(exc, BrokenProcessPool):
+                self._pool_broken = True
+        self._wake.set()
+
+    def _heartbeat(self) -> None:
+        pks: List[int] = list(self._inflight)
+        if pks:
+            CRSJob.objects.filter(pk__in=pks, status="running").update(heartbeat_at=timezone.now())
+
+
+_scheduler: Optional[CRSJobScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> CRSJobScheduler:
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = CRSJobScheduler()
+    return _scheduler
+
+
+def _notify_scheduler() -> None:
+    if getattr(settings, "CRS_SCHEDULER_MODE", "embedded") != "embedded":
+        return
+    scheduler = get_scheduler()
+    scheduler.start()
+    scheduler.wake()
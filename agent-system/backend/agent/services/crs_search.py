@@ -0,0 +1,261 @@
+"""
+BM25 search over CRS artifacts and blueprints.
+
+The indexes are registered as derived indexes in crs_payload_cache, so each
+is built once per CRS state version and shared by every CRSRetriever in the
+process. Query cost is proportional to the postings of the query terms,
+not to the number of artifacts.
+
+  - tokens are identifier-aware: `UserProfileSerializer`, `user_profile`
+    and `HTTPClient` are split into their words, the whole identifier is
+    kept as an extra token so exact names still rank first, and a trailing
+    plural 's' is dropped ("models" matches "Model")
+  - fields are weighted BM25F-style: each field's term frequency is length
+    normalized against that field's average length and scaled by its
+    weight before the BM25 saturation, which is precomputed per posting
+  - a query term missing from the vocabulary is expanded to the terms it
+    prefixes ("serial" -> "serializer"), at a discount
+  - top-k comes from a heap over the accumulated scores
+
+    index = load_crs_index(repository, "artifacts", "bm25")
+    for doc, score in index.search("user serializer", k=10):
+        index.items[doc]
+"""
+
+import heapq
+import logging
+import math
+import re
+import time
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Any, Callable, Container, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+K1 = 1.2
+B = 0.75
+
+ARTIFACT_FIELDS = {"name": 3.0, "type": 1.5, "path": 1.0, "meta": 0.5}
+BLUEPRINT_FIELDS = {"path": 2.0, "purpose": 1.5, "segments": 1.0, "components": 1.0}
+
+STOP_WORDS = {
+    'the', 'a', 'an', 'is', 'are', 'was', 'were', 'how', 'what', 'where', 'when', 'why',
+    'does', 'do', 'can', 'could', 'would', 'in', 'of', 'to', 'for', 'and', 'or', 'this',
+    'that', 'with', 'on', 'me', 'my', 'it', 'be',
+}
+
+# meta values can be large (docstrings, literals); only the first ones are indexed
+_MAX_META_CHARS = 400
+
+# distinct field texts memoized while building (paths and types repeat)
+_TEXT_CACHE_SIZE = 200000
+
+# prefix expansion of unknown query terms
+_MIN_PREFIX = 3
+_MAX_EXPANSIONS = 16
+_EXPANSION_FACTOR = 0.5
+
+_WORD_RE = re.compile(r"\w+")
+_PART_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+
+
+# ----------------------------------------------------------------------
+# Tokenization
+# ----------------------------------------------------------------------
+def _stem(token: str) -> str:
+    if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+        return token[:-1]
+    return token
+
+
+def _word_tokens(word: str) -> Tuple[str, ...]:
+    parts = [p for piece in word.split('_') for p in _PART_RE.findall(piece)]
+    if not parts:
+        return (_stem(word.lower()),)
+    tokens = [_stem(p.lower()) for p in parts]
+    if len(parts) > 1:
+        tokens.append(_stem(word.lower().strip('_')))
+    return tuple(tokens)
+
+
+def tokenize(text: str, cache: Optional[Dict[str, Tuple[str, ...]]] = None) -> List[str]:
+    """Identifier-aware tokens: camelCase / snake_case parts plus the whole identifier"""
+    tokens: List[str] = []
+    for word in _WORD_RE.findall(text or ""):
+        if cache is None:
+            tokens.extend(_word_tokens(word))
+            continue
+        word_tokens = cache.get(word)
+        if word_tokens is None:
+            word_tokens = cache[word] = _word_tokens(word)
+        tokens.extend(word_tokens)
+    return tokens
+
+
+def query_terms(query: str) -> List[str]:
+    seen, terms = set(), []
+    for word in _WORD_RE.findall(query):
+        if word.lower() in STOP_WORDS:
+            continue
+        for term in tokenize(word):
+            if term not in seen:
+                seen.add(term)
+                terms.append(term)
+    return terms
+
+
+# ----------------------------------------------------------------------
+# Index
+# ----------------------------------------------------------------------
+class BM25Index:
+    def __init__(self, items: Sequence[Dict[str, Any]], fields: Dict[str, float],
+                 extract: Callable[[Dict[str, Any]], Dict[str, str]], k1: float = K1, b: float = B):
+        started = time.perf_counter()
+        self.items = items
+        self.k1 = k1
+
+        # identifiers, types and path segments repeat a lot: tokenize each once
+        word_cache: Dict[str, Tuple[str, ...]] = {}
+        text_cache: Dict[str, Tuple[str, ...]] = {}
+        names = list(fields)
+        docs_tokens: List[List[Tuple[str, ...]]] = []
+        totals = [0] * len(names)
+        for item in items:
+            texts = extract(item)
+            doc = []
+            for i, name in enumerate(names):
+                text = texts.get(name) or ""
+                tokens = text_cache.get(text)
+                if tokens is None:
+                    tokens = tuple(tokenize(text, word_cache))
+                    if len(text_cache) < _TEXT_CACHE_SIZE:
+                        text_cache[text] = tokens
+                doc.append(tokens)
+                totals[i] += len(tokens)
+            docs_tokens.append(doc)
+
+        n = len(items)
+        avg = [(total / n if n else 0.0) or 1.0 for total in totals]
+        weights = [fields[name] for name in names]
+        postings: Dict[str, Tuple[List[int], List[float]]] = defaultdict(lambda: ([], []))
+        for doc_id, doc in enumerate(docs_tokens):
+            # weighted, per-field length normalized term frequency (BM25F)
+            combined: Dict[str, float] = {}
+            for i, tokens in enumerate(doc):
+                if not tokens:
+                    continue
+                inc = weights[i] / (1 - b + b * len(tokens) / avg[i])
+                for term in tokens:
+                    combined[term] = combined.get(term, 0.0) + inc
+            for term, tf in combined.items():
+                doc_ids, saturated = postings[term]
+                doc_ids.append(doc_id)
+                saturated.append(tf * (k1 + 1) / (tf + k1))
+
+        self.size = n
+        self.postings = {t: (array('I', d), array('f', w)) for t, (d, w) in postings.items()}
+        self.idf = {
+            t: math.log(1 + (n - len(d) + 0.5) / (len(d) + 0.5)) for t, (d, _) in self.postings.items()
+        }
+        self.vocabulary = sorted(self.postings)
+        logger.info(
+            "Built BM25 index: %d documents, %d terms in %.0fms",
+            n, len(self.vocabulary), (time.perf_counter() - started) * 1000,
+        )
+
+    def _expand(self, term: str) -> List[Tuple[str, float]]:
+        if term in self.postings:
+            return [(term, 1.0)]
+        if len(term) < _MIN_PREFIX:
+            return []
+        expanded = []
+        i = bisect_left(self.vocabulary, term)
+        while i < len(self.vocabulary) and len(expanded) < _MAX_EXPANSIONS:
+            candidate = self.vocabulary[i]
+            if not candidate.startswith(term):
+                break
+            expanded.append((candidate, _EXPANSION_FACTOR))
+            i += 1
+        return expanded
+
+    def scores(self, query: str) -> Dict[int, float]:
+        acc: Dict[int, float] = {}
+        get = acc.get
+        for term in query_terms(query):
+            for t, factor in self._expand(term):
+                idf = self.idf[t] * factor
+                docs, weights = self.postings[t]
+                for doc_id, w in zip(docs, weights):
+                    acc[doc_id] = get(doc_id, 0.0) + idf * w
+        return acc
+
+    def search(self, query: str, k: int = 10, exclude: Optional[Container[int]] = None) -> List[Tuple[int, float]]:
+        """Top-k (doc id, score), best first; ties keep payload order"""
+        acc = self.scores(query)
+        candidates = acc.items() if not exclude else ((d, s) for d, s in acc.items() if d not in exclude)
+        return heapq.nlargest(k, candidates, key=lambda item: (item[1], -item[0]))
+
+
+# ----------------------------------------------------------------------
+# Payload builders (registered in crs_payload_cache.INDEX_BUILDERS)
+# ----------------------------------------------------------------------
+def _meta_text(value: Any, budget: int = _MAX_META_CHARS) -> str:
+    out: List[str] = []
+    stack = [value]
+    while stack and budget > 0:
+        obj = stack.pop()
+        if isinstance(obj, str):
+            out.append(obj[:budget])
+            budget -= len(out[-1])
+        elif isinstance(obj, dict):
+            stack.extend(reversed(list(obj.values())))
+        elif isinstance(obj, (list, tuple)):
+            stack.extend(reversed(obj))
+    return " ".join(out)
+
+
+def artifact_fields(artifact: Dict[str, Any]) -> Dict[str, str]:
+    return {
+        "name": artifact.get("name") or "",
+        "type": artifact.get("type") or "",
+        "path": artifact.get("file_path") or artifact.get("file") or "",
+        "meta": _meta_text(artifact.get("meta")),
+    }
+
+
+def blueprint_items(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Per-file blueprints as the blueprint builder writes them: {"blueprints": [{"file_path", "segments"}]}"""
+    return [b for b in payload.get("blueprints") or [] if isinstance(b, dict)]
+
+
+def blueprint_path(blueprint: Dict[str, Any]) -> str:
+    return blueprint.get("file_path") or blueprint.get("path") or ""
+
+
+def blueprint_fields(blueprint: Dict[str, Any]) -> Dict[str, str]:
+    segments = blueprint.get("segments") or []
+    return {
+        "path": blueprint_path(blueprint),
+        "purpose": blueprint.get("purpose") or "",
+        "segments": " ".join(s.get("name") or "" for s in segments if isinstance(s, dict)),
+        "components": " ".join(str(c) for c in blueprint.get("key_components") or []),
+    }
+
+
+class ArtifactIndex(BM25Index):
+    def __init__(self, artifacts: Sequence[Dict[str, Any]]):
+        super().__init__(artifacts, ARTIFACT_FIELDS, artifact_fields)
+        self.admin = frozenset(
+            i for i, a in enumerate(artifacts)
+            if "admin.py" in (a.get("file_path") or a.get("file") or "").lower()
+        )
+
+
+def build_artifact_index(payload: Dict[str, Any]) -> ArtifactIndex:
+    return ArtifactIndex(payload.get("artifacts", []))
+
+
+def build_blueprint_index(payload: Dict[str, Any]) -> BM25Index:
+    return BM25Index(blueprint_items(payload), BLUEPRINT_FIELDS, blueprint_fields)
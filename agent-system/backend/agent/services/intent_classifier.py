@@ -0,0 +1,312 @@
+"""
+Local CHAT vs TASK intent classifier for the repository chat.
+
+RepositoryChatConsumer used to ask the LLM "is this a question or a task?"
+before every answer. This module decides locally, in microseconds:
+
+  - a keyword/regex rule set (imperative edit verbs, question openers, ...)
+    contributing fixed log-odds, plus
+  - a small logistic-regression model over hashed word 1/2-grams, trained
+    on the seed examples below the first time it is used (pure Python, CPU).
+
+Only when the combined confidence is below the threshold does the caller's
+async LLM fallback run (off the event loop). Decisions are cached per
+normalized message.
+
+    decision = await get_intent_classifier().classify(message, llm_fallback=...)
+    decision.intent      # 'CHAT' | 'TASK'
+    decision.source      # 'local' | 'llm' | 'cache'
+"""
+
+import asyncio
+import logging
+import math
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CHAT = 'CHAT'
+TASK = 'TASK'
+
+DEFAULT_CONFIDENCE = 0.8
+DEFAULT_CACHE_SIZE = 2048
+DEFAULT_LLM_TIMEOUT = 10.0
+
+_HASH_BITS = 18
+_HASH_MASK = (1 << _HASH_BITS) - 1
+
+
+@dataclass
+class IntentDecision:
+    intent: str
+    confidence: float
+    source: str  # 'local' | 'llm' | 'cache'
+    p_task: float = 0.0
+
+
+# ----------------------------------------------------------------------
+# Rules: (pattern, log-odds towards TASK); negative weights favour CHAT
+# ----------------------------------------------------------------------
+_EDIT_VERBS = (
+    r'create|implement|add|write|generate|refactor|fix|rename|delete|remove|update|change|'
+    r'modify|replace|move|migrate|build|make|convert|extract|split|introduce|rewrite|'
+    r'optimi[sz]e|wire|hook up|set up|setup|scaffold|bump|upgrade|patch|apply|run'
+)
+
+RULES: List[Tuple[re.Pattern, float]] = [
+    (re.compile(rf'^(?:please\s+|pls\s+|now\s+|ok(?:ay)?,?\s+)?(?:{_EDIT_VERBS})\b'), 3.0),
+    (re.compile(rf'\b(?:can|could|would|will) you(?: please)? (?:{_EDIT_VERBS})\b'), 2.0),
+    (re.compile(r"\b(?:i want you to|i need you to|go ahead and|let's|lets)\b"), 1.5),
+    (re.compile(r'\b(?:to|in|into) (?:the )?(?:file|module|model|view|serializer|endpoint)s?\b'), 0.5),
+    (re.compile(r'\b\w+\.(?:py|js|ts|tsx|jsx|html|css|json|ya?ml|md)\b'), 0.5),
+    (re.compile(r'^(?:how|what|why|where|which|who|when|whats|what\'s)\b'), -2.5),
+    (re.compile(r'^(?:is|are|does|do|did|can|could|should|would|will|has|have)\b(?! you)'), -1.5),
+    (re.compile(r'^(?:explain|describe|summari[sz]e|show|list|tell me|walk me through|help me understand)\b'), -2.5),
+    (re.compile(r'\bhow (?:do|can|should|would) (?:i|we|one)\b'), -2.0),
+    (re.compile(r'\b(?:what does|what is|what are|is there|are there)\b'), -1.0),
+    (re.compile(r'^(?:hi|hello|hey|thanks|thank you)\b'), -3.0),
+    (re.compile(r'\?\s*$'), -1.0),
+]
+
+
+# ----------------------------------------------------------------------
+# Seed corpus for the hashed n-gram model
+# ----------------------------------------------------------------------
+SEED_EXAMPLES: List[Tuple[str, str]] = [
+    ("create a new django model for invoices", TASK),
+    ("add a serializer for the order model", TASK),
+    ("implement pagination on the products endpoint", TASK),
+    ("refactor the payment service into smaller functions", TASK),
+    ("fix the bug in the login view", TASK),
+    ("rename the user_id field to owner_id", TASK),
+    ("delete the unused helpers module", TASK),
+    ("remove the deprecated api endpoints", TASK),
+    ("update the settings to use postgres", TASK),
+    ("change the default page size to 50", TASK),
+    ("write unit tests for the auth views", TASK),
+    ("generate a migration for the new field", TASK),
+    ("add logging to the celery tasks", TASK),
+    ("please add a created_at timestamp to every model", TASK),
+    ("can you add validation to the signup serializer", TASK),
+    ("could you refactor views.py to use viewsets", TASK),
+    ("make the email field unique", TASK),
+    ("convert the function based views to class based views", TASK),
+    ("split models.py into a models package", TASK),
+    ("move the utils into a shared module", TASK),
+    ("build a crud api for customers", TASK),
+    ("set up a url route for the reports view", TASK),
+    ("wire the new viewset into the router", TASK),
+    ("introduce a service layer for orders", TASK),
+    ("replace the raw sql with the orm", TASK),
+    ("optimize the queryset in the dashboard view", TASK),
+    ("i want you to add soft delete to the article model", TASK),
+    ("go ahead and implement the changes", TASK),
+    ("add an endpoint that returns the user's orders", TASK),
+    ("write a management command to import csv files", TASK),
+    ("extract the permission checks into a mixin", TASK),
+    ("upgrade the serializer to include nested items", TASK),
+    ("apply the fix to all the viewsets", TASK),
+    ("create tests for the product model", TASK),
+    ("modify the invoice model to add a status field", TASK),
+    ("let's add caching to the product list", TASK),
+    ("add a foreign key from comment to post", TASK),
+    ("implement the missing delete method", TASK),
+    ("fix the failing test in test_orders.py", TASK),
+    ("write a docstring for every public function in services.py", TASK),
+    ("how does authentication work in this project", CHAT),
+    ("what models are defined in the billing app", CHAT),
+    ("why is the order view so slow", CHAT),
+    ("where is the user serializer defined", CHAT),
+    ("which endpoints use the product model", CHAT),
+    ("explain the payment flow", CHAT),
+    ("describe the architecture of this repository", CHAT),
+    ("list all the viewsets", CHAT),
+    ("show me the url patterns", CHAT),
+    ("what does the invoice model look like", CHAT),
+    ("is there a serializer for comments", CHAT),
+    ("are there any tests for the api", CHAT),
+    ("does the project use celery", CHAT),
+    ("how do i create a new model", CHAT),
+    ("how should i add a new endpoint", CHAT),
+    ("how can i fix this error", CHAT),
+    ("what is the difference between these two views", CHAT),
+    ("tell me about the order lifecycle", CHAT),
+    ("summarize the changes in the last run", CHAT),
+    ("walk me through the signup process", CHAT),
+    ("what would happen if i delete the cache table", CHAT),
+    ("can you explain how the router resolves urls", CHAT),
+    ("could you tell me which model owns the price field", CHAT),
+    ("what fields does the customer model have", CHAT),
+    ("who calls the send_email function", CHAT),
+    ("when is the nightly job triggered", CHAT),
+    ("hi", CHAT),
+    ("hello there", CHAT),
+    ("thanks that helps", CHAT),
+    ("what are the relationships between order and customer", CHAT),
+    ("is the email field required", CHAT),
+    ("help me understand the permissions setup", CHAT),
+    ("what's the entry point of the api", CHAT),
+    ("which files reference the product serializer", CHAT),
+    ("do we have rate limiting", CHAT),
+    ("should i use a viewset or an apiview here", CHAT),
+    ("what does this error mean", CHAT),
+    ("give me an overview of the codebase", CHAT),
+    ("how many models are there", CHAT),
+    ("is it safe to remove the legacy endpoint", CHAT),
+]
+
+
+# ----------------------------------------------------------------------
+# Features / model
+# ----------------------------------------------------------------------
+_TOKEN_RE = re.compile(r"[a-z0-9_']+|\?")
+
+
+def normalize(message: str) -> str:
+    return ' '.join(message.lower().split())
+
+
+def _bucket(feature: str) -> int:
+    return zlib.crc32(feature.encode('utf-8')) & _HASH_MASK
+
+
+def features(text: str) -> List[int]:
+    """Hashed word unigrams, bigrams and a start-of-message marker"""
+    tokens = _TOKEN_RE.findall(text)
+    if not tokens:
+        return []
+    feats = [_bucket('^' + tokens[0])]
+    feats.extend(_bucket('u:' + t) for t in tokens)
+    feats.extend(_bucket('b:' + a + ' ' + b) for a, b in zip(tokens, tokens[1:]))
+    return feats
+
+
+def _sigmoid(z: float) -> float:
+    if z >= 0:
+        return 1.0 / (1.0 + math.exp(-z))
+    e = math.exp(z)
+    return e / (1.0 + e)
+
+
+class HashedLogisticModel:
+    """Sparse logistic regression over hashed features (SGD, L2)"""
+
+    def __init__(self):
+        self.weights: Dict[int, float] = {}
+        self.bias = 0.0
+
+    def logit(self, feats: Iterable[int]) -> float:
+        w = self.weights
+        return self.bias + sum(w.get(f, 0.0) for f in feats)
+
+    def fit(self, examples: Iterable[Tuple[str, str]], epochs: int = 30, lr: float = 0.3, l2: float = 1e-4):
+        data = [(features(normalize(text)), 1.0 if label == TASK else 0.0) for text, label in examples]
+        w = self.weights
+        for epoch in range(epochs):
+            step = lr / (1.0 + 0.1 * epoch)
+            for feats, y in data:
+                g = _sigmoid(self.logit(feats)) - y
+                self.bias -= step * g
+                for f in feats:
+                    w[f] = w.get(f, 0.0) * (1.0 - step * l2) - step * g
+        return self
+
+
+class IntentClassifier:
+    def __init__(
+        self,
+        confidence: float = DEFAULT_CONFIDENCE,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        examples: Optional[Iterable[Tuple[str, str]]] = None,
+    ):
+        self.confidence = confidence
+        self.cache_size = cache_size
+        self._examples = list(examples) if examples is not None else SEED_EXAMPLES
+        self._model: Optional[HashedLogisticModel] = None
+        self._cache: "OrderedDict[str, IntentDecision]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def model(self) -> HashedLogisticModel:
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = HashedLogisticModel().fit(self._examples)
+        return self._model
+
+    def p_task(self, text: str) -> float:
+        z = self.model.logit(features(text))
+        for pattern, weight in RULES:
+            if pattern.search(text):
+                z += weight
+        return _sigmoid(z)
+
+    def classify_local(self, message: str) -> IntentDecision:
+        """Rules + model only; never calls out"""
+        p = self.p_task(normalize(message))
+        intent = TASK if p >= 0.5 else CHAT
+        return IntentDecision(intent=intent, confidence=max(p, 1.0 - p), source='local', p_task=p)
+
+    # -- cache ----------------------------------------------------------
+    def cached(self, key: str) -> Optional[IntentDecision]:
+        with self._lock:
+            decision = self._cache.get(key)
+            if decision is not None:
+                self._cache.move_to_end(key)
+        return decision
+
+    def remember(self, key: str, decision: IntentDecision) -> None:
+        if self.cache_size <= 0:
+            return
+        with self._lock:
+            self._cache[key] = decision
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    # -- entry point ----------------------------------------------------
+    async def classify(
+        self,
+        message: str,
+        llm_fallback: Optional[Callable[[str], Awaitable[Optional[str]]]] = None,
+        llm_timeout: float = DEFAULT_LLM_TIMEOUT,
+    ) -> IntentDecision:
+        """
+        Local decision when confident; otherwise await llm_fallback(message)
+        (must not block the loop) and keep the local decision if it fails.
+        """
+        key = normalize(message)
+        hit = self.cached(key)
+        if hit is not None:
+            return IntentDecision(hit.intent, hit.confidence, 'cache', hit.p_task)
+
+        decision = self.classify_local(message)
+        if decision.confidence < self.confidence and llm_fallback is not None:
+            try:
+                intent = await asyncio.wait_for(llm_fallback(message), timeout=llm_timeout)
+                if intent in (CHAT, TASK):
+                    decision = IntentDecision(intent, decision.confidence, 'llm', decision.p_task)
+            except Exception as e:
+                logger.warning(f"LLM intent fallback failed: {e}. Using local decision {decision.intent}.")
+
+        self.remember(key, decision)
+        return decision
+
+
+_classifier: Optional[IntentClassifier] = None
+
+
+def get_intent_classifier() -> IntentClassifier:
+    global _classifier
+    if _classifier is None:
+        from django.conf import settings
+        _classifier = IntentClassifier(
+            confidence=getattr(settings, 'INTENT_CONFIDENCE', DEFAULT_CONFIDENCE),
+            cache_size=getattr(settings, 'INTENT_CACHE_SIZE', DEFAULT_CACHE_SIZE),
+        )
+    return _classifier
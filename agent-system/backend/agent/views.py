@@ -4,7 +4,6 @@ Django REST Framework Views for Agent API
 
 import logging
 import os
-import time
 from datetime import timedelta
 from pathlib import Path
 
@@ -32,7 +31,7 @@ from agent.models import (
     SystemDocumentation,
     BenchmarkRun,
     BenchmarkRun,
-    AgentSession, ContextFile
+    AgentSession, ContextFile, CRSJob
 )
 from agent.serializers import (
     SystemListSerializer, SystemDetailSerializer,
@@ -46,16 +45,18 @@ from agent.serializers import (
     SystemDocumentationSerializer,
     LLMProviderSerializer, LLMModelSerializer,
     BenchmarkRunSerializer, BenchmarkRunCreateSerializer,
-    AgentSessionSerializer, AgentSessionListSerializer,ContextFileSerializer
+    AgentSessionSerializer, AgentSessionListSerializer,ContextFileSerializer,
+    CRSJobSerializer
 )
 from agent.services.github_client import GitHubClient
 from agent.services.knowledge_builder import KnowledgeBuilder
 from agent.services.question_generator import QuestionGenerator
 from agent.services.repo_analyzer import RepositoryAnalyzer
+from agent.services.context_files import extract_context_file, invalidate_conversation
 from agent.services.crs_runner import (
-    run_crs_pipeline, load_crs_payload, get_crs_summary,
-    run_crs_step, get_crs_step_status
+    load_crs_payload, get_crs_summary, get_crs_step_status
 )
+from agent.services.crs_scheduler import enqueue_crs_job, wait_for_job, cancel_crs_job
 from agent.services.benchmark_service import (
     get_benchmark_download,
     get_benchmark_report,
@@ -68,6 +69,39 @@ from llm.router import get_llm_router
 
 logger = logging.getLogger(__name__)
 
+CRS_STEPS = ('blueprints', 'artifacts', 'relationships', 'impact')
+
+
+def _crs_wait_seconds(request):
+    """
+    `wait` (body or query): block up to N seconds for the job; true -> the cap.
+    Capped by CRS_JOB_MAX_WAIT, since a waiting request holds a worker thread.
+    """
+    cap = float(getattr(settings, 'CRS_JOB_MAX_WAIT', 30.0))
+    raw = request.data.get('wait') if hasattr(request, 'data') else None
+    if raw is None:
+        raw = request.query_params.get('wait')
+    if raw in (None, '', False, 'false', '0', 0):
+        return 0.0
+    if raw in (True, 'true', '1'):
+        return cap
+    try:
+        return max(0.0, min(float(raw), cap))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _crs_priority(request, default=CRSJob.PRIORITY_INTERACTIVE):
+    raw = request.data.get('priority') if hasattr(request, 'data') else None
+    if raw == 'bulk':
+        return CRSJob.PRIORITY_BULK
+    if raw == 'interactive':
+        return CRSJob.PRIORITY_INTERACTIVE
+    try:
+        return int(raw) if raw is not None else default
+    except (TypeError, ValueError):
+        return default
+
 
 @method_decorator(csrf_exempt, name='dispatch')
 class SystemViewSet(viewsets.ModelViewSet):
@@ -88,6 +122,33 @@ class SystemViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    @decorators.action(detail=True, methods=['post'], url_path='crs/reindex')
+    def crs_reindex(self, request, pk=None):
+        """
+        Queue a CRS pipeline for every cloned repository of the system.
+        Jobs run in parallel (one per repository) at bulk priority, behind
+        interactive requests.
+        """
+        system = self.get_object()
+        force = bool(request.data.get('force', False))
+        jobs, skipped = [], []
+        for repository in system.repositories.all():
+            if not repository.clone_path or not os.path.isdir(repository.clone_path):
+                skipped.append(repository.name)
+                continue
+            job, _ = enqueue_crs_job(
+                repository,
+                kind='pipeline',
+                force=force,
+                priority=_crs_priority(request, default=CRSJob.PRIORITY_BULK),
+                user=request.user,
+            )
+            jobs.append(job)
+        return Response(
+            {'jobs': CRSJobSerializer(jobs, many=True).data, 'skipped_not_cloned': skipped},
+            status=status.HTTP_202_ACCEPTED
+        )
+
 
 class RepositoryViewSet(viewsets.ModelViewSet):
     """
@@ -295,16 +356,13 @@ class RepositoryViewSet(viewsets.ModelViewSet):
                     repository.system.status = 'ready'
                     repository.system.save(update_fields=["status"])
 
-            repository.status = 'crs_running'
-            repository.save(update_fields=["status"])
-
-            crs_summary = run_crs_pipeline(repository)
+            job, _ = enqueue_crs_job(repository, kind='pipeline', user=request.user)
 
             return Response({
                 'message': 'Answers submitted successfully',
                 'config': config,
                 'knowledge_items': len(knowledge_items),
-                'crs': crs_summary
+                'crs_job': CRSJobSerializer(job).data
             })
 
         except Exception as e:
@@ -477,12 +535,18 @@ class RepositoryViewSet(viewsets.ModelViewSet):
                     'message': 'Please clone the repository first using /clone/ endpoint'
                 }, status=status.HTTP_400_BAD_REQUEST)
 
-            repository.status = 'crs_running'
-            repository.save(update_fields=["status"])
-
-            crs_summary = run_crs_pipeline(repository)
-
-            return Response({'message': 'CRS pipeline complete', 'crs': crs_summary})
+            job, created = enqueue_crs_job(
+                repository,
+                kind='pipeline',
+                force=bool(request.data.get('force', False)),
+                priority=_crs_priority(request),
+                user=request.user,
+            )
+            return self._crs_job_response(
+                job, created, _crs_wait_seconds(request),
+                done_message='CRS pipeline complete', queued_message='CRS pipeline queued',
+                result_key='crs',
+            )
 
         except Exception as e:
             logger.error("CRS pipeline failed: %s", e, exc_info=True)
@@ -529,20 +593,25 @@ class RepositoryViewSet(viewsets.ModelViewSet):
                     'clone_path': clone_path
                 }, status=status.HTTP_400_BAD_REQUEST)
 
-            repository.status = 'crs_running'
-            repository.save(update_fields=["status"])
-
-            crs_summary = run_crs_pipeline(repository)
-
-            return Response({
-                'message': 'Repository ingested successfully',
-                'clone': {
-                    'path': clone_path,
-                    'python_files': len(py_files),
-                    'commit_sha': repository.last_commit_sha
-                },
-                'crs': crs_summary
-            })
+            job, created = enqueue_crs_job(
+                repository,
+                kind='pipeline',
+                force=True,
+                priority=_crs_priority(request),
+                user=request.user,
+            )
+            response = self._crs_job_response(
+                job, created, _crs_wait_seconds(request),
+                done_message='Repository ingested successfully',
+                queued_message='Repository cloned; CRS pipeline queued',
+                result_key='crs',
+            )
+            response.data['clone'] = {
+                'path': clone_path,
+                'python_files': len(py_files),
+                'commit_sha': repository.last_commit_sha
+            }
+            return response
 
         except Exception as e:
             logger.error("CRS ingest failed: %s", e, exc_info=True)
@@ -593,8 +662,22 @@ class RepositoryViewSet(viewsets.ModelViewSet):
                     'message': 'Please clone the repository first'
                 }, status=status.HTTP_400_BAD_REQUEST)
 
-            result = run_crs_step(repository, step_name, force=force)
-            return Response({'message': f'Step {step_name} completed', 'result': result})
+            if step_name not in CRS_STEPS and not step_name.startswith('verification_'):
+                raise ValueError(f"Unknown step: {step_name}")
+
+            job, created = enqueue_crs_job(
+                repository,
+                kind='step',
+                step_name=step_name,
+                force=force,
+                priority=_crs_priority(request),
+                user=request.user,
+            )
+            return self._crs_job_response(
+                job, created, _crs_wait_seconds(request),
+                done_message=f'Step {step_name} completed', queued_message=f'Step {step_name} queued',
+                result_key='result',
+            )
 
         except ValueError as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
@@ -602,6 +685,36 @@ class RepositoryViewSet(viewsets.ModelViewSet):
             logger.error("Step %s failed: %s", step_name, e, exc_info=True)
             return Response({'error': str(e), 'type': type(e).__name__}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    def _crs_job_response(self, job, created, wait, *, done_message, queued_message, result_key):
+        """202 while the job is queued/running; the job result (or error) once it is done."""
+        if wait:
+            job = wait_for_job(job, timeout=wait)
+        payload = {'job': CRSJobSerializer(job).data, 'coalesced': not created}
+        if job.status == 'completed':
+            return Response({'message': done_message, result_key: job.result, **payload})
+        if job.status in ('failed', 'cancelled'):
+            return Response(
+                {'error': job.error_message or job.status, 'type': 'CRSJobFailed', **payload},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        return Response({'message': queued_message, **payload}, status=status.HTTP_202_ACCEPTED)
+
+    @decorators.action(detail=True, methods=['get'], url_path='crs/jobs')
+    def crs_jobs(self, request, pk=None, system_pk=None):
+        repository = self.get_object()
+        jobs = CRSJob.objects.filter(repository=repository).select_related('repository')[:50]
+        return Response(CRSJobSerializer(jobs, many=True).data)
+
+    @decorators.action(detail=True, methods=['get', 'delete'], url_path='crs/jobs/(?P<job_id>[0-9a-f-]+)')
+    def crs_job_detail(self, request, pk=None, system_pk=None, job_id=None):
+        repository = self.get_object()
+        job = get_object_or_404(CRSJob, repository=repository, job_id=job_id)
+        if request.method == 'DELETE':
+            if not cancel_crs_job(job):
+                return Response({'error': f'Job is {job.status}; only queued jobs can be cancelled'},
+                                status=status.HTTP_409_CONFLICT)
+        return Response(CRSJobSerializer(job).data)
+
     @decorators.action(detail=True, methods=['get'], url_path='crs/steps/status')
     def crs_steps_status(self, request, pk=None, system_pk=None):
         repository = self.get_object()
@@ -613,11 +726,17 @@ class RepositoryViewSet(viewsets.ModelViewSet):
 
     @decorators.action(detail=True, methods=['get'], url_path='crs/events')
     def crs_events_stream(self, request, pk=None, system_pk=None):
+        """
+        Sync (WSGI) fallback for the CRS event stream.
+        Under ASGI this URL is served by agent.consumers.CRSEventStreamConsumer.
+        """
         from django.http import StreamingHttpResponse
 
         repository = self.get_object()
         broadcaster = get_broadcaster()
 
+        last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+
         since = request.GET.get('since')
         if since:
             try:
@@ -626,20 +745,25 @@ class RepositoryViewSet(viewsets.ModelViewSet):
                 since = None
 
         def event_stream():
-            if since is not None:
+            last_seq = broadcaster.last_seq(repository.id)
+            if last_event_id and last_event_id.strip().isdigit():
+                last_seq = int(last_event_id.strip())
+            elif since is not None:
                 past_events = broadcaster.get_events(repository.id, since=since)
                 for event in past_events:
                     yield event.to_sse().encode('utf-8')
+                if past_events:
+                    last_seq = past_events[-1].seq
 
-            last_check = time.time()
             while True:
-                new_events = broadcaster.get_events(repository.id, since=last_check)
+                # Blocks until the broadcaster notifies (no polling); keepalive on timeout
+                new_events = broadcaster.wait_for_events(repository.id, after_seq=last_seq, timeout=15.0)
+                if not new_events:
+                    yield b": keepalive\n\n"
+                    continue
                 for event in new_events:
                     yield event.to_sse().encode('utf-8')
-
-                last_check = time.time()
-                yield b": keepalive\n\n"
-                time.sleep(0.5)
+                last_seq = new_events[-1].seq
 
         response = StreamingHttpResponse(event_stream(), content_type='text/event-stream')
         response['Cache-Control'] = 'no-cache'
@@ -1771,15 +1895,32 @@ class ContextFileViewSet(viewsets.ModelViewSet):
         else:
             # Serializer should have validated agent_profile if provided in request
             context_file = serializer.save(**save_kwargs)
-            
-            # Check if linked to agent (either via request or passed validation)
-            if context_file.agent_profile:
-                 self.analyze_file(context_file)
+
+        # ✅ NEW: extract text once here; chat turns reuse the stored chunks
+        extract_context_file(context_file)
+        invalidate_conversation(context_file.conversation_id)
+
+        # Check if linked to agent (either via request or passed validation)
+        if 'conversation_pk' not in self.kwargs and context_file.agent_profile:
+            self.analyze_file(context_file)
+
+    def perform_update(self, serializer):
+        context_file = serializer.save()
+        if 'file' in serializer.validated_data:
+            extract_context_file(context_file)
+        invalidate_conversation(context_file.conversation_id)
+
+    def perform_destroy(self, instance):
+        conversation_id = instance.conversation_id
+        instance.delete()
+        invalidate_conversation(conversation_id)
 
     def analyze_file(self, context_file):
         """Helper to run analysis on a file"""
         try:
-            content = context_file.file.read().decode('utf-8')
+            if context_file.extracted_at is None:
+                extract_context_file(context_file)
+            content = '\n'.join(context_file.text_chunks or [])
             
             # Use LLM to analyze
             from llm.router import get_llm_router, LLMConfig
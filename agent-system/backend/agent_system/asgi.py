@@ -13,13 +13,18 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 # is populated before importing code that may import ORM models.
 django_asgi_app = get_asgi_application()
 
+from django.urls import re_path
 from channels.routing import ProtocolTypeRouter, URLRouter
 from channels.auth import AuthMiddlewareStack
 import agent.routing
 
 application = ProtocolTypeRouter({
-    # Django's ASGI application to handle traditional HTTP requests
-    "http": django_asgi_app,
+    # Async streaming endpoints (SSE) first; everything else goes to Django
+    "http": URLRouter(
+        agent.routing.http_urlpatterns + [
+            re_path(r'', django_asgi_app),
+        ]
+    ),
 
     # WebSocket chat handler
     "websocket": AuthMiddlewareStack(
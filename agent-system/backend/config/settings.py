@@ -60,11 +60,52 @@ WSGI_APPLICATION = 'config.wsgi.application'
 ASGI_APPLICATION = 'agent_system.asgi.application'
 
 # Channels configuration
-CHANNEL_LAYERS = {
-    'default': {
-        'BACKEND': 'channels.layers.InMemoryChannelLayer'
-    }
-}
+# Multi-worker deployments: share websocket groups and CRS pipeline events
+# across processes, e.g. redis://localhost:6379/0 (or sqlite:////tmp/bus.sqlite3
+# on a single host). Unset -> in-memory (single process).
+from agent.channel_layers import channel_layers_from_url  # noqa: E402
+
+CHANNEL_LAYERS = channel_layers_from_url(os.getenv('CHANNEL_LAYER_URL', ''))
+CRS_EVENT_BUS_URL = os.getenv('CRS_EVENT_BUS_URL', '')  # read by crs core.events.get_broadcaster()
+
+# CRS job scheduler (agent.services.crs_scheduler)
+# embedded: the web process runs a dispatcher + process pool on first enqueue
+# external: run `python manage.py crs_worker` (set CRS_EVENT_BUS_URL so job
+#           events reach SSE clients of the web workers)
+CRS_SCHEDULER_MODE = os.getenv('CRS_SCHEDULER_MODE', 'embedded')
+CRS_SCHEDULER_WORKERS = int(os.getenv('CRS_SCHEDULER_WORKERS', '0')) or None  # None -> os.cpu_count()
+CRS_JOB_MAX_ATTEMPTS = int(os.getenv('CRS_JOB_MAX_ATTEMPTS', '3'))
+# longest a crs/run or step request may block on its job (`wait`); clients follow
+# the job via crs/jobs/<id> or the events stream instead
+CRS_JOB_MAX_WAIT = float(os.getenv('CRS_JOB_MAX_WAIT', '30'))
+CRS_PROFILE = os.getenv('CRS_PROFILE', 'False') == 'True'  # per-step cProfile/stack samples in run dirs
+
+# CRS query daemon (`python cli.py daemon`): unix:///path/crs.sock or http://host:port.
+# Empty -> queries run in-process (each web worker holds its own indexes).
+CRS_DAEMON_URL = os.getenv('CRS_DAEMON_URL', '')
+CRS_DAEMON_TIMEOUT = float(os.getenv('CRS_DAEMON_TIMEOUT', '10'))
+
+# Parsed CRS payloads shared by chat/tools/views in each process
+# (agent.services.crs_payload_cache); LRU across repositories, by JSON size on disk.
+CRS_PAYLOAD_CACHE_MB = int(os.getenv('CRS_PAYLOAD_CACHE_MB', '512'))
+
+# CPU-only semantic retrieval merged with keyword search in CRSRetriever
+# (agent.services.crs_embeddings; needs numpy). CRS_EMBEDDING_MODEL is a local
+# model path for the onnx / sentence embedders.
+CRS_SEMANTIC_SEARCH = os.getenv('CRS_SEMANTIC_SEARCH', 'True') == 'True'
+CRS_EMBEDDER = os.getenv('CRS_EMBEDDER', 'hashed')  # hashed | onnx | sentence
+CRS_EMBEDDING_MODEL = os.getenv('CRS_EMBEDDING_MODEL', '')
+CRS_EMBEDDING_DIM = int(os.getenv('CRS_EMBEDDING_DIM', '384'))
+CRS_SEMANTIC_WEIGHT = float(os.getenv('CRS_SEMANTIC_WEIGHT', '0.4'))  # share of the fused score
+CRS_IVF_MIN_ROWS = int(os.getenv('CRS_IVF_MIN_ROWS', '50000'))  # brute force below this
+CRS_IVF_NPROBE = int(os.getenv('CRS_IVF_NPROBE', '8'))
+
+# Repository chat CHAT/TASK routing (agent.services.intent_classifier): decided
+# locally; the LLM is asked only below INTENT_CONFIDENCE (0.5-1.0).
+INTENT_CONFIDENCE = float(os.getenv('INTENT_CONFIDENCE', '0.8'))
+INTENT_LLM_FALLBACK = os.getenv('INTENT_LLM_FALLBACK', 'True') == 'True'
+INTENT_LLM_TIMEOUT = float(os.getenv('INTENT_LLM_TIMEOUT', '10'))
+INTENT_CACHE_SIZE = int(os.getenv('INTENT_CACHE_SIZE', '2048'))
 
 DATABASES = {
     'default': {
@@ -5,7 +5,9 @@ Anthropic Client - Minimal implementation
 
 import os
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, List, AsyncIterator
+
+from llm.http_pool import get_async_client, get_sync_httpx, loop_cached
 
 logger = logging.getLogger(__name__)
 
@@ -34,7 +36,36 @@ class AnthropicClient:
         if not self.api_key:
             raise ValueError("ANTHROPIC_API_KEY not set")
         
-        self.client = anthropic.Anthropic(api_key=self.api_key)
+        # shared keep-alive pool (llm.http_pool) instead of one per client
+        self.client = anthropic.Anthropic(api_key=self.api_key, http_client=get_sync_httpx('anthropic'))
+    
+    @property
+    def async_client(self):
+        """AsyncAnthropic on the shared async pool of the running event loop"""
+        return loop_cached(
+            self,
+            'anthropic',
+            lambda: anthropic.AsyncAnthropic(api_key=self.api_key, http_client=get_async_client('anthropic'))
+        )
+    
+    def _split_messages(self, messages: List[Dict[str, str]], json_mode: bool):
+        """Separate system messages from the conversation (Claude takes system separately)"""
+        system_msg = ""
+        conv_messages = []
+        
+        for msg in messages:
+            if msg.get("role") == "system":
+                system_msg += msg.get("content", "") + "\n"
+            else:
+                conv_messages.append({
+                    "role": msg.get("role"),
+                    "content": msg.get("content")
+                })
+        
+        # Add JSON instruction to system if needed
+        if json_mode:
+            system_msg += "\nYou must respond with valid JSON only. No markdown, no other text."
+        return system_msg, conv_messages
     
     def query(
         self,
@@ -59,22 +90,7 @@ class AnthropicClient:
             }
         """
         
-        # Separate system message from conversation
-        system_msg = ""
-        conv_messages = []
-        
-        for msg in messages:
-            if msg.get("role") == "system":
-                system_msg += msg.get("content", "") + "\n"
-            else:
-                conv_messages.append({
-                    "role": msg.get("role"),
-                    "content": msg.get("content")
-                })
-        
-        # Add JSON instruction to system if needed
-        if json_mode:
-            system_msg += "\nYou must respond with valid JSON only. No markdown, no other text."
+        system_msg, conv_messages = self._split_messages(messages, json_mode)
         
         try:
             logger.info(f"Querying Claude: {self.model}")
@@ -118,14 +134,107 @@ class AnthropicClient:
         max_tokens: int = None,
         temperature: float = None
     ):
+        """
+        Query Claude with streaming response
+
+        Yields:
+            Chunks of response text as they arrive
+        """
         self.last_usage = None
-        result = self.query(
-            messages=messages,
-            json_mode=json_mode,
-            max_tokens=max_tokens,
-            temperature=temperature
-        )
-        yield result.get("content", "")
+        system_msg, conv_messages = self._split_messages(messages, json_mode)
+
+        kwargs = {
+            "model": self.model,
+            "max_tokens": max_tokens or self.max_tokens,
+            "temperature": temperature or self.temperature,
+            "messages": conv_messages,
+        }
+        if system_msg:
+            kwargs["system"] = system_msg
+
+        try:
+            logger.info(f"Streaming from Claude: {self.model}")
+            with self.client.messages.stream(**kwargs) as stream:
+                for text in stream.text_stream:
+                    if text:
+                        yield text
+                final = stream.get_final_message()
+            self.last_usage = {
+                "input_tokens": final.usage.input_tokens,
+                "output_tokens": final.usage.output_tokens,
+                "total_tokens": final.usage.input_tokens + final.usage.output_tokens
+            }
+        except Exception as e:
+            logger.error(f"Anthropic streaming error: {e}")
+            raise RuntimeError(f"Claude API error: {e}")
+    
+    async def aquery(
+        self,
+        messages: List[Dict[str, str]],
+        json_mode: bool = False,
+        max_tokens: int = None,
+        temperature: float = None
+    ) -> Dict[str, Any]:
+        """Async query() (AsyncAnthropic over the pooled connection)"""
+        system_msg, conv_messages = self._split_messages(messages, json_mode)
+        kwargs = {
+            "model": self.model,
+            "max_tokens": max_tokens or self.max_tokens,
+            "temperature": temperature or self.temperature,
+            "messages": conv_messages,
+        }
+        if system_msg:
+            kwargs["system"] = system_msg
+        try:
+            logger.info(f"Querying Claude (async): {self.model}")
+            response = await self.async_client.messages.create(**kwargs)
+            usage = self._usage(response.usage)
+            self.last_usage = usage
+            return {
+                "content": response.content[0].text,
+                "usage": usage
+            }
+        except Exception as e:
+            logger.error(f"Anthropic error: {e}")
+            raise RuntimeError(f"Claude API error: {e}")
+    
+    async def aquery_stream(
+        self,
+        messages: List[Dict[str, str]],
+        json_mode: bool = False,
+        max_tokens: int = None,
+        temperature: float = None
+    ) -> AsyncIterator[str]:
+        """Async query_stream(): yields chunks as they arrive, no worker thread"""
+        self.last_usage = None
+        system_msg, conv_messages = self._split_messages(messages, json_mode)
+        kwargs = {
+            "model": self.model,
+            "max_tokens": max_tokens or self.max_tokens,
+            "temperature": temperature or self.temperature,
+            "messages": conv_messages,
+        }
+        if system_msg:
+            kwargs["system"] = system_msg
+        try:
+            logger.info(f"Streaming from Claude (async): {self.model}")
+            async with self.async_client.messages.stream(**kwargs) as stream:
+                async for text in stream.text_stream:
+                    if text:
+                        yield text
+                final = await stream.get_final_message()
+            self.last_usage = self._usage(final.usage)
+        except Exception as e:
+            logger.error(f"Anthropic streaming error: {e}")
+            raise RuntimeError(f"Claude API error: {e}")
+    
+    @staticmethod
+    def _usage(usage) -> Dict[str, int]:
+        return {
+            "input_tokens": usage.input_tokens,
+            "output_tokens": usage.output_tokens,
+            "total_tokens": usage.input_tokens + usage.output_tokens
+        }
     
     def health_check(self) -> bool:
         """Check if API key works"""
@@ -0,0 +1,366 @@
+# llm/cache.py
+"""
+Content-addressed LLM response cache (opt-in, SQLite)
+
+Identical requests - benchmark reruns, question generation, knowledge
+extraction, intent fallbacks - are answered from disk instead of the model.
+Entries are keyed on sha256(provider, model, messages, json_mode,
+temperature, max_tokens), with the effective max_tokens/temperature (the
+client's defaults fill in None).
+
+LLMRouter wraps every client it hands out (local_client, cloud_client,
+client_for_config) in CachedClient when the cache is enabled:
+
+  - query()/aquery():                return the stored response; every
+                                     result carries 'cached': True | False
+  - query_stream()/aquery_stream():  replay the stored chunks; a miss is
+                                     stored only once the stream completes.
+                                     Pass outcome={} to get 'cache' ('hit' |
+                                     'miss') and 'usage' for that call
+
+The outcome is reported per call, not on the client: one CachedClient is
+shared by every chat using the same provider/model.
+
+Settings (env):
+  LLM_CACHE              'True' to enable (default off)
+  LLM_CACHE_PATH         SQLite file (default <backend>/llm_cache.sqlite3)
+  LLM_CACHE_TTL          seconds an entry stays valid (default 7 days, 0 = forever)
+  LLM_CACHE_MAX_ENTRIES  LRU bound on the number of entries (default 10000)
+
+Cache failures never fail a request: they are logged and treated as misses.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CACHE_ENABLED = os.getenv('LLM_CACHE', 'False') == 'True'
+CACHE_PATH = os.getenv('LLM_CACHE_PATH') or str(Path(__file__).resolve().parent.parent / 'llm_cache.sqlite3')
+CACHE_TTL = float(os.getenv('LLM_CACHE_TTL', str(7 * 24 * 3600)))
+CACHE_MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', '10000'))
+
+# evict at most every N writes (plus once on open)
+_EVICT_EVERY = 64
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key         TEXT PRIMARY KEY,
+    provider    TEXT,
+    model       TEXT,
+    content     TEXT NOT NULL,
+    chunks      TEXT,
+    usage       TEXT,
+    created_at  REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    hits        INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache (accessed_at);
+"""
+
+
+def cache_key(
+    provider: str,
+    model: Optional[str],
+    messages: List[Dict[str, Any]],
+    json_mode: bool,
+    temperature: Optional[float],
+    max_tokens: Optional[int],
+) -> str:
+    payload = json.dumps(
+        [provider, model, messages, bool(json_mode), temperature, max_tokens],
+        sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=str,
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+@dataclass
+class CacheEntry:
+    content: str
+    chunks: Optional[List[str]] = None
+    usage: Optional[Dict[str, Any]] = None
+
+    def replay(self) -> List[str]:
+        if self.chunks:
+            return self.chunks
+        return [self.content] if self.content else []
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    writes: int = 0
+    evictions: int = 0
+    errors: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + n)
+
+    def to_dict(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses, 'writes': self.writes,
+                'evictions': self.evictions, 'errors': self.errors}
+
+
+class LLMCache:
+    """SQLite store with TTL expiry and LRU (accessed_at) eviction; one connection per thread"""
+
+    def __init__(self, path: str = CACHE_PATH, ttl: float = CACHE_TTL, max_entries: int = CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+        self._local = threading.local()
+        self._writes = 0
+        self._write_lock = threading.Lock()
+        with self._conn() as conn:
+            conn.executescript(_SCHEMA)
+        self.evict()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            if self.path != ':memory:':
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        try:
+            conn = self._conn()
+            row = conn.execute(
+                'SELECT content, chunks, usage, created_at FROM llm_cache WHERE key = ?', (key,)
+            ).fetchone()
+            now = time.time()
+            if row is not None and self.ttl > 0 and row[3] < now - self.ttl:
+                with conn:
+                    conn.execute('DELETE FROM llm_cache WHERE key = ?', (key,))
+                self.stats.add('evictions')
+                row = None
+            if row is None:
+                self.stats.add('misses')
+                return None
+            with conn:
+                conn.execute(
+                    'UPDATE llm_cache SET accessed_at = ?, hits = hits + 1 WHERE key = ?', (now, key)
+                )
+            self.stats.add('hits')
+            return CacheEntry(
+                content=row[0],
+                chunks=json.loads(row[1]) if row[1] else None,
+                usage=json.loads(row[2]) if row[2] else None,
+            )
+        except Exception as e:
+            self.stats.add('errors')
+            logger.warning(f"LLM cache read failed: {e}")
+            return None
+
+    def put(self, key: str, entry: CacheEntry, provider: str = '', model: Optional[str] = None) -> None:
+        try:
+            now = time.time()
+            conn = self._conn()
+            with conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO llm_cache '
+                    '(key, provider, model, content, chunks, usage, created_at, accessed_at, hits) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)',
+                    (
+                        key, provider, model or '', entry.content,
+                        json.dumps(entry.chunks) if entry.chunks else None,
+                        json.dumps(entry.usage, default=str) if entry.usage else None,
+                        now, now,
+                    ),
+                )
+            self.stats.add('writes')
+            with self._write_lock:
+                self._writes += 1
+                evict = self._writes % _EVICT_EVERY == 0
+            if evict:
+                self.evict()
+        except Exception as e:
+            self.stats.add('errors')
+            logger.warning(f"LLM cache write failed: {e}")
+
+    def evict(self) -> int:
+        """Drop expired entries, then the least recently used beyond max_entries"""
+        removed = 0
+        try:
+            conn = self._conn()
+            with conn:
+                if self.ttl > 0:
+                    removed += conn.execute(
+                        'DELETE FROM llm_cache WHERE created_at < ?', (time.time() - self.ttl,)
+                    ).rowcount
+                if self.max_entries > 0:
+                    removed += conn.execute(
+                        'DELETE FROM llm_cache WHERE key IN ('
+                        ' SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)',
+                        (self.max_entries,),
+                    ).rowcount
+        except Exception as e:
+            self.stats.add('errors')
+            logger.warning(f"LLM cache eviction failed: {e}")
+        if removed:
+            self.stats.add('evictions', removed)
+        return removed
+
+    def clear(self) -> None:
+        with self._conn() as conn:
+            conn.execute('DELETE FROM llm_cache')
+
+    def __len__(self) -> int:
+        return self._conn().execute('SELECT COUNT(*) FROM llm_cache').fetchone()[0]
+
+
+class CachedClient:
+    """
+    Wraps an llm client (OllamaClient, OpenAIClient, ...) with LLMCache.
+    Anything else (health_check, model, ...) is delegated to the client.
+    """
+
+    def __init__(self, client, cache: LLMCache, provider: str, model: Optional[str]):
+        self.client = client
+        self.cache = cache
+        self.provider = provider
+        # default-model configs pass model=None: key on the model the client really uses
+        self.model = model or getattr(client, 'model', None)
+
+    # llm.streaming.astream_client passes outcome={} through to the stream methods
+    accepts_outcome = True
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def _key(self, messages, json_mode=False, max_tokens=None, temperature=None) -> str:
+        return cache_key(
+            self.provider,
+            self.model,
+            messages,
+            json_mode,
+            temperature or getattr(self.client, 'temperature', None),
+            max_tokens or getattr(self.client, 'max_tokens', None),
+        )
+
+    @staticmethod
+    def _hit(entry: CacheEntry) -> Dict[str, Any]:
+        return {'content': entry.content, 'usage': entry.usage or {}, 'cached': True}
+
+    @staticmethod
+    def _report(outcome: Optional[Dict[str, Any]], cache: str, usage) -> None:
+        if outcome is not None:
+            outcome['cache'] = cache
+            outcome['usage'] = usage
+
+    def _store(self, key: str, content: str, usage, chunks: Optional[List[str]] = None) -> CacheEntry:
+        entry = CacheEntry(content=content, chunks=chunks, usage=usage)
+        self.cache.put(key, entry, self.provider, self.model)
+        return entry
+
+    # -- sync -----------------------------------------------------------
+    def query(self, messages, json_mode=False, max_tokens=None, temperature=None) -> Dict[str, Any]:
+        key = self._key(messages, json_mode, max_tokens, temperature)
+        entry = self.cache.get(key)
+        if entry is not None:
+            return self._hit(entry)
+        result = self.client.query(messages, json_mode=json_mode, max_tokens=max_tokens, temperature=temperature)
+        usage = result.get('usage') or getattr(self.client, 'last_usage', None)
+        self._store(key, result.get('content') or '', usage)
+        return {**result, 'cached': False}
+
+    def query_stream(
+        self, messages, json_mode=False, max_tokens=None, temperature=None,
+        outcome: Optional[Dict[str, Any]] = None,
+    ) -> Iterator[str]:
+        key = self._key(messages, json_mode, max_tokens, temperature)
+        entry = self.cache.get(key)
+        if entry is not None:
+            self._report(outcome, 'hit', entry.usage)
+            yield from entry.replay()
+            return
+        self._report(outcome, 'miss', None)
+        chunks = []
+        for chunk in self.client.query_stream(messages, json_mode=json_mode, max_tokens=max_tokens, temperature=temperature):
+            chunks.append(chunk)
+            yield chunk
+        # only reached when the stream ran to completion
+        usage = getattr(self.client, 'last_usage', None)
+        self._report(outcome, 'miss', usage)
+        self._store(key, ''.join(chunks), usage, chunks)
+
+    # -- async ----------------------------------------------------------
+    async def aquery(self, messages, json_mode=False, max_tokens=None, temperature=None) -> Dict[str, Any]:
+        key = self._key(messages, json_mode, max_tokens, temperature)
+        entry = await asyncio.to_thread(self.cache.get, key)
+        if entry is not None:
+            return self._hit(entry)
+        aquery = getattr(self.client, 'aquery', None)
+        kwargs = {'json_mode': json_mode, 'max_tokens': max_tokens, 'temperature': temperature}
+        if aquery is not None:
+            result = await aquery(messages, **kwargs)
+        else:
+            result = await asyncio.to_thread(self.client.query, messages, **kwargs)
+        usage = result.get('usage') or getattr(self.client, 'last_usage', None)
+        await asyncio.to_thread(self._store, key, result.get('content') or '', usage)
+        return {**result, 'cached': False}
+
+    async def aquery_stream(
+        self, messages, json_mode=False, max_tokens=None, temperature=None,
+        outcome: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator[str]:
+        from llm.streaming import astream_client
+
+        key = self._key(messages, json_mode, max_tokens, temperature)
+        entry = await asyncio.to_thread(self.cache.get, key)
+        if entry is not None:
+            self._report(outcome, 'hit', entry.usage)
+            for chunk in entry.replay():
+                yield chunk
+            return
+        self._report(outcome, 'miss', None)
+        inner: Dict[str, Any] = {}
+        chunks = []
+        async for chunk in astream_client(
+            self.client, messages, batch_ms=0, batch_chars=0, outcome=inner,
+            json_mode=json_mode, max_tokens=max_tokens, temperature=temperature,
+        ):
+            chunks.append(chunk)
+            yield chunk
+        self._report(outcome, 'miss', inner.get('usage'))
+        await asyncio.to_thread(self._store, key, ''.join(chunks), inner.get('usage'), chunks)
+
+
+_cache: Optional[LLMCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMCache]:
+    """Process-wide cache, or None when LLM_CACHE is off"""
+    global _cache
+    if not CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LLMCache()
+    return _cache
+
+
+def with_cache(client, provider: str, model: Optional[str]):
+    cache = get_llm_cache()
+    if cache is None or client is None:
+        return client
+    return CachedClient(client, cache, provider, model)
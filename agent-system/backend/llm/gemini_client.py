@@ -3,10 +3,11 @@
 Google Gemini Client - Minimal implementation
 """
 
+import json
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, List, AsyncIterator
 
-import requests
+from llm.http_pool import get_async_client, get_session
 
 logger = logging.getLogger(__name__)
 
@@ -39,30 +40,35 @@ class GeminiClient:
                 parts.append(f"User: {content}")
         return "\n\n".join(parts)
 
-    def query(
-        self,
-        messages: List[Dict[str, str]],
-        json_mode: bool = False,
-        max_tokens: int = None,
-        temperature: float = None
-    ) -> Dict[str, Any]:
-        prompt = self._build_prompt(messages)
+    def _payload(self, messages, json_mode, max_tokens, temperature) -> Dict[str, Any]:
         payload = {
-            "contents": [{"parts": [{"text": prompt}]}],
+            "contents": [{"parts": [{"text": self._build_prompt(messages)}]}],
             "generationConfig": {
                 "maxOutputTokens": max_tokens or self.max_tokens,
                 "temperature": temperature or self.temperature
             }
         }
-
         if json_mode:
             payload["generationConfig"]["responseMimeType"] = "application/json"
+        return payload
+
+    @staticmethod
+    def _text(data: Dict[str, Any]) -> str:
+        parts = ((data.get("candidates") or [{}])[0].get("content") or {}).get("parts") or []
+        return "".join(p.get("text", "") for p in parts)
 
+    def query(
+        self,
+        messages: List[Dict[str, str]],
+        json_mode: bool = False,
+        max_tokens: int = None,
+        temperature: float = None
+    ) -> Dict[str, Any]:
         try:
-            response = requests.post(
+            response = get_session("gemini").post(
                 f"{self.base_url}/models/{self.model}:generateContent",
                 params={"key": self.api_key},
-                json=payload,
+                json=self._payload(messages, json_mode, max_tokens, temperature),
                 timeout=120
             )
             response.raise_for_status()
@@ -73,10 +79,6 @@ class GeminiClient:
             return {
                 "content": content,
                 "usage": usage
-            self.last_usage = data.get("usageMetadata", {})
-            return {
-                "content": content,
-                "usage": data.get("usageMetadata", {})
             }
         except Exception as e:
             logger.error(f"Gemini error: {e}")
@@ -93,6 +95,66 @@ class GeminiClient:
         result = self.query(messages, json_mode=json_mode, max_tokens=max_tokens, temperature=temperature)
         yield result.get("content", "")
 
+    async def aquery(
+        self,
+        messages: List[Dict[str, str]],
+        json_mode: bool = False,
+        max_tokens: int = None,
+        temperature: float = None
+    ) -> Dict[str, Any]:
+        """Async query() over the shared pooled connection (llm.http_pool)"""
+        try:
+            response = await get_async_client("gemini").post(
+                f"{self.base_url}/models/{self.model}:generateContent",
+                params={"key": self.api_key},
+                json=self._payload(messages, json_mode, max_tokens, temperature)
+            )
+            response.raise_for_status()
+            data = response.json()
+            usage = data.get("usageMetadata", {})
+            self.last_usage = usage
+            return {
+                "content": data["candidates"][0]["content"]["parts"][0]["text"],
+                "usage": usage
+            }
+        except Exception as e:
+            logger.error(f"Gemini error: {e}")
+            raise RuntimeError(f"Gemini API error: {e}")
+
+    async def aquery_stream(
+        self,
+        messages: List[Dict[str, str]],
+        json_mode: bool = False,
+        max_tokens: int = None,
+        temperature: float = None
+    ) -> AsyncIterator[str]:
+        """Async streaming via streamGenerateContent (server-sent events)"""
+        self.last_usage = None
+        try:
+            client = get_async_client("gemini")
+            async with client.stream(
+                "POST",
+                f"{self.base_url}/models/{self.model}:streamGenerateContent",
+                params={"key": self.api_key, "alt": "sse"},
+                json=self._payload(messages, json_mode, max_tokens, temperature)
+            ) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line.startswith("data: "):
+                        continue
+                    try:
+                        data = json.loads(line[len("data: "):])
+                    except json.JSONDecodeError:
+                        continue
+                    if data.get("usageMetadata"):
+                        self.last_usage = data["usageMetadata"]
+                    chunk = self._text(data)
+                    if chunk:
+                        yield chunk
+        except Exception as e:
+            logger.error(f"Gemini streaming error: {e}")
+            raise RuntimeError(f"Gemini streaming error: {e}")
+
     def health_check(self) -> bool:
         try:
             self.query(messages=[{"role": "user", "content": "Hi"}], max_tokens=5)
@@ -0,0 +1,163 @@
+# llm/health.py
+"""
+Per-provider latency / error tracking and circuit breakers for LLMRouter
+
+Every routed call reports (key, latency, ok) here; key is "<target>:<model>",
+e.g. "local:deepseek-coder:6.7b". For each key we keep:
+
+  - EWMA latency and EWMA error rate
+  - a window of recent successful latencies (p95 for hedging)
+  - a circuit breaker:
+        closed     normal
+        open       BREAKER_FAILURES consecutive failures; skipped by auto
+                   routing for BREAKER_COOLDOWN seconds
+        half_open  cooldown over; one probe request is let through -
+                   success closes the breaker, failure re-opens it
+
+Only the probe moves an open breaker: calls admitted before it (still in
+flight when the breaker tripped) add their latency/error samples but
+neither close nor re-open it, and releasing them does not free the probe.
+
+Settings (env):
+  LLM_EWMA_ALPHA          smoothing factor (0.2)
+  LLM_BREAKER_FAILURES    consecutive failures that trip a breaker (5)
+  LLM_BREAKER_COOLDOWN    seconds before a half-open probe (30)
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Optional
+
+EWMA_ALPHA = float(os.getenv('LLM_EWMA_ALPHA', '0.2'))
+BREAKER_FAILURES = int(os.getenv('LLM_BREAKER_FAILURES', '5'))
+BREAKER_COOLDOWN = float(os.getenv('LLM_BREAKER_COOLDOWN', '30'))
+
+# recent successful latencies kept per key for the percentile
+_WINDOW = 128
+# samples needed before p95 is trusted
+_MIN_SAMPLES = 5
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+@dataclass
+class ProviderStats:
+    latency_ewma: Optional[float] = None
+    error_ewma: float = 0.0
+    calls: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    state: str = CLOSED
+    opened_at: float = 0.0
+    probe_in_flight: bool = False
+    latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=_WINDOW))
+
+    def p95(self) -> Optional[float]:
+        if len(self.latencies) < _MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+    def to_dict(self) -> Dict[str, object]:
+        p95 = self.p95()
+        return {
+            'state': self.state,
+            'latency_ewma_ms': None if self.latency_ewma is None else round(self.latency_ewma * 1000, 1),
+            'p95_ms': None if p95 is None else round(p95 * 1000, 1),
+            'error_rate': round(self.error_ewma, 3),
+            'calls': self.calls,
+            'failures': self.failures,
+        }
+
+
+class ProviderHealth:
+    def __init__(
+        self,
+        alpha: float = EWMA_ALPHA,
+        failure_threshold: int = BREAKER_FAILURES,
+        cooldown: float = BREAKER_COOLDOWN,
+    ):
+        self.alpha = alpha
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._stats: Dict[str, ProviderStats] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, key: str) -> ProviderStats:
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = ProviderStats()
+        return stats
+
+    def allow(self, key: str) -> bool:
+        """
+        May auto-routing use this key now? An open breaker whose cooldown
+        has passed turns half-open and admits exactly one probe.
+        """
+        with self._lock:
+            stats = self._get(key)
+            if stats.state == CLOSED:
+                return True
+            if stats.state == OPEN and time.monotonic() - stats.opened_at >= self.cooldown:
+                stats.state = HALF_OPEN
+            if stats.state == HALF_OPEN and not stats.probe_in_flight:
+                stats.probe_in_flight = True
+                return True
+            return False
+
+    @staticmethod
+    def _is_probe(stats: ProviderStats, started: float) -> bool:
+        # while half-open, a call that started after the breaker opened can only be the admitted probe
+        return stats.state == HALF_OPEN and stats.probe_in_flight and started >= stats.opened_at
+
+    def record(self, key: str, latency: float, ok: bool) -> None:
+        """Outcome of one call that took latency seconds."""
+        with self._lock:
+            stats = self._get(key)
+            a = self.alpha
+            now = time.monotonic()
+            probe = self._is_probe(stats, now - latency)
+            stats.calls += 1
+            stats.error_ewma = (1 - a) * stats.error_ewma + a * (0.0 if ok else 1.0)
+            if probe:
+                stats.probe_in_flight = False
+            if ok:
+                stats.latency_ewma = latency if stats.latency_ewma is None else (1 - a) * stats.latency_ewma + a * latency
+                stats.latencies.append(latency)
+                if stats.state == CLOSED or probe:
+                    stats.consecutive_failures = 0
+                    stats.state = CLOSED
+                return
+            stats.failures += 1
+            stats.consecutive_failures += 1
+            if probe or (stats.state == CLOSED and stats.consecutive_failures >= self.failure_threshold):
+                stats.state = OPEN
+                stats.opened_at = now
+
+    def release(self, key: str, started: float) -> None:
+        """
+        A call admitted by allow() at time.monotonic() `started` ended without an
+        outcome (cache hit, cancelled hedge loser, abandoned stream). Frees the
+        half-open probe slot only if that call was the probe.
+        """
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is not None and self._is_probe(stats, started):
+                stats.probe_in_flight = False
+
+    def state(self, key: str) -> str:
+        with self._lock:
+            return self._get(key).state
+
+    def p95(self, key: str) -> Optional[float]:
+        with self._lock:
+            return self._get(key).p95()
+
+    def snapshot(self) -> Dict[str, Dict[str, object]]:
+        with self._lock:
+            return {key: stats.to_dict() for key, stats in self._stats.items()}
@@ -0,0 +1,140 @@
+# llm/http_pool.py
+"""
+Shared pooled HTTP clients for the LLM providers
+
+Every client in llm/ used to open a fresh connection per request
+(requests.post). This module hands out one long-lived, keep-alive pool per
+provider instead:
+
+  - get_session(provider):      requests.Session for the sync query()/query_stream()
+  - get_async_client(provider): httpx.AsyncClient for aquery()/aquery_stream();
+                                one per (provider, event loop), since httpx
+                                connections belong to the loop that opened them
+  - get_sync_httpx(provider):   httpx.Client (SDKs that take an http_client)
+
+HTTP/2 is used for the cloud providers when the optional `h2` package is
+installed (pip install httpx[http2]); Ollama is plain HTTP/1.1.
+
+Limits (env):
+  LLM_MAX_CONNECTIONS              default max open connections per provider (100)
+  LLM_MAX_CONNECTIONS_<PROVIDER>   per provider, e.g. LLM_MAX_CONNECTIONS_OLLAMA=8
+  LLM_MAX_KEEPALIVE                idle keep-alive connections kept per provider
+                                   (default: the connection limit, so bursts reuse sockets)
+  LLM_HTTP_TIMEOUT                 read timeout in seconds (120)
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import weakref
+from typing import Dict
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# providers whose APIs speak HTTP/2
+HTTP2_PROVIDERS = {'openai', 'anthropic', 'gemini'}
+
+DEFAULT_MAX_CONNECTIONS = int(os.getenv('LLM_MAX_CONNECTIONS', '100'))
+MAX_KEEPALIVE = int(os.getenv('LLM_MAX_KEEPALIVE', '0')) or None
+HTTP_TIMEOUT = float(os.getenv('LLM_HTTP_TIMEOUT', '120'))
+CONNECT_TIMEOUT = 10.0
+
+_lock = threading.Lock()
+_sessions: Dict[str, requests.Session] = {}
+_sync_httpx: Dict[str, httpx.Client] = {}
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]]" = weakref.WeakKeyDictionary()
+
+
+def max_connections(provider: str) -> int:
+    return int(os.getenv(f'LLM_MAX_CONNECTIONS_{provider.upper()}', DEFAULT_MAX_CONNECTIONS))
+
+
+def _use_http2(provider: str) -> bool:
+    return HTTP2_AVAILABLE and provider in HTTP2_PROVIDERS
+
+
+def _limits(provider: str) -> httpx.Limits:
+    limit = max_connections(provider)
+    keepalive = min(MAX_KEEPALIVE, limit) if MAX_KEEPALIVE else limit
+    return httpx.Limits(max_connections=limit, max_keepalive_connections=keepalive)
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(HTTP_TIMEOUT, connect=CONNECT_TIMEOUT)
+
+
+def get_session(provider: str) -> requests.Session:
+    """Shared keep-alive requests.Session for one provider (thread-safe to use)"""
+    session = _sessions.get(provider)
+    if session is None:
+        with _lock:
+            session = _sessions.get(provider)
+            if session is None:
+                limit = max_connections(provider)
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=limit, pool_block=True)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _sessions[provider] = session
+    return session
+
+
+def get_sync_httpx(provider: str) -> httpx.Client:
+    client = _sync_httpx.get(provider)
+    if client is None:
+        with _lock:
+            client = _sync_httpx.get(provider)
+            if client is None:
+                client = httpx.Client(http2=_use_http2(provider), limits=_limits(provider), timeout=_timeout())
+                _sync_httpx[provider] = client
+    return client
+
+
+def get_async_client(provider: str) -> httpx.AsyncClient:
+    """Shared httpx.AsyncClient for one provider on the running event loop"""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        per_loop = _async_clients.get(loop)
+        if per_loop is None:
+            per_loop = _async_clients[loop] = {}
+        client = per_loop.get(provider)
+        if client is None or client.is_closed:
+            client = per_loop[provider] = httpx.AsyncClient(
+                http2=_use_http2(provider), limits=_limits(provider), timeout=_timeout()
+            )
+    return client
+
+
+def loop_cached(owner: object, key: str, factory):
+    """
+    factory() built once per (owner, running event loop), e.g. an SDK async
+    client wrapping get_async_client(); kept on the owner.
+    """
+    loop = asyncio.get_running_loop()
+    cache = owner.__dict__.setdefault('_loop_cache', weakref.WeakKeyDictionary())
+    per_loop = cache.get(loop)
+    if per_loop is None:
+        per_loop = cache[loop] = {}
+    if key not in per_loop:
+        per_loop[key] = factory()
+    return per_loop[key]
+
+
+async def aclose_all() -> None:
+    """Close the async pools of the running loop (e.g. on ASGI shutdown)"""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        per_loop = _async_clients.pop(loop, {})
+    for client in per_loop.values():
+        await client.aclose()
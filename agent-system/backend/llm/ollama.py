@@ -4,9 +4,12 @@ Ollama Client - Minimal implementation for local LLM
 """
 
 import requests
+import httpx
 import json
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, List, AsyncIterator
+
+from llm.http_pool import get_async_client, get_session
 
 logger = logging.getLogger(__name__)
 
@@ -47,49 +50,22 @@ class OllamaClient:
             }
         """
 
-        # Build prompt from messages
-        prompt = self._build_prompt(messages, json_mode)
-
-        # Call Ollama API
         url = f"{self.base_url}/api/generate"
-
-        payload = {
-            "model": self.model,
-            "prompt": prompt,
-            "stream": False,
-            "options": {
-                "temperature": temperature or self.temperature,
-                "num_predict": max_tokens or self.max_tokens
-            }
-        }
-
-        if json_mode:
-            payload["format"] = "json"
+        payload = self._payload(messages, json_mode, max_tokens, temperature, stream=False)
 
         try:
             logger.info(f"Querying Ollama: {self.model}")
 
-            response = requests.post(url, json=payload, timeout=120)
+            response = get_session('ollama').post(url, json=payload, timeout=120)
             response.raise_for_status()
 
             data = response.json()
-            self.last_usage = {
-                "prompt_tokens": data.get("prompt_eval_count", 0),
-                "completion_tokens": data.get("eval_count", 0),
-                "total_tokens": data.get("prompt_eval_count", 0) + data.get("eval_count", 0)
-            }
-
-            usage = {
-                "prompt_tokens": data.get("prompt_eval_count", 0),
-                "completion_tokens": data.get("eval_count", 0),
-                "total_tokens": data.get("prompt_eval_count", 0) + data.get("eval_count", 0)
-            }
+            usage = self._usage(data)
             self.last_usage = usage
 
             return {
                 "content": data.get("response", ""),
-                "usage": usage,
-                "usage": self.last_usage
+                "usage": usage
             }
 
         except requests.exceptions.Timeout:
@@ -119,31 +95,14 @@ class OllamaClient:
             Chunks of response text as they arrive
         """
 
-        # Build prompt from messages
-        prompt = self._build_prompt(messages, json_mode)
-
-        # Call Ollama API with streaming
         url = f"{self.base_url}/api/generate"
-
-        payload = {
-            "model": self.model,
-            "prompt": prompt,
-            "stream": True,
-            "options": {
-                "temperature": temperature or self.temperature,
-                "num_predict": max_tokens or self.max_tokens
-            }
-        }
-
-        if json_mode:
-            payload["format"] = "json"
+        payload = self._payload(messages, json_mode, max_tokens, temperature, stream=True)
         self.last_usage = None
 
         try:
             logger.info(f"Streaming from Ollama: {self.model}")
-            self.last_usage = None
 
-            response = requests.post(url, json=payload, stream=True, timeout=120)
+            response = get_session('ollama').post(url, json=payload, stream=True, timeout=120)
             response.raise_for_status()
 
             # Stream chunks
@@ -155,9 +114,10 @@ class OllamaClient:
                         if chunk:
                             yield chunk
 
-                        # Check if done
+                        # Final chunk carries usage; keep reading to the end of the
+                        # body so the pooled connection can be reused
                         if data.get("done", False):
-                            break
+                            self.last_usage = self._usage(data)
 
                     except json.JSONDecodeError:
                         logger.warning(f"Failed to parse chunk: {line}")
@@ -170,6 +130,90 @@ class OllamaClient:
         except Exception as e:
             raise RuntimeError(f"Ollama streaming error: {e}")
     
+    async def aquery(
+        self,
+        messages: List[Dict[str, str]],
+        json_mode: bool = False,
+        max_tokens: int = None,
+        temperature: float = None
+    ) -> Dict[str, Any]:
+        """Async query() over the shared pooled connection (llm.http_pool)"""
+        payload = self._payload(messages, json_mode, max_tokens, temperature, stream=False)
+        try:
+            logger.info(f"Querying Ollama (async): {self.model}")
+            response = await get_async_client('ollama').post(f"{self.base_url}/api/generate", json=payload)
+            response.raise_for_status()
+            data = response.json()
+            usage = self._usage(data)
+            self.last_usage = usage
+            return {
+                "content": data.get("response", ""),
+                "usage": usage
+            }
+        except httpx.TimeoutException:
+            raise RuntimeError("Ollama request timed out (>120s)")
+        except httpx.ConnectError:
+            raise RuntimeError(f"Cannot connect to Ollama at {self.base_url}. Is it running?")
+        except Exception as e:
+            raise RuntimeError(f"Ollama error: {e}")
+
+    async def aquery_stream(
+        self,
+        messages: List[Dict[str, str]],
+        json_mode: bool = False,
+        max_tokens: int = None,
+        temperature: float = None
+    ) -> AsyncIterator[str]:
+        """Async query_stream(): yields chunks as they arrive, no worker thread"""
+        payload = self._payload(messages, json_mode, max_tokens, temperature, stream=True)
+        self.last_usage = None
+        try:
+            logger.info(f"Streaming from Ollama (async): {self.model}")
+            client = get_async_client('ollama')
+            async with client.stream("POST", f"{self.base_url}/api/generate", json=payload) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    try:
+                        data = json.loads(line)
+                    except json.JSONDecodeError:
+                        logger.warning(f"Failed to parse chunk: {line}")
+                        continue
+                    chunk = data.get("response", "")
+                    if chunk:
+                        yield chunk
+                    if data.get("done", False):
+                        self.last_usage = self._usage(data)
+        except httpx.TimeoutException:
+            raise RuntimeError("Ollama request timed out (>120s)")
+        except httpx.ConnectError:
+            raise RuntimeError(f"Cannot connect to Ollama at {self.base_url}. Is it running?")
+        except Exception as e:
+            raise RuntimeError(f"Ollama streaming error: {e}")
+
+    def _payload(self, messages, json_mode, max_tokens, temperature, stream: bool) -> Dict[str, Any]:
+        payload = {
+            "model": self.model,
+            "prompt": self._build_prompt(messages, json_mode),
+            "stream": stream,
+            "options": {
+                "temperature": temperature or self.temperature,
+                "num_predict": max_tokens or self.max_tokens
+            }
+        }
+        if json_mode:
+            payload["format"] = "json"
+        return payload
+
+    @staticmethod
+    def _usage(data: Dict[str, Any]) -> Dict[str, int]:
+        return {
+            "prompt_tokens": data.get("prompt_eval_count", 0),
+            "completion_tokens": data.get("eval_count", 0),
+            "total_tokens": data.get("prompt_eval_count", 0) + data.get("eval_count", 0)
+        }
+
     def _build_prompt(self, messages: List[Dict[str, str]], json_mode: bool) -> str:
         """Build prompt from messages"""
         
@@ -199,7 +243,7 @@ class OllamaClient:
         """Check if Ollama is accessible"""
         try:
             url = f"{self.base_url}/api/tags"
-            response = requests.get(url, timeout=5)
+            response = get_session('ollama').get(url, timeout=5)
             response.raise_for_status()
             
             # Check if our model is available
@@ -220,7 +264,7 @@ class OllamaClient:
         """List available models from Ollama"""
         try:
             url = f"{self.base_url}/api/tags"
-            response = requests.get(url, timeout=10)
+            response = get_session('ollama').get(url, timeout=10)
             response.raise_for_status()
 
             data = response.json()
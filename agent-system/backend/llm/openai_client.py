@@ -5,9 +5,9 @@ OpenAI Client - Minimal implementation
 
 import logging
 import json
-from typing import Dict, Any, List
+from typing import Dict, Any, List, AsyncIterator, Optional
 
-import requests
+from llm.http_pool import get_async_client, get_session
 
 logger = logging.getLogger(__name__)
 
@@ -27,32 +27,50 @@ class OpenAIClient:
         if not self.api_key:
             raise ValueError("OPENAI_API_KEY not set")
 
-    def query(
-        self,
-        messages: List[Dict[str, str]],
-        json_mode: bool = False,
-        max_tokens: int = None,
-        temperature: float = None
-    ) -> Dict[str, Any]:
+    def _payload(self, messages, json_mode, max_tokens, temperature, stream: bool = False) -> Dict[str, Any]:
         payload = {
             "model": self.model,
             "messages": messages,
             "max_tokens": max_tokens or self.max_tokens,
             "temperature": temperature or self.temperature
         }
+        if stream:
+            payload["stream"] = True
         if json_mode:
             payload["response_format"] = {"type": "json_object"}
+        return payload
 
-        headers = {
+    def _headers(self) -> Dict[str, str]:
+        return {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
 
+    @staticmethod
+    def _delta(line: str) -> Optional[str]:
+        """Text of one SSE line (None for keep-alives and [DONE]; the body is read to its end so the connection is reused)"""
+        if not line.startswith("data: "):
+            return None
+        data = line[len("data: "):].strip()
+        if data == "[DONE]":
+            return None
+        try:
+            return json.loads(data)["choices"][0]["delta"].get("content") or None
+        except Exception:
+            return None
+
+    def query(
+        self,
+        messages: List[Dict[str, str]],
+        json_mode: bool = False,
+        max_tokens: int = None,
+        temperature: float = None
+    ) -> Dict[str, Any]:
         try:
-            response = requests.post(
+            response = get_session("openai").post(
                 f"{self.base_url}/chat/completions",
-                headers=headers,
-                json=payload,
+                headers=self._headers(),
+                json=self._payload(messages, json_mode, max_tokens, temperature),
                 timeout=120
             )
             response.raise_for_status()
@@ -63,10 +81,6 @@ class OpenAIClient:
             return {
                 "content": content,
                 "usage": usage
-            self.last_usage = data.get("usage")
-            return {
-                "content": content,
-                "usage": data.get("usage", {})
             }
         except Exception as e:
             logger.error(f"OpenAI error: {e}")
@@ -79,30 +93,13 @@ class OpenAIClient:
         max_tokens: int = None,
         temperature: float = None
     ):
-        payload = {
-            "model": self.model,
-            "messages": messages,
-            "max_tokens": max_tokens or self.max_tokens,
-            "temperature": temperature or self.temperature,
-            "stream": True
-        }
-        if json_mode:
-            payload["response_format"] = {"type": "json_object"}
-
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-
-        try:
-            self.last_usage = None
         self.last_usage = None
 
         try:
-            response = requests.post(
+            response = get_session("openai").post(
                 f"{self.base_url}/chat/completions",
-                headers=headers,
-                json=payload,
+                headers=self._headers(),
+                json=self._payload(messages, json_mode, max_tokens, temperature, stream=True),
                 stream=True,
                 timeout=120
             )
@@ -111,24 +108,65 @@ class OpenAIClient:
             for line in response.iter_lines():
                 if not line:
                     continue
-                decoded = line.decode("utf-8")
-                if not decoded.startswith("data: "):
-                    continue
-                data = decoded.replace("data: ", "").strip()
-                if data == "[DONE]":
-                    break
-                chunk = None
-                try:
-                    payload = json.loads(data)
-                    chunk = payload["choices"][0]["delta"].get("content")
-                except Exception:
-                    chunk = None
+                chunk = self._delta(line.decode("utf-8"))
                 if chunk:
                     yield chunk
         except Exception as e:
             logger.error(f"OpenAI streaming error: {e}")
             raise RuntimeError(f"OpenAI streaming error: {e}")
 
+    async def aquery(
+        self,
+        messages: List[Dict[str, str]],
+        json_mode: bool = False,
+        max_tokens: int = None,
+        temperature: float = None
+    ) -> Dict[str, Any]:
+        """Async query() over the shared pooled connection (llm.http_pool)"""
+        try:
+            response = await get_async_client("openai").post(
+                f"{self.base_url}/chat/completions",
+                headers=self._headers(),
+                json=self._payload(messages, json_mode, max_tokens, temperature)
+            )
+            response.raise_for_status()
+            data = response.json()
+            usage = data.get("usage", {})
+            self.last_usage = usage
+            return {
+                "content": data["choices"][0]["message"]["content"],
+                "usage": usage
+            }
+        except Exception as e:
+            logger.error(f"OpenAI error: {e}")
+            raise RuntimeError(f"OpenAI API error: {e}")
+
+    async def aquery_stream(
+        self,
+        messages: List[Dict[str, str]],
+        json_mode: bool = False,
+        max_tokens: int = None,
+        temperature: float = None
+    ) -> AsyncIterator[str]:
+        """Async query_stream(): yields chunks as they arrive, no worker thread"""
+        self.last_usage = None
+        try:
+            client = get_async_client("openai")
+            async with client.stream(
+                "POST",
+                f"{self.base_url}/chat/completions",
+                headers=self._headers(),
+                json=self._payload(messages, json_mode, max_tokens, temperature, stream=True)
+            ) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    chunk = self._delta(line) if line else None
+                    if chunk:
+                        yield chunk
+        except Exception as e:
+            logger.error(f"OpenAI streaming error: {e}")
+            raise RuntimeError(f"OpenAI streaming error: {e}")
+
     def health_check(self) -> bool:
         try:
             self.query(messages=[{"role": "user", "content": "Hi"}], max_tokens=5)
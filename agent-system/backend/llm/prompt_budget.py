@@ -0,0 +1,284 @@
+# llm/prompt_budget.py
+"""
+Token-budgeted prompt assembly
+
+Chat prompts are built from sections (system instructions, tool
+definitions, CRS status, uploaded files, history, the user message). This
+module counts their tokens with the provider's tokenizer when one is
+available (tiktoken for OpenAI-compatible models, optional) or a fast
+estimator otherwise, and packs them into the model's budget:
+
+  - required sections are always kept whole
+  - the rest of the budget is shared by priority weight; a section needing
+    less than its share hands the surplus to the others (water-filling),
+    so low-weight sections are cut first
+  - a section is trimmed per its strategy: 'text' keeps head and tail,
+    'oldest' drops its oldest items first (history), 'each' gives every item
+    a fair share (files); sections squeezed below min_tokens are dropped
+
+    packed = PromptBudget.for_model('ollama', 'deepseek-coder:6.7b', reserve=4000).pack([
+        Section('system', system_text, required=True),
+        Section('files', file_texts, weight=1, strategy='each'),
+        Section('history', history_texts, weight=2, strategy='oldest'),
+    ])
+    packed.text('files'); packed.items('history'); packed.report
+
+Settings (env):
+  LLM_PROMPT_BUDGET    hard cap on prompt tokens for every model (0 = model window)
+  LLM_CONTEXT_TOKENS   context window assumed for unknown/local models (8192)
+"""
+
+import logging
+import math
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Union
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+PROMPT_BUDGET = int(os.getenv('LLM_PROMPT_BUDGET', '0'))
+DEFAULT_CONTEXT_TOKENS = int(os.getenv('LLM_CONTEXT_TOKENS', '8192'))
+
+# context windows by provider (model-specific overrides below)
+CONTEXT_WINDOWS = {
+    'ollama': DEFAULT_CONTEXT_TOKENS,
+    'anthropic': 200000,
+    'openai': 128000,
+    'gemini': 1000000,
+    'custom': DEFAULT_CONTEXT_TOKENS,
+}
+MODEL_CONTEXT_WINDOWS = {
+    'gpt-4': 8192,
+    'gpt-3.5-turbo': 16385,
+}
+
+# estimator: roughly one token per short word/punctuation mark, longer
+# identifiers split every ~4 characters (close to BPE on code and prose)
+_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+_CHARS_PER_PIECE_TOKEN = 4
+
+TRUNCATION_MARK = "\n... [truncated {n} tokens] ...\n"
+
+# smallest remainder worth keeping as a trimmed item
+_MIN_PARTIAL_TOKENS = 48
+
+Tokenizer = Callable[[str], int]
+
+
+def estimate_tokens(text: str) -> int:
+    if not text:
+        return 0
+    return sum(1 + (len(p) - 1) // _CHARS_PER_PIECE_TOKEN for p in _PIECE_RE.findall(text))
+
+
+_tiktoken_cache: Dict[str, Tokenizer] = {}
+
+
+def tokenizer_for(provider: str, model: Optional[str] = None) -> Tokenizer:
+    """Exact counter when available for this provider/model, else estimate_tokens"""
+    if TIKTOKEN_AVAILABLE and provider in ('openai', 'custom'):
+        key = model or ''
+        counter = _tiktoken_cache.get(key)
+        if counter is None:
+            try:
+                encoding = tiktoken.encoding_for_model(model) if model else tiktoken.get_encoding('cl100k_base')
+            except Exception:
+                encoding = tiktoken.get_encoding('cl100k_base')
+            counter = _tiktoken_cache[key] = lambda text: len(encoding.encode(text, disallowed_special=()))
+        return counter
+    return estimate_tokens
+
+
+def context_window(provider: str, model: Optional[str] = None) -> int:
+    if model:
+        for prefix, window in MODEL_CONTEXT_WINDOWS.items():
+            if model == prefix or model.startswith(prefix + '-0'):
+                return window
+    return CONTEXT_WINDOWS.get(provider, DEFAULT_CONTEXT_TOKENS)
+
+
+@dataclass
+class Section:
+    name: str
+    content: Union[str, Sequence[str]]
+    weight: float = 1.0
+    required: bool = False
+    strategy: str = 'text'  # 'text' | 'oldest' | 'each'
+    min_tokens: int = 0
+
+    @property
+    def parts(self) -> List[str]:
+        if isinstance(self.content, str):
+            return [self.content] if self.content else []
+        return [p for p in self.content if p]
+
+
+@dataclass
+class PackedPrompt:
+    budget: int
+    sections: Dict[str, List[str]] = field(default_factory=dict)
+    report: Dict[str, Dict[str, int]] = field(default_factory=dict)
+
+    def items(self, name: str) -> List[str]:
+        return self.sections.get(name, [])
+
+    def text(self, name: str, sep: str = '\n') -> str:
+        return sep.join(self.items(name))
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(r['tokens'] for r in self.report.values())
+
+    def log(self, label: str = 'prompt') -> None:
+        logger.info(
+            "Packed %s: %d/%d tokens (%s)",
+            label,
+            self.total_tokens,
+            self.budget,
+            ', '.join(
+                f"{name}={r['tokens']}" + (f"/{r['original']}" if r['tokens'] != r['original'] else '')
+                for name, r in self.report.items()
+            ),
+        )
+
+
+class PromptBudget:
+    def __init__(self, budget: int, count: Tokenizer = estimate_tokens):
+        self.budget = max(0, budget)
+        self.count = count
+
+    @classmethod
+    def for_model(cls, provider: str, model: Optional[str] = None, reserve: int = 0) -> 'PromptBudget':
+        """Budget = context window minus the tokens reserved for the answer (capped by LLM_PROMPT_BUDGET)"""
+        budget = context_window(provider, model) - (reserve or 0)
+        if PROMPT_BUDGET > 0:
+            budget = min(budget, PROMPT_BUDGET)
+        return cls(max(budget, 512), tokenizer_for(provider, model))
+
+    # -- trimming -------------------------------------------------------
+    def truncate(self, text: str, limit: int) -> str:
+        """Keep the head and tail of text within limit tokens"""
+        total = self.count(text)
+        if total <= limit:
+            return text
+        mark = TRUNCATION_MARK.format(n=total - limit)
+        room = limit - self.count(mark)
+        if room <= 0:
+            return ''
+        # characters per token of this text; shrink until it fits
+        keep = int(len(text) * room / total)
+        while keep > 0:
+            head = text[:math.ceil(keep * 0.75)]
+            tail = text[len(text) - keep // 4:] if keep // 4 else ''
+            candidate = head + mark + tail
+            if self.count(candidate) <= limit:
+                return candidate
+            keep = int(keep * 0.9)
+        return ''
+
+    def _fit(self, section: Section, parts: List[str], sizes: List[int], limit: int) -> List[str]:
+        if sum(sizes) <= limit:
+            return parts
+        if section.strategy == 'oldest':
+            kept, used = [], 0
+            for part, size in zip(reversed(parts), reversed(sizes)):
+                if used + size <= limit:
+                    kept.append(part)
+                    used += size
+                    continue
+                # the oldest item that still fits in part is trimmed
+                if limit - used >= _MIN_PARTIAL_TOKENS or not kept:
+                    trimmed = self.truncate(part, limit - used)
+                    if trimmed:
+                        kept.append(trimmed)
+                break
+            return list(reversed(kept))
+        if section.strategy == 'each':
+            shares = _water_fill(limit, sizes, [1.0] * len(sizes))
+            return [p if s <= share else self.truncate(p, share) for p, s, share in zip(parts, sizes, shares)]
+        joined = '\n'.join(parts)
+        return [self.truncate(joined, limit)]
+
+    # -- packing --------------------------------------------------------
+    def pack(self, sections: Sequence[Section]) -> PackedPrompt:
+        packed = PackedPrompt(budget=self.budget)
+        sizes = {s.name: [self.count(p) for p in s.parts] for s in sections}
+        demand = {name: sum(v) for name, v in sizes.items()}
+
+        remaining = self.budget - sum(demand[s.name] for s in sections if s.required)
+        optional = [s for s in sections if not s.required]
+
+        # drop sections whose share can not reach their minimum, lowest weight first
+        while optional:
+            shares = _water_fill(max(remaining, 0), [demand[s.name] for s in optional], [s.weight for s in optional])
+            starved = [
+                (s.weight, i) for i, (s, share) in enumerate(zip(optional, shares))
+                if share < min(s.min_tokens, demand[s.name])
+            ]
+            if not starved:
+                break
+            optional.pop(min(starved)[1])
+        else:
+            shares = []
+        allot = {s.name: share for s, share in zip(optional, shares)}
+
+        fitted = {s.name: self._fit(s, s.parts, sizes[s.name], allot[s.name]) for s in optional}
+        used = {name: sum(self.count(p) for p in parts) for name, parts in fitted.items()}
+
+        # one more round: budget a trimmed section did not use (item boundaries,
+        # truncation marks) goes to the sections that were trimmed
+        slack = remaining - sum(used.values())
+        trimmed = [s for s in optional if used[s.name] < demand[s.name]]
+        if slack > 0 and trimmed:
+            extra = _water_fill(
+                slack, [demand[s.name] - used[s.name] for s in trimmed], [s.weight for s in trimmed]
+            )
+            for s, more in zip(trimmed, extra):
+                if more <= 0:
+                    continue
+                parts = self._fit(s, s.parts, sizes[s.name], used[s.name] + more)
+                tokens = sum(self.count(p) for p in parts)
+                if tokens > used[s.name]:
+                    allot[s.name] = used[s.name] + more
+                    fitted[s.name], used[s.name] = parts, tokens
+
+        for section in sections:
+            if section.required:
+                kept = section.parts
+                tokens = demand[section.name]
+            else:
+                kept = [p for p in fitted.get(section.name, []) if p]
+                tokens = used.get(section.name, 0)
+            packed.sections[section.name] = kept
+            packed.report[section.name] = {
+                'tokens': tokens,
+                'original': demand[section.name],
+                'budget': demand[section.name] if section.required else allot.get(section.name, 0),
+            }
+        return packed
+
+
+def _water_fill(total: int, demands: List[int], weights: List[float]) -> List[int]:
+    """Split total by weight; shares above a demand are redistributed to the rest"""
+    shares = [0] * len(demands)
+    active = [i for i, d in enumerate(demands) if d > 0]
+    left = total
+    while active and left > 0:
+        weight_sum = sum(weights[i] for i in active) or 1.0
+        satisfied = [i for i in active if demands[i] - shares[i] <= left * weights[i] / weight_sum]
+        if not satisfied:
+            for i in active:
+                shares[i] += int(left * weights[i] / weight_sum)
+            break
+        for i in satisfied:
+            left -= demands[i] - shares[i]
+            shares[i] = demands[i]
+        active = [i for i in active if i not in satisfied]
+    return shares
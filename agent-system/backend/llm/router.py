@@ -4,14 +4,47 @@ LLM Router - Switches between local (Ollama/DeepSeek) and cloud (Anthropic/OpenA
 Handles fallback, retries, and intelligent routing based on task complexity
 """
 
+import asyncio
+import concurrent.futures
 import os
 import logging
-from typing import Dict, Any, List, Optional, Literal
+import threading
+import time
+from typing import Dict, Any, List, Optional, Literal, AsyncIterator
 from dataclasses import dataclass
 import json
 
+from llm.cache import with_cache
+from llm.health import ProviderHealth
+from llm.streaming import astream_client
+
 logger = logging.getLogger(__name__)
 
+# Hedged auto-routing (env): once local has run past its p95 latency (at least
+# LLM_HEDGE_MIN_MS; LLM_HEDGE_DEFAULT_MS until enough samples), cloud is asked too
+HEDGE_ENABLED = os.getenv('LLM_HEDGE', 'False') == 'True'
+HEDGE_MIN_MS = float(os.getenv('LLM_HEDGE_MIN_MS', '500'))
+HEDGE_DEFAULT_MS = float(os.getenv('LLM_HEDGE_DEFAULT_MS', '10000'))
+
+_hedge_executor = None
+_hedge_lock = threading.Lock()
+
+
+def _hedge_pool() -> concurrent.futures.ThreadPoolExecutor:
+    """Threads for hedged sync queries; a losing request finishes in the background"""
+    global _hedge_executor
+    if _hedge_executor is None:
+        with _hedge_lock:
+            if _hedge_executor is None:
+                _hedge_executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=int(os.getenv('LLM_HEDGE_WORKERS', '32')), thread_name_prefix='llm-hedge'
+                )
+    return _hedge_executor
+
+
+class CircuitOpenError(RuntimeError):
+    """Auto-routing skipped a provider whose circuit breaker is open"""
+
 
 @dataclass
 class LLMConfig:
@@ -42,6 +75,9 @@ class LLMRouter:
         self._local_client = None
         self._cloud_client = None
         self._clients = {}
+
+        # ✅ NEW: EWMA latency / error rate and circuit breakers per provider+model
+        self.health = ProviderHealth()
     
     def _get_local_config(self) -> LLMConfig:
         """Get local LLM configuration (Ollama)"""
@@ -81,7 +117,9 @@ class LLMRouter:
         """Lazy-load local client"""
         if self._local_client is None:
             from llm.ollama import OllamaClient
-            self._local_client = OllamaClient(self.local_config)
+            self._local_client = with_cache(
+                OllamaClient(self.local_config), 'ollama', self.local_config.model
+            )
         return self._local_client
     
     @property
@@ -94,6 +132,9 @@ class LLMRouter:
             elif self.cloud_config.provider == 'openai':
                 from llm.openai_client import OpenAIClient
                 self._cloud_client = OpenAIClient(self.cloud_config)
+            self._cloud_client = with_cache(
+                self._cloud_client, self.cloud_config.provider, self.cloud_config.model
+            )
         return self._cloud_client
     
     def _build_client(self, config: LLMConfig):
@@ -124,8 +165,10 @@ class LLMRouter:
             config.temperature
         )
         if cache_key not in self._clients:
-            self._clients[cache_key] = self._build_client(config)
+            # ✅ NEW: opt-in response cache (llm.cache, LLM_CACHE=True)
+            self._clients[cache_key] = with_cache(self._build_client(config), config.provider, config.model)
         return self._clients[cache_key]
+
     def query(
         self,
         messages: List[Dict[str, str]],
@@ -171,6 +214,7 @@ class LLMRouter:
         temperature: Optional[float]
     ) -> Dict[str, Any]:
         """Query local LLM (Ollama)"""
+        started = time.monotonic()
         try:
             logger.info(f"Querying local LLM: {self.local_config.model}")
             
@@ -183,9 +227,11 @@ class LLMRouter:
             
             result['provider'] = 'local'
             result['model'] = self.local_config.model
+            self._record('local', started, True, cached=result.get('cached', False))
             return result
             
         except Exception as e:
+            self._record('local', started, False)
             logger.error(f"Local LLM error: {e}")
             raise
     
@@ -197,6 +243,7 @@ class LLMRouter:
         temperature: Optional[float]
     ) -> Dict[str, Any]:
         """Query cloud LLM"""
+        started = time.monotonic()
         try:
             logger.info(f"Querying cloud LLM: {self.cloud_config.model}")
             
@@ -209,9 +256,11 @@ class LLMRouter:
             
             result['provider'] = 'cloud'
             result['model'] = self.cloud_config.model
+            self._record('cloud', started, True, cached=result.get('cached', False))
             return result
             
         except Exception as e:
+            self._record('cloud', started, False)
             logger.error(f"Cloud LLM error: {e}")
             raise
     
@@ -226,37 +275,305 @@ class LLMRouter:
         Auto-routing with fallback
         
         Strategy:
-        1. Try local first (fast, private)
+        1. Try local first (fast, private), unless its circuit breaker is open
         2. If local fails or times out, try cloud
         3. If cloud not configured, raise error
+        4. ✅ NEW: with LLM_HEDGE, fire cloud as well once local runs past its
+           p95 latency and take whichever answers first
         """
-        
-        # Try local first
-        try:
-            return self._query_local(messages, json_mode, max_tokens, temperature)
-        except Exception as local_error:
-            logger.warning(f"Local LLM failed: {local_error}, falling back to cloud")
-            
-            # Check if cloud is configured
-            if not self.cloud_config.api_key:
-                raise RuntimeError(
-                    "Local LLM failed and cloud LLM not configured. "
-                    "Set ANTHROPIC_API_KEY or OPENAI_API_KEY environment variable."
-                ) from local_error
-            
-            # Try cloud
+        query = {'local': self._query_local, 'cloud': self._query_cloud}
+        args = (messages, json_mode, max_tokens, temperature)
+
+        if HEDGE_ENABLED and self.cloud_config.api_key and self.health.allow(self._health_key('local')):
+            return self._query_hedged(query, args)
+
+        errors = {}
+        for target in ('local', 'cloud'):
+            if target == 'cloud' and not self.cloud_config.api_key:
+                break
+            if not self.health.allow(self._health_key(target)):
+                errors[target] = CircuitOpenError(f"{target} LLM circuit breaker is open")
+                logger.warning(f"Skipping {target} LLM: circuit breaker open")
+                continue
             try:
-                result = self._query_cloud(messages, json_mode, max_tokens, temperature)
-                result['fallback'] = True
-                result['local_error'] = str(local_error)
-                return result
-            except Exception as cloud_error:
-                # Both failed
-                raise RuntimeError(
-                    f"Both local and cloud LLM failed. "
-                    f"Local: {local_error}, Cloud: {cloud_error}"
-                ) from cloud_error
+                return self._mark_fallback(query[target](*args), target, errors)
+            except Exception as e:
+                errors[target] = e
+                if target == 'local':
+                    logger.warning(f"Local LLM failed: {e}, falling back to cloud")
+        self._raise_auto_failure(errors)
+
+    def _query_hedged(self, query, args) -> Dict[str, Any]:
+        """local first; cloud is started too if local has not answered after the hedge delay"""
+        delay = self._hedge_delay('local')
+        pool = _hedge_pool()
+        futures = {pool.submit(query['local'], *args): 'local'}
+        errors = {}
+
+        done, _ = concurrent.futures.wait(futures, timeout=delay)
+        if done:
+            try:
+                return next(iter(done)).result()
+            except Exception as e:
+                errors['local'] = e
+                logger.warning(f"Local LLM failed: {e}, falling back to cloud")
+
+        if not self.health.allow(self._health_key('cloud')):
+            errors['cloud'] = CircuitOpenError("cloud LLM circuit breaker is open")
+            if 'local' not in errors:
+                try:
+                    return next(iter(futures)).result()
+                except Exception as e:
+                    errors['local'] = e
+            self._raise_auto_failure(errors)
+
+        if 'local' in errors:
+            futures = {}
+        else:
+            logger.info(f"Local LLM slower than {delay * 1000:.0f} ms, hedging with cloud")
+        futures[pool.submit(query['cloud'], *args)] = 'cloud'
+
+        for future in concurrent.futures.as_completed(futures):
+            target = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                errors[target] = e
+                continue
+            if len(futures) > 1:
+                result['hedged'] = True
+            return self._mark_fallback(result, target, errors)
+        self._raise_auto_failure(errors)
+
+    # ------------------------------------------------------------------
+    # Provider health: EWMA latency/error rate + circuit breakers (llm.health)
+    # ------------------------------------------------------------------
+    def _health_key(self, target: str) -> str:
+        config = self.cloud_config if target == 'cloud' else self.local_config
+        return f"{target}:{config.model}"
+
+    def _record(self, target: str, started: float, ok: bool, cached: bool = False) -> None:
+        """A cache hit says nothing about the provider: free its admission, add no sample"""
+        if cached:
+            self.health.release(self._health_key(target), started)
+            return
+        self.health.record(self._health_key(target), time.monotonic() - started, ok)
+
+    def _hedge_delay(self, target: str) -> float:
+        p95 = self.health.p95(self._health_key(target))
+        if p95 is None:
+            return HEDGE_DEFAULT_MS / 1000.0
+        return max(p95, HEDGE_MIN_MS / 1000.0)
+
+    @staticmethod
+    def _mark_fallback(result: Dict[str, Any], target: str, errors: Dict[str, Exception]) -> Dict[str, Any]:
+        if target == 'cloud' and 'local' in errors:
+            result['fallback'] = True
+            result['local_error'] = str(errors['local'])
+        return result
+
+    def _raise_auto_failure(self, errors: Dict[str, Exception]):
+        local_error = errors.get('local')
+        cloud_error = errors.get('cloud')
+        if cloud_error is None:
+            raise RuntimeError(
+                "Local LLM failed and cloud LLM not configured. "
+                "Set ANTHROPIC_API_KEY or OPENAI_API_KEY environment variable."
+            ) from local_error
+        raise RuntimeError(
+            f"Both local and cloud LLM failed. "
+            f"Local: {local_error}, Cloud: {cloud_error}"
+        ) from cloud_error
+
+    def health_stats(self) -> Dict[str, Any]:
+        """Per provider/model latency, error rate and breaker state"""
+        return self.health.snapshot()
     
+    # ------------------------------------------------------------------
+    # Async path: same routing, clients' aquery()/aquery_stream() over the
+    # shared pooled connections (llm.http_pool), no thread per request
+    # ------------------------------------------------------------------
+    async def aquery(
+        self,
+        messages: List[Dict[str, str]],
+        *,
+        provider: Optional[str] = None,
+        json_mode: bool = False,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Async query(): same arguments, routing, breakers and hedging"""
+        args = (messages, json_mode, max_tokens, temperature)
+        if provider == 'cloud':
+            return await self._aquery_one('cloud', *args)
+        if provider == 'local':
+            return await self._aquery_one('local', *args)
+
+        if HEDGE_ENABLED and self.cloud_config.api_key and self.health.allow(self._health_key('local')):
+            return await self._aquery_hedged(args)
+
+        errors = {}
+        for target in ('local', 'cloud'):
+            if target == 'cloud' and not self.cloud_config.api_key:
+                break
+            if not self.health.allow(self._health_key(target)):
+                errors[target] = CircuitOpenError(f"{target} LLM circuit breaker is open")
+                logger.warning(f"Skipping {target} LLM: circuit breaker open")
+                continue
+            try:
+                return self._mark_fallback(await self._aquery_one(target, *args), target, errors)
+            except Exception as e:
+                errors[target] = e
+                if target == 'local':
+                    logger.warning(f"Local LLM failed: {e}, falling back to cloud")
+        self._raise_auto_failure(errors)
+
+    async def _aquery_hedged(self, args) -> Dict[str, Any]:
+        delay = self._hedge_delay('local')
+        tasks = {asyncio.ensure_future(self._aquery_one('local', *args)): 'local'}
+        started = {'local': time.monotonic()}
+        errors = {}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                try:
+                    return next(iter(done)).result()
+                except Exception as e:
+                    errors['local'] = e
+                    tasks = {}
+                    logger.warning(f"Local LLM failed: {e}, falling back to cloud")
+
+            if not self.health.allow(self._health_key('cloud')):
+                errors['cloud'] = CircuitOpenError("cloud LLM circuit breaker is open")
+                if 'local' not in errors:
+                    try:
+                        return await next(iter(tasks))
+                    except Exception as e:
+                        errors['local'] = e
+                self._raise_auto_failure(errors)
+
+            if 'local' not in errors:
+                logger.info(f"Local LLM slower than {delay * 1000:.0f} ms, hedging with cloud")
+            tasks[asyncio.ensure_future(self._aquery_one('cloud', *args))] = 'cloud'
+            started['cloud'] = time.monotonic()
+            hedged = len(tasks) > 1
+
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    target = tasks[task]
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        errors[target] = e
+                        continue
+                    if hedged:
+                        result['hedged'] = True
+                    return self._mark_fallback(result, target, errors)
+            self._raise_auto_failure(errors)
+        finally:
+            for task, target in tasks.items():
+                if not task.done():
+                    task.cancel()
+                    self.health.release(self._health_key(target), started[target])
+
+    async def aquery_stream(
+        self,
+        messages: List[Dict[str, str]],
+        *,
+        provider: Optional[str] = None,
+        json_mode: bool = False,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Async streaming with the same routing. In auto mode the cloud fallback
+        is only taken if local fails before producing any text; targets with an
+        open circuit breaker are skipped. Health is recorded once the stream
+        completes (whole-response latency, like query()); cache replays and
+        streams the caller abandons are not recorded.
+        """
+        targets = [provider] if provider in ('local', 'cloud') else ['local', 'cloud']
+        last_error = None
+        for target in targets:
+            if target == 'cloud' and provider is None and not self.cloud_config.api_key:
+                break
+            key = self._health_key(target)
+            if provider is None and not self.health.allow(key):
+                logger.warning(f"Skipping {target} LLM stream: circuit breaker open")
+                last_error = CircuitOpenError(f"{target} LLM circuit breaker is open")
+                continue
+            started = time.monotonic()
+            first_chunk = False
+            recorded = False
+            outcome: Dict[str, Any] = {}
+            try:
+                client, config = self._target(target)
+                async for chunk in astream_client(
+                    client,
+                    messages,
+                    json_mode=json_mode,
+                    max_tokens=max_tokens or config.max_tokens,
+                    temperature=temperature or config.temperature,
+                    outcome=outcome,
+                ):
+                    first_chunk = True
+                    yield chunk
+                recorded = True
+                self._record(target, started, True, cached=outcome.get('cache') == 'hit')
+                return
+            except Exception as e:
+                recorded = True
+                self._record(target, started, False)
+                if first_chunk or provider is not None:
+                    raise
+                logger.warning(f"{target} LLM stream failed: {e}, falling back to cloud")
+                last_error = e
+            finally:
+                if not recorded:
+                    self.health.release(key, started)
+        raise RuntimeError(f"LLM streaming failed: {last_error}") from last_error
+
+    def _target(self, target: str):
+        if target == 'cloud':
+            return self.cloud_client, self.cloud_config
+        return self.local_client, self.local_config
+
+    async def _aquery_one(
+        self,
+        target: str,
+        messages: List[Dict[str, str]],
+        json_mode: bool,
+        max_tokens: Optional[int],
+        temperature: Optional[float]
+    ) -> Dict[str, Any]:
+        client, config = self._target(target)
+        logger.info(f"Querying {target} LLM (async): {config.model}")
+        kwargs = {
+            'messages': messages,
+            'json_mode': json_mode,
+            'max_tokens': max_tokens or config.max_tokens,
+            'temperature': temperature or config.temperature,
+        }
+        started = time.monotonic()
+        try:
+            aquery = getattr(client, 'aquery', None)
+            if aquery is not None:
+                result = await aquery(**kwargs)
+            else:
+                from asgiref.sync import sync_to_async
+                result = await sync_to_async(client.query, thread_sensitive=False)(**kwargs)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self._record(target, started, False)
+            raise
+        self._record(target, started, True, cached=result.get('cached', False))
+        result['provider'] = target
+        result['model'] = config.model
+        return result
+
     def parse_json_response(self, response: Dict[str, Any]) -> Dict[str, Any]:
         """
         Parse JSON from LLM response
@@ -286,7 +603,8 @@ class LLMRouter:
         Returns:
             {
                 "local": {"available": bool, "model": str, "error": str},
-                "cloud": {"available": bool, "model": str, "error": str}
+                "cloud": {"available": bool, "model": str, "error": str},
+                "routing": {"<target>:<model>": {"state", "latency_ewma_ms", "p95_ms", ...}}
             }
         """
         result = {
@@ -310,7 +628,8 @@ class LLMRouter:
                 result['cloud']['error'] = "API key not configured"
         except Exception as e:
             result['cloud']['error'] = str(e)
-        
+
+        result['routing'] = self.health_stats()
         return result
 
 
@@ -0,0 +1,233 @@
+# llm/streaming.py
+"""
+Async bridge for the blocking query_stream() generators of the LLM clients
+
+OllamaClient / OpenAIClient / AnthropicClient.query_stream() are sync
+generators reading an HTTP response. aiter_stream() runs one in a worker
+thread and hands each chunk to the event loop as soon as the client yields
+it, so websocket consumers can forward tokens while the model is still
+generating (instead of list()-ing the whole completion first).
+
+Optional micro-batching coalesces tiny chunks into fewer websocket frames:
+  - batch_ms:    flush buffered text at most every N ms (0 = off)
+  - batch_chars: flush once N characters are buffered (0 = off)
+The first chunk is never held back. Defaults come from LLM_STREAM_BATCH_MS /
+LLM_STREAM_BATCH_CHARS.
+
+    async for text in aiter_stream(lambda: client.query_stream(messages)):
+        await self.send_json({'type': 'assistant_message_chunk', 'chunk': text})
+
+astream_client(client, messages) prefers the client's native async
+aquery_stream() (llm.http_pool connections) and falls back to the thread.
+Pass outcome={} to learn the usage (and, for llm.cache.CachedClient, the
+cache hit/miss) of that one call.
+
+If the consumer stops iterating (client disconnected, task cancelled), the
+worker stops pulling from the generator and closes it.
+"""
+
+import asyncio
+import concurrent.futures
+import os
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Optional
+
+STREAM_BATCH_MS = float(os.getenv('LLM_STREAM_BATCH_MS', '0'))
+STREAM_BATCH_CHARS = int(os.getenv('LLM_STREAM_BATCH_CHARS', '0'))
+
+# backpressure: the worker blocks once this many chunks are waiting
+_QUEUE_MAX = 1024
+
+_DONE = object()
+
+
+class _Failure:
+    def __init__(self, exc: BaseException):
+        self.exc = exc
+
+
+def _produce(
+    make_stream: Callable[[], Iterable[str]],
+    loop: asyncio.AbstractEventLoop,
+    queue: asyncio.Queue,
+    stop: threading.Event,
+) -> None:
+    def put(item) -> None:
+        if stop.is_set():
+            return
+        coro = queue.put(item)
+        try:
+            fut = asyncio.run_coroutine_threadsafe(coro, loop)
+        except RuntimeError:  # loop already closed: the consumer is gone
+            coro.close()
+            return
+        while not stop.is_set():
+            try:
+                fut.result(timeout=0.5)
+                return
+            except concurrent.futures.TimeoutError:
+                continue
+        fut.cancel()
+
+    stream = None
+    try:
+        stream = make_stream()
+        for chunk in stream:
+            if stop.is_set():
+                break
+            if chunk:
+                put(chunk)
+        put(_DONE)
+    except BaseException as e:  # surfaced in the consumer
+        put(_Failure(e))
+    finally:
+        close = getattr(stream, 'close', None)
+        if callable(close):
+            try:
+                close()
+            except Exception:
+                pass
+
+
+async def _thread_source(make_stream: Callable[[], Iterable[str]]) -> AsyncIterator[str]:
+    """Chunks of a blocking generator, produced in a worker thread"""
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=_QUEUE_MAX)
+    stop = threading.Event()
+    worker = threading.Thread(
+        target=_produce, args=(make_stream, loop, queue, stop), name='llm-stream', daemon=True
+    )
+    worker.start()
+    try:
+        while True:
+            item = await queue.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                raise item.exc
+            yield item
+    finally:
+        stop.set()
+        # unblock a worker waiting on a full queue
+        while not queue.empty():
+            queue.get_nowait()
+
+
+async def _batched(source: AsyncIterator[str], batch_ms: float, batch_chars: int) -> AsyncIterator[str]:
+    """Coalesce chunks by time/size; the first chunk passes straight through"""
+    if batch_ms <= 0 and batch_chars <= 0:
+        async for chunk in source:
+            yield chunk
+        return
+
+    buf = []
+    buf_len = 0
+    first = True
+    deadline = None
+    pending = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(source.__anext__())
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            done, _ = await asyncio.wait({pending}, timeout=timeout)
+            if not done:  # time flush; the pending read carries on
+                yield ''.join(buf)
+                buf, buf_len, deadline = [], 0, None
+                continue
+            task, pending = pending, None
+            try:
+                chunk = task.result()
+            except StopAsyncIteration:
+                break
+            except BaseException:
+                if buf:
+                    yield ''.join(buf)
+                    buf, buf_len = [], 0
+                raise
+
+            if first:
+                first = False
+                yield chunk
+                continue
+            buf.append(chunk)
+            buf_len += len(chunk)
+            if batch_chars > 0 and buf_len >= batch_chars:
+                yield ''.join(buf)
+                buf, buf_len, deadline = [], 0, None
+            elif deadline is None and batch_ms > 0:
+                deadline = time.monotonic() + batch_ms / 1000.0
+
+        if buf:
+            yield ''.join(buf)
+    finally:
+        if pending is not None:
+            pending.cancel()
+            # the source is still inside __anext__ until the cancelled read settles
+            await asyncio.gather(pending, return_exceptions=True)
+        aclose = getattr(source, 'aclose', None)
+        if aclose is not None:
+            await aclose()
+
+
+def _batch_args(batch_ms: Optional[float], batch_chars: Optional[int]):
+    return (
+        STREAM_BATCH_MS if batch_ms is None else batch_ms,
+        STREAM_BATCH_CHARS if batch_chars is None else batch_chars,
+    )
+
+
+def aiter_stream(
+    make_stream: Callable[[], Iterable[str]],
+    *,
+    batch_ms: Optional[float] = None,
+    batch_chars: Optional[int] = None,
+) -> AsyncIterator[str]:
+    """
+    Yield text from make_stream() (called in a worker thread) as it arrives,
+    optionally micro-batched. Exceptions raised by the client are re-raised here.
+    """
+    return _batched(_thread_source(make_stream), *_batch_args(batch_ms, batch_chars))
+
+
+async def _usage_after(source: AsyncIterator[str], client, outcome: Dict[str, Any]) -> AsyncIterator[str]:
+    try:
+        async for chunk in source:
+            yield chunk
+        outcome['usage'] = getattr(client, 'last_usage', None)
+    finally:
+        aclose = getattr(source, 'aclose', None)
+        if aclose is not None:
+            await aclose()
+
+
+def astream_client(
+    client,
+    messages,
+    *,
+    batch_ms: Optional[float] = None,
+    batch_chars: Optional[int] = None,
+    outcome: Optional[Dict[str, Any]] = None,
+    **kwargs,
+) -> AsyncIterator[str]:
+    """
+    Stream from an llm client: its native aquery_stream() when it has one
+    (pooled async HTTP, no thread), else query_stream() via a worker thread.
+
+    outcome, when given, is filled for this call: 'usage' once the stream
+    completes and, from clients that report it themselves (accepts_outcome,
+    e.g. CachedClient), 'cache'. Plain clients only expose last_usage, which
+    is read the moment their stream ends.
+    """
+    reports = outcome is not None and getattr(client, 'accepts_outcome', False) is True
+    if reports:
+        kwargs['outcome'] = outcome
+    native = getattr(client, 'aquery_stream', None)
+    if native is not None:
+        source = native(messages, **kwargs)
+    else:
+        source = _thread_source(lambda: client.query_stream(messages, **kwargs))
+    if outcome is not None and not reports:
+        source = _usage_after(source, client, outcome)
+    return _batched(source, *_batch_args(batch_ms, batch_chars))
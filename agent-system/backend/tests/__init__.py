@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# CRS modules (core.*, crs_main, tools.*) live in ../crs, as for agent.services.crs_runner
+_crs_dir = Path(__file__).resolve().parents[2] / "crs"
+if str(_crs_dir) not in sys.path:
+    sys.path.insert(0, str(_crs_dir))
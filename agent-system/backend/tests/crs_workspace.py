@@ -0,0 +1,42 @@
+import json
+import os
+from pathlib import Path
+
+from core.fs import WorkspaceFS
+
+TOOLS_DIR = Path(__file__).resolve().parents[2] / "crs" / "tools"
+
+MODELS_PY = (
+    "from django.db import models\n\n"
+    "class Order(models.Model):\n"
+    "    total = models.IntegerField()\n"
+)
+
+
+def make_workspace(root, files, config=None):
+    """Temp CRS workspace: src/ files plus a config.json pointing at the repo's tools"""
+    for rel, text in files.items():
+        path = os.path.join(root, "src", rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+    cfg = {"version": "crs-workspace-config-v1", "paths": {"tools_dir": str(TOOLS_DIR)}}
+    for key, value in (config or {}).items():
+        if isinstance(value, dict):
+            cfg.setdefault(key, {}).update(value)
+        else:
+            cfg[key] = value
+    config_path = os.path.join(root, "config.json")
+    with open(config_path, "w", encoding="utf-8") as f:
+        json.dump(cfg, f)
+    return WorkspaceFS(config_path=config_path)
+
+
+def blueprint_payload(files):
+    """blueprints.json exactly as the pipeline's blueprint builder writes it"""
+    import tempfile
+
+    from tools.blueprint_builder_v1_workspace import index_workspace_blueprints
+
+    with tempfile.TemporaryDirectory() as root:
+        return index_workspace_blueprints(make_workspace(root, files))
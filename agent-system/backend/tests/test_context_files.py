@@ -0,0 +1,130 @@
+import os
+import tempfile
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from agent.services import context_files
+from agent.services.context_files import (
+    CONTEXT_FILE_MAX_CHARS,
+    chunk_text,
+    conversation_file_parts,
+    extract_context_file,
+    extract_text,
+    invalidate_conversation,
+)
+
+
+class ExtractionTests(SimpleTestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def write(self, name, data):
+        path = os.path.join(self._tmp.name, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def test_text_is_decoded_and_normalized(self):
+        digest, text = extract_text(self.write("a.txt", "﻿line one  \r\nline two\r\n\r\n".encode()))
+        self.assertEqual(text, "line one\nline two")
+        self.assertEqual(len(digest), 64)
+
+    def test_latin1_fallback(self):
+        self.assertEqual(extract_text(self.write("l.txt", "café".encode("latin-1")))[1], "café")
+
+    def test_utf8_cut_at_the_read_limit_stays_utf8(self):
+        _, text = extract_text(self.write("euro.txt", "€".encode() * 50000))
+        self.assertEqual(text, "€" * CONTEXT_FILE_MAX_CHARS)
+
+    def test_text_is_capped(self):
+        _, text = extract_text(self.write("big.txt", b"x" * (CONTEXT_FILE_MAX_CHARS * 2)))
+        self.assertEqual(len(text), CONTEXT_FILE_MAX_CHARS)
+
+    def test_binary_and_unreadable_pdf_become_placeholders(self):
+        _, text = extract_text(self.write("b.bin", b"\x00\x01\x02" * 10), "b.bin")
+        self.assertEqual(text, "[Binary file b.bin: 30 bytes; not included]")
+        with mock.patch.object(context_files, "PYPDF_AVAILABLE", False):
+            _, text = extract_text(self.write("d.pdf", b"%PDF-1.4 ..."), "d.pdf")
+        self.assertIn("text extraction unavailable", text)
+
+    def test_hash_covers_the_whole_file(self):
+        a, _ = extract_text(self.write("a", b"x" * (CONTEXT_FILE_MAX_CHARS * 4) + b"a"))
+        b, _ = extract_text(self.write("b", b"x" * (CONTEXT_FILE_MAX_CHARS * 4) + b"b"))
+        self.assertNotEqual(a, b)
+
+    def test_chunks_split_at_line_boundaries(self):
+        text = "\n".join(f"line {i:03d}" for i in range(100))
+        chunks = chunk_text(text, size=100)
+        self.assertEqual("\n".join(chunks), text)
+        self.assertTrue(all(len(c) <= 100 for c in chunks))
+        self.assertEqual(chunk_text("y" * 250, size=100), ["y" * 100, "y" * 100, "y" * 50])
+
+    def test_unchanged_file_is_not_re_extracted(self):
+        path = self.write("c.txt", b"hello")
+        row = SimpleNamespace(id=1, pk=None, name="c.txt", file=SimpleNamespace(path=path),
+                              content_hash="", text_chunks=None, extracted_at=None)
+        extract_context_file(row)
+        self.assertEqual(row.text_chunks, ["hello"])
+        stamp = row.extracted_at
+        extract_context_file(row)
+        self.assertIs(row.extracted_at, stamp)
+
+
+class FakeFiles:
+    """ContextFile.objects.filter(conversation_id=...).order_by(...) over an in-memory list"""
+
+    def __init__(self):
+        self.rows = []
+        self.full_loads = 0
+
+    def filter(self, conversation_id):
+        return self
+
+    def order_by(self, *fields):
+        return self
+
+    def values_list(self, *fields):
+        return [tuple(getattr(row, f) for f in fields) for row in self.rows]
+
+    def __iter__(self):
+        self.full_loads += 1
+        return iter(list(self.rows))
+
+
+def row(id, name, text):
+    return SimpleNamespace(id=id, name=name, content_hash=f"h{id}", text_chunks=[text], extracted_at=1)
+
+
+class ConversationCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.files = FakeFiles()
+        patcher = mock.patch.object(context_files, "ContextFile", SimpleNamespace(objects=self.files))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(invalidate_conversation, 7)
+
+    def test_parts_are_assembled_once_per_signature(self):
+        self.files.rows = [row(1, "a.py", "print(1)")]
+        first = conversation_file_parts(7)
+        self.assertEqual(first, ["\n## File: a.py\n```\nprint(1)\n```\n"])
+        self.assertIs(conversation_file_parts(7), first)
+        self.assertEqual(self.files.full_loads, 1)
+
+    def test_new_upload_changes_the_signature(self):
+        self.files.rows = [row(1, "a.py", "a")]
+        conversation_file_parts(7)
+        self.files.rows = [row(2, "b.py", "b")] + self.files.rows
+        self.assertEqual(len(conversation_file_parts(7)), 2)
+        self.assertEqual(self.files.full_loads, 2)
+
+    def test_invalidate_forces_a_reload(self):
+        self.files.rows = [row(1, "a.py", "a")]
+        conversation_file_parts(7)
+        invalidate_conversation(7)
+        conversation_file_parts(7)
+        self.assertEqual(self.files.full_loads, 2)
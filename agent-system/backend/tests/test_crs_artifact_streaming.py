@@ -0,0 +1,99 @@
+import json
+import os
+import tempfile
+
+from django.test import SimpleTestCase
+
+from core.step_runner import CRSStepRunner
+from crs_main import run_pipeline
+from tests.crs_workspace import MODELS_PY, make_workspace
+from tools.artifact_extractor_v1_workspace import stream_workspace_artifacts
+from tools.relationship_builder_v1_workspace import project_artifact
+
+SERIALIZERS_PY = (
+    "from rest_framework import serializers\n"
+    "from shop.models import Order\n\n"
+    "class OrderSerializer(serializers.ModelSerializer):\n"
+    "    class Meta:\n"
+    "        model = Order\n"
+    "        fields = ['total']\n"
+)
+
+VIEWS_PY = (
+    "from rest_framework import viewsets\n"
+    "from shop.models import Order\n"
+    "from shop.serializers import OrderSerializer\n\n"
+    "class OrderViewSet(viewsets.ModelViewSet):\n"
+    "    queryset = Order.objects.all()\n"
+    "    serializer_class = OrderSerializer\n"
+)
+
+FILES = {
+    "shop/models.py": MODELS_PY,
+    "shop/serializers.py": SERIALIZERS_PY,
+    "shop/views.py": VIEWS_PY,
+    "billing/models.py": MODELS_PY.replace("Order", "Invoice"),
+}
+
+STREAMING = {"components": {"artifact_streaming": True}}
+
+
+def outputs(fs):
+    """artifacts/relationships payloads with the workspace path and timestamps taken out"""
+    root = os.path.dirname(fs.paths.src_dir)
+    arts = json.loads(fs.read_text(fs.paths.artifacts_json).replace(root, "<ws>"))
+    rels = json.loads(fs.read_text(fs.paths.relationships_json).replace(root, "<ws>"))
+    arts.pop("blueprints", None)  # input path, or a placeholder when passed in memory
+    rels.pop("generated_at", None)
+    return arts, rels
+
+
+class ArtifactStreamingParityTests(SimpleTestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.plain = make_workspace(os.path.join(self._tmp.name, "plain"), FILES)
+        self.streamed = make_workspace(os.path.join(self._tmp.name, "streamed"), FILES, STREAMING)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_pipeline_outputs_match_in_memory_mode(self):
+        run_pipeline(self.plain)
+        run_id = run_pipeline(self.streamed)
+        self.assertEqual(outputs(self.streamed), outputs(self.plain))
+        self.assertTrue(outputs(self.plain)[1]["relationships"])
+        steps = self.streamed.read_json(self.streamed.run_path(run_id, "run.json"))["steps"]
+        self.assertEqual(steps["artifacts"]["metrics"]["files_processed"], len(FILES))
+
+    def test_step_runner_outputs_match_in_memory_mode(self):
+        for fs in (self.plain, self.streamed):
+            runner = CRSStepRunner(fs)
+            runner.run_blueprints(force=True)
+            runner.run_artifacts(force=True)
+            runner.run_relationships(force=True)
+        self.assertEqual(outputs(self.streamed), outputs(self.plain))
+
+    def test_overlay_streams_in_memory(self):
+        run_pipeline(self.plain)
+        before = self.plain.read_text(self.plain.paths.artifacts_json)
+        overlay = self.plain.overlay()
+        overlay.write_text(
+            os.path.join(overlay.paths.src_dir, "shop", "models.py"),
+            MODELS_PY.replace("Order", "Cart"),
+        )
+        run_pipeline(overlay, force=True)
+        result = stream_workspace_artifacts(overlay, project=project_artifact)
+        names = sorted(a["name"] for a in overlay.read_json(overlay.paths.artifacts_json)["artifacts"])
+        self.assertIn("Cart", names)
+        self.assertEqual(result["artifact_count"], len(result["artifacts"]))
+        self.assertEqual(self.plain.read_text(self.plain.paths.artifacts_json), before)
+
+    def test_indented_blueprints_file_is_read_whole(self):
+        run_pipeline(self.plain)
+        expected = self.plain.read_json(self.plain.paths.artifacts_json)["artifacts"]
+        blueprints = self.plain.read_json(self.plain.paths.blueprints_json)
+        self.plain.write_text(self.plain.paths.blueprints_json, json.dumps(blueprints, indent=2))
+        result = stream_workspace_artifacts(self.plain)
+        self.assertFalse(result["projection"])
+        self.assertEqual(result["artifacts"], [])
+        self.assertEqual(self.plain.read_json(self.plain.paths.artifacts_json)["artifacts"], expected)
@@ -0,0 +1,60 @@
+import os
+import tempfile
+
+from django.test import SimpleTestCase
+
+from crs_bench import STEPS, compare, generate_django_project, render_markdown, run_bench, write_report
+
+
+def _report(wall_s):
+    return {
+        "generated_at": "t",
+        "results": [{"models": 5, "files": 1, "artifacts": 1, "relationships": 1,
+                     "steps": {step: {"wall_s": wall_s.get(step, 0.1)} for step in STEPS}}],
+    }
+
+
+class GenerateProjectTest(SimpleTestCase):
+    def test_generates_every_app_file(self):
+        with tempfile.TemporaryDirectory() as root:
+            info = generate_django_project(root, models=3, models_per_app=2)
+            self.assertEqual(info["models"], 3)
+            for rel in ("config/urls.py", "app000/models.py", "app001/serializers.py", "app001/views.py"):
+                self.assertTrue(os.path.exists(os.path.join(root, rel)), rel)
+            with open(os.path.join(root, "app000", "models.py")) as f:
+                self.assertIn('ordering = ["-id"]', f.read())
+
+
+class RunBenchTest(SimpleTestCase):
+    def test_small_run_is_consistent(self):
+        report = run_bench([4], repeat=1, memory=False, log=lambda message: None)
+        result = report["results"][0]
+        self.assertEqual(result["models"], 4)
+        self.assertGreaterEqual(result["artifacts"], 4)
+        self.assertTrue(result["verification_ok"])
+        self.assertEqual(result["query_errors"], 0)
+        self.assertEqual(set(STEPS) - set(result["steps"]), set())
+        self.assertIn("| 4 |", render_markdown(report))
+
+
+class CompareTest(SimpleTestCase):
+    def test_regression_needs_ratio_and_absolute_delta(self):
+        baseline = _report({"artifacts": 0.1, "blueprints": 0.001})
+        current = _report({"artifacts": 0.2, "blueprints": 0.002})
+        result = compare(current, baseline, threshold=0.25, min_delta_s=0.005)
+        self.assertFalse(result["ok"])
+        self.assertEqual([r["step"] for r in result["regressions"]], ["artifacts"])
+
+    def test_unmatched_sizes_are_skipped(self):
+        baseline = _report({})
+        baseline["results"][0]["models"] = 10
+        self.assertEqual(compare(_report({}), baseline)["compared"], 0)
+
+    def test_write_report_renders_comparison(self):
+        report = _report({"artifacts": 0.2})
+        report["comparison"] = compare(report, _report({"artifacts": 0.1}))
+        with tempfile.TemporaryDirectory() as out:
+            paths = write_report(report, out)
+            self.assertTrue(os.path.exists(paths["json"]))
+            with open(paths["markdown"]) as f:
+                self.assertIn("regression", f.read())
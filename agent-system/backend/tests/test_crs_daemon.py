@@ -0,0 +1,105 @@
+import os
+import tempfile
+import threading
+
+from django.test import SimpleTestCase, override_settings
+
+from agent.services import crs_daemon_client
+from agent.services.crs_daemon_client import CRSDaemonClient, CRSDaemonUnavailable
+from crs_daemon import WorkspaceRegistry, make_server
+from crs_main import run_pipeline
+from tests.crs_workspace import MODELS_PY, make_workspace
+
+
+class DaemonTestCase(SimpleTestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+        self.fs = make_workspace(self.root, {"shop/models.py": MODELS_PY})
+        run_pipeline(self.fs)
+        self.config = os.path.join(self.root, "config.json")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def model_names(self, resp):
+        self.assertTrue(resp["ok"], resp)
+        return sorted(a["name"] for a in resp["result"])
+
+
+class WorkspaceRegistryTest(DaemonTestCase):
+    def test_index_is_swapped_when_payload_changes(self):
+        registry = WorkspaceRegistry()
+        first = registry.run_op(self.config, "find_artifacts", {"type": "django_model"})
+        self.assertEqual(self.model_names(first), ["Order"])
+        self.assertNotIn("args", first)
+        again = registry.run_op(self.config, "find_artifacts", {"type": "django_model"})
+        self.assertEqual(again["gen"], first["gen"])
+
+        with open(os.path.join(self.root, "src", "shop", "models.py"), "a") as f:
+            f.write("\n\nclass Refund(models.Model):\n    amount = models.IntegerField()\n")
+        run_pipeline(self.fs)
+        fresh = registry.run_op(self.config, "find_artifacts", {"type": "django_model"})
+        self.assertEqual(self.model_names(fresh), ["Order", "Refund"])
+        self.assertEqual(fresh["gen"], first["gen"] + 1)
+
+    def test_lru_is_bounded(self):
+        registry = WorkspaceRegistry(max_workspaces=1)
+        registry.get(self.config)
+        with tempfile.TemporaryDirectory() as other:
+            make_workspace(other, {})
+            registry.get(os.path.join(other, "config.json"))
+            self.assertEqual([w["ws"] for w in registry.workspaces()], [os.path.join(other, "config.json")])
+
+    def test_handle_reports_errors(self):
+        registry = WorkspaceRegistry()
+        self.assertFalse(registry.handle([])["ok"])
+        self.assertEqual(registry.handle({"op": "ping", "id": 3}), {"ok": True, "result": "pong", "workspaces": 0, "id": 3})
+        self.assertIn("missing 'ws'", registry.handle({"op": "stats"})["error"])
+        self.assertIn("invalid JSON", registry.handle_bytes(b"{nope").decode())
+        batch = registry.handle({"ws": self.config, "ops": [{"op": "stats"}, {"op": "no_such_op"}]})
+        self.assertEqual([r["ok"] for r in batch["results"]], [True, False])
+
+
+class DaemonTransportTest(DaemonTestCase):
+    def serve(self, address):
+        server = make_server(address, WorkspaceRegistry())
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def check_client(self, client):
+        self.addCleanup(client.close)
+        self.assertTrue(client.ping())
+        for _ in range(2):  # second call reuses the connection
+            self.assertEqual(self.model_names(client.run_op(self.config, "find_artifacts", {"type": "django_model"})),
+                             ["Order"])
+        batch = client.run_ops(self.config, [{"op": "stats"}, {"op": "find_model", "args": {"model_name": "Order"}}])
+        self.assertTrue(batch["ok"], batch)
+        self.assertEqual(batch["results"][1]["result"]["name"], "Order")
+
+    def test_unix_socket(self):
+        path = os.path.join(self.root, "crs.sock")
+        self.serve(f"unix://{path}")
+        self.check_client(CRSDaemonClient(f"unix://{path}"))
+
+    def test_http(self):
+        server = self.serve("http://127.0.0.1:0")
+        self.check_client(CRSDaemonClient(f"http://127.0.0.1:{server.server_address[1]}"))
+
+    def test_unreachable_daemon_raises(self):
+        client = CRSDaemonClient(f"unix://{os.path.join(self.root, 'missing.sock')}", timeout=1)
+        with self.assertRaises(CRSDaemonUnavailable):
+            client.ping()
+
+
+class DaemonFallbackTest(DaemonTestCase):
+    def test_falls_back_to_in_process_registry(self):
+        self.addCleanup(setattr, crs_daemon_client, "_daemon_down_until", 0.0)
+        with override_settings(CRS_DAEMON_URL=f"unix://{os.path.join(self.root, 'missing.sock')}", CRS_DAEMON_TIMEOUT=1):
+            resp = crs_daemon_client._call("run_op", self.config, "find_artifacts", {"type": "django_model"})
+            self.assertGreater(crs_daemon_client._daemon_down_until, 0.0)
+        self.assertEqual(self.model_names(resp), ["Order"])
@@ -0,0 +1,151 @@
+import tempfile
+from pathlib import Path
+
+import numpy as np
+from django.test import SimpleTestCase, override_settings
+
+from agent.services.crs_embeddings import (
+    HashedEmbedder,
+    IVFPartition,
+    VectorStore,
+    build_semantic_index,
+    hybrid_search,
+)
+from agent.services.crs_search import blueprint_items, build_artifact_index, build_blueprint_index
+from tests.crs_workspace import MODELS_PY, blueprint_payload
+
+
+class CountingEmbedder(HashedEmbedder):
+    def __init__(self, dim=64):
+        super().__init__(dim)
+        self.embedded = []
+
+    def embed(self, texts):
+        self.embedded.extend(texts)
+        return super().embed(texts)
+
+
+ARTIFACTS = {"artifacts": [
+    {"name": "UserProfileSerializer", "type": "class", "file_path": "accounts/serializers.py"},
+    {"name": "InvoiceViewSet", "type": "class", "file_path": "billing/views.py"},
+    {"name": "send_invoice_email", "type": "function", "file_path": "billing/tasks.py"},
+    {"name": "InvoiceAdmin", "type": "class", "file_path": "billing/admin.py"},
+]}
+
+
+class HashedEmbedderTests(SimpleTestCase):
+    def test_vectors_are_deterministic_and_normalized(self):
+        a = HashedEmbedder(64).embed(["UserProfile serializer", ""])
+        b = HashedEmbedder(64).embed(["UserProfile serializer", ""])
+        np.testing.assert_array_equal(a, b)
+        self.assertAlmostEqual(float(np.linalg.norm(a[0])), 1.0, places=5)
+        self.assertEqual(float(np.linalg.norm(a[1])), 0.0)
+
+    def test_related_identifiers_are_closer(self):
+        query, near, far = HashedEmbedder(256).embed(["serial", "UserProfileSerializer", "send_invoice_email"])
+        self.assertGreater(float(query @ near), float(query @ far))
+
+
+class VectorStoreTests(SimpleTestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self._tmp.name) / "embeddings"
+        self.embedder = CountingEmbedder()
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def store(self):
+        return VectorStore(self.dir, "artifacts", self.embedder)
+
+    def test_only_new_hashes_are_embedded(self):
+        self.assertEqual(self.store().sync(["k1", "k2"], ["alpha", "beta"]), 2)
+        store = self.store()
+        self.assertEqual(store.keys.tolist(), ["k1", "k2"])
+        self.assertEqual(store.sync(["k2", "k3", "k1"], ["beta", "gamma", "alpha"]), 1)
+        self.assertEqual(self.embedder.embedded, ["alpha", "beta", "gamma"])
+        np.testing.assert_array_equal(store.vectors[2], self.embedder.embed(["alpha"])[0])
+
+    def test_reload_is_memory_mapped_and_stale_matrices_are_removed(self):
+        self.store().sync(["k1"], ["alpha"])
+        self.store().sync(["k1", "k2"], ["alpha", "beta"])
+        self.assertEqual(len(list(self.dir.glob("*.vectors.npy"))), 1)
+        self.assertIsInstance(self.store().vectors, np.memmap)
+
+    def test_keys_from_another_write_are_not_paired_with_this_matrix(self):
+        self.store().sync(["k1", "k2"], ["alpha", "beta"])
+        np.save(self.dir / "artifacts.hashed-64.keys.npy", np.array(["k2", "k1"], dtype="U32"))
+        store = self.store()
+        self.assertEqual(len(store.keys), 0)
+        self.assertEqual(store.sync(["k2", "k1"], ["beta", "alpha"]), 2)
+
+    def test_unwritable_directory_keeps_vectors_in_memory(self):
+        blocker = Path(self._tmp.name) / "file"
+        blocker.write_text("x")
+        store = VectorStore(blocker / "embeddings", "artifacts", self.embedder)
+        self.assertEqual(store.sync(["k1"], ["alpha"]), 1)
+        self.assertEqual(store.vectors.shape, (1, 64))
+
+
+class SemanticSearchTests(SimpleTestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self._tmp.name)
+        self.embedder = HashedEmbedder(256)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_search_and_exclude(self):
+        index = build_semantic_index("artifacts", ARTIFACTS, self.dir, self.embedder)
+        self.assertEqual(index.search("serializer for user profiles", k=1)[0][0], 0)
+        docs = [doc for doc, _ in index.search("invoice", k=3, exclude={3})]
+        self.assertNotIn(3, docs)
+        self.assertEqual(len(docs), 3)
+
+    def test_empty_payload_keeps_persisted_vectors(self):
+        build_semantic_index("artifacts", ARTIFACTS, self.dir, self.embedder)
+        empty = build_semantic_index("artifacts", {}, self.dir, self.embedder)
+        self.assertEqual(empty.search("invoice"), [])
+        self.assertEqual(len(VectorStore(self.dir, "artifacts", self.embedder).keys), 4)
+
+    def test_hybrid_search_finds_paraphrases(self):
+        semantic = build_semantic_index("artifacts", ARTIFACTS, self.dir, self.embedder)
+        keyword = build_artifact_index(ARTIFACTS)
+        results = hybrid_search(keyword, semantic, "invoices emailed", k=2, exclude={3}, weight=0.5)
+        self.assertEqual(results[0][0], 2)
+        self.assertTrue(all(doc != 3 for doc, _ in results))
+
+    @override_settings(CRS_IVF_MIN_ROWS=100, CRS_IVF_NPROBE=64)
+    def test_ivf_partition_is_reused_for_the_same_rows(self):
+        items = {"artifacts": [{"name": f"Thing{i}", "type": "class", "file_path": f"app{i % 7}/models.py"}
+                               for i in range(300)]}
+        index = build_semantic_index("artifacts", items, self.dir, self.embedder)
+        self.assertIsNotNone(index.ivf)
+        self.assertEqual(index.search("Thing42", k=1)[0][0], 42)
+        again = build_semantic_index("artifacts", items, self.dir, self.embedder)
+        np.testing.assert_array_equal(again.ivf.centroids, index.ivf.centroids)
+
+    def test_blueprint_index_over_builder_output(self):
+        payload = blueprint_payload({
+            "billing/tasks.py": "def send_invoice_email(invoice):\n    pass\n",
+            "shop/models.py": MODELS_PY,
+        })
+        index = build_semantic_index("blueprints", payload, self.dir, self.embedder)
+        paths = [b["file_path"] for b in blueprint_items(payload)]
+        self.assertEqual(len(VectorStore(self.dir, "blueprints", self.embedder).keys), 2)
+        self.assertEqual(paths[index.search("invoice emails", k=1)[0][0]], "billing/tasks.py")
+        results = hybrid_search(build_blueprint_index(payload), index, "order model", k=1)
+        self.assertEqual(paths[results[0][0]], "shop/models.py")
+
+    def test_ivf_trains_on_fewer_rows_than_the_minimum_list_count(self):
+        vectors = self.embedder.embed([f"row {i}" for i in range(5)])
+        partition = IVFPartition.train(vectors)
+        self.assertEqual(len(partition.centroids), 5)
+        self.assertEqual(sorted(partition.candidates(vectors[0], 5).tolist()), list(range(5)))
+
+    def test_ivf_candidates_cover_all_rows_with_full_probe(self):
+        vectors = self.embedder.embed([f"row {i}" for i in range(64)])
+        partition = IVFPartition.train(vectors)
+        rows = partition.candidates(vectors[0], len(partition.centroids))
+        self.assertEqual(sorted(rows.tolist()), list(range(64)))
@@ -0,0 +1,160 @@
+import asyncio
+import os
+import queue
+import tempfile
+import time
+
+from django.test import SimpleTestCase
+
+from agent.channel_layers import SQLiteChannelLayer, channel_layers_from_url
+from core.event_bus import (
+    QueueRelayBroadcaster,
+    SharedEventBroadcaster,
+    SQLiteEventStore,
+    broadcaster_from_url,
+)
+from core.events import CRSEvent, CRSEventBroadcaster, EventType
+
+
+def make_event(message="x"):
+    return CRSEvent(event_type=EventType.STEP_LOG, timestamp=time.time(), run_id="run-1",
+                    data={"message": message})
+
+
+def row(message):
+    return make_event(message).to_dict()
+
+
+class SQLiteEventStoreTest(SimpleTestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, "bus.sqlite3")
+        self.store = SQLiteEventStore(self.path, max_per_repo=3, poll_interval=0.01)
+
+    def tearDown(self):
+        self.store.close()
+        self._tmp.cleanup()
+
+    def test_seq_is_consecutive_per_repository(self):
+        self.store.append_batch([(1, row("a")), (2, row("b")), (1, row("c"))])
+        self.assertEqual([r["seq"] for r in self.store.read_after(1, 0)], [1, 2])
+        self.assertEqual(self.store.last_seq(1), 2)
+        self.assertEqual(self.store.last_seq(2), 1)
+        self.assertEqual(self.store.last_seq(3), 0)
+
+    def test_trims_to_max_per_repo(self):
+        self.store.append_batch([(1, row(str(i))) for i in range(5)])
+        self.assertEqual([r["data"]["message"] for r in self.store.read_after(1, 0)], ["2", "3", "4"])
+        self.assertEqual(self.store.last_seq(1), 5)
+
+    def test_poll_sees_other_writers_only_after_open(self):
+        self.store.append_batch([(1, row("before"))])
+        reader = SQLiteEventStore(self.path, poll_interval=0.01)
+        try:
+            self.assertEqual(reader.poll(0.01), [])
+            self.store.append_batch([(1, row("after"))])
+            polled = reader.poll(1.0)
+        finally:
+            reader.close()
+        self.assertEqual([(repo, r["data"]["message"], r["seq"]) for repo, r in polled], [(1, "after", 2)])
+
+
+class SharedEventBroadcasterTest(SimpleTestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, "bus.sqlite3")
+        self.buses = []
+
+    def tearDown(self):
+        for bus in self.buses:
+            bus.close()
+        self._tmp.cleanup()
+
+    def bus(self, **kwargs):
+        bus = SharedEventBroadcaster(SQLiteEventStore(self.path, poll_interval=0.01),
+                                     flush_interval=0.01, tail_timeout=0.05, **kwargs)
+        self.buses.append(bus)
+        return bus
+
+    def test_events_reach_other_process_broadcaster(self):
+        writer, reader = self.bus(), self.bus()
+        writer.broadcast(1, make_event("a"))
+        writer.broadcast(1, make_event("b"))
+        events = []
+        deadline = time.monotonic() + 5
+        while len(events) < 2 and time.monotonic() < deadline:
+            events += reader.wait_for_events(1, after_seq=events[-1].seq if events else 0, timeout=0.5)
+        self.assertEqual([(e.seq, e.data["message"]) for e in events], [(1, "a"), (2, "b")])
+
+    def test_old_seq_replays_from_store(self):
+        writer = self.bus()
+        for i in range(4):
+            writer.broadcast(1, make_event(str(i)))
+        writer.flush()
+        reader = self.bus(max_queue_size=1)
+        self.assertEqual(reader.last_seq(1), 4)
+        self.assertEqual([e.data["message"] for e in reader.get_events(1, after_seq=1)], ["1", "2", "3"])
+
+    def test_async_reads(self):
+        writer, reader = self.bus(), self.bus()
+        writer.broadcast(1, make_event("a"))
+        writer.flush()
+
+        async def scenario():
+            replay = await reader.aget_events(1, after_seq=0, timeout=1)
+            last = await reader.alast_seq(1)
+            loop = asyncio.get_running_loop()
+            loop.call_later(0.05, writer.broadcast, 1, make_event("b"))
+            live = await reader.aget_events(1, after_seq=last, timeout=5)
+            return replay, last, live
+
+        replay, last, live = asyncio.run(scenario())
+        self.assertEqual([e.data["message"] for e in replay], ["a"])
+        self.assertEqual(last, 1)
+        self.assertEqual([(e.seq, e.data["message"]) for e in live], [(2, "b")])
+
+
+class RelayAndUrlTest(SimpleTestCase):
+    def test_queue_relay_forwards_to_parent(self):
+        q = queue.Queue()
+        QueueRelayBroadcaster(q).broadcast(7, make_event("child"))
+        parent = CRSEventBroadcaster()
+        event = QueueRelayBroadcaster.relay_to(parent, q.get_nowait())
+        self.assertEqual(event.seq, 1)
+        self.assertEqual(parent.get_events(7)[0].data["message"], "child")
+
+    def test_broadcaster_from_url(self):
+        self.assertIs(type(broadcaster_from_url("")), CRSEventBroadcaster)
+        self.assertIs(type(broadcaster_from_url("memory://")), CRSEventBroadcaster)
+        with tempfile.TemporaryDirectory() as tmp:
+            bus = broadcaster_from_url(f"sqlite:///{tmp}/bus.sqlite3")
+            try:
+                self.assertIsInstance(bus, SharedEventBroadcaster)
+            finally:
+                bus.close()
+        with self.assertRaises(ValueError):
+            broadcaster_from_url("kafka://nope")
+
+
+class ChannelLayerTest(SimpleTestCase):
+    def test_channel_layers_from_url(self):
+        self.assertEqual(channel_layers_from_url("")["default"]["BACKEND"],
+                         "channels.layers.InMemoryChannelLayer")
+        redis_layer = channel_layers_from_url("redis://localhost:6379/0")["default"]
+        self.assertEqual(redis_layer["BACKEND"], "channels_redis.pubsub.RedisPubSubChannelLayer")
+        self.assertEqual(redis_layer["CONFIG"], {"hosts": ["redis://localhost:6379/0"]})
+        self.assertEqual(channel_layers_from_url("sqlite:////tmp/x.sqlite3")["default"]["CONFIG"],
+                         {"path": "/tmp/x.sqlite3"})
+
+    def test_sqlite_group_send_across_layers(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "layer.sqlite3")
+
+            async def scenario():
+                a, b = SQLiteChannelLayer(path=path), SQLiteChannelLayer(path=path)
+                channel = await b.new_channel()
+                await b.group_add("chat", channel)
+                await a.group_send("chat", {"type": "chat.message", "text": "hi"})
+                return await asyncio.wait_for(b.receive(channel), timeout=5)
+
+            self.assertEqual(asyncio.run(scenario())["text"], "hi")
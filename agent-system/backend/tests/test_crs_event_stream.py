@@ -0,0 +1,90 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+from channels.testing import HttpCommunicator
+from django.test import SimpleTestCase, override_settings
+
+from agent.consumers import CRSEventStreamConsumer
+
+PATH = "/api/systems/1/repositories/2/crs/events/"
+
+
+def get_response(headers=()):
+    async def request():
+        comm = HttpCommunicator(CRSEventStreamConsumer.as_asgi(), "GET", PATH, headers=list(headers))
+        comm.scope["url_route"] = {"args": (), "kwargs": {"system_pk": "1", "pk": "2"}}
+        return await comm.get_response()
+    return asyncio.run(request())
+
+
+def header(response, name):
+    return dict(response["headers"]).get(name)
+
+
+class CRSEventStreamAuthTest(SimpleTestCase):
+    def test_anonymous_is_rejected(self):
+        response = get_response()
+        self.assertEqual(response["status"], 403)
+
+    def test_malformed_basic_auth_is_rejected_by_drf(self):
+        response = get_response([(b"authorization", b"Basic a b")])
+        self.assertEqual(response["status"], 401)
+        self.assertIn(b"Invalid basic header", response["body"])
+
+
+class CRSEventStreamCorsTest(SimpleTestCase):
+    def response(self, origin):
+        return get_response([(b"origin", origin)])
+
+    @override_settings(CORS_ALLOW_ALL_ORIGINS=False, CORS_ALLOWED_ORIGINS=["http://app.example"],
+                       CORS_ALLOW_CREDENTIALS=True)
+    def test_allowed_origin_is_echoed(self):
+        response = self.response(b"http://app.example")
+        self.assertEqual(header(response, b"access-control-allow-origin"), b"http://app.example")
+        self.assertEqual(header(response, b"access-control-allow-credentials"), b"true")
+
+    @override_settings(CORS_ALLOW_ALL_ORIGINS=False, CORS_ALLOWED_ORIGINS=["http://app.example"])
+    def test_unknown_origin_gets_no_allow_origin(self):
+        response = self.response(b"http://evil.example")
+        self.assertIsNone(header(response, b"access-control-allow-origin"))
+
+    @override_settings(CORS_ALLOW_ALL_ORIGINS=True, CORS_ALLOW_CREDENTIALS=False)
+    def test_allow_all_without_credentials_uses_wildcard(self):
+        response = self.response(b"http://any.example")
+        self.assertEqual(header(response, b"access-control-allow-origin"), b"*")
+
+
+class FakeBroadcaster:
+    """Records the thread of the blocking legacy read; the live tail ends the stream"""
+
+    def __init__(self):
+        self.read_thread = None
+
+    async def alast_seq(self, repository_id):
+        return 0
+
+    def get_events(self, repository_id, since=None):
+        self.read_thread = threading.current_thread()
+        return [SimpleNamespace(seq=3, to_sse=lambda: "id: 3\ndata: {}\n\n")]
+
+    async def aget_events(self, repository_id, after_seq, timeout=None):
+        self.after_seq = after_seq
+        raise asyncio.CancelledError
+
+
+class CRSEventStreamReplayTest(SimpleTestCase):
+    def test_since_replay_reads_off_the_event_loop(self):
+        consumer = CRSEventStreamConsumer()
+        consumer.scope = {"query_string": b"since=1.5", "headers": []}
+        sent = []
+
+        async def send_body(body, more_body=False):
+            sent.append(body)
+
+        consumer.send_body = send_body
+        broadcaster = FakeBroadcaster()
+        asyncio.run(consumer._stream(broadcaster, 2))
+        self.assertIsNot(broadcaster.read_thread, threading.main_thread())
+        self.assertEqual(sent, [b"id: 3\ndata: {}\n\n"])
+        self.assertEqual(broadcaster.after_seq, 3)
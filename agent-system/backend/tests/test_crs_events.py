@@ -0,0 +1,83 @@
+import asyncio
+import threading
+import time
+from dataclasses import replace
+
+from django.test import SimpleTestCase
+
+from core.events import CRSEvent, CRSEventBroadcaster, EventType
+
+
+def make_event(message="x"):
+    return CRSEvent(
+        event_type=EventType.STEP_LOG,
+        timestamp=time.time(),
+        run_id="run-1",
+        data={"message": message},
+    )
+
+
+class CRSEventBroadcasterTest(SimpleTestCase):
+    def setUp(self):
+        self.bus = CRSEventBroadcaster(max_queue_size=3)
+
+    def messages(self, events):
+        return [e.data["message"] for e in events]
+
+    def test_broadcast_assigns_consecutive_seq(self):
+        seqs = [self.bus.broadcast(1, make_event(str(i))).seq for i in range(3)]
+        self.assertEqual(seqs, [1, 2, 3])
+        self.assertEqual(self.bus.last_seq(1), 3)
+        self.assertEqual(self.bus.last_seq(2), 0)
+
+    def test_after_seq_is_offset_lookup(self):
+        for i in range(3):
+            self.bus.broadcast(1, make_event(str(i)))
+        self.assertEqual(self.messages(self.bus.get_events(1, after_seq=1)), ["1", "2"])
+        self.assertEqual(self.bus.get_events(1, after_seq=3), [])
+
+    def test_ring_buffer_drops_oldest(self):
+        for i in range(5):
+            self.bus.broadcast(1, make_event(str(i)))
+        self.assertEqual(self.messages(self.bus.get_events(1)), ["2", "3", "4"])
+        # a reader that fell behind the window gets what is still buffered
+        self.assertEqual(self.messages(self.bus.get_events(1, after_seq=0)), ["2", "3", "4"])
+
+    def test_clear_keeps_sequence(self):
+        self.bus.broadcast(1, make_event())
+        self.bus.clear_events(1)
+        self.assertEqual(self.bus.get_events(1), [])
+        self.assertEqual(self.bus.broadcast(1, make_event()).seq, 2)
+
+    def test_publish_local_gap_restarts_window(self):
+        self.bus.broadcast(1, make_event("old"))
+        self.bus._publish_local(1, replace(make_event("remote"), seq=10))
+        self.assertEqual(self.messages(self.bus.get_events(1)), ["remote"])
+        self.assertEqual(self.bus.last_seq(1), 10)
+
+    def test_wait_for_events_wakes_on_broadcast(self):
+        timer = threading.Timer(0.05, lambda: self.bus.broadcast(1, make_event("late")))
+        timer.start()
+        try:
+            events = self.bus.wait_for_events(1, after_seq=0, timeout=5)
+        finally:
+            timer.join()
+        self.assertEqual(self.messages(events), ["late"])
+
+    def test_wait_for_events_times_out(self):
+        self.assertEqual(self.bus.wait_for_events(1, after_seq=0, timeout=0.01), [])
+
+    def test_aget_events_wakes_from_other_thread(self):
+        async def scenario():
+            loop = asyncio.get_running_loop()
+            loop.call_later(0.05, lambda: threading.Thread(
+                target=self.bus.broadcast, args=(1, make_event("async"))).start())
+            return await self.bus.aget_events(1, after_seq=0, timeout=5)
+
+        self.assertEqual(self.messages(asyncio.run(scenario())), ["async"])
+        self.assertEqual(self.bus._async_waiters, {})
+
+    def test_aget_events_times_out_and_unregisters(self):
+        events = asyncio.run(self.bus.aget_events(1, after_seq=0, timeout=0.01))
+        self.assertEqual(events, [])
+        self.assertEqual(self.bus._async_waiters, {})
@@ -0,0 +1,145 @@
+import os
+import subprocess
+import tempfile
+import unittest
+
+from django.test import SimpleTestCase
+
+from core.git_changes import GIT_AVAILABLE, diff_paths, head_commit, is_dirty
+from core.pipeline_state import PipelineState
+from crs_main import run_pipeline
+from tests.crs_workspace import MODELS_PY, make_workspace
+
+
+def git(cwd, *args):
+    subprocess.run(
+        ["git", "-c", "user.name=crs", "-c", "user.email=crs@example.com", "-C", cwd, *args],
+        check=True, capture_output=True,
+    )
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def commit_all(cwd, message="change"):
+    git(cwd, "add", "-A")
+    git(cwd, "commit", "-q", "-m", message)
+    return head_commit(cwd)
+
+
+@unittest.skipUnless(GIT_AVAILABLE, "git is not installed")
+class GitChangesTests(SimpleTestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.src = self._tmp.name
+        git(self.src, "init", "-q")
+        write(os.path.join(self.src, "a.py"), "A = 1\n")
+        write(os.path.join(self.src, "b.py"), "B = 1\n")
+        write(os.path.join(self.src, "pkg", "c.py"), "class C:\n    value = 'a fairly long line'\n")
+        self.base = commit_all(self.src, "initial")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_head_commit_outside_a_work_tree_is_none(self):
+        with tempfile.TemporaryDirectory() as other:
+            self.assertIsNone(head_commit(other))
+            self.assertIsNone(is_dirty(other))
+
+    def test_is_dirty_honours_suffix(self):
+        self.assertFalse(is_dirty(self.src))
+        write(os.path.join(self.src, "notes.txt"), "untracked\n")
+        self.assertFalse(is_dirty(self.src, suffix=".py"))
+        self.assertTrue(is_dirty(self.src, suffix=None))
+        write(os.path.join(self.src, "a.py"), "A = 2\n")
+        self.assertTrue(is_dirty(self.src))
+
+    def test_diff_paths_reports_each_kind(self):
+        write(os.path.join(self.src, "a.py"), "A = 2\n")
+        os.remove(os.path.join(self.src, "b.py"))
+        os.rename(os.path.join(self.src, "pkg", "c.py"), os.path.join(self.src, "pkg", "d.py"))
+        write(os.path.join(self.src, "e.py"), "E = 1\n")
+        head = commit_all(self.src)
+
+        diff = diff_paths(self.src, self.base)
+        self.assertEqual(diff.head, head)
+        self.assertEqual(diff.added, ["e.py"])
+        self.assertEqual(diff.modified, ["a.py"])
+        self.assertEqual(diff.deleted, ["b.py"])
+        self.assertEqual(diff.renamed, [("pkg/c.py", "pkg/d.py")])
+        self.assertEqual(diff.paths(), ["a.py", "b.py", "e.py", "pkg/c.py", "pkg/d.py"])
+        self.assertEqual(diff.summary()["renamed"], 1)
+
+    def test_diff_paths_is_relative_to_subdirectory(self):
+        write(os.path.join(self.src, "pkg", "c.py"), "class C:\n    pass\n")
+        write(os.path.join(self.src, "a.py"), "A = 3\n")
+        commit_all(self.src)
+        diff = diff_paths(os.path.join(self.src, "pkg"), self.base)
+        self.assertEqual(diff.modified, ["c.py"])
+
+    def test_unknown_base_commit_is_none(self):
+        self.assertIsNone(diff_paths(self.src, "0" * 40))
+
+
+@unittest.skipUnless(GIT_AVAILABLE, "git is not installed")
+class GitDeltaPipelineTests(SimpleTestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.fs = make_workspace(self._tmp.name, {"shop/models.py": MODELS_PY})
+        self.src = self.fs.paths.src_dir
+        git(self.src, "init", "-q")
+        commit_all(self.src, "initial")
+        self.first = self.run_steps()
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def run_steps(self, **kwargs):
+        return self.fs.read_json(self.fs.run_path(run_pipeline(self.fs, **kwargs), "run.json"))["steps"]
+
+    def artifact_names(self):
+        return sorted(a["name"] for a in self.fs.read_json(self.fs.paths.artifacts_json)["artifacts"])
+
+    def test_first_run_records_commit(self):
+        self.assertNotIn("git_delta", self.first)
+        meta = PipelineState(self.fs).load_meta()
+        self.assertEqual(meta["git"]["commit"], head_commit(self.src))
+
+    def test_new_commit_reindexes_only_the_diff(self):
+        write(os.path.join(self.src, "billing", "models.py"), MODELS_PY.replace("Order", "Invoice"))
+        commit_all(self.src)
+        steps = self.run_steps()
+        self.assertTrue(steps["git_delta"]["ok"])
+        self.assertEqual(steps["git_delta"]["extra"]["updated"], ["billing/models.py"])
+        self.assertTrue(steps["blueprints"]["extra"]["skipped"])
+        incremental = self.artifact_names()
+
+        self.run_steps(force=True)
+        self.assertEqual(incremental, self.artifact_names())
+        self.assertIn("Invoice", incremental)
+
+    def test_deleted_file_is_removed(self):
+        write(os.path.join(self.src, "billing", "models.py"), MODELS_PY.replace("Order", "Invoice"))
+        commit_all(self.src)
+        self.run_steps()
+        os.remove(os.path.join(self.src, "billing", "models.py"))
+        commit_all(self.src)
+        steps = self.run_steps()
+        self.assertTrue(steps["git_delta"]["ok"])
+        self.assertNotIn("Invoice", self.artifact_names())
+
+    def test_dirty_tree_falls_back_to_fingerprinting(self):
+        write(os.path.join(self.src, "billing", "models.py"), MODELS_PY.replace("Order", "Invoice"))
+        steps = self.run_steps()
+        self.assertNotIn("git_delta", steps)
+        self.assertIn("Invoice", self.artifact_names())
+        self.assertNotIn("git", PipelineState(self.fs).load_meta())
+
+    def test_incremental_can_be_disabled(self):
+        self.fs.cfg["git"] = {"incremental": False}
+        write(os.path.join(self.src, "billing", "models.py"), MODELS_PY.replace("Order", "Invoice"))
+        commit_all(self.src)
+        self.assertNotIn("git_delta", self.run_steps())
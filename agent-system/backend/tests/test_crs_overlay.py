@@ -0,0 +1,105 @@
+import os
+import tempfile
+from pathlib import Path
+
+from django.test import SimpleTestCase
+
+from core.fs import LocalDiskBackend, OverlayBackend
+from core.source_scanner import SourceScanner
+
+
+class OverlayBackendTest(SimpleTestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+        self.disk = LocalDiskBackend()
+        self.disk.write_text(os.path.join(self.root, "src", "a.py"), "A = 1\n")
+        self.disk.write_text(os.path.join(self.root, "src", "pkg", "b.py"), "B = 1\n")
+        self.overlay = OverlayBackend(self.disk)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def path(self, *parts):
+        return os.path.join(self.root, *parts)
+
+    def test_writes_stay_in_memory(self):
+        self.overlay.write_text(self.path("src", "new.py"), "N = 1\n")
+        self.assertEqual(self.overlay.read_text(self.path("src", "new.py")), "N = 1\n")
+        self.assertFalse(os.path.exists(self.path("src", "new.py")))
+        self.assertIn(self.path("src", "new.py"), self.overlay.list_files(self.path("src"), suffix=".py"))
+        self.assertEqual(self.overlay.read_text(self.path("src", "a.py")), "A = 1\n")
+
+    def test_deleted_file_is_hidden(self):
+        target = self.path("src", "a.py")
+        self.overlay.delete(target)
+
+        self.assertFalse(self.overlay.exists(target))
+        with self.assertRaises(FileNotFoundError):
+            self.overlay.read_text(target)
+        with self.assertRaises(FileNotFoundError):
+            self.overlay.iter_lines(target)
+        self.assertNotIn(target, self.overlay.list_files(self.path("src")))
+        self.assertNotIn(target, self.overlay.scan_files(SourceScanner(self.path("src")), self.path("src")))
+        # base untouched until commit
+        self.assertTrue(os.path.exists(target))
+        self.assertEqual(self.overlay.pending_deletes(under=self.path("src")), [target])
+
+    def test_deleted_directory_hides_children(self):
+        self.overlay.delete(self.path("src", "pkg"))
+        self.assertFalse(self.overlay.exists(self.path("src", "pkg", "b.py")))
+        self.assertEqual(self.overlay.list_files(self.path("src")), [self.path("src", "a.py")])
+
+    def test_rewrite_after_delete(self):
+        target = self.path("src", "a.py")
+        self.overlay.write_text(target, "A = 2\n")
+        self.overlay.delete(target)
+        self.assertEqual(self.overlay.pending_paths(), [])
+        self.overlay.write_text(target, "A = 3\n")
+        self.assertTrue(self.overlay.exists(target))
+        self.assertEqual(self.overlay.read_text(target), "A = 3\n")
+
+    def test_commit_applies_deletes_and_writes(self):
+        self.overlay.delete(self.path("src", "pkg", "b.py"))
+        self.overlay.write_text(self.path("src", "c.py"), "C = 1\n")
+        done = self.overlay.commit()
+
+        self.assertEqual(set(done), {self.path("src", "pkg", "b.py"), self.path("src", "c.py")})
+        self.assertFalse(os.path.exists(self.path("src", "pkg", "b.py")))
+        self.assertEqual(self.disk.read_text(self.path("src", "c.py")), "C = 1\n")
+        self.assertEqual(self.overlay.pending_deletes(), [])
+
+    def test_discard_drops_tombstones(self):
+        self.overlay.delete(self.path("src", "a.py"))
+        self.overlay.discard()
+        self.assertTrue(self.overlay.exists(self.path("src", "a.py")))
+
+
+class EvaluatePatchDeleteTest(SimpleTestCase):
+    def test_deleted_file_drops_out_of_speculative_run(self):
+        import json
+        from core.fs import WorkspaceFS
+        from crs_main import evaluate_patch
+
+        with tempfile.TemporaryDirectory() as root:
+            os.makedirs(os.path.join(root, "src", "app"))
+            with open(os.path.join(root, "src", "app", "models.py"), "w") as f:
+                f.write("from django.db import models\n\nclass Order(models.Model):\n    total = models.IntegerField()\n")
+            with open(os.path.join(root, "src", "app", "utils.py"), "w") as f:
+                f.write("def helper():\n    return 1\n")
+            tools_dir = Path(__file__).resolve().parents[2] / "crs" / "tools"
+            with open(os.path.join(root, "config.json"), "w") as f:
+                json.dump({"version": "crs-workspace-config-v1", "paths": {"tools_dir": str(tools_dir)}}, f)
+
+            result = evaluate_patch(
+                WorkspaceFS(config_path=os.path.join(root, "config.json")),
+                {"changes": [{"op": "delete_file", "path": "src/app/utils.py"}]},
+            )
+
+            ov = result["fs"]
+            names = [a.get("name") for a in ov.read_json(ov.paths.artifacts_json).get("artifacts", [])]
+            self.assertIn("Order", names)
+            self.assertNotIn("helper", names)
+            self.assertEqual(result["deleted_src_paths"], [os.path.join(root, "src", "app", "utils.py")])
+            self.assertTrue(os.path.exists(os.path.join(root, "src", "app", "utils.py")))
+            self.assertFalse(os.path.exists(os.path.join(root, "state", "artifacts.json")))
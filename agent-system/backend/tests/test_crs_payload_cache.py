@@ -0,0 +1,129 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from agent.services.crs_payload_cache import CRSPayloadCache
+from tests.crs_workspace import MODELS_PY, blueprint_payload
+
+ARTIFACTS = {
+    "artifacts": [
+        {"name": "Order", "type": "class", "file_path": "shop/models.py"},
+        {"name": "OrderAdmin", "type": "class", "file_path": "shop/admin.py"},
+        {"name": "checkout", "type": "function", "file_path": "shop/views.py"},
+    ]
+}
+
+
+class CRSPayloadCacheTests(SimpleTestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self._tmp.name) / "artifacts.json"
+        self.write(ARTIFACTS)
+        self.cache = CRSPayloadCache(max_bytes=1 << 20)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def write(self, payload, path=None):
+        path = path or self.path
+        path.write_text(json.dumps(payload), encoding="utf-8")
+        # a rewrite within the same clock tick must still change the fingerprint
+        stamp = time.time_ns() + 1_000_000_000
+        os.utime(path, ns=(stamp, stamp))
+
+    def test_payload_is_parsed_once_per_state(self):
+        first = self.cache.payload(1, "artifacts", self.path)
+        self.assertIs(self.cache.payload(1, "artifacts", self.path), first)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_rewritten_file_is_reloaded(self):
+        self.cache.payload(1, "artifacts", self.path)
+        self.write({"artifacts": []})
+        self.assertEqual(self.cache.payload(1, "artifacts", self.path), {"artifacts": []})
+
+    def test_invalidate_repository_only_drops_that_repository(self):
+        other = Path(self._tmp.name) / "other.json"
+        self.write(ARTIFACTS, other)
+        first = self.cache.payload(1, "artifacts", self.path)
+        kept = self.cache.payload(2, "artifacts", other)
+        self.cache.invalidate_repository(1)
+        self.assertIsNot(self.cache.payload(1, "artifacts", self.path), first)
+        self.assertIs(self.cache.payload(2, "artifacts", other), kept)
+
+    def test_missing_file_is_an_empty_payload(self):
+        self.cache.payload(1, "artifacts", self.path)
+        self.path.unlink()
+        self.assertEqual(self.cache.payload(1, "artifacts", self.path), {})
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+    def test_lru_eviction_by_file_size(self):
+        size = self.path.stat().st_size
+        cache = CRSPayloadCache(max_bytes=2 * size)
+        paths = []
+        for i in range(3):
+            path = Path(self._tmp.name) / f"a{i}.json"
+            self.write(ARTIFACTS, path)
+            paths.append(path)
+        cache.payload(0, "artifacts", paths[0])
+        cache.payload(1, "artifacts", paths[1])
+        cache.payload(0, "artifacts", paths[0])
+        cache.payload(2, "artifacts", paths[2])
+        self.assertEqual(cache.stats()["bytes"], 2 * size)
+        self.assertEqual(set(cache._entries), {(0, "artifacts"), (2, "artifacts")})
+
+    def test_oversized_payload_is_not_cached(self):
+        cache = CRSPayloadCache(max_bytes=10)
+        self.assertEqual(cache.payload(1, "artifacts", self.path), ARTIFACTS)
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_indexes_are_built_lazily_once_per_entry(self):
+        by_name = self.cache.index(1, "artifacts", self.path, "by_name")
+        self.assertEqual(sorted(by_name), ["Order", "OrderAdmin", "checkout"])
+        self.assertIs(self.cache.index(1, "artifacts", self.path, "by_name"), by_name)
+        self.assertEqual([a["name"] for a in self.cache.index(1, "artifacts", self.path, "non_admin")],
+                         ["Order", "checkout"])
+        self.assertEqual([a["name"] for a in self.cache.index(1, "artifacts", self.path, "models")], ["Order"])
+
+        self.write({"artifacts": [{"name": "Refund"}]})
+        self.assertEqual(list(self.cache.index(1, "artifacts", self.path, "by_name")), ["Refund"])
+
+    def test_blueprints_by_path_over_builder_output(self):
+        path = Path(self._tmp.name) / "blueprints.json"
+        self.write(blueprint_payload({"shop/models.py": MODELS_PY, "shop/__init__.py": ""}), path)
+        by_path = self.cache.index(1, "blueprints", path, "by_path")
+        self.assertEqual(sorted(by_path), ["shop/__init__.py", "shop/models.py"])
+        self.assertEqual([s["name"] for s in by_path["shop/models.py"]["segments"] if s["kind"] == "class_def"],
+                         ["Order"])
+        self.assertEqual(self.cache.index(1, "blueprints", path, "bm25").size, 2)
+
+    def test_derived_without_state_uses_an_empty_payload(self):
+        missing = Path(self._tmp.name) / "missing.json"
+        self.assertEqual(self.cache.derived(1, "relationships", missing, "x", lambda p: p), {})
+
+    def test_concurrent_misses_parse_once(self):
+        real_load = json.load
+        loads = []
+
+        def slow_load(handle):
+            loads.append(1)
+            time.sleep(0.05)
+            return real_load(handle)
+
+        results = []
+        with mock.patch("agent.services.crs_payload_cache.json.load", side_effect=slow_load):
+            threads = [
+                threading.Thread(target=lambda: results.append(self.cache.payload(1, "artifacts", self.path)))
+                for _ in range(4)
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        self.assertEqual(len(loads), 1)
+        self.assertTrue(all(r is results[0] for r in results))
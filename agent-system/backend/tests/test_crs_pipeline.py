@@ -0,0 +1,75 @@
+import io
+import os
+import tempfile
+import threading
+from contextlib import redirect_stdout
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from core.events import CRSEventEmitter, EventType, LogLevel
+from core.run_context import RunContext
+from crs_main import run_pipeline
+from tests.crs_workspace import MODELS_PY, make_workspace
+
+
+class RunContextTest(SimpleTestCase):
+    def test_log_keeps_step_text_and_emits(self):
+        emitter = CRSEventEmitter("run-1", repository_id=1)
+        ctx = RunContext(fs=None, run_id="run-1", emitter=emitter)
+        ctx.log("artifacts", "one")
+        ctx.log("artifacts", "two", LogLevel.WARNING)
+        ctx.log("blueprints", "other")
+
+        self.assertEqual(ctx.step_text("artifacts"), "one\ntwo")
+        self.assertEqual(ctx.step_text("missing"), "")
+        logs = [e for e in emitter.get_events() if e.event_type == EventType.STEP_LOG]
+        self.assertEqual([e.data["message"] for e in logs], ["one", "two", "other"])
+
+    def test_echo_prints_only_when_asked(self):
+        out = io.StringIO()
+        with redirect_stdout(out):
+            RunContext(fs=None, run_id="quiet").log("s", "hidden")
+            RunContext(fs=None, run_id="loud", echo=True).log("s", "shown")
+        self.assertEqual(out.getvalue(), "shown\n")
+
+
+class ReentrantPipelineTest(SimpleTestCase):
+    def test_concurrent_runs_stay_in_their_workspace(self):
+        with tempfile.TemporaryDirectory() as a, tempfile.TemporaryDirectory() as b:
+            workspaces = {
+                "a": make_workspace(a, {"shop/models.py": MODELS_PY}),
+                "b": make_workspace(b, {"billing/models.py": MODELS_PY.replace("Order", "Invoice")}),
+            }
+            runs, errors = {}, []
+
+            def run(name):
+                try:
+                    runs[name] = run_pipeline(workspaces[name])
+                except Exception as e:  # surfaced below
+                    errors.append(e)
+
+            env_before = os.environ.get("CRS_CONFIG")
+            with mock.patch("sys.stdout", new_callable=io.StringIO) as stdout:
+                threads = [threading.Thread(target=run, args=(name,)) for name in workspaces]
+                for t in threads:
+                    t.start()
+                for t in threads:
+                    t.join()
+
+            self.assertEqual(errors, [])
+            self.assertEqual(os.environ.get("CRS_CONFIG"), env_before)
+            self.assertEqual(stdout.getvalue(), "")
+
+            def names(fs):
+                return {x.get("name") for x in fs.read_json(fs.paths.artifacts_json).get("artifacts", [])}
+
+            self.assertIn("Order", names(workspaces["a"]))
+            self.assertNotIn("Invoice", names(workspaces["a"]))
+            self.assertIn("Invoice", names(workspaces["b"]))
+            self.assertNotIn("Order", names(workspaces["b"]))
+
+            for name, fs in workspaces.items():
+                run_json = fs.read_json(fs.run_path(runs[name], "run.json"))
+                self.assertEqual(run_json["status"], "ok")
+                self.assertTrue(os.path.exists(fs.run_path(runs[name], "artifacts.log")))
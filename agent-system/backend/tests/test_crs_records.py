@@ -0,0 +1,151 @@
+import copy
+import io
+import json
+import tempfile
+
+from django.test import SimpleTestCase
+
+from core.query_api import CRSQueryAPI
+from core.records import Compactor, dumps_payload, iter_payload_chunks, iter_payload_records
+from crs_main import run_pipeline
+from tests.crs_workspace import MODELS_PY, make_workspace
+from tools.artifact_extractor_v1_workspace import Artifact
+from tools.relationship_builder_v1_workspace import RelEnd, Relationship
+
+SERIALIZERS_PY = (
+    "from rest_framework import serializers\n"
+    "from shop.models import Order\n\n"
+    "class OrderSerializer(serializers.ModelSerializer):\n"
+    "    class Meta:\n"
+    "        model = Order\n"
+    "        fields = ['total']\n"
+)
+
+
+def artifact(aid, name, line):
+    return Artifact(
+        artifact_id=aid, type="django_model", name=name, file_path="shop/models.py",
+        anchor={"start_line": line, "end_line": line + 2}, confidence="high",
+        evidence=[{"file_path": "shop/models.py", "anchor": {"start_line": line, "end_line": line + 2}}],
+        meta={"bases": ["models.Model"]},
+    )
+
+
+class PayloadEncodingTests(SimpleTestCase):
+    def setUp(self):
+        self.payload = {
+            "version": "crs-artifacts-v2",
+            "artifacts": [artifact("a1", "Order", 3), artifact("a2", "Invoice", 9).to_dict()],
+            "summary": {"count": 2},
+        }
+        self.plain = json.loads(json.dumps(self.payload, default=lambda o: o.to_dict()))
+
+    def test_dumps_payload_round_trips_one_record_per_line(self):
+        text = dumps_payload(self.payload)
+        self.assertEqual(json.loads(text), self.plain)
+        record_lines = [line for line in text.splitlines() if line.startswith('    {"artifact_id"')]
+        self.assertEqual(len(record_lines), 2)
+
+    def test_dumps_payload_edge_cases(self):
+        self.assertEqual(dumps_payload({}), "{}\n")
+        self.assertEqual(json.loads(dumps_payload([1, 2])), [1, 2])
+        self.assertEqual(json.loads(dumps_payload({"artifacts": []})), {"artifacts": []})
+
+    def test_chunks_match_dumps_payload(self):
+        head = {"version": "crs-artifacts-v2"}
+        records = (a for a in self.plain["artifacts"])
+        text = "".join(iter_payload_chunks(head, "artifacts", records))
+        self.assertEqual(text, dumps_payload({**head, "artifacts": self.plain["artifacts"]}))
+        empty = "".join(iter_payload_chunks(head, "artifacts", []))
+        self.assertEqual(json.loads(empty), {**head, "artifacts": []})
+
+    def test_iter_payload_records(self):
+        text = dumps_payload(self.payload)
+        records = list(iter_payload_records(io.StringIO(text), "artifacts"))
+        self.assertEqual(records, self.plain["artifacts"])
+        empty = dumps_payload({"version": 1, "artifacts": []})
+        self.assertEqual(list(iter_payload_records(empty.splitlines(True), "artifacts")), [])
+
+    def test_iter_payload_records_rejects_other_layouts(self):
+        indented = json.dumps(self.plain, indent=2)
+        with self.assertRaises(ValueError):
+            list(iter_payload_records(indented.splitlines(True), "artifacts"))
+        truncated = dumps_payload(self.payload).splitlines(True)[:4]
+        with self.assertRaises(ValueError):
+            list(iter_payload_records(truncated, "artifacts"))
+
+
+class CompactorTests(SimpleTestCase):
+    def test_equal_flat_dicts_are_shared(self):
+        c = Compactor()
+        a = c.flat({"start_line": 1, "end_line": 3})
+        b = c.flat({"start_line": 1, "end_line": 3})
+        self.assertIs(a, b)
+        self.assertIsNot(a, c.flat({"start_line": 1, "end_line": 4}))
+
+    def test_bool_and_int_values_stay_apart(self):
+        c = Compactor()
+        self.assertEqual(c.flat({"resolved": True})["resolved"], True)
+        self.assertIs(type(c.flat({"resolved": 1})["resolved"]), int)
+
+    def test_nested_and_large_dicts_are_not_shared(self):
+        c = Compactor()
+        nested = {"fields": ["total"]}
+        self.assertIs(c.flat(nested), nested)
+        large = {f"k{i}": i for i in range(20)}
+        self.assertIs(c.flat(large), large)
+        self.assertEqual(c.flat("text"), "text")
+
+    def test_artifact_and_relationship_ends_are_shared(self):
+        c = Compactor()
+        arts = [json.loads(json.dumps(artifact(f"a{i}", "Order", 3).to_dict())) for i in range(2)]
+        for a in arts:
+            c.artifact(a)
+        self.assertIs(arts[0]["anchor"], arts[1]["anchor"])
+        self.assertIs(arts[0]["evidence"][0]["anchor"], arts[1]["anchor"])
+        self.assertIs(arts[0]["name"], arts[1]["name"])
+
+        end = {"artifact_id": "a1", "type": "django_model", "name": "Order"}
+        rels = [{"type": "uses", "from": dict(end), "to": dict(end), "meta": {}} for _ in range(2)]
+        for r in rels:
+            c.relationship(r)
+        self.assertIs(rels[0]["from"], rels[1]["to"])
+
+
+class RecordTests(SimpleTestCase):
+    def test_artifact_to_dict_is_shallow(self):
+        a = artifact("a1", "Order", 3)
+        d = a.to_dict()
+        self.assertIs(d["anchor"], a.anchor)
+        self.assertFalse(hasattr(a, "__dict__"))
+
+    def test_relationships_share_end_dicts_per_payload(self):
+        model = RelEnd("a1", "django_model", "Order")
+        view = RelEnd("a2", "drf_view", "OrderView")
+        rels = [
+            Relationship(f"r{i}", "uses_model", view, model, "high", [], {}) for i in range(2)
+        ]
+        ends = {}
+        first, second = (r.to_dict(ends) for r in rels)
+        self.assertIs(first["to"], second["to"])
+        self.assertEqual(first["from"], {"artifact_id": "a2", "type": "drf_view", "name": "OrderView"})
+        self.assertIsNot(rels[0].to_dict()["to"], rels[1].to_dict()["to"])
+
+
+class CompactQueryIndexTests(SimpleTestCase):
+    def test_compact_index_answers_like_plain_index(self):
+        with tempfile.TemporaryDirectory() as root:
+            fs = make_workspace(root, {"shop/models.py": MODELS_PY, "shop/serializers.py": SERIALIZERS_PY})
+            run_pipeline(fs)
+            arts = fs.read_json(fs.paths.artifacts_json)
+            rels = fs.read_json(fs.paths.relationships_json)
+
+        plain, compact = CRSQueryAPI(fs), CRSQueryAPI(fs)
+        plain._idx = plain.load_payloads(copy.deepcopy(arts), copy.deepcopy(rels), compact=False)
+        compact._idx = compact.load_payloads(arts, rels)
+        self.assertTrue(plain.find_models("Order"))
+        self.assertEqual(compact.find_models("Order"), plain.find_models("Order"))
+        self.assertEqual(compact.find_serializers(), plain.find_serializers())
+        model_id = plain.resolve_model("Order")["artifact_id"]
+        self.assertTrue(plain.neighbors(model_id)["relationships"])
+        self.assertEqual(compact.neighbors(model_id), plain.neighbors(model_id))
@@ -0,0 +1,164 @@
+import re
+import tempfile
+
+from django.test import SimpleTestCase
+
+from core.query_api import CRSQueryAPI
+from core.route_index import RouteIndex, route_to_regex
+from crs_main import run_pipeline
+from tests.crs_workspace import MODELS_PY, make_workspace
+
+SERIALIZERS_PY = (
+    "from rest_framework import serializers\n"
+    "from shop.models import Order\n\n"
+    "class OrderSerializer(serializers.ModelSerializer):\n"
+    "    class Meta:\n"
+    "        model = Order\n"
+    "        fields = ['total']\n"
+)
+
+VIEWS_PY = (
+    "from rest_framework import viewsets\n"
+    "from shop.models import Order\n"
+    "from shop.serializers import OrderSerializer\n\n"
+    "class OrderViewSet(viewsets.ModelViewSet):\n"
+    "    queryset = Order.objects.all()\n"
+    "    serializer_class = OrderSerializer\n\n"
+    "def order_summary(request, pk):\n"
+    "    pass\n\n"
+    "def archive(request, year):\n"
+    "    pass\n\n"
+    "def files(request, rest):\n"
+    "    pass\n"
+)
+
+PROJECT_URLS = (
+    "from django.urls import include, path, re_path\n"
+    "from shop import views\n\n"
+    "urlpatterns = [\n"
+    "    path('api/shop/', include('shop.urls')),\n"
+    "    re_path(r'^legacy/(?P<year>[0-9]{4})/$', views.archive),\n"
+    "    path('files/<path:rest>', views.files),\n"
+    "]\n"
+)
+
+SHOP_URLS = (
+    "from django.urls import path\n"
+    "from rest_framework.routers import DefaultRouter\n"
+    "from shop.views import OrderViewSet, order_summary\n\n"
+    "router = DefaultRouter()\n"
+    "router.register('orders', OrderViewSet, basename='order')\n\n"
+    "urlpatterns = [\n"
+    "    path('orders/<int:pk>/summary/', order_summary, name='order-summary'),\n"
+    "]\n"
+    "urlpatterns += router.urls\n"
+)
+
+
+def url_pattern(route, target, line, fn="path", file_path="app/urls.py", **meta):
+    return {
+        "artifact_id": f"url_pattern:{route}:{file_path}:{line}",
+        "type": "url_pattern",
+        "name": route,
+        "file_path": file_path,
+        "anchor": {"start_line": line, "end_line": line},
+        "meta": {"fn": fn, "route": route, "target": target, **meta},
+    }
+
+
+class RouteToRegexTests(SimpleTestCase):
+    def test_converters(self):
+        rx = re.compile(route_to_regex("orders/<int:pk>/<slug:slug>/"))
+        self.assertEqual(rx.fullmatch("orders/7/big-box/").groupdict(), {"pk": "7", "slug": "big-box"})
+        self.assertIsNone(rx.fullmatch("orders/x/big-box/"))
+
+    def test_unknown_converter_falls_back_to_str(self):
+        rx = re.compile(route_to_regex("<year:y>/"))
+        self.assertTrue(rx.fullmatch("2024/"))
+        self.assertIsNone(rx.fullmatch("a/b/"))
+
+
+class RouteIndexTests(SimpleTestCase):
+    def test_first_pattern_in_urlpatterns_order_wins(self):
+        idx = RouteIndex.from_artifacts([
+            url_pattern("items/<str:slug>/", "item_by_slug", 2),
+            url_pattern("items/new/", "new_item", 3),
+        ])
+        self.assertEqual(idx.resolve("/items/new/").entry.view, "item_by_slug")
+        views = [m.entry.view for m in idx.match_all("/items/new/")]
+        self.assertEqual(views, ["item_by_slug", "new_item"])
+
+    def test_append_slash_and_query_string(self):
+        idx = RouteIndex.from_artifacts([url_pattern("items/<int:pk>/", "item", 2)])
+        self.assertEqual(idx.resolve("/items/5?format=json").params, {"pk": "5"})
+        self.assertIsNone(idx.resolve("/items/five/"))
+
+    def test_unanchored_re_path_matches_prefix(self):
+        idx = RouteIndex.from_artifacts([url_pattern(r"^docs/", "docs", 2, fn="re_path")])
+        self.assertEqual(idx.resolve("/docs/a/b/").entry.view, "docs")
+
+    def test_invalid_regex_is_skipped(self):
+        idx = RouteIndex.from_artifacts([
+            url_pattern(r"^broken/(?P<x>[0-9/$", "broken", 2, fn="re_path"),
+            url_pattern("ok/", "ok", 3),
+        ])
+        self.assertEqual(idx.stats(), {"routes": 1, "skipped": 1})
+        self.assertEqual(idx.resolve("/ok/").entry.view, "ok")
+
+    def test_by_pattern_knows_composed_and_raw_routes(self):
+        idx = RouteIndex.from_artifacts([
+            url_pattern("api/", None, 2, file_path="project/urls.py", include="app.urls"),
+            url_pattern("items/", "items", 2),
+        ])
+        self.assertEqual([e.view for e in idx.by_pattern("api/items/")], ["items"])
+        self.assertEqual([e.view for e in idx.by_pattern("items/")], ["items"])
+
+
+class QueryAPIRouteTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls._tmp = tempfile.TemporaryDirectory()
+        fs = make_workspace(cls._tmp.name, {
+            "shop/models.py": MODELS_PY,
+            "shop/serializers.py": SERIALIZERS_PY,
+            "shop/views.py": VIEWS_PY,
+            "shop/urls.py": SHOP_URLS,
+            "project/urls.py": PROJECT_URLS,
+        })
+        run_pipeline(fs)
+        cls.api = CRSQueryAPI(fs)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._tmp.cleanup()
+        super().tearDownClass()
+
+    def test_include_prefix_and_router_routes(self):
+        listing = self.api.resolve_url("/api/shop/orders/")
+        self.assertEqual((listing["pattern"], listing["view"], listing["name"]),
+                         ("api/shop/orders/", "OrderViewSet", "order-list"))
+        detail = self.api.resolve_url("https://example.com/api/shop/orders/42/?expand=1")
+        self.assertEqual((detail["name"], detail["params"]), ("order-detail", {"pk": "42"}))
+        self.assertEqual(self.api.resolve_url("/api/shop/orders/42")["name"], "order-detail")
+
+    def test_path_re_path_and_path_converter(self):
+        summary = self.api.resolve_url("/api/shop/orders/42/summary/")
+        self.assertEqual((summary["kind"], summary["view"]), ("path", "order_summary"))
+        legacy = self.api.resolve_url("/legacy/2024/")
+        self.assertEqual((legacy["kind"], legacy["params"]), ("re_path", {"year": "2024"}))
+        self.assertFalse(self.api.resolve_url("/legacy/24/")["found"])
+        self.assertEqual(self.api.resolve_url("/files/a/b/c.txt")["params"], {"rest": "a/b/c.txt"})
+
+    def test_trace_route_to_model(self):
+        trace = self.api.trace_route_to_model("/api/shop/orders/5/")
+        self.assertEqual(trace["view"]["name"], "OrderViewSet")
+        self.assertEqual(trace["serializer"]["name"], "OrderSerializer")
+        self.assertEqual(trace["model"]["name"], "Order")
+        self.assertEqual(trace["matched"]["params"], {"pk": "5"})
+
+    def test_trace_urls_to_models(self):
+        out = self.api.trace_urls_to_models(["/api/shop/orders/1/", "/api/shop/orders/2/", "/nope/"])
+        self.assertEqual((out["total"], out["resolved"], out["unresolved"]), (3, 2, 1))
+        self.assertEqual(out["by_model"], {"Order": 2})
+        self.assertEqual(out["results"][0]["params"], {"pk": "1"})
@@ -0,0 +1,158 @@
+import multiprocessing
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from agent.models import CRSJob, Repository, System
+from agent.services import crs_pool_worker
+from crs_main import run_pipeline
+from tests.crs_workspace import MODELS_PY, make_workspace
+
+
+def _apps_ready():
+    from django.apps import apps
+
+    from agent.models import CRSJob  # noqa: F401  (would raise before django.setup())
+    return apps.ready
+
+
+class PoolWorkerBootstrapTest(SimpleTestCase):
+    def test_spawned_worker_sets_up_django_before_models(self):
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(1, mp_context=ctx, initializer=crs_pool_worker.init_pool_worker,
+                                 initargs=(None,)) as pool:
+            self.assertTrue(pool.submit(_apps_ready).result(timeout=120))
+
+    def test_scheduler_imports_worker_entry_points(self):
+        from agent.services import crs_scheduler
+
+        self.assertIs(crs_scheduler.execute_crs_job, crs_pool_worker.execute_crs_job)
+
+
+class ExecuteJobForceTest(SimpleTestCase):
+    def run_job(self, kind, force):
+        job = mock.Mock(kind=kind, step_name="artifacts", force=force, job_id="j1")
+        objects = mock.Mock()
+        objects.select_related.return_value.get.return_value = job
+        with mock.patch("agent.models.CRSJob.objects", objects), \
+                mock.patch("agent.services.crs_runner.run_crs_pipeline", return_value={}) as pipeline, \
+                mock.patch("agent.services.crs_runner.run_crs_step", return_value={}) as step, \
+                mock.patch("agent.services.crs_scheduler._emit_job_event"), \
+                mock.patch("agent.services.crs_scheduler._finish_job") as finish, \
+                mock.patch("django.db.close_old_connections"):
+            outcome = crs_pool_worker.execute_crs_job(1)
+        self.assertTrue(outcome["ok"])
+        self.assertEqual(finish.call_args.args[1], "completed")
+        return job, pipeline, step
+
+    def test_pipeline_job_passes_force(self):
+        job, pipeline, _ = self.run_job("pipeline", True)
+        pipeline.assert_called_once_with(job.repository, force=True)
+
+    def test_step_job_passes_force(self):
+        job, _, step = self.run_job("step", True)
+        step.assert_called_once_with(job.repository, "artifacts", force=True, run_id="job_j1")
+
+
+class ForcedPipelineTest(SimpleTestCase):
+    def test_force_reruns_up_to_date_steps(self):
+        with tempfile.TemporaryDirectory() as root:
+            fs = make_workspace(root, {"shop/models.py": MODELS_PY})
+            run_pipeline(fs)
+
+            def steps(run_id):
+                return fs.read_json(fs.run_path(run_id, "run.json"))["steps"]
+
+            skipped = steps(run_pipeline(fs))
+            self.assertTrue(all(s["extra"].get("skipped") for s in skipped.values()))
+
+            forced_run = run_pipeline(fs, force=True)
+            self.assertFalse(any(s["extra"].get("skipped") for s in steps(forced_run).values()))
+            self.assertTrue(fs.read_json(fs.run_path(forced_run, "decision.json"))["reason"]["forced"])
+
+
+class JobQueueTest(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(username="crs", password="password")
+        system = System.objects.create(name="Shop", user=user)
+        self.repo = Repository.objects.create(name="api", system=system)
+        self.other = Repository.objects.create(name="web", system=system)
+        for target in ("agent.services.crs_scheduler._emit_job_event",
+                       "agent.services.crs_scheduler._notify_scheduler"):
+            patcher = mock.patch(target)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def enqueue(self, repo, **kwargs):
+        from agent.services.crs_scheduler import enqueue_crs_job
+        return enqueue_crs_job(repo, **kwargs)
+
+    def claim(self):
+        from agent.services.crs_scheduler import claim_next_job
+        return claim_next_job("w1")
+
+    def test_duplicate_work_coalesces_into_the_queued_job(self):
+        job, created = self.enqueue(self.repo, priority=CRSJob.PRIORITY_BULK)
+        again, coalesced = self.enqueue(self.repo, force=True, priority=CRSJob.PRIORITY_INTERACTIVE)
+        self.assertTrue(created)
+        self.assertFalse(coalesced)
+        self.assertEqual(again.pk, job.pk)
+        self.assertEqual((again.priority, again.force, again.coalesced_count),
+                         (CRSJob.PRIORITY_INTERACTIVE, True, 1))
+        _, step_created = self.enqueue(self.repo, kind="step", step_name="artifacts")
+        self.assertTrue(step_created)
+        self.assertEqual(CRSJob.objects.filter(status="queued").count(), 2)
+
+    def test_interactive_jobs_are_claimed_before_bulk(self):
+        bulk, _ = self.enqueue(self.other, priority=CRSJob.PRIORITY_BULK)
+        interactive, _ = self.enqueue(self.repo, priority=CRSJob.PRIORITY_INTERACTIVE)
+        first = self.claim()
+        self.assertEqual(first.pk, interactive.pk)
+        self.assertEqual((first.status, first.worker_id, first.attempts), ("running", "w1", 1))
+        self.assertEqual(self.claim().pk, bulk.pk)
+
+    def test_repository_with_a_running_job_is_skipped(self):
+        self.enqueue(self.repo)
+        self.claim()
+        self.enqueue(self.repo, kind="step", step_name="impact")
+        self.assertIsNone(self.claim())
+        other, _ = self.enqueue(self.other, priority=CRSJob.PRIORITY_BULK)
+        self.assertEqual(self.claim().pk, other.pk)
+
+    def running_job(self, repo, attempts=1, age=600):
+        job, _ = self.enqueue(repo)
+        CRSJob.objects.filter(pk=job.pk).update(
+            status="running", attempts=attempts, heartbeat_at=timezone.now() - timedelta(seconds=age))
+        return job
+
+    @override_settings(CRS_JOB_MAX_ATTEMPTS=3)
+    def test_stale_jobs_are_requeued_or_failed(self):
+        from agent.services.crs_scheduler import recover_stale_jobs
+
+        stale = self.running_job(self.repo)
+        exhausted = self.running_job(self.other, attempts=3)
+        self.assertEqual(recover_stale_jobs(stale_after=60), 1)
+        self.assertEqual(CRSJob.objects.get(pk=stale.pk).status, "queued")
+        self.assertEqual(CRSJob.objects.get(pk=exhausted.pk).status, "failed")
+
+    def test_fresh_heartbeat_is_left_running(self):
+        from agent.services.crs_scheduler import recover_stale_jobs
+
+        job = self.running_job(self.repo, age=5)
+        self.assertEqual(recover_stale_jobs(stale_after=60), 0)
+        self.assertEqual(CRSJob.objects.get(pk=job.pk).status, "running")
+
+    def test_stale_job_superseded_by_queued_work_is_cancelled(self):
+        from agent.services.crs_scheduler import recover_stale_jobs
+
+        stale = self.running_job(self.repo)
+        queued, _ = self.enqueue(self.repo)
+        self.assertNotEqual(queued.pk, stale.pk)
+        self.assertEqual(recover_stale_jobs(stale_after=60), 0)
+        self.assertEqual(CRSJob.objects.get(pk=stale.pk).status, "cancelled")
+        self.assertEqual(CRSJob.objects.get(pk=queued.pk).status, "queued")
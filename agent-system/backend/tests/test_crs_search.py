@@ -0,0 +1,99 @@
+from django.test import SimpleTestCase
+
+from agent.services.crs_search import (
+    ArtifactIndex,
+    BM25Index,
+    artifact_fields,
+    blueprint_items,
+    build_blueprint_index,
+    query_terms,
+    tokenize,
+)
+from tests.crs_workspace import MODELS_PY, blueprint_payload
+
+VIEWS_PY = (
+    "from django.shortcuts import render\n\n"
+    "def checkout_view(request):\n"
+    "    return render(request, 'checkout.html')\n"
+)
+
+ARTIFACTS = [
+    {"name": "UserProfileSerializer", "type": "class", "file_path": "accounts/serializers.py"},
+    {"name": "UserProfile", "type": "class", "file_path": "accounts/models.py",
+     "meta": {"fields": ["user", "avatar"], "doc": "Extra data for a user"}},
+    {"name": "UserProfileAdmin", "type": "class", "file_path": "accounts/admin.py"},
+    {"name": "checkout_view", "type": "function", "file_path": "shop/views.py"},
+    {"name": "Order", "type": "class", "file_path": "shop/models.py"},
+]
+
+
+class TokenizeTests(SimpleTestCase):
+    def test_identifiers_are_split_and_kept_whole(self):
+        self.assertEqual(tokenize("UserProfileSerializer"), ["user", "profile", "serializer", "userprofileserializer"])
+        self.assertEqual(tokenize("user_profile"), ["user", "profile", "user_profile"])
+        self.assertEqual(tokenize("HTTPClient"), ["http", "client", "httpclient"])
+        self.assertEqual(tokenize("v2 api"), ["v", "2", "v2", "api"])
+
+    def test_plural_s_is_folded(self):
+        self.assertEqual(tokenize("models Orders class"), ["model", "order", "class"])
+
+    def test_query_terms_drop_stop_words_and_duplicates(self):
+        self.assertEqual(query_terms("What are the User models of the user app?"), ["user", "model", "app"])
+
+    def test_word_cache_is_reused(self):
+        cache = {}
+        self.assertEqual(tokenize("OrderItem OrderItem", cache), tokenize("OrderItem OrderItem"))
+        self.assertEqual(list(cache), ["OrderItem"])
+
+
+class BM25IndexTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.index = ArtifactIndex(ARTIFACTS)
+
+    def names(self, query, **kwargs):
+        return [ARTIFACTS[doc]["name"] for doc, _ in self.index.search(query, **kwargs)]
+
+    def test_exact_identifier_ranks_first(self):
+        self.assertEqual(self.names("UserProfileSerializer")[0], "UserProfileSerializer")
+
+    def test_name_field_outweighs_path_and_meta(self):
+        index = ArtifactIndex([
+            {"name": "Invoice", "file_path": "billing/order.py", "meta": {"doc": "order"}},
+            {"name": "Order", "file_path": "shop/x.py"},
+        ])
+        self.assertEqual([doc for doc, _ in index.search("order")], [1, 0])
+
+    def test_unknown_terms_expand_by_prefix_at_a_discount(self):
+        self.assertEqual(self.names("serial"), ["UserProfileSerializer"])
+        exact = dict(self.index.search("serializer"))
+        prefix = dict(self.index.search("serial"))
+        self.assertLess(prefix[0], exact[0])
+        self.assertEqual(self.index.search("se"), [])
+
+    def test_top_k_and_tie_order(self):
+        self.assertEqual(len(self.index.search("class", k=2)), 2)
+        ties = BM25Index([{"name": "a x"}, {"name": "b x"}, {"name": "c x"}], {"name": 1.0},
+                         lambda item: {"name": item["name"]})
+        self.assertEqual([doc for doc, _ in ties.search("x")], [0, 1, 2])
+
+    def test_admin_artifacts_can_be_excluded(self):
+        self.assertEqual(self.index.admin, frozenset({2}))
+        self.assertNotIn("UserProfileAdmin", self.names("user profile", exclude=self.index.admin))
+        self.assertIn("UserProfileAdmin", self.names("user profile"))
+
+    def test_meta_is_searchable(self):
+        self.assertEqual(self.names("avatar"), ["UserProfile"])
+        self.assertIn("avatar", artifact_fields(ARTIFACTS[1])["meta"])
+
+    def test_blueprint_index_over_builder_output(self):
+        payload = blueprint_payload({"shop/views.py": VIEWS_PY, "shop/models.py": MODELS_PY})
+        index = build_blueprint_index(payload)
+        self.assertEqual(index.size, 2)
+        paths = [b["file_path"] for b in blueprint_items(payload)]
+        self.assertEqual(paths[index.search("checkout")[0][0]], "shop/views.py")
+        self.assertEqual(paths[index.search("order")[0][0]], "shop/models.py")
+
+    def test_empty_index(self):
+        self.assertEqual(ArtifactIndex([]).search("anything"), [])
@@ -0,0 +1,149 @@
+import os
+import tempfile
+
+from django.test import SimpleTestCase
+
+from core.source_scanner import SourceScanner, compile_pattern
+from tests.crs_workspace import MODELS_PY, make_workspace
+
+
+def write(path, text=""):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+class CompilePatternTests(SimpleTestCase):
+    def test_blank_and_comment_lines_are_skipped(self):
+        self.assertIsNone(compile_pattern(""))
+        self.assertIsNone(compile_pattern("# comment"))
+
+    def test_unanchored_pattern_matches_at_any_depth(self):
+        rule = compile_pattern("*_pb2.py")
+        self.assertTrue(rule.regex.match("api_pb2.py"))
+        self.assertTrue(rule.regex.match("pkg/sub/api_pb2.py"))
+
+    def test_anchored_and_double_star(self):
+        anchored = compile_pattern("/build")
+        self.assertTrue(anchored.regex.match("build"))
+        self.assertFalse(anchored.regex.match("pkg/build"))
+        deep = compile_pattern("docs/**/*.py")
+        self.assertTrue(deep.regex.match("docs/conf.py"))
+        self.assertTrue(deep.regex.match("docs/a/b/conf.py"))
+
+    def test_negation_and_dir_only_flags(self):
+        rule = compile_pattern("!keep/")
+        self.assertTrue(rule.negate)
+        self.assertTrue(rule.dir_only)
+
+
+class SourceScannerTests(SimpleTestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+        for rel in (
+            "app/models.py",
+            "app/migrations/0001_initial.py",
+            "app/__pycache__/models.cpython-311.pyc",
+            "node_modules/lib/index.js",
+            ".venv/lib/site.py",
+            "env2/m.py",
+            "legacy/old.py",
+            "api_pb2.py",
+            "README.md",
+        ):
+            write(self.path(rel))
+        write(self.path("env2/pyvenv.cfg"), "home = /usr/bin\n")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def path(self, rel):
+        return os.path.join(self.root, *rel.split("/"))
+
+    def listed(self, scanner, suffix=None):
+        return [os.path.relpath(p, self.root).replace(os.sep, "/") for p in scanner.list_files(suffix=suffix)]
+
+    def test_default_excludes(self):
+        self.assertEqual(
+            self.listed(SourceScanner(self.root)),
+            ["README.md", "api_pb2.py", "app/models.py", "legacy/old.py"],
+        )
+
+    def test_default_excludes_can_be_disabled(self):
+        files = self.listed(SourceScanner(self.root, default_excludes=False, skip_virtualenvs=False), ".py")
+        self.assertIn("app/migrations/0001_initial.py", files)
+        self.assertIn(".venv/lib/site.py", files)
+        self.assertIn("env2/m.py", files)
+
+    def test_include_and_exclude(self):
+        scanner = SourceScanner(self.root, include=["**/*.py"], exclude=["legacy/", "*_pb2.py"])
+        self.assertEqual(self.listed(scanner), ["app/models.py"])
+
+    def test_gitignore_nested_and_negated(self):
+        write(self.path(".gitignore"), "*.md\nlegacy/\n")
+        write(self.path("app/.gitignore"), "*.py\n!models.py\n")
+        write(self.path("app/views.py"))
+        self.assertEqual(self.listed(SourceScanner(self.root), ".py"), ["api_pb2.py", "app/models.py"])
+        self.assertIn("README.md", self.listed(SourceScanner(self.root, gitignore=False)))
+
+    def test_virtualenv_is_skipped_by_walk_and_is_excluded(self):
+        scanner = SourceScanner(self.root)
+        self.assertNotIn("env2/m.py", self.listed(scanner))
+        self.assertTrue(scanner.is_excluded(self.path("env2/m.py")))
+        self.assertTrue(scanner.is_excluded(self.path("env2"), is_dir=True))
+        self.assertFalse(scanner.is_excluded(self.path("app/models.py")))
+
+        keep = SourceScanner(self.root, skip_virtualenvs=False)
+        self.assertIn("env2/m.py", self.listed(keep))
+        self.assertFalse(keep.is_excluded(self.path("env2/m.py")))
+
+    def test_is_excluded_agrees_with_walk(self):
+        write(self.path(".gitignore"), "legacy/\n")
+        scanner = SourceScanner(self.root, include=["**/*.py"], exclude=["*_pb2.py"])
+        kept = set(self.listed(scanner))
+        for rel in ("app/models.py", "app/migrations/0001_initial.py", ".venv/lib/site.py",
+                    "env2/m.py", "legacy/old.py", "api_pb2.py", "README.md"):
+            self.assertEqual(scanner.is_excluded(self.path(rel)), rel not in kept, rel)
+        self.assertTrue(scanner.is_excluded(os.path.dirname(self.root)))
+
+    def test_walk_from_excluded_start_yields_nothing(self):
+        scanner = SourceScanner(self.root)
+        self.assertEqual(scanner.list_files(self.path("env2")), [])
+        self.assertEqual(scanner.list_files(self.path("node_modules")), [])
+
+    def test_reset_picks_up_new_virtualenv(self):
+        scanner = SourceScanner(self.root)
+        write(self.path("tools/x.py"))
+        self.assertFalse(scanner.is_excluded(self.path("tools/x.py")))
+        write(self.path("tools/pyvenv.cfg"))
+        scanner.reset()
+        self.assertTrue(scanner.is_excluded(self.path("tools/x.py")))
+
+
+class FromConfigTests(SimpleTestCase):
+    def test_scan_section_is_applied(self):
+        with tempfile.TemporaryDirectory() as root:
+            fs = make_workspace(root, {"shop/models.py": MODELS_PY, "legacy/old.py": "X = 1\n"},
+                                {"scan": {"exclude": ["legacy/"]}})
+            files = fs.scanner.list_files(suffix=".py")
+            self.assertEqual([os.path.relpath(p, fs.paths.src_dir) for p in files],
+                             [os.path.join("shop", "models.py")])
+
+    def test_defaults_without_scan_section(self):
+        with tempfile.TemporaryDirectory() as root:
+            scanner = SourceScanner.from_config(root, None)
+            self.assertTrue(scanner.gitignore)
+            self.assertTrue(scanner.skip_virtualenvs)
+            scanner = SourceScanner.from_config(root, {"scan": {"gitignore": False, "skip_virtualenvs": False}})
+            self.assertFalse(scanner.gitignore)
+            self.assertFalse(scanner.skip_virtualenvs)
+
+    def test_legacy_blueprint_builder_honours_scan_config(self):
+        from tools.blueprint_builder_v1_workspace import _iter_py_files
+
+        with tempfile.TemporaryDirectory() as root:
+            fs = make_workspace(root, {"shop/models.py": MODELS_PY, "legacy/old.py": "X = 1\n"},
+                                {"scan": {"exclude": ["legacy/"]}})
+            files = _iter_py_files(fs.paths.src_dir, fs.get_cfg())
+            self.assertEqual([os.path.basename(p) for p in files], ["models.py"])
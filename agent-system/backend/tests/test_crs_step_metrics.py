@@ -0,0 +1,76 @@
+import tempfile
+import threading
+import tracemalloc
+
+from django.test import SimpleTestCase
+
+from core.step_metrics import StepMeter
+from crs_main import run_pipeline
+from tests.crs_workspace import MODELS_PY, make_workspace
+
+
+class StepMeterTest(SimpleTestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.fs = make_workspace(self._tmp.name, {"shop/models.py": MODELS_PY})
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_io_and_items(self):
+        with StepMeter(self.fs, "s") as meter:
+            self.fs.write_text(self.fs.paths.src_dir + "/x.py", "X = 1\n")
+            self.fs.read_text(self.fs.paths.src_dir + "/x.py")
+        metrics = meter.metrics(items=4)
+        self.assertEqual((metrics["files_read"], metrics["files_written"]), (1, 1))
+        self.assertEqual(metrics["files_processed"], 1)
+        self.assertEqual(metrics["items"], 4)
+        self.assertEqual(meter.metrics(files=7)["files_processed"], 7)
+
+    def test_overlapping_profiled_steps_share_tracemalloc(self):
+        self.assertFalse(tracemalloc.is_tracing())
+        inner_entered, outer_may_exit = threading.Event(), threading.Event()
+        seen = {}
+
+        def inner():
+            with StepMeter(self.fs, "inner", profile=True) as meter:
+                inner_entered.set()
+                outer_may_exit.wait(5)
+            seen["inner"] = meter.metrics()
+
+        with StepMeter(self.fs, "outer", profile=True) as outer:
+            thread = threading.Thread(target=inner)
+            thread.start()
+            inner_entered.wait(5)
+        # outer left first: the inner step is still tracing
+        self.assertTrue(tracemalloc.is_tracing())
+        outer_may_exit.set()
+        thread.join()
+
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertIn("py_peak_mb", outer.metrics())
+        self.assertIn("py_peak_mb", seen["inner"])
+
+    def test_host_tracing_is_left_running(self):
+        tracemalloc.start()
+        try:
+            with StepMeter(self.fs, "s", profile=True):
+                pass
+            self.assertTrue(tracemalloc.is_tracing())
+        finally:
+            tracemalloc.stop()
+
+
+class PipelineFilesProcessedTest(SimpleTestCase):
+    def test_steps_count_source_files(self):
+        with tempfile.TemporaryDirectory() as root:
+            fs = make_workspace(root, {
+                "shop/models.py": MODELS_PY,
+                "billing/models.py": MODELS_PY.replace("Order", "Invoice"),
+                "billing/utils.py": "def helper():\n    return 1\n",
+            })
+            steps = fs.read_json(fs.run_path(run_pipeline(fs), "run.json"))["steps"]
+        self.assertEqual(steps["blueprints"]["metrics"]["files_processed"], 3)
+        self.assertEqual(steps["artifacts"]["metrics"]["files_processed"], 3)
+        # only files with artifacts take part in relationships
+        self.assertEqual(steps["relationships"]["metrics"]["files_processed"], 2)
@@ -0,0 +1,126 @@
+import os
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from core.source_scanner import SourceScanner
+from core.watcher import InotifyWatcher, PollingWatcher, inotify_available
+from crs_main import run_pipeline
+from crs_watch import IncrementalIndexer
+from tests.crs_workspace import MODELS_PY, make_workspace
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+class WatcherTestMixin:
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+        write(os.path.join(self.root, "a.py"), "A = 1\n")
+        self.watcher = self.make_watcher()
+
+    def tearDown(self):
+        self.watcher.close()
+        self._tmp.cleanup()
+
+    def test_burst_of_writes_is_one_batch(self):
+        write(os.path.join(self.root, "a.py"), "A = 22\n")
+        write(os.path.join(self.root, "pkg", "b.py"), "B = 1\n")
+        write(os.path.join(self.root, "notes.txt"), "ignored\n")
+        batch = self.watcher.next_batch(timeout=5)
+        self.assertIn(os.path.join(self.root, "a.py"), batch)
+        self.assertIn(os.path.join(self.root, "pkg", "b.py"), batch)
+        self.assertNotIn(os.path.join(self.root, "notes.txt"), batch)
+        self.assertEqual(self.watcher.next_batch(timeout=0.05), set())
+
+    def test_delete_is_reported(self):
+        os.remove(os.path.join(self.root, "a.py"))
+        self.assertIn(os.path.join(self.root, "a.py"), self.watcher.next_batch(timeout=5))
+
+    def test_excluded_directories_are_dropped(self):
+        write(os.path.join(self.root, "node_modules", "x.py"), "X = 1\n")
+        write(os.path.join(self.root, "c.py"), "C = 1\n")
+        batch = self.watcher.next_batch(timeout=5)
+        self.assertIn(os.path.join(self.root, "c.py"), batch)
+        self.assertFalse(any("node_modules" in p for p in batch))
+
+
+class PollingWatcherTest(WatcherTestMixin, SimpleTestCase):
+    def make_watcher(self):
+        return PollingWatcher(self.root, poll_interval=0.02, debounce=0.1, scanner=SourceScanner(self.root))
+
+    def test_mtime_only_change_is_detected(self):
+        path = os.path.join(self.root, "a.py")
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        self.assertEqual(self.watcher.next_batch(timeout=5), {path})
+
+
+class InotifyWatcherTest(WatcherTestMixin, SimpleTestCase):
+    def setUp(self):
+        if not inotify_available():
+            self.skipTest("inotify not available")
+        super().setUp()
+
+    def make_watcher(self):
+        return InotifyWatcher(self.root, debounce=0.1, scanner=SourceScanner(self.root))
+
+
+class IncrementalIndexerTest(SimpleTestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+        self.fs = make_workspace(self.root, {"shop/models.py": MODELS_PY})
+        self.indexer = IncrementalIndexer(self.fs, log=lambda message: None)
+        self.indexer.bootstrap()
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def src(self, rel):
+        return os.path.join(self.root, "src", rel)
+
+    def artifact_names(self):
+        return sorted(a["name"] for a in self.fs.read_json(self.fs.paths.artifacts_json)["artifacts"])
+
+    def test_unchanged_save_is_a_no_op(self):
+        self.assertIsNone(self.indexer.apply_changes([self.src("shop/models.py")]))
+
+    def test_edit_that_keeps_the_artifacts_skips_the_relationship_pass(self):
+        with open(self.src("shop/models.py"), "a", encoding="utf-8") as f:
+            f.write("# trailing note\n")
+        artifacts_json = self.fs.paths.artifacts_json
+        before = os.stat(artifacts_json).st_mtime_ns
+        with mock.patch("crs_watch._run_relationship_builder") as relink:
+            summary = self.indexer.apply_changes([self.src("shop/models.py")])
+        self.assertEqual(summary["updated"], ["shop/models.py"])
+        self.assertFalse(summary["artifacts_changed"])
+        relink.assert_not_called()
+        self.assertEqual(os.stat(artifacts_json).st_mtime_ns, before)
+        self.assertEqual(self.indexer.fingerprint(), self.indexer.state.compute_src_fingerprint()["src_fingerprint"])
+        self.assertFalse(self.indexer.state.decide().run_relationships)
+
+    def test_add_and_remove_match_full_rebuild(self):
+        write(self.src("billing/models.py"), MODELS_PY.replace("Order", "Invoice"))
+        summary = self.indexer.apply_changes([self.src("billing/models.py")])
+        self.assertEqual(summary["updated"], ["billing/models.py"])
+        self.assertIn("Invoice", self.artifact_names())
+        self.assertTrue(os.path.exists(os.path.join(self.root, "state", "impact.json")))
+
+        os.remove(self.src("shop/models.py"))
+        summary = self.indexer.apply_changes([self.src("shop")])
+        self.assertEqual(summary["removed"], ["shop/models.py"])
+        incremental = self.artifact_names()
+        self.assertNotIn("Order", incremental)
+
+        # the watcher's state counts as up to date, and matches a full rebuild
+        self.assertEqual(self.indexer.fingerprint(), self.indexer.state.compute_src_fingerprint()["src_fingerprint"])
+        decision = self.indexer.state.decide()
+        self.assertFalse(decision.run_blueprints or decision.run_artifacts or decision.run_relationships)
+        run_pipeline(self.fs, force=True)
+        self.assertEqual(self.artifact_names(), incremental)
@@ -0,0 +1,104 @@
+import asyncio
+
+from django.test import SimpleTestCase, override_settings
+
+from agent.services import intent_classifier
+from agent.services.intent_classifier import CHAT, SEED_EXAMPLES, TASK, IntentClassifier, features, normalize
+
+
+class IntentClassifierLocalTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.classifier = IntentClassifier()
+
+    def test_seed_examples_are_classified_correctly(self):
+        wrong = [text for text, label in SEED_EXAMPLES if self.classifier.classify_local(text).intent != label]
+        self.assertEqual(wrong, [])
+
+    def test_unseen_messages(self):
+        for message, intent in (
+            ("Add a `slug` field to the Article model", TASK),
+            ("please refactor billing/views.py into viewsets", TASK),
+            ("Could you implement rate limiting on the login endpoint?", TASK),
+            ("How is the Article model related to Author?", CHAT),
+            ("what endpoints expose invoices", CHAT),
+            ("Can you explain what the order signal handlers do?", CHAT),
+        ):
+            decision = self.classifier.classify_local(message)
+            self.assertEqual(decision.intent, intent, message)
+            self.assertEqual(decision.source, "local")
+
+    def test_confidence_is_the_probability_of_the_chosen_intent(self):
+        decision = self.classifier.classify_local("create a new model for refunds")
+        self.assertGreaterEqual(decision.confidence, 0.5)
+        self.assertAlmostEqual(decision.confidence, decision.p_task)
+
+    def test_features_are_case_and_whitespace_insensitive(self):
+        self.assertEqual(features(normalize("  Fix   THE bug ")), features(normalize("fix the bug")))
+        self.assertEqual(features(""), [])
+
+
+class IntentClassifierFallbackTests(SimpleTestCase):
+    def classify(self, classifier, message, fallback=None, **kwargs):
+        return asyncio.run(classifier.classify(message, llm_fallback=fallback, **kwargs))
+
+    def test_confident_decisions_skip_the_llm(self):
+        calls = []
+
+        async def fallback(message):
+            calls.append(message)
+            return CHAT
+
+        decision = self.classify(IntentClassifier(confidence=0.8), "add a serializer for orders", fallback)
+        self.assertEqual((decision.intent, decision.source), (TASK, "local"))
+        self.assertEqual(calls, [])
+
+    def test_uncertain_decisions_ask_the_llm(self):
+        async def fallback(message):
+            return TASK
+
+        decision = self.classify(IntentClassifier(confidence=1.0), "what does the order view do", fallback)
+        self.assertEqual((decision.intent, decision.source), (TASK, "llm"))
+
+    def test_failed_or_slow_fallback_keeps_local_decision(self):
+        async def broken(message):
+            raise RuntimeError("llm down")
+
+        async def slow(message):
+            await asyncio.sleep(5)
+            return TASK
+
+        async def garbage(message):
+            return "MAYBE"
+
+        for fallback in (broken, slow, garbage):
+            decision = self.classify(IntentClassifier(confidence=1.0), "explain the payment flow", fallback,
+                                     llm_timeout=0.05)
+            self.assertEqual((decision.intent, decision.source), (CHAT, "local"), fallback.__name__)
+
+    def test_decisions_are_cached_per_normalized_message(self):
+        classifier = IntentClassifier(cache_size=2)
+        first = self.classify(classifier, "Explain the payment flow")
+        again = self.classify(classifier, "  explain the PAYMENT flow ")
+        self.assertEqual((again.intent, again.source), (first.intent, "cache"))
+
+        self.classify(classifier, "list all viewsets")
+        self.classify(classifier, "fix the login view")
+        self.assertEqual(self.classify(classifier, "explain the payment flow").source, "local")
+
+    def test_cache_can_be_disabled(self):
+        classifier = IntentClassifier(cache_size=0)
+        self.classify(classifier, "hello")
+        self.assertEqual(self.classify(classifier, "hello").source, "local")
+
+    @override_settings(INTENT_CONFIDENCE=0.9, INTENT_CACHE_SIZE=7)
+    def test_shared_classifier_reads_settings(self):
+        saved = intent_classifier._classifier
+        intent_classifier._classifier = None
+        try:
+            classifier = intent_classifier.get_intent_classifier()
+            self.assertIs(classifier, intent_classifier.get_intent_classifier())
+            self.assertEqual((classifier.confidence, classifier.cache_size), (0.9, 7))
+        finally:
+            intent_classifier._classifier = saved
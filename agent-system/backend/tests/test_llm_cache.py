@@ -0,0 +1,213 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from llm import cache as llm_cache
+from llm.cache import CacheEntry, CachedClient, LLMCache, cache_key, with_cache
+from llm.streaming import astream_client
+
+
+class FakeClient:
+    """Echoes the last user message; usage counts the words"""
+
+    temperature = 0.7
+    max_tokens = 100
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+        self.last_usage = None
+
+    def _answer(self, messages):
+        self.calls += 1
+        text = messages[-1]["content"]
+        return text.split(), {"total_tokens": len(text.split())}
+
+    def query(self, messages, json_mode=False, max_tokens=None, temperature=None):
+        words, usage = self._answer(messages)
+        self.last_usage = usage
+        return {"content": " ".join(words), "usage": usage}
+
+    def query_stream(self, messages, json_mode=False, max_tokens=None, temperature=None):
+        words, usage = self._answer(messages)
+        for i, word in enumerate(words):
+            time.sleep(self.delay)
+            yield word if i == 0 else " " + word
+        self.last_usage = usage
+
+
+def ask(text):
+    return [{"role": "user", "content": text}]
+
+
+class LLMCacheStoreTests(SimpleTestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, "cache.sqlite3")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_key_covers_every_request_parameter(self):
+        base = ("ollama", "m", ask("hi"), False, 0.7, 100)
+        keys = {
+            cache_key(*base),
+            cache_key("openai", *base[1:]),
+            cache_key("ollama", "m2", *base[2:]),
+            cache_key("ollama", "m", ask("hello"), *base[3:]),
+            cache_key(*base[:3], True, *base[4:]),
+            cache_key(*base[:4], 0.2, 100),
+            cache_key(*base[:5], 50),
+        }
+        self.assertEqual(len(keys), 7)
+        self.assertEqual(cache_key(*base), cache_key(*base))
+
+    def test_round_trip_and_stats(self):
+        store = LLMCache(self.path, ttl=0, max_entries=0)
+        self.assertIsNone(store.get("k"))
+        store.put("k", CacheEntry("a b", chunks=["a", " b"], usage={"total_tokens": 2}))
+        entry = store.get("k")
+        self.assertEqual((entry.content, entry.replay(), entry.usage), ("a b", ["a", " b"], {"total_tokens": 2}))
+        self.assertEqual(CacheEntry("whole").replay(), ["whole"])
+        self.assertEqual(CacheEntry("").replay(), [])
+        self.assertEqual(store.stats.to_dict()["hits"], 1)
+        self.assertEqual(store.stats.to_dict()["misses"], 1)
+
+    def test_expired_entries_are_dropped(self):
+        store = LLMCache(self.path, ttl=60, max_entries=0)
+        store.put("k", CacheEntry("old"))
+        with mock.patch("llm.cache.time.time", return_value=time.time() + 120):
+            self.assertIsNone(store.get("k"))
+        self.assertEqual(len(store), 0)
+
+    def test_lru_eviction_keeps_recently_read_entries(self):
+        store = LLMCache(self.path, ttl=0, max_entries=2)
+        store.put("a", CacheEntry("a"))
+        time.sleep(0.01)
+        store.put("b", CacheEntry("b"))
+        time.sleep(0.01)
+        store.get("a")
+        store.put("c", CacheEntry("c"))
+        self.assertEqual(store.evict(), 1)
+        self.assertIsNone(store.get("b"))
+        self.assertIsNotNone(store.get("a"))
+
+    def test_read_errors_are_misses(self):
+        store = LLMCache(self.path)
+        with mock.patch.object(store, "_conn", side_effect=RuntimeError("disk gone")):
+            self.assertIsNone(store.get("k"))
+            store.put("k", CacheEntry("x"))
+        self.assertEqual(store.stats.errors, 2)
+
+    def test_with_cache_is_a_no_op_when_disabled(self):
+        client = FakeClient()
+        with mock.patch.object(llm_cache, "CACHE_ENABLED", False):
+            self.assertIs(with_cache(client, "ollama", "m"), client)
+
+
+class CachedClientTests(SimpleTestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.store = LLMCache(os.path.join(self._tmp.name, "cache.sqlite3"))
+        self.inner = FakeClient()
+        self.client = CachedClient(self.inner, self.store, "ollama", "m")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_query_reports_cached_per_result(self):
+        first = self.client.query(ask("one two"))
+        second = self.client.query(ask("one two"))
+        self.assertEqual((first["content"], first["cached"]), ("one two", False))
+        self.assertEqual((second["content"], second["cached"]), ("one two", True))
+        self.assertEqual(second["usage"], {"total_tokens": 2})
+        self.assertEqual(self.inner.calls, 1)
+
+    def test_defaults_fill_in_the_key(self):
+        self.client.query(ask("x"))
+        self.client.query(ask("x"), temperature=0.7, max_tokens=100)
+        self.assertEqual(self.inner.calls, 1)
+        self.client.query(ask("x"), temperature=0.1)
+        self.assertEqual(self.inner.calls, 2)
+
+    def test_default_model_is_taken_from_the_client(self):
+        small, large = FakeClient(), FakeClient()
+        small.model, large.model = "llama3:8b", "llama3:70b"
+        CachedClient(small, self.store, "ollama", None).query(ask("x"))
+        CachedClient(large, self.store, "ollama", None).query(ask("x"))
+        self.assertEqual((small.calls, large.calls), (1, 1))
+        self.assertTrue(CachedClient(large, self.store, "ollama", None).query(ask("x"))["cached"])
+
+    def test_stream_replays_chunks_and_reports_outcome(self):
+        miss, hit = {}, {}
+        self.assertEqual(list(self.client.query_stream(ask("a b c"), outcome=miss)), ["a", " b", " c"])
+        self.assertEqual(list(self.client.query_stream(ask("a b c"), outcome=hit)), ["a", " b", " c"])
+        self.assertEqual(miss, {"cache": "miss", "usage": {"total_tokens": 3}})
+        self.assertEqual(hit, {"cache": "hit", "usage": {"total_tokens": 3}})
+        self.assertEqual(self.inner.calls, 1)
+
+    def test_abandoned_stream_is_not_stored(self):
+        stream = self.client.query_stream(ask("a b c"))
+        next(stream)
+        stream.close()
+        self.assertEqual(len(self.store), 0)
+
+    def test_async_query_and_stream(self):
+        async def run():
+            first = await self.client.aquery(ask("x y"))
+            second = await self.client.aquery(ask("x y"))
+            outcome = {}
+            chunks = [c async for c in astream_client(self.client, ask("x y z"), outcome=outcome)]
+            return first, second, chunks, outcome
+
+        first, second, chunks, outcome = asyncio.run(run())
+        self.assertEqual((first["cached"], second["cached"]), (False, True))
+        self.assertEqual(chunks, ["x", " y", " z"])
+        self.assertEqual(outcome, {"cache": "miss", "usage": {"total_tokens": 3}})
+
+    def test_concurrent_chats_get_their_own_outcome(self):
+        """One CachedClient serves every chat on a model: outcomes must not leak between calls"""
+        self.inner.delay = 0.02
+        list(self.client.query_stream(ask("cached answer")))
+
+        async def chat(text):
+            outcome = {}
+            async for _ in astream_client(self.client, ask(text), batch_ms=0, batch_chars=0, outcome=outcome):
+                await asyncio.sleep(0)
+            return outcome
+
+        async def run():
+            return await asyncio.gather(chat("a fresh question here"), chat("cached answer"))
+
+        fresh, cached = asyncio.run(run())
+        self.assertEqual(fresh, {"cache": "miss", "usage": {"total_tokens": 4}})
+        self.assertEqual(cached, {"cache": "hit", "usage": {"total_tokens": 2}})
+
+    def test_plain_client_outcome_has_usage_only(self):
+        async def run():
+            outcome = {}
+            chunks = [c async for c in astream_client(self.inner, ask("p q"), outcome=outcome)]
+            return chunks, outcome
+
+        chunks, outcome = asyncio.run(run())
+        self.assertEqual("".join(chunks), "p q")
+        self.assertEqual(outcome, {"usage": {"total_tokens": 2}})
+
+    def test_cache_is_shared_across_threads(self):
+        results = []
+
+        def worker():
+            results.append(self.client.query(ask("same"))["content"])
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(results, ["same"] * 4)
+        self.assertEqual(len(self.store), 1)
@@ -0,0 +1,190 @@
+import asyncio
+import os
+import tempfile
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from llm.cache import CachedClient, LLMCache
+from llm.health import CLOSED, HALF_OPEN, OPEN, ProviderHealth
+from llm.router import LLMRouter
+
+
+class ProviderHealthTests(SimpleTestCase):
+    def setUp(self):
+        self.health = ProviderHealth(alpha=0.5, failure_threshold=2, cooldown=0.05)
+
+    def call(self, ok, duration=0.0):
+        """allow() + record() the way the router does: latency is measured from admission"""
+        started = time.monotonic()
+        admitted = self.health.allow("k")
+        time.sleep(duration)
+        if admitted:
+            self.health.record("k", time.monotonic() - started, ok)
+        return admitted
+
+    def trip(self):
+        self.call(False)
+        self.call(False)
+        self.assertEqual(self.health.state("k"), OPEN)
+
+    def test_consecutive_failures_open_the_breaker(self):
+        self.call(False)
+        self.call(True)
+        self.call(False)
+        self.assertEqual(self.health.state("k"), CLOSED)
+        self.call(False)
+        self.assertEqual(self.health.state("k"), OPEN)
+        self.assertFalse(self.health.allow("k"))
+
+    def test_only_one_probe_after_cooldown(self):
+        self.trip()
+        time.sleep(0.06)
+        started = time.monotonic()
+        self.assertTrue(self.health.allow("k"))
+        self.assertEqual(self.health.state("k"), HALF_OPEN)
+        self.assertFalse(self.health.allow("k"))
+        self.health.release("k", started)
+        self.assertTrue(self.health.allow("k"))
+
+    def test_releasing_a_straggler_keeps_the_probe_in_flight(self):
+        started = time.monotonic()
+        self.assertTrue(self.health.allow("k"))
+        self.trip()
+        time.sleep(0.06)
+        self.assertTrue(self.health.allow("k"))
+        self.health.release("k", started)
+        self.assertFalse(self.health.allow("k"))
+
+    def test_probe_success_closes_and_failure_reopens(self):
+        self.trip()
+        time.sleep(0.06)
+        self.assertTrue(self.call(False))
+        self.assertEqual(self.health.state("k"), OPEN)
+        time.sleep(0.06)
+        self.assertTrue(self.call(True))
+        self.assertEqual(self.health.state("k"), CLOSED)
+
+    def test_straggler_success_does_not_close_an_open_breaker(self):
+        started = time.monotonic()
+        self.assertTrue(self.health.allow("k"))
+        self.trip()
+        self.health.record("k", time.monotonic() - started, True)
+        self.assertEqual(self.health.state("k"), OPEN)
+
+    def test_straggler_does_not_settle_the_probe(self):
+        started = time.monotonic()
+        self.assertTrue(self.health.allow("k"))
+        self.trip()
+        time.sleep(0.06)
+        self.assertTrue(self.health.allow("k"))
+        self.health.record("k", time.monotonic() - started, True)
+        self.assertEqual(self.health.state("k"), HALF_OPEN)
+        self.assertFalse(self.health.allow("k"))
+
+    def test_p95_needs_enough_samples(self):
+        for i in range(4):
+            self.health.record("k", 0.1 * (i + 1), True)
+        self.assertIsNone(self.health.p95("k"))
+        self.health.record("k", 1.0, True)
+        self.assertEqual(self.health.p95("k"), 1.0)
+        stats = self.health.snapshot()["k"]
+        self.assertEqual((stats["calls"], stats["failures"], stats["p95_ms"]), (5, 0, 1000.0))
+
+
+class SlowClient:
+    """query()/query_stream() that take `delay` seconds in total"""
+
+    temperature = 0.7
+    max_tokens = 100
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.last_usage = None
+
+    def query(self, messages, **kwargs):
+        time.sleep(self.delay)
+        return {"content": "ab", "usage": None}
+
+    def query_stream(self, messages, **kwargs):
+        yield "a"
+        time.sleep(self.delay)
+        yield "b"
+
+
+class RouterHealthTests(SimpleTestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.router = LLMRouter()
+        self.inner = SlowClient(0.05)
+        store = LLMCache(os.path.join(self._tmp.name, "cache.sqlite3"))
+        self.router._local_client = CachedClient(self.inner, store, "ollama", self.router.local_config.model)
+        self.key = self.router._health_key("local")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def stream(self, text="hi", **kwargs):
+        async def run():
+            return [c async for c in self.router.aquery_stream([{"role": "user", "content": text}], **kwargs)]
+
+        return asyncio.run(run())
+
+    def samples(self):
+        return list(self.router.health._get(self.key).latencies)
+
+    def test_stream_latency_covers_the_whole_response(self):
+        self.assertEqual("".join(self.stream(provider="local")), "ab")
+        self.assertEqual(len(self.samples()), 1)
+        self.assertGreaterEqual(self.samples()[0], 0.05)
+
+    def test_cache_hits_are_not_recorded(self):
+        self.stream(provider="local")
+        self.stream(provider="local")
+        self.router.query([{"role": "user", "content": "q"}], provider="local")
+        self.router.query([{"role": "user", "content": "q"}], provider="local")
+
+        async def run():
+            await self.router.aquery([{"role": "user", "content": "q"}], provider="local")
+
+        asyncio.run(run())
+        self.assertEqual(len(self.samples()), 2)
+
+    def test_cache_hit_frees_the_probe(self):
+        self.stream(provider="local")
+        stats = self.router.health._get(self.key)
+        stats.state, stats.opened_at = OPEN, 0.0
+        self.assertEqual(self.stream(), ["a", "b"])
+        self.assertEqual(self.router.health.state(self.key), HALF_OPEN)
+        self.assertTrue(self.router.health.allow(self.key))
+
+    def test_abandoned_straggler_stream_does_not_free_the_probe(self):
+        async def run():
+            source = self.router.aquery_stream([{"role": "user", "content": "y"}])
+            await source.__anext__()
+            stats = self.router.health._get(self.key)
+            stats.state, stats.opened_at = OPEN, time.monotonic()
+            self.router.health.cooldown = 0
+            self.assertTrue(self.router.health.allow(self.key))
+            await source.aclose()
+
+        asyncio.run(run())
+        self.assertEqual(self.router.health.state(self.key), HALF_OPEN)
+        self.assertFalse(self.router.health.allow(self.key))
+
+    def test_abandoned_stream_is_not_recorded(self):
+        async def run():
+            source = self.router.aquery_stream([{"role": "user", "content": "x"}], provider="local")
+            await source.__anext__()
+            await source.aclose()
+
+        asyncio.run(run())
+        self.assertEqual(self.samples(), [])
+
+    def test_open_breaker_is_skipped_in_auto_mode(self):
+        stats = self.router.health._get(self.key)
+        stats.state, stats.opened_at = OPEN, time.monotonic()
+        with mock.patch.object(self.router.cloud_config, "api_key", None):
+            with self.assertRaisesMessage(RuntimeError, "circuit breaker is open"):
+                self.stream()
@@ -0,0 +1,188 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from llm import http_pool
+from llm.ollama import OllamaClient
+from llm.openai_client import OpenAIClient
+from llm.router import LLMConfig
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    """Ollama /api/generate (NDJSON) and OpenAI /chat/completions (SSE), keep-alive"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.peers.add(self.client_address)
+        self.server.requests.append((self.path, body))
+        if self.path == "/api/generate":
+            if body["stream"]:
+                lines = [{"response": "Hel"}, {"response": "lo"},
+                         {"response": "", "done": True, "prompt_eval_count": 3, "eval_count": 2}]
+                data = "".join(json.dumps(line) + "\n" for line in lines)
+            else:
+                data = json.dumps({"response": "Hello", "prompt_eval_count": 3, "eval_count": 2})
+        else:
+            events = [{"choices": [{"delta": {"content": c}}]} for c in ("Hi", " there")]
+            data = ": keep-alive\n\n" + "".join(f"data: {json.dumps(e)}\n\n" for e in events) + "data: [DONE]\n\n"
+        encoded = data.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+
+class FakeServerMixin:
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), FakeLLMHandler)
+        cls.server.daemon_threads = True
+        cls.server.peers = set()
+        cls.server.requests = []
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.peers.clear()
+        self.server.requests.clear()
+
+
+class HttpPoolTests(SimpleTestCase):
+    def test_one_session_per_provider(self):
+        self.assertIs(http_pool.get_session("ollama"), http_pool.get_session("ollama"))
+        self.assertIsNot(http_pool.get_session("ollama"), http_pool.get_session("openai"))
+
+    def test_connection_limits_from_env(self):
+        with mock.patch.dict("os.environ", {"LLM_MAX_CONNECTIONS_OLLAMA": "8"}):
+            self.assertEqual(http_pool.max_connections("ollama"), 8)
+            self.assertEqual(http_pool.max_connections("openai"), http_pool.DEFAULT_MAX_CONNECTIONS)
+            limits = http_pool._limits("ollama")
+        self.assertEqual(limits.max_connections, 8)
+        self.assertEqual(limits.max_keepalive_connections, 8)
+
+    def test_async_client_is_per_event_loop(self):
+        async def grab():
+            client = http_pool.get_async_client("ollama")
+            self.assertIs(client, http_pool.get_async_client("ollama"))
+            await http_pool.aclose_all()
+            self.assertTrue(client.is_closed)
+            self.assertIsNot(http_pool.get_async_client("ollama"), client)
+            await http_pool.aclose_all()
+            return client
+
+        self.assertIsNot(asyncio.run(grab()), asyncio.run(grab()))
+
+    def test_loop_cached_builds_once_per_loop(self):
+        owner = type("Owner", (), {})()
+        built = []
+
+        async def get():
+            first = http_pool.loop_cached(owner, "sdk", lambda: built.append(1) or object())
+            self.assertIs(first, http_pool.loop_cached(owner, "sdk", object))
+
+        asyncio.run(get())
+        asyncio.run(get())
+        self.assertEqual(len(built), 2)
+
+
+class OllamaPooledClientTests(FakeServerMixin, SimpleTestCase):
+    def ollama(self):
+        return OllamaClient(LLMConfig(provider="ollama", model="m", base_url=self.base_url))
+
+    def test_sync_requests_reuse_one_connection(self):
+        client = self.ollama()
+        for _ in range(3):
+            self.assertEqual(client.query([{"role": "user", "content": "hi"}])["content"], "Hello")
+        self.assertEqual("".join(client.query_stream([{"role": "user", "content": "hi"}])), "Hello")
+        self.assertEqual(client.last_usage["total_tokens"], 5)
+        self.assertEqual(len(self.server.peers), 1)
+
+    def test_async_stream_and_query_share_the_pool(self):
+        client = self.ollama()
+
+        async def run():
+            try:
+                chunks = [c async for c in client.aquery_stream([{"role": "user", "content": "hi"}])]
+                usage = client.last_usage
+                result = await client.aquery([{"role": "user", "content": "hi"}], json_mode=True)
+                return chunks, usage, result
+            finally:
+                await http_pool.aclose_all()
+
+        chunks, usage, result = asyncio.run(run())
+        self.assertEqual(chunks, ["Hel", "lo"])
+        self.assertEqual(usage, {"prompt_tokens": 3, "completion_tokens": 2, "total_tokens": 5})
+        self.assertEqual(result["content"], "Hello")
+        self.assertEqual(self.server.requests[-1][1]["format"], "json")
+        self.assertEqual(len(self.server.peers), 1)
+
+    def test_sync_and_async_send_the_same_body(self):
+        client = self.ollama()
+        messages = [{"role": "system", "content": "terse"}, {"role": "user", "content": "hi"}]
+        client.query(messages, json_mode=True, max_tokens=7, temperature=0.3)
+        list(client.query_stream(messages, max_tokens=7))
+
+        async def run():
+            try:
+                await client.aquery(messages, json_mode=True, max_tokens=7, temperature=0.3)
+                return [c async for c in client.aquery_stream(messages, max_tokens=7)]
+            finally:
+                await http_pool.aclose_all()
+
+        asyncio.run(run())
+        bodies = [body for _, body in self.server.requests]
+        self.assertEqual(bodies[0], bodies[2])
+        self.assertEqual(bodies[1], bodies[3])
+        self.assertEqual(bodies[0]["format"], "json")
+        self.assertEqual(bodies[1]["options"]["num_predict"], 7)
+
+    def test_unreachable_server(self):
+        client = OllamaClient(LLMConfig(provider="ollama", model="m", base_url="http://127.0.0.1:9"))
+
+        async def run():
+            try:
+                return [c async for c in client.aquery_stream([{"role": "user", "content": "hi"}])]
+            finally:
+                await http_pool.aclose_all()
+
+        with self.assertRaisesMessage(RuntimeError, "Cannot connect to Ollama"):
+            asyncio.run(run())
+
+
+class OpenAIPooledClientTests(FakeServerMixin, SimpleTestCase):
+    def test_async_stream_parses_sse(self):
+        client = OpenAIClient(LLMConfig(provider="openai", model="m", base_url=self.base_url, api_key="k"))
+
+        async def run():
+            try:
+                return [c async for c in client.aquery_stream([{"role": "user", "content": "hi"}])]
+            finally:
+                await http_pool.aclose_all()
+
+        self.assertEqual(asyncio.run(run()), ["Hi", " there"])
+        path, body = self.server.requests[-1]
+        self.assertEqual(path, "/chat/completions")
+        self.assertTrue(body["stream"])
+
+    def test_delta_ignores_keepalives_and_done(self):
+        self.assertIsNone(OpenAIClient._delta(": keep-alive"))
+        self.assertIsNone(OpenAIClient._delta("data: [DONE]"))
+        self.assertIsNone(OpenAIClient._delta("data: {not json"))
+        self.assertEqual(OpenAIClient._delta('data: {"choices": [{"delta": {"content": "x"}}]}'), "x")
@@ -0,0 +1,134 @@
+import asyncio
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from llm.streaming import aiter_stream, astream_client
+
+
+def collect(source):
+    async def run():
+        return [chunk async for chunk in source]
+
+    return asyncio.run(run())
+
+
+class FakeStream:
+    """Blocking generator that records how far it was pulled and whether it was closed"""
+
+    def __init__(self, chunks, delay=0.0, fail_after=None):
+        self.chunks = chunks
+        self.delay = delay
+        self.fail_after = fail_after
+        self.pulled = 0
+        self.closed = threading.Event()
+
+    def __call__(self):
+        try:
+            for i, chunk in enumerate(self.chunks):
+                if self.fail_after is not None and i == self.fail_after:
+                    raise RuntimeError("provider went away")
+                time.sleep(self.delay)
+                self.pulled += 1
+                yield chunk
+        finally:
+            self.closed.set()
+
+
+class AiterStreamTests(SimpleTestCase):
+    def test_chunks_arrive_in_order(self):
+        stream = FakeStream(["a", "", "b", "c"])
+        self.assertEqual(collect(aiter_stream(stream, batch_ms=0, batch_chars=0)), ["a", "b", "c"])
+        self.assertTrue(stream.closed.is_set())
+
+    def test_first_chunk_is_not_held_back_by_the_rest(self):
+        stream = FakeStream(["first", "second", "third"], delay=0.2)
+
+        async def run():
+            started = time.monotonic()
+            source = aiter_stream(stream, batch_ms=0, batch_chars=0)
+            await source.__anext__()
+            elapsed = time.monotonic() - started
+            await source.aclose()
+            return elapsed
+
+        self.assertLess(asyncio.run(run()), 0.5)
+
+    def test_size_batching_keeps_the_first_chunk_separate(self):
+        stream = FakeStream(list("abcdefg"))
+        chunks = collect(aiter_stream(stream, batch_ms=0, batch_chars=3))
+        self.assertEqual(chunks[0], "a")
+        self.assertEqual("".join(chunks), "abcdefg")
+        self.assertTrue(all(len(c) <= 3 for c in chunks))
+        self.assertLess(len(chunks), 7)
+
+    def test_time_batching_flushes_while_stream_is_open(self):
+        stream = FakeStream(["a", "b", "c", "d"], delay=0.05)
+        chunks = collect(aiter_stream(stream, batch_ms=20, batch_chars=0))
+        self.assertEqual("".join(chunks), "abcd")
+        self.assertEqual(chunks[0], "a")
+
+    def test_client_errors_are_reraised_after_buffered_text(self):
+        stream = FakeStream(["a", "b", "c"], fail_after=2)
+        received = []
+
+        async def run():
+            async for chunk in aiter_stream(stream, batch_ms=0, batch_chars=100):
+                received.append(chunk)
+
+        with self.assertRaisesMessage(RuntimeError, "provider went away"):
+            asyncio.run(run())
+        self.assertEqual("".join(received), "ab")
+
+    def test_stopping_early_closes_the_generator(self):
+        stream = FakeStream([str(i) for i in range(10000)])
+
+        async def run():
+            source = aiter_stream(stream, batch_ms=0, batch_chars=0)
+            async for _ in source:
+                break
+            await source.aclose()
+
+        asyncio.run(run())
+        self.assertTrue(stream.closed.wait(5))
+        self.assertLess(stream.pulled, 10000)
+
+    def test_closing_after_a_time_flush_waits_for_the_pending_read(self):
+        stream = FakeStream(["a", "b", "c", "d", "e"], delay=0.1)
+
+        async def run():
+            source = aiter_stream(stream, batch_ms=120, batch_chars=0)
+            received = []
+            async for chunk in source:
+                received.append(chunk)
+                if len(received) == 2:  # a time flush: the next read is still in flight
+                    break
+            await source.aclose()
+            return received
+
+        received = asyncio.run(run())
+        self.assertEqual(received[0], "a")
+        self.assertTrue(stream.closed.wait(5))
+        self.assertLess(stream.pulled, 5)
+
+
+class AstreamClientTests(SimpleTestCase):
+    def test_native_async_stream_is_preferred(self):
+        class NativeClient:
+            def query_stream(self, messages, **kwargs):
+                raise AssertionError("thread fallback used")
+
+            async def aquery_stream(self, messages, **kwargs):
+                for chunk in ("x", "y"):
+                    yield chunk + kwargs.get("suffix", "")
+
+        chunks = collect(astream_client(NativeClient(), [], batch_ms=0, batch_chars=0, suffix="!"))
+        self.assertEqual(chunks, ["x!", "y!"])
+
+    def test_sync_client_runs_in_a_thread(self):
+        class SyncClient:
+            def query_stream(self, messages, **kwargs):
+                yield threading.current_thread().name
+
+        self.assertEqual(collect(astream_client(SyncClient(), [], batch_ms=0, batch_chars=0)), ["llm-stream"])
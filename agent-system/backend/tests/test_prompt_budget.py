@@ -0,0 +1,125 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from agent.consumers import RepositoryChatConsumer
+from llm import prompt_budget
+from llm.prompt_budget import PromptBudget, Section, _water_fill, context_window, estimate_tokens
+
+
+def words(n, prefix="w"):
+    return " ".join(f"{prefix}{i}" for i in range(n))
+
+
+class EstimatorTests(SimpleTestCase):
+    def test_estimate_tokens(self):
+        self.assertEqual(estimate_tokens(""), 0)
+        self.assertEqual(estimate_tokens("a b c"), 3)
+        self.assertEqual(estimate_tokens("x = f(y)"), 6)
+        self.assertEqual(estimate_tokens("averyveryverylongidentifier"), 7)
+
+    def test_context_windows(self):
+        self.assertEqual(context_window("anthropic"), 200000)
+        self.assertEqual(context_window("openai", "gpt-4"), 8192)
+        self.assertEqual(context_window("openai", "gpt-4-0613"), 8192)
+        self.assertEqual(context_window("openai", "gpt-4o"), 128000)
+        self.assertEqual(context_window("unknown"), prompt_budget.DEFAULT_CONTEXT_TOKENS)
+
+    def test_for_model_reserves_the_answer_and_honours_the_cap(self):
+        self.assertEqual(PromptBudget.for_model("openai", "gpt-4", reserve=1000).budget, 7192)
+        with mock.patch.object(prompt_budget, "PROMPT_BUDGET", 2000):
+            self.assertEqual(PromptBudget.for_model("anthropic", reserve=8000).budget, 2000)
+        self.assertEqual(PromptBudget.for_model("ollama", reserve=100000).budget, 512)
+
+    def test_water_fill_redistributes_unused_share(self):
+        self.assertEqual(_water_fill(100, [10, 500], [1, 1]), [10, 90])
+        self.assertEqual(_water_fill(90, [500, 500], [2, 1]), [60, 30])
+        self.assertEqual(_water_fill(100, [0, 20], [5, 1]), [0, 20])
+
+
+class PackTests(SimpleTestCase):
+    def test_everything_fits_untouched(self):
+        packed = PromptBudget(1000).pack([
+            Section("system", "be brief", required=True),
+            Section("files", ["a b", "c d"], strategy="each"),
+        ])
+        self.assertEqual(packed.items("files"), ["a b", "c d"])
+        self.assertEqual(packed.report["system"], {"tokens": 3, "original": 3, "budget": 3})
+
+    def test_required_sections_are_kept_and_the_rest_share_what_is_left(self):
+        packed = PromptBudget(300).pack([
+            Section("system", words(100), required=True),
+            Section("tools", words(400), weight=3),
+            Section("files", words(400), weight=1),
+        ])
+        self.assertEqual(packed.report["system"]["tokens"], packed.report["system"]["original"])
+        self.assertLessEqual(packed.total_tokens, 300)
+        self.assertGreater(packed.report["tools"]["tokens"], packed.report["files"]["tokens"])
+
+    def test_text_keeps_head_and_tail(self):
+        text = words(500)
+        trimmed = PromptBudget(1000).truncate(text, 100)
+        self.assertLessEqual(estimate_tokens(trimmed), 100)
+        self.assertTrue(trimmed.startswith("w0 w1"))
+        self.assertTrue(trimmed.endswith("w499"))
+        self.assertIn("[truncated", trimmed)
+
+    def test_history_drops_oldest_first(self):
+        history = [words(50, f"m{i}") for i in range(5)]
+        size = estimate_tokens(history[0])
+        packed = PromptBudget(2 * size + 20).pack([Section("history", history, strategy="oldest")])
+        kept = packed.items("history")
+        self.assertEqual(kept, history[-2:])
+
+    def test_files_get_a_fair_share_each(self):
+        files = [words(20, "small"), words(400, "big"), words(400, "huge")]
+        packed = PromptBudget(300).pack([Section("files", files, strategy="each")])
+        kept = packed.items("files")
+        self.assertEqual(kept[0], files[0])
+        self.assertEqual(len(kept), 3)
+        self.assertLessEqual(packed.total_tokens, 300)
+
+    def test_starved_sections_are_dropped_lowest_weight_first(self):
+        packed = PromptBudget(250).pack([
+            Section("system", words(100), required=True),
+            Section("tools", words(300), weight=3, min_tokens=100),
+            Section("files", words(300), weight=1, min_tokens=100),
+        ])
+        self.assertEqual(packed.items("files"), [])
+        self.assertGreater(packed.report["tools"]["tokens"], 100)
+
+
+class SystemPromptFrameTests(SimpleTestCase):
+    """The required system section must be the fixed text that is really sent"""
+
+    profile = SimpleNamespace(name="Helper")
+
+    def render(self, **sections):
+        return RepositoryChatConsumer._render_system_prompt(self.profile, "You help. Available Tools:\n- x", **sections)
+
+    def test_frame_plus_sections_is_the_final_prompt(self):
+        sections = {"tools": "**x**: does x", "crs": "# CRS\nready", "files": "file body", "knowledge": "notes"}
+        frame = self.render(**{name: "" for name in sections})
+        full = self.render(**sections)
+        self.assertEqual(len(frame) + sum(len(v) for v in sections.values()), len(full))
+        for fixed in ("You help.", "# KNOWLEDGE CONTEXT", "# User Uploaded Context Files:",
+                      "# Agent Knowledge Base (Helper):", "---", "Use the available tools"):
+            self.assertIn(fixed, frame)
+
+    def test_absent_sections_leave_no_header(self):
+        self.assertEqual(self.render(), "You help. Available Tools:\n- x")
+        generic = RepositoryChatConsumer._render_system_prompt(None, "")
+        self.assertTrue(generic.startswith("You are a helpful AI assistant."))
+
+    def test_packed_prompt_fits_the_budget(self):
+        sections = {"tools": words(400, "t"), "files": words(400, "f")}
+        frame = self.render(tools="", files="")
+        budget = PromptBudget(400)
+        packed = budget.pack([
+            Section("system", frame, required=True),
+            Section("tools", sections["tools"], weight=3),
+            Section("files", [sections["files"]], strategy="each"),
+        ])
+        prompt = self.render(tools=packed.text("tools"), files="".join(packed.items("files")))
+        self.assertLessEqual(estimate_tokens(prompt), 400 + 5)
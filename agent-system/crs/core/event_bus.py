@@ -0,0 +1,440 @@
+"""
+Cross-process CRS event fan-out (v1)
+
+CRSEventBroadcaster keeps events in process memory, so with several
+Daphne/Uvicorn workers a pipeline running in worker A is invisible to SSE
+clients connected to worker B. SharedEventBroadcaster keeps the same API but:
+
+  - publishes through a shared EventStore (batched by a background flusher)
+  - tails the store from every process and feeds the local ring buffer
+  - replays from the store when a reader asks for a seq older than the buffer
+
+Stores:
+  - SQLiteEventStore: shared file, polled by one tail thread per process
+    (single host / tests)
+  - RedisEventStore: sorted set per repository + PUBLISH notifications
+    (multi host; needs the `redis` package)
+
+QueueRelayBroadcaster forwards events from pool worker processes to the
+parent's broadcaster when no shared store is configured.
+"""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from dataclasses import replace
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.events import CRSEvent, CRSEventBroadcaster, EventType
+
+try:
+    import redis  # type: ignore
+    REDIS_AVAILABLE = True
+except ImportError:
+    redis = None
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+def _event_to_row(event: CRSEvent) -> Dict[str, Any]:
+    return event.to_dict()
+
+
+def _event_from_row(row: Dict[str, Any]) -> CRSEvent:
+    return CRSEvent(
+        event_type=EventType(row.get("event_type")),
+        timestamp=float(row.get("timestamp") or 0.0),
+        run_id=str(row.get("run_id") or ""),
+        step_name=row.get("step_name"),
+        data=row.get("data"),
+        seq=row.get("seq"),
+    )
+
+
+class EventStore:
+    """
+    Interface for shared event storage.
+    Sequence numbers are per repository, consecutive, assigned by the store.
+    """
+
+    def append_batch(self, items: List[Tuple[int, Dict[str, Any]]]) -> None:
+        raise NotImplementedError
+
+    def read_after(self, repository_id: int, after_seq: int, limit: int = 1000) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def last_seq(self, repository_id: int) -> int:
+        raise NotImplementedError
+
+    def poll(self, timeout: float) -> List[Tuple[int, Dict[str, Any]]]:
+        """New (repository_id, row) pairs since the previous poll (blocks up to timeout)."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteEventStore(EventStore):
+    """
+    Shared SQLite file. Writers serialize on BEGIN IMMEDIATE, so seq
+    assignment is consistent across processes.
+    """
+
+    def __init__(self, path: str, max_per_repo: int = 1000, poll_interval: float = 0.2):
+        self.path = os.path.abspath(path)
+        self.max_per_repo = max_per_repo
+        self.poll_interval = poll_interval
+        self._local = threading.local()
+
+        conn = self._conn()
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS crs_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                repository_id INTEGER NOT NULL,
+                seq INTEGER NOT NULL,
+                payload TEXT NOT NULL,
+                UNIQUE (repository_id, seq)
+            );
+            CREATE TABLE IF NOT EXISTS crs_event_seq (
+                repository_id INTEGER PRIMARY KEY,
+                last_seq INTEGER NOT NULL
+            );
+            """
+        )
+        row = conn.execute("SELECT COALESCE(MAX(id), 0) FROM crs_events").fetchone()
+        # tail cursor starts at "now": history is served by read_after()
+        self._cursor = int(row[0])
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            parent = os.path.dirname(self.path)
+            if parent:
+                os.makedirs(parent, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def append_batch(self, items: List[Tuple[int, Dict[str, Any]]]) -> None:
+        if not items:
+            return
+        by_repo: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        for repository_id, row in items:
+            by_repo[int(repository_id)].append(row)
+
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for repository_id, rows in by_repo.items():
+                cur = conn.execute(
+                    "SELECT last_seq FROM crs_event_seq WHERE repository_id = ?", (repository_id,)
+                ).fetchone()
+                last = int(cur[0]) if cur else 0
+                values = []
+                for i, row in enumerate(rows, start=1):
+                    row = dict(row, seq=last + i)
+                    values.append((repository_id, last + i, json.dumps(row)))
+                conn.executemany(
+                    "INSERT INTO crs_events (repository_id, seq, payload) VALUES (?, ?, ?)", values
+                )
+                last += len(rows)
+                conn.execute(
+                    "INSERT INTO crs_event_seq (repository_id, last_seq) VALUES (?, ?) "
+                    "ON CONFLICT(repository_id) DO UPDATE SET last_seq = excluded.last_seq",
+                    (repository_id, last),
+                )
+                conn.execute(
+                    "DELETE FROM crs_events WHERE repository_id = ? AND seq <= ?",
+                    (repository_id, last - self.max_per_repo),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def read_after(self, repository_id: int, after_seq: int, limit: int = 1000) -> List[Dict[str, Any]]:
+        rows = self._conn().execute(
+            "SELECT payload FROM crs_events WHERE repository_id = ? AND seq > ? ORDER BY seq LIMIT ?",
+            (int(repository_id), int(after_seq), int(limit)),
+        ).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def last_seq(self, repository_id: int) -> int:
+        row = self._conn().execute(
+            "SELECT last_seq FROM crs_event_seq WHERE repository_id = ?", (int(repository_id),)
+        ).fetchone()
+        return int(row[0]) if row else 0
+
+    def poll(self, timeout: float) -> List[Tuple[int, Dict[str, Any]]]:
+        deadline = time.monotonic() + max(0.0, timeout)
+        while True:
+            rows = self._conn().execute(
+                "SELECT id, repository_id, payload FROM crs_events WHERE id > ? ORDER BY id LIMIT 500",
+                (self._cursor,),
+            ).fetchall()
+            if rows:
+                self._cursor = int(rows[-1][0])
+                return [(int(r[1]), json.loads(r[2])) for r in rows]
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return []
+            time.sleep(min(self.poll_interval, remaining))
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class RedisEventStore(EventStore):
+    """
+    Redis: one sorted set per repository (score = seq), INCRBY for seq
+    allocation and a PUBLISH per batch so tails wake immediately.
+    """
+
+    CHANNEL = "crs:events"
+
+    def __init__(self, url: str, max_per_repo: int = 1000, prefix: str = "crs:events"):
+        if not REDIS_AVAILABLE:
+            raise RuntimeError("redis package not installed. Run: pip install redis")
+        self.client = redis.Redis.from_url(url)
+        self.max_per_repo = max_per_repo
+        self.prefix = prefix
+        self._pubsub = None
+        self._last_seen: Dict[int, int] = {}
+
+    def _key(self, repository_id: int) -> str:
+        return f"{self.prefix}:{int(repository_id)}"
+
+    def append_batch(self, items: List[Tuple[int, Dict[str, Any]]]) -> None:
+        if not items:
+            return
+        by_repo: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        for repository_id, row in items:
+            by_repo[int(repository_id)].append(row)
+
+        # round trip 1: allocate seq ranges
+        pipe = self.client.pipeline()
+        repos = list(by_repo.keys())
+        for repository_id in repos:
+            pipe.incrby(f"{self._key(repository_id)}:seq", len(by_repo[repository_id]))
+        lasts = pipe.execute()
+
+        # round trip 2: store + trim + notify
+        pipe = self.client.pipeline()
+        notify = []
+        for repository_id, last in zip(repos, lasts):
+            rows = by_repo[repository_id]
+            first = int(last) - len(rows) + 1
+            mapping = {json.dumps(dict(row, seq=first + i)): first + i for i, row in enumerate(rows)}
+            pipe.zadd(self._key(repository_id), mapping)
+            pipe.zremrangebyrank(self._key(repository_id), 0, -(self.max_per_repo + 1))
+            notify.append({"repository_id": repository_id, "seq_from": first, "seq_to": int(last)})
+        pipe.publish(self.CHANNEL, json.dumps(notify))
+        pipe.execute()
+
+    def read_after(self, repository_id: int, after_seq: int, limit: int = 1000) -> List[Dict[str, Any]]:
+        raw = self.client.zrangebyscore(self._key(repository_id), f"({int(after_seq)}", "+inf", start=0, num=int(limit))
+        return [json.loads(r) for r in raw]
+
+    def last_seq(self, repository_id: int) -> int:
+        v = self.client.get(f"{self._key(repository_id)}:seq")
+        return int(v) if v else 0
+
+    def poll(self, timeout: float) -> List[Tuple[int, Dict[str, Any]]]:
+        if self._pubsub is None:
+            self._pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            self._pubsub.subscribe(self.CHANNEL)
+        msg = self._pubsub.get_message(timeout=timeout)
+        if not msg or msg.get("type") != "message":
+            return []
+
+        out: List[Tuple[int, Dict[str, Any]]] = []
+        for note in json.loads(msg["data"]):
+            repository_id = int(note["repository_id"])
+            after = self._last_seen.get(repository_id, int(note["seq_from"]) - 1)
+            rows = self.read_after(repository_id, after)
+            if rows:
+                self._last_seen[repository_id] = int(rows[-1]["seq"])
+            out.extend((repository_id, r) for r in rows)
+        return out
+
+    def close(self) -> None:
+        if self._pubsub is not None:
+            self._pubsub.close()
+            self._pubsub = None
+
+
+class SharedEventBroadcaster(CRSEventBroadcaster):
+    """
+    CRSEventBroadcaster over a shared EventStore.
+
+    broadcast() only enqueues; a flusher thread writes batches of up to
+    `batch_size` events every `flush_interval` seconds. A tail thread feeds
+    events from all processes (including this one) into the local ring
+    buffer, so readers keep using wait_for_events()/aget_events().
+    """
+
+    def __init__(
+        self,
+        store: EventStore,
+        *,
+        max_queue_size: int = 1000,
+        batch_size: int = 200,
+        flush_interval: float = 0.05,
+        tail_timeout: float = 1.0,
+    ):
+        super().__init__(max_queue_size=max_queue_size)
+        self.store = store
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.tail_timeout = tail_timeout
+
+        self._outbox: List[Tuple[int, Dict[str, Any]]] = []
+        self._outbox_cond = threading.Condition()
+        self._stopped = threading.Event()
+
+        self._flusher = threading.Thread(target=self._flush_loop, name="crs-event-flush", daemon=True)
+        self._tail = threading.Thread(target=self._tail_loop, name="crs-event-tail", daemon=True)
+        self._flusher.start()
+        self._tail.start()
+
+    # --------------------
+    # publish (batched)
+    # --------------------
+    def broadcast(self, repository_id: int, event: CRSEvent) -> CRSEvent:
+        """Queue event for the shared store (seq is assigned when the batch is written)"""
+        with self._outbox_cond:
+            self._outbox.append((int(repository_id), _event_to_row(replace(event, seq=None))))
+            if len(self._outbox) >= self.batch_size:
+                self._outbox_cond.notify()
+        return event
+
+    def flush(self) -> None:
+        with self._outbox_cond:
+            batch, self._outbox = self._outbox, []
+        if batch:
+            self.store.append_batch(batch)
+
+    def _flush_loop(self) -> None:
+        while not self._stopped.is_set():
+            with self._outbox_cond:
+                if len(self._outbox) < self.batch_size:
+                    self._outbox_cond.wait(timeout=self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning("CRS event flush failed: %s: %s", type(e).__name__, e)
+                time.sleep(self.flush_interval)
+
+    # --------------------
+    # subscribe (tail)
+    # --------------------
+    def _tail_loop(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                for repository_id, row in self.store.poll(self.tail_timeout):
+                    self._publish_local(repository_id, _event_from_row(row))
+            except Exception as e:
+                logger.warning("CRS event tail failed: %s: %s", type(e).__name__, e)
+                time.sleep(self.tail_timeout)
+        # release the tail's own connection / subscription
+        self.store.close()
+
+    # --------------------
+    # reads (replay by seq)
+    # --------------------
+    def last_seq(self, repository_id: int) -> int:
+        return max(super().last_seq(repository_id), self.store.last_seq(repository_id))
+
+    def get_events(
+        self,
+        repository_id: int,
+        since: Optional[float] = None,
+        after_seq: Optional[int] = None,
+    ) -> List[CRSEvent]:
+        if after_seq is None:
+            return super().get_events(repository_id, since=since)
+
+        with self._lock:
+            buf = self._buffers.get(repository_id)
+            covered = buf is not None and len(buf.events) > 0 and after_seq + 1 >= buf.first_seq
+            local = buf.after(after_seq) if covered else []
+        if covered:
+            return local
+        # older than the local window (or nothing local yet): replay from the store
+        return [_event_from_row(r) for r in self.store.read_after(repository_id, after_seq)]
+
+    # store reads are blocking (SQLite / Redis round trips): keep them off the event loop
+    async def alast_seq(self, repository_id: int) -> int:
+        return await asyncio.to_thread(self.last_seq, repository_id)
+
+    async def aget_events(
+        self,
+        repository_id: int,
+        after_seq: int,
+        timeout: Optional[float] = None,
+    ) -> List[CRSEvent]:
+        replay = await asyncio.to_thread(self.get_events, repository_id, after_seq=after_seq)
+        if replay:
+            return replay
+        await self._await_local(repository_id, after_seq, timeout)
+        return await asyncio.to_thread(self.get_events, repository_id, after_seq=after_seq)
+
+    def close(self) -> None:
+        self._stopped.set()
+        with self._outbox_cond:
+            self._outbox_cond.notify()
+        self._flusher.join(timeout=self.flush_interval + 5)
+        self._tail.join(timeout=self.tail_timeout + 5)
+        self.flush()
+        self.store.close()
+
+
+class QueueRelayBroadcaster(CRSEventBroadcaster):
+    """
+    Broadcaster for child processes of a parent that owns an in-memory bus.
+
+    broadcast() forwards (repository_id, event row) over a multiprocessing
+    queue; the parent calls relay_to() to publish them on its own
+    broadcaster. Reads stay local (children have no SSE clients).
+    """
+
+    def __init__(self, queue: Any, max_queue_size: int = 1000):
+        super().__init__(max_queue_size=max_queue_size)
+        self.queue = queue
+
+    def broadcast(self, repository_id: int, event: CRSEvent) -> CRSEvent:
+        try:
+            self.queue.put_nowait((int(repository_id), _event_to_row(replace(event, seq=None))))
+        except Exception as e:
+            logger.warning("CRS event relay failed: %s: %s", type(e).__name__, e)
+        return event
+
+    @staticmethod
+    def relay_to(broadcaster: CRSEventBroadcaster, item: Tuple[int, Dict[str, Any]]) -> CRSEvent:
+        repository_id, row = item
+        return broadcaster.broadcast(repository_id, _event_from_row(row))
+
+
+def broadcaster_from_url(url: str) -> CRSEventBroadcaster:
+    """Build the process broadcaster from CRS_EVENT_BUS_URL"""
+    url = (url or "").strip()
+    if not url or url.startswith("memory://"):
+        return CRSEventBroadcaster()
+    if url.startswith("sqlite://"):
+        # sqlite:////abs/path -> /abs/path ; sqlite:///rel/path -> rel/path
+        path = url[len("sqlite:///"):] if url.startswith("sqlite:///") else url[len("sqlite://"):]
+        return SharedEventBroadcaster(SQLiteEventStore(path))
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return SharedEventBroadcaster(RedisEventStore(url))
+    raise ValueError(f"Unsupported CRS_EVENT_BUS_URL: {url}")
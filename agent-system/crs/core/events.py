@@ -1,13 +1,16 @@
 """
 CRS Event System for real-time progress streaming
 """
+import asyncio
 import json
+import os
 import time
-from dataclasses import dataclass, asdict
-from typing import Any, Dict, List, Optional, Callable
+from dataclasses import dataclass, asdict, replace
+from itertools import islice
+from typing import Any, Deque, Dict, List, Optional, Callable, Tuple
 from enum import Enum
-from collections import defaultdict
-from threading import Lock
+from collections import deque
+from threading import Condition, Lock
 
 
 class EventType(str, Enum):
@@ -20,6 +23,11 @@ class EventType(str, Enum):
     PIPELINE_START = "pipeline_start"
     PIPELINE_COMPLETE = "pipeline_complete"
     PIPELINE_ERROR = "pipeline_error"
+    # scheduler (backend agent.services.crs_scheduler)
+    JOB_QUEUED = "job_queued"
+    JOB_STARTED = "job_started"
+    JOB_COMPLETE = "job_complete"
+    JOB_FAILED = "job_failed"
 
 
 class LogLevel(str, Enum):
@@ -38,10 +46,13 @@ class CRSEvent:
     run_id: str
     step_name: Optional[str] = None
     data: Optional[Dict[str, Any]] = None
+    seq: Optional[int] = None  # assigned by CRSEventBroadcaster (per repository)
 
     def to_sse(self) -> str:
         """Convert to Server-Sent Events format"""
         event_dict = asdict(self)
+        if self.seq is not None:
+            return f"id: {self.seq}\ndata: {json.dumps(event_dict)}\n\n"
         return f"data: {json.dumps(event_dict)}\n\n"
 
     def to_dict(self) -> Dict[str, Any]:
@@ -160,18 +171,22 @@ class CRSEventEmitter:
         self,
         step_name: str,
         duration: float,
-        result: Dict[str, Any]
+        result: Dict[str, Any],
+        metrics: Optional[Dict[str, Any]] = None
     ) -> None:
-        """Emit step complete event"""
+        """Emit step complete event (metrics: cpu/rss/io/throughput, see core.step_metrics)"""
+        data = {
+            "duration": duration,
+            "result": result
+        }
+        if metrics:
+            data["metrics"] = metrics
         event = CRSEvent(
             event_type=EventType.STEP_COMPLETE,
             timestamp=time.time(),
             run_id=self.run_id,
             step_name=step_name,
-            data={
-                "duration": duration,
-                "result": result
-            }
+            data=data
         )
         self.emit(event)
 
@@ -196,55 +211,219 @@ class CRSEventEmitter:
         )
         self.emit(event)
 
+    def emit_job_event(
+        self,
+        event_type: EventType,
+        job_id: str,
+        data: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Emit a scheduler job lifecycle event (job_queued/started/complete/failed)"""
+        event = CRSEvent(
+            event_type=event_type,
+            timestamp=time.time(),
+            run_id=self.run_id,
+            data={"job_id": job_id, **(data or {})}
+        )
+        self.emit(event)
+
     def get_events(self) -> List[CRSEvent]:
         """Get all emitted events"""
         with self._lock:
             return list(self.events)
 
 
+class _RepoEventBuffer:
+    """
+    Ring buffer for one repository.
+    Events carry consecutive seq numbers, so the event with seq N lives at
+    offset N - first_seq (no scan needed).
+    """
+
+    def __init__(self, max_size: int):
+        self.events: Deque[CRSEvent] = deque(maxlen=max_size)
+        self.next_seq = 1
+
+    @property
+    def first_seq(self) -> int:
+        return self.next_seq - len(self.events)
+
+    def after(self, seq: int) -> List[CRSEvent]:
+        offset = max(0, seq - self.first_seq + 1)
+        if offset >= len(self.events):
+            return []
+        return list(islice(self.events, offset, None))
+
+
 class CRSEventBroadcaster:
     """
     Global event broadcaster for SSE streams
-    Manages event queues per repository
+    Manages a ring buffer per repository (deque, maxlen) with monotonically
+    increasing sequence numbers.
+
+    Readers never poll:
+      - sync readers block in wait_for_events() (condition variable)
+      - async readers await aget_events() (asyncio.Event per waiter)
     """
 
-    def __init__(self):
-        self._queues: Dict[int, List[CRSEvent]] = defaultdict(list)
-        self._max_queue_size = 1000
+    def __init__(self, max_queue_size: int = 1000):
+        self._buffers: Dict[int, _RepoEventBuffer] = {}
+        self._max_queue_size = max_queue_size
         self._lock = Lock()
-
-    def broadcast(self, repository_id: int, event: CRSEvent) -> None:
-        """Broadcast event to repository's queue"""
+        self._cond = Condition(self._lock)
+        # repository_id -> [(loop, asyncio.Event)]
+        self._async_waiters: Dict[int, List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]]] = {}
+
+    def _buffer(self, repository_id: int) -> _RepoEventBuffer:
+        buf = self._buffers.get(repository_id)
+        if buf is None:
+            buf = _RepoEventBuffer(self._max_queue_size)
+            self._buffers[repository_id] = buf
+        return buf
+
+    def broadcast(self, repository_id: int, event: CRSEvent) -> CRSEvent:
+        """Broadcast event to repository's queue (returns the sequenced copy)"""
+        with self._lock:
+            seq = self._buffer(repository_id).next_seq
+        return self._publish_local(repository_id, replace(event, seq=seq))
+
+    def _publish_local(self, repository_id: int, sequenced: CRSEvent) -> CRSEvent:
+        """
+        Append an already-sequenced event to the local ring buffer and wake readers.
+        Shared backends (core.event_bus) call this for events from other processes.
+        """
+        with self._cond:
+            buf = self._buffer(repository_id)
+            if sequenced.seq is None or sequenced.seq < buf.next_seq:
+                sequenced = replace(sequenced, seq=buf.next_seq)
+            elif sequenced.seq > buf.next_seq:
+                # gap (events published before this process subscribed): restart the window
+                buf.events.clear()
+            buf.next_seq = sequenced.seq + 1
+            buf.events.append(sequenced)
+            waiters = self._async_waiters.pop(repository_id, [])
+            self._cond.notify_all()
+
+        for loop, ev in waiters:
+            try:
+                loop.call_soon_threadsafe(ev.set)
+            except RuntimeError:
+                # loop already closed (client went away)
+                pass
+        return sequenced
+
+    def last_seq(self, repository_id: int) -> int:
+        """Sequence number of the newest event (0 if none)"""
         with self._lock:
-            queue = self._queues[repository_id]
-            queue.append(event)
-            # Keep queue size limited
-            if len(queue) > self._max_queue_size:
-                self._queues[repository_id] = queue[-self._max_queue_size:]
+            buf = self._buffers.get(repository_id)
+            return buf.next_seq - 1 if buf else 0
 
     def get_events(
         self,
         repository_id: int,
-        since: Optional[float] = None
+        since: Optional[float] = None,
+        after_seq: Optional[int] = None,
     ) -> List[CRSEvent]:
-        """Get events for a repository since a timestamp"""
+        """
+        Get events for a repository.
+        - after_seq: events with seq > after_seq (offset lookup)
+        - since: legacy timestamp filter
+        """
         with self._lock:
-            events = self._queues.get(repository_id, [])
+            buf = self._buffers.get(repository_id)
+            if buf is None:
+                return []
+            if after_seq is not None:
+                return buf.after(after_seq)
             if since is not None:
-                return [e for e in events if e.timestamp > since]
-            return list(events)
+                return [e for e in buf.events if e.timestamp > since]
+            return list(buf.events)
+
+    def wait_for_events(
+        self,
+        repository_id: int,
+        after_seq: int,
+        timeout: Optional[float] = None,
+    ) -> List[CRSEvent]:
+        """Block until events newer than after_seq exist (or timeout). Returns them."""
+        with self._cond:
+            self._cond.wait_for(
+                lambda: self._buffer(repository_id).next_seq - 1 > after_seq,
+                timeout=timeout,
+            )
+        return self.get_events(repository_id, after_seq=after_seq)
+
+    async def alast_seq(self, repository_id: int) -> int:
+        """Async variant of last_seq()"""
+        return self.last_seq(repository_id)
+
+    async def aget_events(
+        self,
+        repository_id: int,
+        after_seq: int,
+        timeout: Optional[float] = None,
+    ) -> List[CRSEvent]:
+        """Async variant of wait_for_events(); never blocks the event loop."""
+        await self._await_local(repository_id, after_seq, timeout)
+        return self.get_events(repository_id, after_seq=after_seq)
+
+    async def _await_local(self, repository_id: int, after_seq: int, timeout: Optional[float]) -> None:
+        """Wait until the local ring buffer has events newer than after_seq (or timeout)"""
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        while True:
+            ev = asyncio.Event()
+            with self._lock:
+                if self._buffer(repository_id).next_seq - 1 > after_seq:
+                    return
+                self._async_waiters.setdefault(repository_id, []).append((loop, ev))
+
+            remaining = None if deadline is None else deadline - loop.time()
+            try:
+                # woken for every new event; an event at or below after_seq (late
+                # delivery from a shared store) loops back to wait again
+                await asyncio.wait_for(ev.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                return
+            finally:
+                with self._lock:
+                    waiters = self._async_waiters.get(repository_id)
+                    if waiters and (loop, ev) in waiters:
+                        waiters.remove((loop, ev))
+                    if not waiters:
+                        self._async_waiters.pop(repository_id, None)
 
     def clear_events(self, repository_id: int) -> None:
-        """Clear events for a repository"""
+        """Clear events for a repository (sequence numbers keep increasing)"""
         with self._lock:
-            if repository_id in self._queues:
-                del self._queues[repository_id]
+            buf = self._buffers.get(repository_id)
+            if buf is not None:
+                buf.events.clear()
 
 
 # Global broadcaster instance
-_broadcaster = CRSEventBroadcaster()
+_broadcaster: Optional[CRSEventBroadcaster] = None
+_broadcaster_lock = Lock()
 
 
 def get_broadcaster() -> CRSEventBroadcaster:
-    """Get global event broadcaster"""
+    """
+    Get global event broadcaster.
+    CRS_EVENT_BUS_URL selects a cross-process backend (see core.event_bus):
+      - unset / "memory://"          -> in-process ring buffer (default)
+      - "sqlite:////path/bus.sqlite3" -> shared SQLite file (single host / tests)
+      - "redis://host:6379/0"        -> Redis pub/sub (multi-host)
+    """
+    global _broadcaster
+    if _broadcaster is None:
+        with _broadcaster_lock:
+            if _broadcaster is None:
+                from core.event_bus import broadcaster_from_url
+                _broadcaster = broadcaster_from_url(os.environ.get("CRS_EVENT_BUS_URL", ""))
     return _broadcaster
+
+
+def set_broadcaster(broadcaster: CRSEventBroadcaster) -> None:
+    """Install the process broadcaster explicitly (e.g. a relay inside pool worker processes)"""
+    global _broadcaster
+    with _broadcaster_lock:
+        _broadcaster = broadcaster
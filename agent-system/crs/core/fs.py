@@ -1,10 +1,17 @@
 import json
 import os
+import shutil
 import tempfile
+import threading
 from dataclasses import dataclass
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
 
 from datetime import datetime
+
+from core.records import dumps_payload
+from core.source_scanner import SourceScanner
+
+
 class CRSFileIOError(Exception):
     pass
 
@@ -20,6 +27,42 @@ def _norm_join(root: str, p: str) -> str:
     return os.path.join(root, p)
 
 
+def _nbytes(data: str) -> int:
+    return len(data) if data.isascii() else len(data.encode("utf-8"))
+
+
+class IOCounters:
+    """Running totals of IO done through one WorkspaceFS (read by core.step_metrics)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.files_read = 0
+        self.bytes_read = 0
+        self.files_written = 0
+        self.bytes_written = 0
+
+    def add_read(self, data: str, *, files: int = 1) -> None:
+        n = _nbytes(data)
+        with self._lock:
+            self.files_read += files
+            self.bytes_read += n
+
+    def add_write(self, data: str, *, files: int = 1) -> None:
+        n = _nbytes(data)
+        with self._lock:
+            self.files_written += files
+            self.bytes_written += n
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "files_read": self.files_read,
+                "bytes_read": self.bytes_read,
+                "files_written": self.files_written,
+                "bytes_written": self.bytes_written,
+            }
+
+
 @dataclass
 class WorkspacePaths:
     workspace_root: str
@@ -45,12 +88,38 @@ class StorageBackend:
     def write_text(self, path: str, data: str) -> None:
         raise NotImplementedError
 
+    def iter_lines(self, path: str) -> Iterator[str]:
+        """Lines of a text file (with line endings); disk backends should not load it whole."""
+        return iter(self.read_text(path).splitlines(keepends=True))
+
+    def write_chunks(self, path: str, chunks: Iterable[str]) -> None:
+        """Write text produced piecewise; disk backends should not join it in memory."""
+        self.write_text(path, "".join(chunks))
+
     def exists(self, path: str) -> bool:
         raise NotImplementedError
 
     def makedirs(self, path: str) -> None:
         raise NotImplementedError
 
+    def delete(self, path: str) -> None:
+        """Remove a file, or a directory with everything under it."""
+        raise NotImplementedError
+
+    def list_files(self, root: str, suffix: Optional[str] = None) -> List[str]:
+        """
+        Absolute paths of all files under root (recursive, sorted).
+        suffix filters by filename ending (e.g. ".py").
+        """
+        raise NotImplementedError
+
+    def scan_files(self, scanner: SourceScanner, start: str, suffix: Optional[str] = None) -> List[str]:
+        """
+        Like list_files, but only what `scanner` keeps (include/exclude/.gitignore).
+        Backends that can walk lazily should prune directories instead of filtering.
+        """
+        return [p for p in self.list_files(start, suffix=suffix) if not scanner.is_excluded(p)]
+
 
 class LocalDiskBackend(StorageBackend):
     def read_text(self, path: str) -> str:
@@ -75,12 +144,194 @@ class LocalDiskBackend(StorageBackend):
             except Exception:
                 pass
 
+    def iter_lines(self, path: str) -> Iterator[str]:
+        with open(path, "r", encoding="utf-8") as f:
+            yield from f
+
+    def write_chunks(self, path: str, chunks: Iterable[str]) -> None:
+        parent = os.path.dirname(path) or "."
+        os.makedirs(parent, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".crs_tmp_", dir=parent)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+            os.replace(tmp_path, path)
+        finally:
+            try:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            except Exception:
+                pass
+
     def exists(self, path: str) -> bool:
         return os.path.exists(path)
 
     def makedirs(self, path: str) -> None:
         os.makedirs(path, exist_ok=True)
 
+    def delete(self, path: str) -> None:
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+
+    def list_files(self, root: str, suffix: Optional[str] = None) -> List[str]:
+        out: List[str] = []
+        for dirpath, _, filenames in os.walk(root):
+            for fn in filenames:
+                if suffix and not fn.endswith(suffix):
+                    continue
+                out.append(os.path.join(dirpath, fn))
+        return sorted(out)
+
+    def scan_files(self, scanner: SourceScanner, start: str, suffix: Optional[str] = None) -> List[str]:
+        return scanner.list_files(start, suffix=suffix)
+
+
+class OverlayBackend(StorageBackend):
+    """
+    Copy-on-write layer over another backend (v1).
+    - Reads fall through to `base` unless the path was written here
+    - Writes/makedirs stay in memory; the base backend is never touched
+    - delete() leaves a tombstone: the path (and, for a directory,
+      everything under it) disappears from reads, exists() and listings
+      until it is written again
+    - commit() flushes (a subset of) pending writes and deletes to the base backend
+
+    Used to evaluate candidate patches (pipeline + impact + verification)
+    without mutating the real workspace.
+    """
+
+    def __init__(self, base: StorageBackend):
+        self.base = base
+        self._files: Dict[str, str] = {}
+        self._dirs: Set[str] = set()
+        self._deleted: Set[str] = set()
+
+    @staticmethod
+    def _key(path: str) -> str:
+        return _abspath(path)
+
+    def _is_deleted(self, k: str) -> bool:
+        """Tombstoned (directly or via a deleted parent) and not rewritten since."""
+        if not self._deleted or k in self._files:
+            return False
+        p = k
+        while True:
+            if p in self._deleted:
+                return True
+            parent = os.path.dirname(p)
+            if parent == p:
+                return False
+            p = parent
+
+    def read_text(self, path: str) -> str:
+        k = self._key(path)
+        if k in self._files:
+            return self._files[k]
+        if self._is_deleted(k):
+            raise FileNotFoundError(path)
+        return self.base.read_text(path)
+
+    def iter_lines(self, path: str) -> Iterator[str]:
+        k = self._key(path)
+        if k in self._files:
+            return iter(self._files[k].splitlines(keepends=True))
+        if self._is_deleted(k):
+            raise FileNotFoundError(path)
+        return self.base.iter_lines(path)
+
+    def write_text(self, path: str, data: str) -> None:
+        k = self._key(path)
+        self._files[k] = data
+        self._dirs.add(os.path.dirname(k))
+
+    def exists(self, path: str) -> bool:
+        k = self._key(path)
+        if k in self._files or k in self._dirs:
+            return True
+        return not self._is_deleted(k) and self.base.exists(path)
+
+    def makedirs(self, path: str) -> None:
+        k = self._key(path)
+        self._dirs.add(k)
+        self._deleted.discard(k)
+
+    def delete(self, path: str) -> None:
+        k = self._key(path)
+        prefix = k.rstrip(os.sep) + os.sep
+        for f in [f for f in self._files if f == k or f.startswith(prefix)]:
+            del self._files[f]
+        self._dirs = {d for d in self._dirs if d != k and not d.startswith(prefix)}
+        self._deleted.add(k)
+
+    def _visible(self, paths: Iterable[str]) -> Set[str]:
+        return {p for p in paths if not self._is_deleted(self._key(p))}
+
+    def list_files(self, root: str, suffix: Optional[str] = None) -> List[str]:
+        root_abs = self._key(root)
+        prefix = root_abs.rstrip(os.sep) + os.sep
+        out = self._visible(self.base.list_files(root, suffix=suffix))
+        for k in self._files:
+            if not k.startswith(prefix):
+                continue
+            if suffix and not k.endswith(suffix):
+                continue
+            out.add(k)
+        return sorted(out)
+
+    def scan_files(self, scanner: SourceScanner, start: str, suffix: Optional[str] = None) -> List[str]:
+        root_abs = self._key(start)
+        prefix = root_abs.rstrip(os.sep) + os.sep
+        out = self._visible(self.base.scan_files(scanner, start, suffix=suffix))
+        for k in self._files:
+            if k.startswith(prefix) and (not suffix or k.endswith(suffix)) and not scanner.is_excluded(k):
+                out.add(k)
+        return sorted(out)
+
+    # --------------------
+    # overlay management
+    # --------------------
+    def pending_paths(self, under: Optional[str] = None) -> List[str]:
+        if not under:
+            return sorted(self._files.keys())
+        prefix = self._key(under).rstrip(os.sep) + os.sep
+        return sorted(k for k in self._files if k.startswith(prefix))
+
+    def pending_deletes(self, under: Optional[str] = None) -> List[str]:
+        if not under:
+            return sorted(self._deleted)
+        prefix = self._key(under).rstrip(os.sep) + os.sep
+        return sorted(k for k in self._deleted if k.startswith(prefix))
+
+    def commit(self, paths: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        Flush pending deletes, then pending writes, to the base backend.
+        paths=None => everything. Returns the committed paths.
+        """
+        if paths is None:
+            deletes, keys = sorted(self._deleted), sorted(self._files.keys())
+        else:
+            keys = [self._key(p) for p in paths]
+            deletes = [k for k in keys if k in self._deleted]
+        done: List[str] = []
+        for k in deletes:
+            self.base.delete(k)
+            self._deleted.discard(k)
+            done.append(k)
+        for k in keys:
+            if k not in self._files:
+                continue
+            self.base.write_text(k, self._files.pop(k))
+            done.append(k)
+        return done
+
+    def discard(self) -> None:
+        self._files.clear()
+        self._dirs.clear()
+        self._deleted.clear()
+
 
 class WorkspaceFS:
     """
@@ -94,8 +345,9 @@ class WorkspaceFS:
     def __init__(self, config_path: Optional[str] = None, backend: Optional[StorageBackend] = None):
         self.config_path = config_path or os.environ.get("CRS_CONFIG", "config.json")
         self.backend: StorageBackend = backend or LocalDiskBackend()
+        self.io = IOCounters()
 
-        if not os.path.exists(self.config_path):
+        if not self.backend.exists(self.config_path):
             raise CRSFileIOError(f"Workspace config not found: {self.config_path}")
 
         self.workspace_root = _abspath(os.path.dirname(self.config_path) or ".")
@@ -181,24 +433,78 @@ class WorkspaceFS:
         return bool(c.get(key, default))
 
     def read_json(self, path: str) -> Any:
-        raw = self.backend.read_text(path)
+        raw = self.read_text(path)
         return json.loads(raw)
 
     def write_json(self, path: str, payload: Any) -> None:
-        self.backend.write_text(path, json.dumps(payload, indent=2))
+        self.write_text(path, json.dumps(payload, indent=2))
 
     def read_text(self, path: str) -> str:
-        return self.backend.read_text(path)
+        data = self.backend.read_text(path)
+        self.io.add_read(data)
+        return data
 
     def write_text(self, path: str, data: str) -> None:
         self.backend.write_text(path, data)
+        self.io.add_write(data)
+
+    def delete(self, path: str) -> None:
+        self.backend.delete(path)
+
+    def iter_lines(self, path: str) -> Iterator[str]:
+        """Stream a text file line by line (counted as one file read)."""
+        self.io.add_read("")
+        for line in self.backend.iter_lines(path):
+            self.io.add_read(line, files=0)
+            yield line
+
+    def write_chunks(self, path: str, chunks: Iterable[str]) -> None:
+        """Write text piecewise (e.g. core.records.iter_payload_chunks) without joining it first."""
+        def _counted() -> Iterator[str]:
+            for chunk in chunks:
+                self.io.add_write(chunk, files=0)
+                yield chunk
+
+        self.backend.write_chunks(path, _counted())
+        self.io.add_write("")
+
+    @property
+    def scanner(self) -> SourceScanner:
+        """Source walk rules for src_dir (config.json "scan" + .gitignore)."""
+        if getattr(self, "_scanner", None) is None:
+            self._scanner = SourceScanner.from_config(self.paths.src_dir, self.cfg)
+        return self._scanner
+
+    def list_files(self, root: Optional[str] = None, suffix: Optional[str] = None) -> List[str]:
+        """
+        Recursive file listing through the backend (defaults to src_dir).
+        Scanners must use this instead of os.walk so overlays see new files.
+        Listings inside src_dir go through the source scanner (pruned walk).
+        """
+        root_abs = _abspath(root or self.paths.src_dir)
+        src = self.paths.src_dir
+        if root_abs == src or root_abs.startswith(src.rstrip(os.sep) + os.sep):
+            return self.backend.scan_files(self.scanner, root_abs, suffix=suffix)
+        return self.backend.list_files(root_abs, suffix=suffix)
+
+    def overlay(self) -> "WorkspaceFS":
+        """
+        Fork an in-memory view of this workspace (see OverlayBackend).
+        Everything written through the returned fs stays in memory until
+        `fs.backend.commit()` is called.
+        """
+        return WorkspaceFS(config_path=self.config_path, backend=OverlayBackend(self.backend))
+
+    @property
+    def is_overlay(self) -> bool:
+        return isinstance(self.backend, OverlayBackend)
 
-    # canonical writes
+    # canonical writes (one record per line, see core.records.dumps_payload)
     def save_blueprints(self, payload: Any) -> None:
-        self.write_json(self.paths.blueprints_json, payload)
+        self.write_text(self.paths.blueprints_json, dumps_payload(payload))
 
     def save_artifacts(self, payload: Any) -> None:
-        self.write_json(self.paths.artifacts_json, payload)
+        self.write_text(self.paths.artifacts_json, dumps_payload(payload))
 
     def save_relationships(self, payload: Any) -> None:
-        self.write_json(self.paths.relationships_json, payload)
+        self.write_text(self.paths.relationships_json, dumps_payload(payload))
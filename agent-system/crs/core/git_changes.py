@@ -0,0 +1,134 @@
+"""
+Git-based change detection for src_dir (v1)
+
+When src_dir is a git checkout (e.g. a repository clone updated by
+`git pull`), the commit a state was built from plus `git diff` between
+that commit and HEAD tells exactly which files changed, so a re-index
+does not have to hash the whole tree again.
+
+  - head_commit(src_dir):            HEAD sha (None outside a work tree / without git)
+  - is_dirty(src_dir, suffix):       uncommitted or untracked changes under src_dir
+  - diff_paths(src_dir, base, head): GitDiff with added/modified/deleted/renamed
+                                     paths (relative to src_dir)
+
+Every helper returns None when git cannot answer (git missing, not a
+repository, base commit not present in a shallow clone, ...); callers
+then fall back to full fingerprinting.
+"""
+import shutil
+import subprocess
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+GIT_AVAILABLE = shutil.which("git") is not None
+GIT_TIMEOUT = 30
+
+
+@dataclass
+class GitDiff:
+    base: str
+    head: str
+    added: List[str] = field(default_factory=list)
+    modified: List[str] = field(default_factory=list)
+    deleted: List[str] = field(default_factory=list)
+    renamed: List[Tuple[str, str]] = field(default_factory=list)  # (old, new)
+
+    def paths(self) -> List[str]:
+        """Every path whose content appeared, changed or disappeared (both sides of renames)."""
+        out = set(self.added) | set(self.modified) | set(self.deleted)
+        for old, new in self.renamed:
+            out.add(old)
+            out.add(new)
+        return sorted(out)
+
+    def summary(self) -> dict:
+        return {
+            "base": self.base,
+            "head": self.head,
+            "added": len(self.added),
+            "modified": len(self.modified),
+            "deleted": len(self.deleted),
+            "renamed": len(self.renamed),
+        }
+
+
+def _git(src_dir: str, *args: str) -> Optional[bytes]:
+    if not GIT_AVAILABLE:
+        return None
+    try:
+        result = subprocess.run(
+            ["git", "-C", src_dir, *args],
+            capture_output=True,
+            timeout=GIT_TIMEOUT,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if result.returncode != 0:
+        return None
+    return result.stdout
+
+
+def head_commit(src_dir: str) -> Optional[str]:
+    out = _git(src_dir, "rev-parse", "--verify", "-q", "HEAD")
+    sha = out.decode().strip() if out else ""
+    return sha or None
+
+
+def is_dirty(src_dir: str, suffix: Optional[str] = ".py") -> Optional[bool]:
+    """
+    True when src_dir has staged, unstaged or untracked changes (ignored files
+    do not count). With suffix, only matching paths are considered.
+    """
+    out = _git(src_dir, "status", "--porcelain", "-z", "--untracked-files=all", "--", ".")
+    if out is None:
+        return None
+    entries = out.decode("utf-8", "surrogateescape").split("\0")
+    i = 0
+    while i < len(entries):
+        entry = entries[i]
+        i += 1
+        if not entry:
+            continue
+        status, path = entry[:2], entry[3:]
+        if "R" in status or "C" in status:
+            i += 1  # the original path follows as its own entry
+        if not suffix or path.endswith(suffix):
+            return True
+    return False
+
+
+def diff_paths(src_dir: str, base: str, head: str = "HEAD") -> Optional[GitDiff]:
+    """Committed changes base..head under src_dir, paths relative to src_dir."""
+    if _git(src_dir, "cat-file", "-e", f"{base}^{{commit}}") is None:
+        return None  # unknown commit (history rewritten, shallow clone, ...)
+    out = _git(src_dir, "diff", "--name-status", "-z", "-M", "--relative", base, head, "--")
+    if out is None:
+        return None
+    head_sha = head_commit(src_dir) if head == "HEAD" else head
+    diff = GitDiff(base=base, head=head_sha or head)
+
+    tokens = out.decode("utf-8", "surrogateescape").split("\0")
+    i = 0
+    while i < len(tokens):
+        status = tokens[i]
+        i += 1
+        if not status:
+            continue
+        kind = status[0]
+        if kind in ("R", "C"):
+            old, new = tokens[i], tokens[i + 1]
+            i += 2
+            if kind == "R":
+                diff.renamed.append((old, new))
+            else:
+                diff.added.append(new)
+            continue
+        path = tokens[i]
+        i += 1
+        if kind == "A":
+            diff.added.append(path)
+        elif kind == "D":
+            diff.deleted.append(path)
+        else:  # M, T (type change), U
+            diff.modified.append(path)
+    return diff
@@ -326,7 +326,7 @@ class ImpactEngine:
 
     def _update_snapshots(self, artifacts_payload: Dict[str, Any], relationships_payload: Dict[str, Any]) -> None:
         d = self._snapshots_dir()
-        _ensure_dir(d)
+        self.fs.backend.makedirs(d)
         a_path, r_path = self._snapshot_paths()
         try:
             arts = artifacts_payload.get("artifacts") if isinstance(artifacts_payload.get("artifacts"), list) else []
@@ -353,12 +353,8 @@ class ImpactEngine:
         # Conservative fallback: treat all src/*.py as changed
         if not changed_files:
             src_root = self.fs.paths.src_dir
-            for dirpath, _, filenames in os.walk(src_root):
-                for fn in filenames:
-                    if fn.endswith(".py"):
-                        abs_fp = os.path.join(dirpath, fn)
-                        rel_fp = _norm(os.path.relpath(abs_fp, src_root))
-                        changed_files.append(rel_fp)
+            for abs_fp in self.fs.list_files(src_root, suffix=".py"):
+                changed_files.append(_norm(os.path.relpath(abs_fp, src_root)))
 
         changed_files_set = set(changed_files)
 
@@ -457,7 +453,7 @@ class ImpactEngine:
         # ✅ NEW: optional snapshot diff metadata (additive only)
         # This is purely for debugging; it does NOT change core impact behavior.
         try:
-            _ensure_dir(self._snapshots_dir())
+            self.fs.backend.makedirs(self._snapshots_dir())
             prev_a_path, prev_r_path = self._snapshot_paths()
             prev_a = self._load_snapshot(prev_a_path)
             prev_r = self._load_snapshot(prev_r_path)
@@ -507,6 +503,7 @@ class ImpactEngine:
         *,
         include_graph_impact: bool = True,     # ✅ NEW passthrough
         update_snapshots: bool = True,         # ✅ NEW passthrough
+        patch_id: Optional[str] = None,        # ✅ NEW (e.g. "watch_<n>" for file-watcher batches)
     ) -> Dict[str, Any]:
         """
         Workspace entrypoint:
@@ -517,9 +514,10 @@ class ImpactEngine:
               - state/impact.json                     (NEW: "latest" canonical)
           - if run_id provided, also write to runs/<run_id>/impact.json
         """
-        patch_id, auto_patch_payload = self._load_latest_patch_payload()
-        if patch_payload is None:
-            patch_payload = auto_patch_payload
+        if patch_id is None:
+            patch_id, auto_patch_payload = self._load_latest_patch_payload()
+            if patch_payload is None:
+                patch_payload = auto_patch_payload
 
         impact = self.build_impact(
             patch_id=patch_id,
@@ -529,7 +527,7 @@ class ImpactEngine:
         )
 
         impact_dir = os.path.join(self.fs.paths.state_dir, "impact")
-        _ensure_dir(impact_dir)
+        self.fs.backend.makedirs(impact_dir)
 
         # existing
         out_path = os.path.join(impact_dir, f"impact_{patch_id}.json")
@@ -206,6 +206,7 @@ def apply_patch(
           - replace_text: {op:"replace_text", path:"...", find:"...", replace:"...", count?:0}
           - insert_after: {op:"insert_after", path:"...", anchor:"...", insert:"...", once?:true}
           - insert_before: {op:"insert_before", path:"...", anchor:"...", insert:"...", once?:true}
+          - delete_file: {op:"delete_file", path:"..."}
 
     Side effects:
       - writes patch record to state/patches/<patch_id>.json
@@ -275,6 +276,13 @@ def apply_patch(
                 before, after, n = _apply_insert_before(fs, abs_path, anchor, insert_text, once=once)
                 meta = {"insertions": n, "once": once}
 
+            elif op == "delete_file":
+                if not fs.backend.exists(abs_path):
+                    raise ValueError("delete_file target does not exist")
+                before = _read_existing(fs, abs_path)
+                fs.delete(abs_path)
+                meta = {"deleted": True}
+
             else:
                 raise ValueError(f"Unsupported op: {op}")
 
@@ -4,9 +4,10 @@ import os
 import time
 import hashlib
 from dataclasses import dataclass
-from typing import Any, Dict, Optional, List
+from typing import Any, Dict, Optional, List, Tuple
 
 from core.fs import WorkspaceFS
+from core.git_changes import GIT_AVAILABLE, GitDiff, diff_paths, head_commit, is_dirty
 
 
 def _utc_iso() -> str:
@@ -54,6 +55,11 @@ class PipelineState:
     - state/patches/*.json queue (pending/applied/failed)
     - apply_pending_patches() applies patches BEFORE decide()/pipeline run
     - writes state/impact.json (v1: changed_files only)
+
+    Git additions:
+    - meta.git records the src_dir commit the state was built from
+    - git_delta() diffs that commit against HEAD so a run can refresh only
+      the changed files (clean checkouts only; otherwise full fingerprinting)
     """
 
     META_VERSION = "crs-meta-state-v1"
@@ -110,19 +116,16 @@ class PipelineState:
         file_hashes: Dict[str, str] = {}
         total_files = 0
 
-        for dirpath, _, filenames in os.walk(src_root):
-            for fn in filenames:
-                if not fn.endswith(".py"):
-                    continue
-                total_files += 1
-                abs_fp = os.path.join(dirpath, fn)
-                rel_fp = _norm(os.path.relpath(abs_fp, src_root))
+        # listing goes through the backend so overlay-only files are included
+        for abs_fp in self.fs.list_files(src_root, suffix=".py"):
+            total_files += 1
+            rel_fp = _norm(os.path.relpath(abs_fp, src_root))
 
-                try:
-                    txt = self.fs.read_text(abs_fp)
-                except Exception:
-                    txt = ""
-                file_hashes[rel_fp] = _sha1_text(txt)
+            try:
+                txt = self.fs.read_text(abs_fp)
+            except Exception:
+                txt = ""
+            file_hashes[rel_fp] = _sha1_text(txt)
 
         joined = "\n".join(f"{k}:{file_hashes[k]}" for k in sorted(file_hashes.keys()))
         return {
@@ -165,14 +168,13 @@ class PipelineState:
         Reads state/patches/*.json and returns those with status == "pending".
         Adds an internal key: _abs_path for persistence.
         """
-        if not os.path.isdir(self.patches_dir):
+        if not self.fs.backend.exists(self.patches_dir):
             return []
 
         out: List[Dict[str, Any]] = []
-        for fn in sorted(os.listdir(self.patches_dir)):
-            if not fn.endswith(".json"):
+        for abs_path in self.fs.list_files(self.patches_dir, suffix=".json"):
+            if os.path.dirname(abs_path) != os.path.abspath(self.patches_dir):
                 continue
-            abs_path = os.path.join(self.patches_dir, fn)
             obj = self.fs.read_json(abs_path)
             if isinstance(obj, dict) and obj.get("status") == "pending":
                 obj["_abs_path"] = abs_path
@@ -308,6 +310,75 @@ class PipelineState:
         self.save_meta(meta)
         return meta
 
+    # -------------------------
+    # Git change detection
+    # -------------------------
+    def git_enabled(self) -> bool:
+        """config.json "git": {"incremental": false} turns it off; overlays never use it."""
+        git_cfg = self.cfg.get("git") if isinstance(self.cfg.get("git"), dict) else {}
+        return GIT_AVAILABLE and not self.fs.is_overlay and bool(git_cfg.get("incremental", True))
+
+    def git_snapshot(self) -> Optional[str]:
+        """HEAD of src_dir if it is a git checkout without uncommitted .py changes, else None."""
+        if not self.git_enabled():
+            return None
+        src_dir = self.fs.paths.src_dir
+        head = head_commit(src_dir)
+        if not head or is_dirty(src_dir, suffix=".py") is not False:
+            return None
+        return head
+
+    def _scan_sha1(self) -> str:
+        return _sha1_json(self.cfg.get("scan") or {})
+
+    def record_src_commit(self, commit: Optional[str], src_fingerprint: str) -> Dict[str, Any]:
+        """Remember which commit produced the state with `src_fingerprint` (None forgets it)."""
+        meta = self.load_meta()
+        if commit:
+            meta["git"] = {
+                "commit": commit,
+                "src_fingerprint": src_fingerprint,
+                "scan_sha1": self._scan_sha1(),
+                "recorded_at": _utc_iso(),
+            }
+        else:
+            meta.pop("git", None)
+        self.save_meta(meta)
+        return meta
+
+    def git_delta(self, head: Optional[str]) -> Tuple[Optional[GitDiff], str]:
+        """
+        Committed changes between the recorded commit and `head` (from git_snapshot()).
+        Returns (diff, "ok"), or (None, reason) when a full fingerprint is needed.
+        """
+        if not head:
+            return None, "src_dir is not a clean git checkout"
+        meta = self.load_meta()
+        rec = meta.get("git") if isinstance(meta.get("git"), dict) else {}
+        base = str(rec.get("commit") or "")
+        if not base:
+            return None, "no recorded commit"
+        fp = rec.get("src_fingerprint")
+        steps = meta.get("steps") if isinstance(meta.get("steps"), dict) else {}
+        for step in ("blueprints", "artifacts", "relationships"):
+            if not isinstance(steps.get(step), dict) or steps[step].get("src_fingerprint") != fp:
+                return None, f"{step} state was not built from the recorded commit"
+        if rec.get("scan_sha1") != self._scan_sha1():
+            return None, "scan rules changed"
+        patch = meta.get("patch") if isinstance(meta.get("patch"), dict) else {}
+        if patch.get("dirty"):
+            return None, "patch dirty"
+        for p in (self.fs.paths.blueprints_json, self.fs.paths.artifacts_json, self.fs.paths.relationships_json):
+            if not self.fs.backend.exists(p):
+                return None, f"missing output: {os.path.basename(p)}"
+
+        diff = diff_paths(self.fs.paths.src_dir, base, head)
+        if diff is None:
+            return None, f"git diff {base[:12]}..{head[:12]} failed"
+        if any(os.path.basename(p) == ".gitignore" for p in diff.paths()):
+            return None, ".gitignore changed"
+        return diff, "ok"
+
     # -------------------------
     # Decisions
     # -------------------------
@@ -350,9 +421,18 @@ class PipelineState:
     # -------------------------
     # Convenience: hash outputs
     # -------------------------
-    def hash_output_file(self, abs_path: str) -> Optional[str]:
+    def hash_output_file(self, abs_path: str, *, stream: bool = False) -> Optional[str]:
+        """
+        sha1 of the parsed output (key order independent). stream=True hashes
+        the file text line by line instead, without loading it.
+        """
         if not self.fs.backend.exists(abs_path):
             return None
+        if stream:
+            h = hashlib.sha1()
+            for line in self.fs.iter_lines(abs_path):
+                h.update(line.encode("utf-8", errors="replace"))
+            return h.hexdigest()
         try:
             obj = self.fs.read_json(abs_path)
             return _sha1_json(obj)
@@ -3,6 +3,8 @@ from typing import Any, Dict, List, Optional, Set, Tuple
 from dataclasses import dataclass
 
 from core.fs import WorkspaceFS
+from core.records import Compactor
+from core.route_index import RouteIndex
 
 
 def _norm(p: str) -> str:
@@ -56,11 +58,13 @@ class CRSQueryAPI:
       - trace_route_to_model(..., allow_all_matches=True) returns richer results
       - impacted_by_patch() reads state/impact.json if present
       - graph_walk() BFS traversal with rel_type filtering (no refactor explosion)
+      - resolve_url() / trace_urls_to_models() over a route trie (core.route_index)
     """
 
     def __init__(self, fs: WorkspaceFS):
         self.fs = fs
         self._idx: Optional[QueryIndex] = None
+        self._routes: Optional[RouteIndex] = None
 
     # -------------------------
     # Load / index
@@ -71,7 +75,17 @@ class CRSQueryAPI:
 
         artifacts_payload = self.fs.read_json(self.fs.paths.artifacts_json)
         relationships_payload = self.fs.read_json(self.fs.paths.relationships_json)
+        return self.load_payloads(artifacts_payload, relationships_payload)
 
+    def load_payloads(self, artifacts_payload: Any, relationships_payload: Any, *, compact: bool = True) -> QueryIndex:
+        """
+        Build the index from already-loaded payloads (no disk reads).
+        Used by long-lived processes (crs watch) to swap in fresh state.
+        compact=True interns strings and shares equal anchors / relationship
+        ends in place (core.records.Compactor); indexed dicts are read-only.
+        """
+        compactor = Compactor() if compact else None
+        self._routes = None
         arts = artifacts_payload.get("artifacts") if isinstance(artifacts_payload, dict) and isinstance(artifacts_payload.get("artifacts"), list) else []
         rels = relationships_payload.get("relationships") if isinstance(relationships_payload, dict) and isinstance(relationships_payload.get("relationships"), list) else []
 
@@ -84,6 +98,8 @@ class CRSQueryAPI:
         for a in arts:
             if not isinstance(a, dict):
                 continue
+            if compactor is not None:
+                compactor.artifact(a)
 
             aid = a.get("artifact_id")
             if isinstance(aid, str) and aid:
@@ -110,6 +126,8 @@ class CRSQueryAPI:
         for r in rels:
             if not isinstance(r, dict):
                 continue
+            if compactor is not None:
+                compactor.relationship(r)
             fr = r.get("from") if isinstance(r.get("from"), dict) else {}
             to = r.get("to") if isinstance(r.get("to"), dict) else {}
             fid = fr.get("artifact_id")
@@ -370,76 +388,153 @@ class CRSQueryAPI:
     # -------------------------
     # Useful traces
     # -------------------------
+    def route_index(self) -> RouteIndex:
+        """Route trie over url_pattern + router_register artifacts (built on first use)."""
+        if self._routes is None:
+            idx = self.load()
+            self._routes = RouteIndex.from_artifacts(
+                idx.artifacts_by_type.get("url_pattern", []) + idx.artifacts_by_type.get("router_register", [])
+            )
+        return self._routes
+
+    def resolve_url(self, url: str, *, allow_all_matches: bool = False) -> Dict[str, Any]:
+        """
+        Concrete URL ("/api/users/42/", full URL or access-log path) -> matching
+        route pattern, view and captured params; first match wins like Django.
+        """
+        matches = self.route_index().match_all(url)
+        if not matches:
+            return {"url": url, "found": False, "reason": "no route matched"}
+        if allow_all_matches:
+            return {"url": url, "found": True, "matches": [m.to_dict() for m in matches]}
+        return {"url": url, "found": True, **matches[0].to_dict()}
+
+    def _route_matches(self, route: str) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """(artifact, route info) for a route pattern (composed or as written) or a concrete URL."""
+        routes = self.route_index()
+        picked = [(e.artifact, {"pattern": e.pattern, "kind": e.kind, "params": {}}) for e in routes.by_pattern(route)]
+        if not picked:
+            picked = [(m.entry.artifact, {"pattern": m.entry.pattern, "kind": m.entry.kind, "params": m.params}) for m in routes.match_all(route)]
+        out: List[Tuple[Dict[str, Any], Dict[str, Any]]] = []
+        seen: Set[str] = set()
+        for art, info in picked:
+            aid = str(art.get("artifact_id") or id(art))
+            if aid not in seen:
+                seen.add(aid)
+                out.append((art, info))
+        return out
+
+    def _trace_from_route_artifact(self, url_art: Dict[str, Any]) -> Dict[str, Any]:
+        url_id = url_art.get("artifact_id")
+        if not isinstance(url_id, str):
+            return {"found": False, "reason": "url_pattern missing artifact_id", "url_pattern": url_art}
+
+        # router.register(...) reaches its viewset through "registers"
+        rel_type = "registers" if url_art.get("type") == "router_register" else "routes_to"
+        url_neighbors = self.neighbors(url_id, rel_types=[rel_type], direction="out")
+        views = url_neighbors.get("neighbors") or []
+        if not views:
+            return {"found": True, "url_pattern": url_art, "reason": f"no {rel_type} edge"}
+
+        view = views[0]
+        view_id = view.get("artifact_id")
+
+        ser = None
+        if isinstance(view_id, str):
+            view_neighbors = self.neighbors(view_id, rel_types=["view_uses_serializer"], direction="out", include_unresolved=True)
+            serializers = view_neighbors.get("neighbors") or []
+            if serializers:
+                ser = serializers[0]
+
+        if not ser:
+            return {"found": True, "url_pattern": url_art, "view": view, "reason": "no serializer link"}
+
+        ser_id = ser.get("artifact_id")
+
+        model = None
+        if isinstance(ser_id, str):
+            ser_neighbors = self.neighbors(ser_id, rel_types=["serializes_model"], direction="out", include_unresolved=True)
+            models = ser_neighbors.get("neighbors") or []
+            if models:
+                model = models[0]
+
+        return {"found": True, "url_pattern": url_art, "view": view, "serializer": ser, "model": model}
+
     def trace_route_to_model(self, route: str, *, allow_all_matches: bool = False) -> Dict[str, Any]:
         """
         Best-effort trace:
           url_pattern(route) -> view -> serializer -> model
         Uses relationship types you already produce:
-          routes_to, view_uses_serializer, serializes_model
+          routes_to (router_register: registers), view_uses_serializer, serializes_model
+
+        `route` is a pattern (as written or with include() prefixes composed)
+        or a concrete URL, resolved through the route index.
 
         NEW:
           - allow_all_matches=True returns all matching url_patterns (and traces for each)
         """
-        idx = self.load()
         route = (route or "").strip()
 
-        url_patterns = idx.artifacts_by_type.get("url_pattern", [])
-        matches: List[Dict[str, Any]] = []
-        for a in url_patterns:
-            if not isinstance(a, dict):
-                continue
-            if str(a.get("name") or "") == route:
-                matches.append(a)
-                continue
-            meta = a.get("meta") if isinstance(a.get("meta"), dict) else {}
-            if str(meta.get("route") or "") == route:
-                matches.append(a)
-
+        matches = self._route_matches(route)
         if not matches:
             return {"route": route, "found": False, "reason": "no url_pattern matched"}
 
-        def _trace_one(url_art: Dict[str, Any]) -> Dict[str, Any]:
-            url_id = url_art.get("artifact_id")
-            if not isinstance(url_id, str):
-                return {"found": False, "reason": "url_pattern missing artifact_id", "url_pattern": url_art}
-
-            url_neighbors = self.neighbors(url_id, rel_types=["routes_to"], direction="out")
-            views = url_neighbors.get("neighbors") or []
-            if not views:
-                return {"found": True, "url_pattern": url_art, "reason": "no routes_to edge"}
-
-            view = views[0]
-            view_id = view.get("artifact_id")
-
-            ser = None
-            if isinstance(view_id, str):
-                view_neighbors = self.neighbors(view_id, rel_types=["view_uses_serializer"], direction="out", include_unresolved=True)
-                serializers = view_neighbors.get("neighbors") or []
-                if serializers:
-                    ser = serializers[0]
-
-            if not ser:
-                return {"found": True, "url_pattern": url_art, "view": view, "reason": "no serializer link"}
-
-            ser_id = ser.get("artifact_id")
-
-            model = None
-            if isinstance(ser_id, str):
-                ser_neighbors = self.neighbors(ser_id, rel_types=["serializes_model"], direction="out", include_unresolved=True)
-                models = ser_neighbors.get("neighbors") or []
-                if models:
-                    model = models[0]
-
-            return {"found": True, "url_pattern": url_art, "view": view, "serializer": ser, "model": model}
-
         if allow_all_matches:
-            traces = [_trace_one(m) for m in matches]
+            traces = [{**self._trace_from_route_artifact(a), "matched": info} for a, info in matches]
             return {"route": route, "found": True, "matches": len(matches), "traces": traces}
 
+        url_art, info = matches[0]
         return {
             "route": route,
             "found": True,
-            **_trace_one(matches[0]),
+            "matched": info,
+            **self._trace_from_route_artifact(url_art),
+        }
+
+    def trace_urls_to_models(self, urls: List[str], *, limit: int = 10000) -> Dict[str, Any]:
+        """
+        Bulk route -> model for many concrete URLs (e.g. an access log).
+        Each distinct route is traced once; URLs sharing it reuse the trace.
+        """
+        routes = self.route_index()
+        traces: Dict[str, Dict[str, Any]] = {}
+        results: List[Dict[str, Any]] = []
+        by_model: Dict[str, int] = {}
+        unresolved = 0
+
+        for url in list(urls or [])[: max(1, limit)]:
+            m = routes.resolve(url)
+            if m is None:
+                unresolved += 1
+                results.append({"url": url, "found": False})
+                continue
+            key = str(m.entry.artifact.get("artifact_id") or m.entry.pattern)
+            trace = traces.get(key)
+            if trace is None:
+                trace = traces[key] = self._trace_from_route_artifact(m.entry.artifact)
+            model = trace.get("model") if isinstance(trace.get("model"), dict) else None
+            view = trace.get("view") if isinstance(trace.get("view"), dict) else None
+            model_name = model.get("name") if model else None
+            if model_name:
+                by_model[model_name] = by_model.get(model_name, 0) + 1
+            results.append(
+                {
+                    "url": url,
+                    "found": True,
+                    "pattern": m.entry.pattern,
+                    "params": m.params,
+                    "view": view.get("name") if view else m.entry.view,
+                    "model": model_name,
+                    "model_id": model.get("artifact_id") if model else None,
+                }
+            )
+
+        return {
+            "total": len(results),
+            "resolved": len(results) - unresolved,
+            "unresolved": unresolved,
+            "by_model": dict(sorted(by_model.items(), key=lambda kv: -kv[1])),
+            "results": results,
         }
 
     # -------------------------
@@ -81,6 +81,7 @@ class CRSQueryRunner:
     Traces:
       - trace_route_to_model(route)
       - trace_model_to_routes(model_name_or_id)
+      - resolve_url(url) / trace_urls_to_models(urls)   (route trie)
 
     Model helpers:
       - find_models()
@@ -331,12 +332,21 @@ class CRSQueryRunner:
                 if isinstance(r, dict) and str(r.get("type")) == rel_type:
                     used_rels.append(r)
 
-        _collect_edge(result.get("url_pattern"), "routes_to")
+        url_art = result.get("url_pattern")
+        _collect_edge(url_art, "registers" if isinstance(url_art, dict) and url_art.get("type") == A_ROUTER_REGISTER else "routes_to")
         _collect_edge(result.get("view"), "view_uses_serializer")
         _collect_edge(result.get("serializer"), "serializes_model")
 
         return {**result, "relationships_used": used_rels}
 
+    def resolve_url(self, url: str, *, allow_all_matches: bool = False) -> Dict[str, Any]:
+        """Concrete URL -> route pattern + view + params (route trie, include() prefixes composed)."""
+        return self.api.resolve_url(url, allow_all_matches=allow_all_matches)
+
+    def trace_urls_to_models(self, urls: List[str], *, limit: int = 10000) -> Dict[str, Any]:
+        """Bulk URL -> model (e.g. access-log paths); each distinct route is traced once."""
+        return self.api.trace_urls_to_models(urls, limit=limit)
+
     # -------------------------
     # Reverse trace: model -> serializers -> views -> routes
     # -------------------------
@@ -659,6 +669,8 @@ class CRSQueryRunner:
                 # traces
                 {"op": "trace_route_to_model", "args": {"route": "str"}, "returns": "dict"},
                 {"op": "trace_model_to_routes", "args": {"model_name_or_id": "str", "limit": "int"}, "returns": "dict"},
+                {"op": "resolve_url", "args": {"url": "str", "allow_all_matches": "bool"}, "returns": "dict"},
+                {"op": "trace_urls_to_models", "args": {"urls": "list[str]", "limit": "int"}, "returns": "dict"},
                 # model helpers
                 {"op": "find_models", "args": {"contains": "str?", "limit": "int"}, "returns": "list[artifact]"},
                 {"op": "find_model", "args": {"model_name": "str"}, "returns": "artifact?"},
@@ -696,6 +708,8 @@ class CRSQueryRunner:
             "neighbors": self.neighbors,
             "trace_route_to_model": self.trace_route_to_model,
             "trace_model_to_routes": self.trace_model_to_routes,
+            "resolve_url": self.resolve_url,
+            "trace_urls_to_models": self.trace_urls_to_models,
             "find_models": self.find_models,
             "find_model": self.find_model,
             "get_model_fields": self.get_model_fields,
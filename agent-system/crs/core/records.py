@@ -0,0 +1,168 @@
+"""
+Compact records for CRS graph payloads (v1)
+
+The artifact and relationship graphs are mostly the same few strings
+(types, names, file paths, artifact ids) and small flat dicts (anchors,
+relationship ends) repeated thousands of times. This module keeps them
+small in memory and cheap to serialize:
+
+  - intern_str():   one shared str object per distinct value
+  - Compactor:      shares identical flat dicts and interns their strings
+                    while a loaded payload is indexed (query API)
+  - dumps_payload(): state payload -> JSON text, one record per line,
+                    records with to_dict() encoded directly (no asdict)
+  - iter_payload_chunks() / iter_payload_records(): the same layout
+                    written / read one record at a time (streaming)
+
+dumps_payload() uses the C encoder for every value; json.dumps(indent=...)
+would fall back to the pure-Python encoder for the whole payload.
+"""
+import json
+import sys
+from typing import Any, Dict, Iterable, Iterator, Tuple
+
+# payload keys holding long record lists (one record per line on disk)
+RECORD_LIST_KEYS = ("blueprints", "artifacts", "relationships")
+
+_FLAT_DICT_MAX_KEYS = 12
+
+
+def intern_str(s: Any) -> Any:
+    return sys.intern(s) if type(s) is str else s
+
+
+def _default(o: Any) -> Any:
+    to_dict = getattr(o, "to_dict", None)
+    if callable(to_dict):
+        return to_dict()
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+_encoder = json.JSONEncoder(separators=(",", ":"), default=_default)
+
+
+def dumps_record(obj: Any) -> str:
+    """Compact JSON for one record (dict or object with to_dict())."""
+    return _encoder.encode(obj)
+
+
+def dumps_payload(payload: Any) -> str:
+    """
+    JSON text for a state payload: one top-level key per line and one record
+    per line for RECORD_LIST_KEYS lists. Parses back to the same object.
+    """
+    if not isinstance(payload, dict):
+        return _encoder.encode(payload)
+    parts = []
+    for k, v in payload.items():
+        key = _encoder.encode(str(k))
+        if k in RECORD_LIST_KEYS and isinstance(v, list) and v:
+            body = ",\n    ".join(_encoder.encode(x) for x in v)
+            parts.append(f"  {key}: [\n    {body}\n  ]")
+        else:
+            parts.append(f"  {key}: {_encoder.encode(v)}")
+    return "{\n" + ",\n".join(parts) + "\n}\n" if parts else "{}\n"
+
+
+def iter_payload_chunks(head: Dict[str, Any], key: str, records: Iterable[Any]) -> Iterator[str]:
+    """
+    dumps_payload({**head, key: list(records)}) as text chunks, consuming
+    `records` lazily (nothing is kept after it is encoded).
+    """
+    yield "{\n"
+    for k, v in head.items():
+        yield f"  {_encoder.encode(str(k))}: {_encoder.encode(v)},\n"
+    yield f"  {_encoder.encode(key)}: ["
+    sep = "\n    "
+    for rec in records:
+        yield sep + _encoder.encode(rec)
+        sep = ",\n    "
+    yield "\n  ]\n}\n" if sep != "\n    " else "]\n}\n"
+
+
+def iter_payload_records(lines: Iterable[str], key: str) -> Iterator[Dict[str, Any]]:
+    """
+    Records of payload[key] from text in dumps_payload() layout, parsed one
+    line at a time. Raises ValueError when the text is in another layout
+    (e.g. an older indent=2 file) before yielding anything.
+    """
+    opener = f"  {_encoder.encode(key)}: ["
+    it = iter(lines)
+    for line in it:
+        line = line.rstrip("\r\n")
+        if line == opener:
+            break
+        if line.startswith(opener) and line[len(opener):].rstrip(",") == "]":
+            return
+    else:
+        raise ValueError(f"no one-record-per-line '{key}' list found")
+    decode = json.JSONDecoder().decode
+    for line in it:
+        line = line.strip()
+        if line.startswith("]"):
+            return
+        if line.endswith(","):
+            line = line[:-1]
+        yield decode(line)
+    raise ValueError(f"unterminated '{key}' list")
+
+
+class Compactor:
+    """
+    Deduplicates a loaded artifacts/relationships payload in place:
+    string fields are interned and equal flat dicts (anchors, relationship
+    ends, small meta) become one shared dict. Shared dicts must be treated
+    as read-only, which the query API already does.
+    """
+
+    def __init__(self):
+        self._flat: Dict[Tuple, Dict[str, Any]] = {}
+
+    def flat(self, d: Any) -> Any:
+        if type(d) is not dict or len(d) > _FLAT_DICT_MAX_KEYS:
+            return d
+        key = []
+        for k, v in d.items():
+            t = type(v)
+            if t is str:
+                v = sys.intern(v)
+            elif v is not None and t not in (int, float, bool):
+                return d  # nested: not shared
+            key.append((k, t, v))  # type keeps True and 1 apart
+        key_t = tuple(key)
+        shared = self._flat.get(key_t)
+        if shared is None:
+            shared = self._flat[key_t] = {k: v for k, _, v in key}
+        return shared
+
+    def _evidence(self, ev: Any) -> Any:
+        if type(ev) is not list:
+            return ev
+        for e in ev:
+            if type(e) is dict:
+                if "anchor" in e:
+                    e["anchor"] = self.flat(e["anchor"])
+                if "file_path" in e:
+                    e["file_path"] = intern_str(e["file_path"])
+        return ev
+
+    def artifact(self, a: Dict[str, Any]) -> Dict[str, Any]:
+        for k in ("artifact_id", "type", "name", "file_path", "confidence"):
+            if k in a:
+                a[k] = intern_str(a[k])
+        if "anchor" in a:
+            a["anchor"] = self.flat(a["anchor"])
+        if "evidence" in a:
+            a["evidence"] = self._evidence(a["evidence"])
+        return a
+
+    def relationship(self, r: Dict[str, Any]) -> Dict[str, Any]:
+        for k in ("type", "confidence"):
+            if k in r:
+                r[k] = intern_str(r[k])
+        for k in ("from", "to", "meta"):
+            if k in r:
+                r[k] = self.flat(r[k])
+        if "evidence" in r:
+            r["evidence"] = self._evidence(r["evidence"])
+        return r
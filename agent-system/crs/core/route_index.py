@@ -0,0 +1,471 @@
+"""
+Route index for URL resolution (v1)
+
+Builds a segment trie from url_pattern and router_register artifacts so a
+concrete URL ("/api/shop/orders/42/") resolves to the pattern and view that
+Django would dispatch it to, in time proportional to the path length
+instead of one comparison per url_pattern.
+
+  - include() prefixes are composed: path("api/shop/", include("shop.urls"))
+    mounts every pattern of shop/urls.py under "api/shop/"; router.urls
+    included (or never included: urlpatterns += router.urls) mounts the
+    router's list/detail routes
+  - path() converters (int, str, slug, uuid, path; custom -> str) and
+    re_path() regexes are split on "/" into static segments (dict lookup)
+    and per-segment regexes; parts that may span "/" (.*, <path:...>) are
+    matched as a regex over the rest of the path
+  - when several patterns match, the first in urlpatterns order wins
+    (include order, then line), like Django's resolver; a path without
+    its trailing slash is retried with one (APPEND_SLASH)
+
+    idx = RouteIndex.from_artifacts(artifacts)
+    m = idx.resolve("/api/shop/orders/42/")
+    m.entry.pattern   -> "api/shop/orders/<int:pk>/"
+    m.entry.view      -> "OrderViewSet"
+    m.params          -> {"pk": "42"}
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+A_URL_PATTERN = "url_pattern"
+A_ROUTER_REGISTER = "router_register"
+
+# django.urls.converters
+PATH_CONVERTERS: Dict[str, str] = {
+    "int": r"[0-9]+",
+    "str": r"[^/]+",
+    "slug": r"[-a-zA-Z0-9_]+",
+    "uuid": r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}",
+    "path": r".+",
+}
+# rest_framework.routers.SimpleRouter default lookup
+ROUTER_LOOKUP = r"(?P<pk>[^/.]+)"
+
+MAX_MOUNTS_PER_FILE = 64
+MAX_MATCHES = 50
+
+_PARAM_RE = re.compile(r"<(?:(?P<converter>[^>:]+):)?(?P<parameter>[^>]+)>")
+_REGEX_META = set(".^$*+?{}[]()|")
+_SLASH_ESCAPES = set("SWD")  # \S \W \D match "/"
+
+
+@dataclass
+class RouteEntry:
+    pattern: str                  # composed route, e.g. "api/shop/orders/<int:pk>/"
+    kind: str                     # "path" | "re_path" | "router"
+    artifact: Dict[str, Any]      # url_pattern or router_register artifact
+    view: Optional[str]           # target view / registered viewset (as written)
+    order: Tuple[int, ...]        # urlpatterns order (include chain, then line)
+    name: Optional[str] = None    # url name (router: "<basename>-list" / "-detail")
+    regex: str = ""               # composed regex the trie was built from
+
+
+@dataclass
+class RouteMatch:
+    entry: RouteEntry
+    params: Dict[str, str] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        e = self.entry
+        return {
+            "pattern": e.pattern,
+            "kind": e.kind,
+            "view": e.view,
+            "name": e.name,
+            "params": self.params,
+            "artifact_id": e.artifact.get("artifact_id"),
+        }
+
+
+# ---------------------------
+# pattern -> regex
+# ---------------------------
+def route_to_regex(route: str) -> str:
+    """path() route -> regex body (no anchors), as django.urls.resolvers._route_to_regex."""
+    out: List[str] = []
+    pos = 0
+    for m in _PARAM_RE.finditer(route):
+        out.append(re.escape(route[pos:m.start()]))
+        conv = PATH_CONVERTERS.get(m.group("converter") or "str", PATH_CONVERTERS["str"])
+        name = m.group("parameter")
+        out.append(f"(?P<{name}>{conv})" if name.isidentifier() else f"(?:{conv})")
+        pos = m.end()
+    out.append(re.escape(route[pos:]))
+    return "".join(out)
+
+
+def _strip_regex(regex: str) -> Tuple[str, bool]:
+    """re_path() regex -> (body without ^/$ anchors, ends with $)."""
+    body = regex[1:] if regex.startswith("^") else regex
+    for end in ("\\Z", "$"):
+        if body.endswith(end) and not body.endswith("\\" + end):
+            return body[: -len(end)], True
+    return body, False
+
+
+def _split_top_level(regex: str) -> List[str]:
+    """Split a regex on "/" outside groups and character classes."""
+    parts: List[str] = []
+    buf: List[str] = []
+    depth = 0
+    in_class = False
+    i, n = 0, len(regex)
+    while i < n:
+        c = regex[i]
+        if c == "\\" and i + 1 < n:
+            if regex[i + 1] == "/" and depth == 0 and not in_class:
+                parts.append("".join(buf))
+                buf = []
+            else:
+                buf.append(regex[i:i + 2])
+            i += 2
+            continue
+        if in_class:
+            in_class = c != "]"
+        elif c == "[":
+            in_class = True
+            # a "]" right after "[" or "[^" is a literal member
+            lead = 2 if regex.startswith("[^", i) else 1
+            if regex.startswith("]", i + lead):
+                lead += 1
+            buf.append(regex[i:i + lead])
+            i += lead
+            continue
+        elif c == "(":
+            depth += 1
+        elif c == ")":
+            depth -= 1
+        elif c == "/" and depth == 0:
+            parts.append("".join(buf))
+            buf = []
+            i += 1
+            continue
+        buf.append(c)
+        i += 1
+    parts.append("".join(buf))
+    return parts
+
+
+def _literal(seg: str) -> Optional[str]:
+    """The text a regex segment matches when it is a plain literal, else None."""
+    out: List[str] = []
+    i, n = 0, len(seg)
+    while i < n:
+        c = seg[i]
+        if c == "\\":
+            if i + 1 >= n or seg[i + 1].isalnum():
+                return None
+            out.append(seg[i + 1])
+            i += 2
+            continue
+        if c in _REGEX_META:
+            return None
+        out.append(c)
+        i += 1
+    return "".join(out)
+
+
+def _spans_slash(seg: str) -> bool:
+    """True when a segment regex could match "/" (then it cannot be matched per segment)."""
+    i, n = 0, len(seg)
+    while i < n:
+        c = seg[i]
+        if c == "\\":
+            if i + 1 < n and seg[i + 1] in _SLASH_ESCAPES:
+                return True
+            i += 2
+            continue
+        if c == "[":
+            j = i + 1
+            negated = j < n and seg[j] == "^"
+            j += 1 if negated else 0
+            if j < n and seg[j] == "]":
+                j += 1
+            while j < n and seg[j] != "]":
+                j += 2 if seg[j] == "\\" else 1
+            body = seg[i + 1:j]
+            if negated != ("/" in body):
+                return True
+            i = j + 1
+            continue
+        if c == ".":
+            return True
+        i += 1
+    return False
+
+
+# ---------------------------
+# trie
+# ---------------------------
+class _Node:
+    __slots__ = ("static", "dynamic", "tails", "entries")
+
+    def __init__(self):
+        self.static: Dict[str, "_Node"] = {}
+        self.dynamic: Dict[str, Tuple["re.Pattern[str]", "_Node"]] = {}
+        self.tails: List[Tuple["re.Pattern[str]", bool, RouteEntry]] = []
+        self.entries: List[RouteEntry] = []
+
+
+class RouteIndex:
+    def __init__(self):
+        self._root = _Node()
+        self.entries: List[RouteEntry] = []
+        self.skipped: List[Dict[str, Any]] = []
+        self._by_pattern: Dict[str, List[RouteEntry]] = {}
+
+    # ---------------------------
+    # building
+    # ---------------------------
+    def add(self, entry: RouteEntry, exact: bool = True) -> bool:
+        """Insert one route (entry.regex: composed regex body without anchors)."""
+        try:
+            segs = _split_top_level(entry.regex)
+            node = self._root
+            for i, seg in enumerate(segs):
+                last = i == len(segs) - 1
+                lit = _literal(seg)
+                if lit is not None and (exact or not last):
+                    node = node.static.setdefault(lit, _Node())
+                    continue
+                if _spans_slash(seg) or (last and not exact):
+                    tail = "/".join(segs[i:])
+                    node.tails.append((re.compile(tail), exact, entry))
+                    break
+                slot = node.dynamic.get(seg)
+                if slot is None:
+                    slot = node.dynamic[seg] = (re.compile(seg), _Node())
+                node = slot[1]
+            else:
+                node.entries.append(entry)
+        except re.error as e:
+            self.skipped.append({"pattern": entry.pattern, "reason": f"re.error: {e}"})
+            return False
+        self.entries.append(entry)
+        self._by_pattern.setdefault(entry.pattern, []).append(entry)
+        raw = entry.artifact.get("meta", {}).get("route") if entry.kind != "router" else entry.artifact.get("meta", {}).get("prefix")
+        if isinstance(raw, str) and raw != entry.pattern:
+            self._by_pattern.setdefault(raw, []).append(entry)
+        return True
+
+    @classmethod
+    def from_artifacts(cls, artifacts: Iterable[Dict[str, Any]]) -> "RouteIndex":
+        idx = cls()
+        patterns_by_file: Dict[str, List[Dict[str, Any]]] = {}
+        routers_by_file: Dict[str, List[Dict[str, Any]]] = {}
+        for a in artifacts:
+            if not isinstance(a, dict):
+                continue
+            fp = str(a.get("file_path") or "").replace("\\", "/")
+            if a.get("type") == A_URL_PATTERN:
+                patterns_by_file.setdefault(fp, []).append(a)
+            elif a.get("type") == A_ROUTER_REGISTER:
+                routers_by_file.setdefault(fp, []).append(a)
+        for arts in list(patterns_by_file.values()) + list(routers_by_file.values()):
+            arts.sort(key=_line)
+
+        mounts = _file_mounts(patterns_by_file, set(patterns_by_file) | set(routers_by_file))
+
+        for fp in sorted(set(patterns_by_file) | set(routers_by_file)):
+            included_routers: Dict[str, List[Tuple[str, str, Tuple[int, ...]]]] = {}
+            for a in patterns_by_file.get(fp, []):
+                meta = a.get("meta") or {}
+                inc = meta.get("include")
+                piece = _piece(meta)
+                if inc:
+                    router = inc[: -len(".urls")] if isinstance(inc, str) and inc.endswith(".urls") else None
+                    if router and any((r.get("meta") or {}).get("router") == router for r in routers_by_file.get(fp, [])):
+                        included_routers.setdefault(router, []).append((piece[0], piece[1], (_line(a),)))
+                    continue
+                if piece[1] is None or meta.get("fn") not in ("path", "re_path"):
+                    continue
+                for m_pat, m_rx, m_order in mounts.get(fp, [("", "", ())]):
+                    own_rx, exact = _piece_regex(piece)
+                    idx.add(
+                        RouteEntry(
+                            pattern=m_pat + piece[1],
+                            kind=str(meta.get("fn")),
+                            artifact=a,
+                            view=meta.get("target"),
+                            order=m_order + (_line(a),),
+                            name=meta.get("name"),
+                            regex=m_rx + own_rx,
+                        ),
+                        exact=exact,
+                    )
+
+            for r in routers_by_file.get(fp, []):
+                meta = r.get("meta") or {}
+                prefix = meta.get("prefix")
+                if not isinstance(prefix, str):
+                    continue
+                # where router.urls is mounted in this file (default: urlpatterns += router.urls)
+                inside = included_routers.get(str(meta.get("router")), [("path", "", ())])
+                for m_pat, m_rx, m_order in mounts.get(fp, [("", "", ())]):
+                    for kind, route, inc_order in inside:
+                        base_rx = m_rx + _piece_regex((kind, route or ""))[0]
+                        base_pat = m_pat + (route or "")
+                        for suffix, suffix_rx, name_suffix, sub in _router_routes(prefix):
+                            basename = meta.get("basename")
+                            idx.add(
+                                RouteEntry(
+                                    pattern=base_pat + suffix,
+                                    kind="router",
+                                    artifact=r,
+                                    view=meta.get("viewset"),
+                                    order=m_order + inc_order + (_line(r), sub),
+                                    name=f"{basename}-{name_suffix}" if basename else None,
+                                    regex=base_rx + suffix_rx,
+                                )
+                            )
+        return idx
+
+    # ---------------------------
+    # lookup
+    # ---------------------------
+    def by_pattern(self, pattern: str) -> List[RouteEntry]:
+        """Entries whose composed pattern (or raw route / router prefix) is exactly `pattern`."""
+        return list(self._by_pattern.get(pattern, []))
+
+    def match_all(self, url: str, *, limit: int = MAX_MATCHES) -> List[RouteMatch]:
+        """Every route matching `url` (path or full URL; query string ignored), first match first."""
+        path = _url_path(url)
+        out = self._match(path, limit)
+        if not out and not path.endswith("/"):
+            out = self._match(path + "/", limit)
+        out.sort(key=lambda m: m.entry.order)
+        return out
+
+    def resolve(self, url: str) -> Optional[RouteMatch]:
+        matches = self.match_all(url)
+        return matches[0] if matches else None
+
+    def _match(self, path: str, limit: int) -> List[RouteMatch]:
+        segs = path.split("/")
+        n = len(segs)
+        out: List[RouteMatch] = []
+        stack: List[Tuple[_Node, int, Dict[str, str]]] = [(self._root, 0, {})]
+        while stack and len(out) < limit:
+            node, i, params = stack.pop()
+            if node.tails:
+                rest = "/".join(segs[i:])
+                for rx, exact, entry in node.tails:
+                    m = rx.fullmatch(rest) if exact else rx.match(rest)
+                    if m:
+                        out.append(RouteMatch(entry, {**params, **_groups(m)}))
+            if i == n:
+                out.extend(RouteMatch(e, params) for e in node.entries)
+                continue
+            seg = segs[i]
+            for rx, child in node.dynamic.values():
+                m = rx.fullmatch(seg)
+                if m:
+                    stack.append((child, i + 1, {**params, **_groups(m)} if m.groupdict() else params))
+            child = node.static.get(seg)
+            if child is not None:
+                stack.append((child, i + 1, params))
+        return out
+
+    def stats(self) -> Dict[str, Any]:
+        return {"routes": len(self.entries), "skipped": len(self.skipped)}
+
+
+# ---------------------------
+# helpers
+# ---------------------------
+def _line(a: Dict[str, Any]) -> int:
+    anchor = a.get("anchor") or {}
+    return int(anchor.get("start_line") or 0)
+
+
+def _groups(m: "re.Match[str]") -> Dict[str, str]:
+    return {k: v for k, v in m.groupdict().items() if v is not None}
+
+
+def _url_path(url: str) -> str:
+    url = (url or "").strip()
+    if "://" in url:
+        url = urlsplit(url).path
+    else:
+        url = url.split("?", 1)[0].split("#", 1)[0]
+    return url.lstrip("/")
+
+
+def _piece(meta: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+    """(fn, route) of a url_pattern; bare include(...) entries mount at ""."""
+    fn = meta.get("fn") or "path"
+    route = meta.get("route")
+    if route is None and meta.get("include") and not meta.get("fn"):
+        route = ""
+    return str(fn), route
+
+
+def _piece_regex(piece: Tuple[str, Optional[str]]) -> Tuple[str, bool]:
+    kind, route = piece
+    if kind == "re_path":
+        return _strip_regex(route or "")
+    return route_to_regex(route or ""), True
+
+
+def _router_routes(prefix: str) -> List[Tuple[str, str, str, int]]:
+    """SimpleRouter list/detail routes for one register(prefix, ...): (pattern, regex, name suffix, order)."""
+    if prefix:
+        return [
+            (f"{prefix}/", f"{prefix}/", "list", 0),
+            (f"{prefix}/<pk>/", f"{prefix}/{ROUTER_LOOKUP}/", "detail", 1),
+        ]
+    return [("", "", "list", 0), ("<pk>/", f"{ROUTER_LOOKUP}/", "detail", 1)]
+
+
+def _module_of(file_path: str) -> str:
+    mod = file_path[:-3] if file_path.endswith(".py") else file_path
+    if mod.endswith("/__init__"):
+        mod = mod[: -len("/__init__")]
+    return mod.strip("/").replace("/", ".")
+
+
+def _file_mounts(
+    patterns_by_file: Dict[str, List[Dict[str, Any]]],
+    files: Iterable[str],
+) -> Dict[str, List[Tuple[str, str, Tuple[int, ...]]]]:
+    """
+    urls file -> [(pattern prefix, regex prefix, order)] for every include()
+    chain reaching it; files nobody includes are mounted at the root.
+    """
+    modules = {_module_of(fp): fp for fp in files}
+    edges: Dict[str, List[Tuple[str, Dict[str, Any]]]] = {}  # child -> [(parent file, include artifact)]
+    for parent, arts in patterns_by_file.items():
+        for a in arts:
+            inc = (a.get("meta") or {}).get("include")
+            if not isinstance(inc, str) or not inc:
+                continue
+            child = modules.get(inc) or next(
+                (fp for mod, fp in modules.items() if mod.endswith("." + inc)), None
+            )
+            if child and child != parent:
+                edges.setdefault(child, []).append((parent, a))
+
+    root_order = {fp: i for i, fp in enumerate(sorted(files))}
+    memo: Dict[str, List[Tuple[str, str, Tuple[int, ...]]]] = {}
+
+    def mounts(fp: str, visiting: Tuple[str, ...]) -> List[Tuple[str, str, Tuple[int, ...]]]:
+        if fp in memo:
+            return memo[fp]
+        out: List[Tuple[str, str, Tuple[int, ...]]] = []
+        for parent, a in edges.get(fp, []):
+            if parent in visiting:
+                continue
+            piece = _piece(a.get("meta") or {})
+            rx = _piece_regex((piece[0], piece[1] or ""))[0]
+            for p_pat, p_rx, p_order in mounts(parent, visiting + (fp,)):
+                out.append((p_pat + (piece[1] or ""), p_rx + rx, p_order + (_line(a),)))
+                if len(out) >= MAX_MOUNTS_PER_FILE:
+                    break
+        if not out:
+            out = [("", "", (root_order.get(fp, 0),))]
+        memo[fp] = out
+        return out
+
+    return {fp: mounts(fp, ()) for fp in files}
@@ -0,0 +1,72 @@
+"""
+Per-run context for CRS pipelines (v1)
+
+Everything a run needs is carried explicitly instead of through process
+globals (CRS_CONFIG env, redirected stdout), so several pipelines can run
+in one process at the same time:
+
+  - fs:       the workspace (disk or overlay)
+  - run_id:   run folder under state/runs/
+  - logger:   per-run logger ("crs.run.<run_id>")
+  - emitter:  optional CRSEventEmitter (SSE / dashboards)
+
+Tools that accept a `ctx` keyword receive this object and log through it.
+"""
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from core.events import CRSEventEmitter, LogLevel
+from core.fs import WorkspaceFS
+
+
+_LEVELS = {
+    LogLevel.DEBUG: logging.DEBUG,
+    LogLevel.INFO: logging.INFO,
+    LogLevel.WARNING: logging.WARNING,
+    LogLevel.ERROR: logging.ERROR,
+}
+
+
+@dataclass
+class RunContext:
+    fs: WorkspaceFS
+    run_id: str
+    emitter: Optional[CRSEventEmitter] = None
+    logger: Optional[logging.Logger] = None
+    echo: bool = False  # also print (CLI runs)
+
+    _lines: Dict[str, List[str]] = field(default_factory=dict, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.logger is None:
+            self.logger = logging.getLogger(f"crs.run.{self.run_id}")
+
+    def log(self, step: str, message: str, level: LogLevel = LogLevel.INFO) -> None:
+        """Record a line for `step` (kept for <step>.log), log it and emit it."""
+        with self._lock:
+            self._lines.setdefault(step, []).append(message)
+        self.logger.log(_LEVELS.get(level, logging.INFO), "[%s] %s", step, message)
+        if self.echo:
+            print(message)
+        if self.emitter:
+            self.emitter.emit_step_log(step, message, level)
+
+    def step_text(self, step: str) -> str:
+        with self._lock:
+            return "\n".join(self._lines.get(step, []))
+
+    # thin passthroughs so callers don't need to check for an emitter
+    def step_start(self, step: str, metadata: Optional[Dict] = None) -> None:
+        if self.emitter:
+            self.emitter.emit_step_start(step, metadata)
+
+    def step_complete(self, step: str, duration: float, result: Dict, metrics: Optional[Dict] = None) -> None:
+        if self.emitter:
+            self.emitter.emit_step_complete(step, duration, result, metrics)
+
+    def step_error(self, step: str, error: Exception, tb: Optional[str] = None) -> None:
+        if self.emitter:
+            self.emitter.emit_step_error(step, str(error), type(error).__name__, tb)
@@ -0,0 +1,274 @@
+"""
+Source tree scanner (v1)
+
+The single place that decides which files under src_dir CRS looks at.
+src_dir is usually a whole repository clone, so the walk prunes
+directories as it goes instead of filtering a full listing afterwards:
+
+  - default excludes: VCS dirs, caches, node_modules, virtualenvs
+    (named ones and any dir holding a pyvenv.cfg), site-packages, migrations
+  - config.json "scan" section:
+        "scan": {
+          "include": ["**/*.py"],            # optional; default: everything
+          "exclude": ["legacy/", "*_pb2.py"],
+          "gitignore": true,                 # honour .gitignore files (nested too)
+          "default_excludes": true
+        }
+  - .gitignore files, read while walking and applied to their subtree
+
+Exclude rules use gitignore syntax (`dir/`, `/anchored`, `**`, `!negate`);
+the last matching rule wins. Directories are listed with os.scandir so
+type checks come from the directory entry, without an extra stat call.
+"""
+import os
+import re
+from dataclasses import dataclass
+from typing import Any, Container, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+DEFAULT_EXCLUDES: Tuple[str, ...] = (
+    ".git/",
+    ".hg/",
+    ".svn/",
+    "__pycache__/",
+    "node_modules/",
+    "venv/",
+    ".venv/",
+    "virtualenv/",
+    "site-packages/",
+    ".tox/",
+    ".nox/",
+    ".mypy_cache/",
+    ".pytest_cache/",
+    ".ruff_cache/",
+    "*.egg-info/",
+    "migrations/",
+)
+
+
+@dataclass(frozen=True)
+class _Rule:
+    base: str  # directory (relative to root) the rule is scoped to; "" = root
+    regex: "re.Pattern[str]"
+    negate: bool
+    dir_only: bool
+
+
+def _glob_body(pat: str) -> str:
+    out: List[str] = []
+    i, n = 0, len(pat)
+    while i < n:
+        c = pat[i]
+        if c == "*":
+            if pat.startswith("**/", i):
+                out.append("(?:.*/)?")
+                i += 3
+                continue
+            if pat.startswith("**", i):
+                out.append(".*")
+                i += 2
+                continue
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            j = pat.find("]", i + 1)
+            if j == -1:
+                out.append(re.escape(c))
+            else:
+                cls = pat[i + 1:j]
+                if cls.startswith("!"):
+                    cls = "^" + cls[1:]
+                out.append(f"[{cls}]")
+                i = j
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            out.append(re.escape(pat[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+def compile_pattern(pattern: str, base: str = "") -> Optional[_Rule]:
+    """One gitignore-style line -> rule (None for blanks/comments)."""
+    p = pattern.rstrip("\n").rstrip()
+    if not p or p.startswith("#"):
+        return None
+    negate = p.startswith("!")
+    if negate:
+        p = p[1:]
+    if p.startswith("\\"):
+        p = p[1:]
+    dir_only = p.endswith("/")
+    p = p.rstrip("/")
+    if not p:
+        return None
+    anchored = "/" in p
+    p = p.lstrip("/")
+    prefix = "" if anchored or p.startswith("**/") else "(?:.*/)?"
+    return _Rule(base=base, regex=re.compile(f"^{prefix}{_glob_body(p)}$"), negate=negate, dir_only=dir_only)
+
+
+def _compile_all(patterns: Iterable[str], base: str = "") -> Tuple[_Rule, ...]:
+    return tuple(r for r in (compile_pattern(p, base) for p in patterns) if r is not None)
+
+
+class SourceScanner:
+    def __init__(
+        self,
+        root: str,
+        *,
+        include: Optional[Sequence[str]] = None,
+        exclude: Sequence[str] = (),
+        gitignore: bool = True,
+        default_excludes: bool = True,
+        skip_virtualenvs: bool = True,
+    ):
+        self.root = os.path.abspath(root)
+        self.gitignore = gitignore
+        self.skip_virtualenvs = skip_virtualenvs
+        self._include = _compile_all(include) if include else ()
+        self._base_rules = _compile_all(DEFAULT_EXCLUDES if default_excludes else ()) + _compile_all(exclude)
+        self._dir_rules: Dict[str, Tuple[_Rule, ...]] = {}
+        self._venv_dirs: Dict[str, bool] = {}
+
+    @classmethod
+    def from_config(cls, root: str, cfg: Optional[Dict[str, Any]]) -> "SourceScanner":
+        scan = (cfg or {}).get("scan") or {}
+        return cls(
+            root,
+            include=scan.get("include") or None,
+            exclude=scan.get("exclude") or (),
+            gitignore=bool(scan.get("gitignore", True)),
+            default_excludes=bool(scan.get("default_excludes", True)),
+            skip_virtualenvs=bool(scan.get("skip_virtualenvs", True)),
+        )
+
+    # ---------------------------
+    # rules
+    # ---------------------------
+    def _gitignore_rules(self, rel_dir: str) -> Tuple[_Rule, ...]:
+        if not self.gitignore:
+            return ()
+        path = os.path.join(self.root, rel_dir, ".gitignore")
+        try:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                return _compile_all(f.readlines(), rel_dir)
+        except OSError:
+            return ()
+
+    def _rules_for(self, rel_dir: str, has_gitignore: Optional[bool] = None) -> Tuple[_Rule, ...]:
+        """Rules in effect inside rel_dir (inherited + its own .gitignore)."""
+        rules = self._dir_rules.get(rel_dir)
+        if rules is None:
+            parent = self._base_rules if not rel_dir else self._rules_for(rel_dir.rpartition("/")[0])
+            own = self._gitignore_rules(rel_dir) if has_gitignore is not False else ()
+            rules = self._dir_rules[rel_dir] = parent + own
+        return rules
+
+    def _is_virtualenv(self, rel_dir: str, names: Optional[Container[str]] = None) -> bool:
+        """A directory (other than root) holding a pyvenv.cfg; `names` = its listing when known."""
+        if not rel_dir or not self.skip_virtualenvs:
+            return False
+        if names is not None:
+            found = self._venv_dirs[rel_dir] = "pyvenv.cfg" in names
+            return found
+        found = self._venv_dirs.get(rel_dir)
+        if found is None:
+            found = self._venv_dirs[rel_dir] = os.path.isfile(os.path.join(self.root, rel_dir, "pyvenv.cfg"))
+        return found
+
+    @staticmethod
+    def _match(rules: Tuple[_Rule, ...], rel: str, is_dir: bool) -> bool:
+        excluded = False
+        for r in rules:
+            if r.dir_only and not is_dir:
+                continue
+            sub = rel[len(r.base) + 1:] if r.base else rel
+            if r.regex.match(sub):
+                excluded = not r.negate
+        return excluded
+
+    def _included(self, rel: str) -> bool:
+        return not self._include or any(r.regex.match(rel) for r in self._include)
+
+    def _rel(self, path: str) -> Optional[str]:
+        rel = os.path.relpath(os.path.abspath(path), self.root).replace(os.sep, "/")
+        if rel == ".":
+            return ""
+        return None if rel.startswith("../") or rel == ".." else rel
+
+    def is_excluded(self, path: str, is_dir: bool = False) -> bool:
+        """True when `path` (absolute or cwd-relative) would not be yielded by a walk."""
+        rel = self._rel(path)
+        if rel is None:
+            return True
+        if not rel:
+            return False
+        parts = rel.split("/")
+        for i in range(1, len(parts)):
+            d = "/".join(parts[:i])
+            if self._match(self._rules_for("/".join(parts[:i - 1])), d, True) or self._is_virtualenv(d):
+                return True
+        parent = "/".join(parts[:-1])
+        if self._match(self._rules_for(parent), rel, is_dir):
+            return True
+        if is_dir:
+            return self._is_virtualenv(rel)
+        return not self._included(rel)
+
+    def reset(self) -> None:
+        """Forget cached .gitignore rules and virtualenv checks (call when they may have changed)."""
+        self._dir_rules.clear()
+        self._venv_dirs.clear()
+
+    # ---------------------------
+    # walking
+    # ---------------------------
+    def walk(self, start: Optional[str] = None) -> Iterator[Tuple[str, List[os.DirEntry], List[os.DirEntry]]]:
+        """
+        Yields (rel_dir, kept_subdirs, kept_files) top-down from `start`
+        (default: root); excluded directories are never entered.
+        """
+        self.reset()
+        start_rel = "" if start is None else self._rel(start)
+        if start_rel is None or (start_rel and self.is_excluded(os.path.join(self.root, start_rel), is_dir=True)):
+            return
+        stack = [start_rel]
+        while stack:
+            rel_dir = stack.pop()
+            try:
+                with os.scandir(os.path.join(self.root, rel_dir)) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+            names = {e.name for e in entries}
+            if self._is_virtualenv(rel_dir, names):
+                continue
+            rules = self._rules_for(rel_dir, ".gitignore" in names)
+            dirs: List[os.DirEntry] = []
+            files: List[os.DirEntry] = []
+            for e in entries:
+                rel = f"{rel_dir}/{e.name}" if rel_dir else e.name
+                try:
+                    is_dir = e.is_dir(follow_symlinks=False)
+                except OSError:
+                    continue
+                if self._match(rules, rel, is_dir):
+                    continue
+                if is_dir:
+                    dirs.append(e)
+                elif self._included(rel):
+                    files.append(e)
+            yield rel_dir, dirs, files
+            stack.extend(f"{rel_dir}/{d.name}" if rel_dir else d.name for d in reversed(dirs))
+
+    def iter_entries(self, start: Optional[str] = None, suffix: Optional[str] = None) -> Iterator[os.DirEntry]:
+        for _, _, files in self.walk(start):
+            for e in files:
+                if not suffix or e.name.endswith(suffix):
+                    yield e
+
+    def list_files(self, start: Optional[str] = None, suffix: Optional[str] = None) -> List[str]:
+        """Absolute paths of kept files under start (default: root), sorted."""
+        return sorted(e.path for e in self.iter_entries(start, suffix))
@@ -0,0 +1,185 @@
+"""
+Per-step resource metrics for CRS runs (v1)
+
+StepMeter wraps one pipeline step and reports:
+
+  - wall_s / cpu_s:        wall clock and CPU time of the calling thread
+  - max_rss_mb:            process RSS high-water mark after the step (resource)
+  - rss_growth_mb:         how much the step raised that high-water mark
+  - files_read/written, bytes_read/written: WorkspaceFS IO during the step
+  - files_processed:       source files the step handled, as reported by the
+                           step (falls back to files_read)
+  - items / items_per_s:   step output size (files, artifacts, relationships)
+
+With profile=True it also records the Python heap peak (tracemalloc) and
+writes into the run directory:
+
+  - <step>.prof          cProfile stats (pstats format; disk workspaces only)
+  - <step>.pstats.txt    top functions by cumulative time
+  - <step>.folded        sampled stacks in collapsed format, for
+                         flamegraph.pl / speedscope / inferno
+
+tracemalloc and the profiler slow steps down noticeably, hence opt-in.
+tracemalloc is process-global: overlapping profiled steps (concurrent
+pipelines in one process) share one tracing session, started by the first
+step and stopped by the last, and then report the shared peak.
+"""
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Any, Dict, Optional
+
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:  # Windows
+    resource = None  # type: ignore
+    RESOURCE_AVAILABLE = False
+
+from core.fs import WorkspaceFS
+
+
+_trace_lock = threading.Lock()
+_trace_users = 0
+_trace_owned = False  # tracing was started here (not by the host process)
+
+
+def _trace_acquire() -> None:
+    global _trace_users, _trace_owned
+    with _trace_lock:
+        if _trace_users == 0:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                _trace_owned = True
+            tracemalloc.reset_peak()
+        _trace_users += 1
+
+
+def _trace_release() -> float:
+    """Traced heap peak (MB) of the shared session; stops tracing when the last user leaves."""
+    global _trace_users, _trace_owned
+    with _trace_lock:
+        peak = tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else 0
+        _trace_users -= 1
+        if _trace_users == 0 and _trace_owned:
+            tracemalloc.stop()
+            _trace_owned = False
+    return peak / (1024 * 1024)
+
+
+def max_rss_mb() -> Optional[float]:
+    if not RESOURCE_AVAILABLE:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+class StackSampler:
+    """Samples one thread's Python stack every `interval` seconds (collapsed-stack counts)."""
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts: Dict[str, int] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="crs-stack-sampler", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                key = ";".join(reversed(stack))
+                self.counts[key] = self.counts.get(key, 0) + 1
+
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> str:
+        self._stop.set()
+        self._thread.join()
+        return "".join(f"{stack} {n}\n" for stack, n in sorted(self.counts.items()))
+
+
+class StepMeter:
+    """
+    Context manager around one step:
+
+        with StepMeter(fs, "artifacts", run_id=run_id, profile=True) as meter:
+            payload = ...
+        metrics = meter.metrics(items=len(payload["artifacts"]))
+    """
+
+    def __init__(self, fs: WorkspaceFS, step: str, *, run_id: Optional[str] = None, profile: bool = False):
+        self.fs = fs
+        self.step = step
+        self.run_id = run_id
+        self.profile = profile
+        self._result: Dict[str, Any] = {}
+
+    def __enter__(self) -> "StepMeter":
+        self._io0 = self.fs.io.snapshot()
+        self._rss0 = max_rss_mb()
+        self._profiler: Optional[cProfile.Profile] = None
+        self._sampler: Optional[StackSampler] = None
+        if self.profile:
+            _trace_acquire()
+            self._sampler = StackSampler(threading.get_ident()).start()
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        self._t0, self._c0 = time.perf_counter(), time.thread_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        wall = time.perf_counter() - self._t0
+        cpu = time.thread_time() - self._c0
+        io1 = self.fs.io.snapshot()
+        rss1 = max_rss_mb()
+
+        out: Dict[str, Any] = {
+            "wall_s": round(wall, 6),
+            "cpu_s": round(cpu, 6),
+            "max_rss_mb": round(rss1, 1) if rss1 is not None else None,
+            "rss_growth_mb": round(rss1 - self._rss0, 1) if rss1 is not None and self._rss0 is not None else None,
+            **{k: io1[k] - self._io0[k] for k in io1},
+        }
+        if self._profiler is not None:
+            self._profiler.disable()
+            out["py_peak_mb"] = round(_trace_release(), 2)
+            out["profile_files"] = self._dump_profile(self._profiler, self._sampler.stop())
+        self._result = out
+
+    def _dump_profile(self, profiler: cProfile.Profile, folded: str) -> Dict[str, str]:
+        if not self.run_id:
+            return {}
+        files: Dict[str, str] = {}
+        txt = io.StringIO()
+        pstats.Stats(profiler, stream=txt).sort_stats("cumulative").print_stats(60)
+        self.fs.write_run_text(self.run_id, f"{self.step}.pstats.txt", txt.getvalue())
+        files["pstats_txt"] = self.fs.run_path(self.run_id, f"{self.step}.pstats.txt")
+        self.fs.write_run_text(self.run_id, f"{self.step}.folded", folded)
+        files["folded"] = self.fs.run_path(self.run_id, f"{self.step}.folded")
+        if not self.fs.is_overlay:
+            prof_path = self.fs.run_path(self.run_id, f"{self.step}.prof")
+            profiler.dump_stats(prof_path)
+            files["prof"] = prof_path
+        return files
+
+    def metrics(self, items: Optional[int] = None, files: Optional[int] = None) -> Dict[str, Any]:
+        """`files`: source files the step processed (steps reading a payload instead of src report it)"""
+        out = dict(self._result)
+        out["files_processed"] = files if files is not None else out.get("files_read", 0)
+        if items is not None:
+            out["items"] = items
+            out["items_per_s"] = round(items / out["wall_s"], 1) if out.get("wall_s") else None
+        return out
@@ -12,6 +12,7 @@ from core.pipeline_state import PipelineState
 from core.events import CRSEventEmitter, LogLevel
 from core.impact_engine import ImpactEngine
 from core.query_api import CRSQueryAPI
+from core.records import iter_payload_records
 from core.patch_engine import apply_patch_from_file
 from core.spec_store import SpecStore
 from core.verification_engine import VerificationEngine
@@ -50,6 +51,11 @@ class CRSStepRunner:
         if self.emitter:
             self.emitter.emit_step_log(step_name, message, level)
 
+    def _streaming(self) -> bool:
+        """config.json components.artifact_streaming (bounded-memory artifacts step)"""
+        cfg = self.fs.get_cfg() or {}
+        return bool((cfg.get("components") or {}).get("artifact_streaming", False))
+
     def run_blueprints(self, force: bool = False) -> Dict[str, Any]:
         """Run blueprints indexing step"""
         step_name = "blueprints"
@@ -141,22 +147,27 @@ class CRSStepRunner:
             # Load and run artifact extractor
             ax_path = _get_tool_path(self.fs, "artifact_extractor_v1_workspace.py")
             mod = _load_module_from_path("crs_artifact_extractor", ax_path)
+            stream_fn = getattr(mod, "stream_workspace_artifacts", None)
+            streamed = self._streaming() and callable(stream_fn)
             fn = getattr(mod, "extract_all", None)
-            if not callable(fn):
+            if not streamed and not callable(fn):
                 raise RuntimeError("Artifact extractor must expose extract_all()")
 
             self._log(step_name, "Extracting artifacts from blueprints...")
 
-            payload = fn(self.fs.paths.blueprints_json, self.fs.paths.artifacts_json)
-            if not isinstance(payload, dict):
-                payload = {"payload": payload}
-
-            arts_count = len(payload.get("artifacts", []))
+            if streamed:
+                payload = stream_fn(self.fs)
+                arts_count = payload.get("artifact_count", 0)
+            else:
+                payload = fn(self.fs.paths.blueprints_json, self.fs.paths.artifacts_json)
+                if not isinstance(payload, dict):
+                    payload = {"payload": payload}
+                arts_count = len(payload.get("artifacts", []))
             self._log(step_name, f"Extracted {arts_count} artifacts")
 
             # Update state
             src_info = self.state.compute_src_fingerprint()
-            art_sha = self.state.hash_output_file(self.fs.paths.artifacts_json)
+            art_sha = self.state.hash_output_file(self.fs.paths.artifacts_json, stream=streamed)
             self.state.mark_step_done("artifacts",
                                      src_fingerprint=src_info["src_fingerprint"],
                                      output_sha1=art_sha)
@@ -215,17 +226,28 @@ class CRSStepRunner:
             if not callable(fn):
                 raise RuntimeError("Relationship builder must expose build_relationships()")
 
-            # Load artifacts
-            artifacts_payload = self.fs.read_json(self.fs.paths.artifacts_json)
+            cfg = self.fs.get_cfg() or {}
+            components = (cfg.get("components") or {})
+            include_heuristic = bool(components.get("relationship_include_heuristic_mentions", True))
+
+            # Load artifacts (streaming: only the projection the builder reads)
+            artifacts_payload = None
+            project = getattr(mod, "project_artifact", None)
+            if self._streaming() and callable(project):
+                try:
+                    records = iter_payload_records(self.fs.iter_lines(self.fs.paths.artifacts_json), "artifacts")
+                    artifacts_payload = {
+                        "artifacts": [project(a, include_heuristic_mentions=include_heuristic) for a in records]
+                    }
+                except ValueError:
+                    artifacts_payload = None
+            if artifacts_payload is None:
+                artifacts_payload = self.fs.read_json(self.fs.paths.artifacts_json)
             if not isinstance(artifacts_payload, dict):
                 raise FileNotFoundError(f"Artifacts JSON not found/invalid")
 
             self._log(step_name, "Building relationships from artifacts...")
 
-            cfg = self.fs.get_cfg() or {}
-            components = (cfg.get("components") or {})
-            include_heuristic = bool(components.get("relationship_include_heuristic_mentions", True))
-
             rel_payload = fn(artifacts_payload, include_heuristic_mentions=include_heuristic)
             if not isinstance(rel_payload, dict):
                 rel_payload = {"payload": rel_payload}
@@ -0,0 +1,296 @@
+"""
+Source tree watcher (v1)
+
+Delivers debounced batches of changed paths under a root directory:
+
+  - InotifyWatcher: Linux inotify through ctypes (no extra dependency);
+    one watch per directory, new directories are picked up as they appear
+  - PollingWatcher: os.scandir walk comparing (mtime_ns, size) snapshots
+
+next_batch() waits for a first change, then keeps collecting until no new
+change arrived for `debounce` seconds (capped by `max_delay`), so a burst
+of saves (git checkout, formatter run) becomes one batch.
+
+A directory path in a batch means "rescan this subtree" (directory
+moved/deleted, or the inotify queue overflowed).
+
+With a SourceScanner, excluded directories (node_modules, virtualenvs,
+.gitignore'd trees, ...) are neither watched nor polled, and changes to
+excluded files are dropped.
+"""
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import time
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from core.source_scanner import SourceScanner
+
+# directories that never hold indexable sources (used when no scanner is given)
+SKIP_DIRS = {"__pycache__", ".git", ".hg", ".svn"}
+
+
+class BaseWatcher:
+    def __init__(
+        self,
+        root: str,
+        suffix: Optional[str] = ".py",
+        debounce: float = 0.15,
+        max_delay: float = 2.0,
+        scanner: Optional[SourceScanner] = None,
+    ):
+        self.root = os.path.abspath(root)
+        self.suffix = suffix
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.scanner = scanner
+
+    def _wanted(self, path: str) -> bool:
+        if self.suffix and not path.endswith(self.suffix):
+            return False
+        return self.scanner is None or not self.scanner.is_excluded(path)
+
+    def _skip_dir(self, path: str) -> bool:
+        if self.scanner is not None:
+            return self.scanner.is_excluded(path, is_dir=True)
+        return os.path.basename(path) in SKIP_DIRS
+
+    def _walk(self, top: str) -> Iterator[Tuple[str, List[os.DirEntry]]]:
+        """(dirpath, file entries) for every directory kept under top."""
+        if self.scanner is not None:
+            for rel_dir, _, files in self.scanner.walk(top):
+                yield os.path.join(self.scanner.root, rel_dir) if rel_dir else self.scanner.root, files
+            return
+        stack = [top]
+        while stack:
+            d = stack.pop()
+            try:
+                with os.scandir(d) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+            files: List[os.DirEntry] = []
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in SKIP_DIRS:
+                            stack.append(entry.path)
+                    else:
+                        files.append(entry)
+                except OSError:
+                    continue
+            yield d, files
+
+    def _read_raw(self, timeout: Optional[float]) -> Set[str]:
+        """Changed paths seen within `timeout` seconds (empty on timeout)."""
+        raise NotImplementedError
+
+    def next_batch(self, timeout: Optional[float] = None) -> Set[str]:
+        pending = self._read_raw(timeout)
+        if not pending:
+            return set()
+        started = time.monotonic()
+        while True:
+            remaining = min(self.debounce, started + self.max_delay - time.monotonic())
+            if remaining <= 0:
+                break
+            more = self._read_raw(remaining)
+            if not more:
+                break
+            pending |= more
+        return pending
+
+    def close(self) -> None:
+        pass
+
+
+# ---------------------------
+# Polling
+# ---------------------------
+class PollingWatcher(BaseWatcher):
+    kind = "polling"
+
+    def __init__(self, root: str, poll_interval: float = 0.5, **kwargs):
+        super().__init__(root, **kwargs)
+        self.poll_interval = poll_interval
+        self._snapshot = self._scan()
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        out: Dict[str, Tuple[int, int]] = {}
+        for _, files in self._walk(self.root):
+            for entry in files:
+                if self.suffix and not entry.name.endswith(self.suffix):
+                    continue
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                out[entry.path] = (st.st_mtime_ns, st.st_size)
+        return out
+
+    def _read_raw(self, timeout: Optional[float]) -> Set[str]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            current = self._scan()
+            prev = self._snapshot
+            changed = {p for p, sig in current.items() if prev.get(p) != sig}
+            changed |= prev.keys() - current.keys()
+            self._snapshot = current
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            wait = self.poll_interval if deadline is None else min(self.poll_interval, max(0.0, deadline - time.monotonic()))
+            time.sleep(wait)
+
+
+# ---------------------------
+# inotify (Linux)
+# ---------------------------
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = (
+    IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+)
+_EVENT_HEADER = struct.Struct("iIII")
+
+_libc = None
+
+
+def _get_libc():
+    global _libc
+    if _libc is None:
+        name = ctypes.util.find_library("c")
+        lib = ctypes.CDLL(name or "libc.so.6", use_errno=True)
+        lib.inotify_init1.argtypes = [ctypes.c_int]
+        lib.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        lib.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        _libc = lib
+    return _libc
+
+
+def inotify_available() -> bool:
+    if not hasattr(os, "uname") or os.uname().sysname != "Linux":
+        return False
+    try:
+        return hasattr(_get_libc(), "inotify_init1")
+    except OSError:
+        return False
+
+
+class InotifyWatcher(BaseWatcher):
+    kind = "inotify"
+
+    def __init__(self, root: str, **kwargs):
+        super().__init__(root, **kwargs)
+        self._libc = _get_libc()
+        fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self._fd = fd
+        self._dirs: Dict[int, str] = {}
+        try:
+            self._add_tree(self.root)
+        except OSError:
+            self.close()
+            raise
+
+    def _add_dir(self, path: str) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), _WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err in (errno.ENOENT, errno.ENOTDIR, errno.EACCES):
+                return  # vanished or unreadable: nothing to watch
+            raise OSError(err, f"inotify_add_watch({path}): {os.strerror(err)}")
+        self._dirs[wd] = path
+
+    def _add_tree(self, top: str) -> Set[str]:
+        """Watch `top` and its subdirectories; returns wanted files found (for new trees)."""
+        found: Set[str] = set()
+        for dirpath, files in self._walk(top):
+            self._add_dir(dirpath)
+            found.update(e.path for e in files if not self.suffix or e.name.endswith(self.suffix))
+        return found
+
+    def _read_raw(self, timeout: Optional[float]) -> Set[str]:
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        changed: Set[str] = set()
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, name_len = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + name_len].rstrip(b"\0").decode("utf-8", "surrogateescape")
+            offset += name_len
+
+            if mask & IN_Q_OVERFLOW:
+                changed.add(self.root)
+                continue
+            parent = self._dirs.get(wd)
+            if mask & IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+            if parent is None:
+                continue
+            path = os.path.join(parent, name) if name else parent
+
+            if mask & IN_ISDIR:
+                if self._skip_dir(path):
+                    continue
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    changed |= self._add_tree(path)
+                elif mask & (IN_MOVED_FROM | IN_DELETE):
+                    changed.add(path)  # subtree gone: caller rescans it
+                continue
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                if path == self.root:
+                    changed.add(self.root)
+                continue
+            if name and self._wanted(path) and mask & (IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE):
+                changed.add(path)
+        return changed
+
+    def close(self) -> None:
+        fd, self._fd = getattr(self, "_fd", -1), -1
+        if fd >= 0:
+            os.close(fd)
+
+
+def make_watcher(
+    root: str,
+    *,
+    suffix: Optional[str] = ".py",
+    debounce: float = 0.15,
+    poll_interval: float = 0.5,
+    force_polling: bool = False,
+    scanner: Optional[SourceScanner] = None,
+) -> BaseWatcher:
+    """inotify when available (and under the watch limit), polling otherwise."""
+    if not force_polling and inotify_available():
+        try:
+            return InotifyWatcher(root, suffix=suffix, debounce=debounce, scanner=scanner)
+        except OSError:
+            pass  # e.g. ENOSPC: fs.inotify.max_user_watches exhausted
+    return PollingWatcher(root, poll_interval=poll_interval, suffix=suffix, debounce=debounce, scanner=scanner)
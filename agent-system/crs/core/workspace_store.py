@@ -4,6 +4,8 @@ import hashlib
 from dataclasses import dataclass
 from typing import Any, Dict, Optional
 
+from core.source_scanner import SourceScanner
+
 
 def _norm(p: str) -> str:
     return p.replace("\\", "/")
@@ -115,17 +117,14 @@ class WorkspaceStore:
         file_hashes: Dict[str, str] = {}
         total_files = 0
 
-        for dirpath, _, filenames in os.walk(self.paths.src_dir):
-            for fn in filenames:
-                if not fn.endswith(".py"):
-                    continue
-                total_files += 1
-                abs_fp = os.path.join(dirpath, fn)
-                rel_fp = _norm(os.path.relpath(abs_fp, self.paths.src_dir))
-
-                with open(abs_fp, "rb") as f:
-                    b = f.read()
-                file_hashes[rel_fp] = _sha1_bytes(b)
+        scanner = SourceScanner.from_config(self.paths.src_dir, self.config)
+        for abs_fp in scanner.list_files(suffix=".py"):
+            total_files += 1
+            rel_fp = _norm(os.path.relpath(abs_fp, self.paths.src_dir))
+
+            with open(abs_fp, "rb") as f:
+                b = f.read()
+            file_hashes[rel_fp] = _sha1_bytes(b)
 
         # fingerprint of fingerprints
         joined = "\n".join(f"{k}:{file_hashes[k]}" for k in sorted(file_hashes.keys()))
@@ -0,0 +1,543 @@
+# crs_bench.py
+"""
+CRS pipeline benchmark (v1)
+
+Generates synthetic Django/DRF projects of increasing size and times every
+pipeline stage on them, so scaling regressions show up before production:
+
+  blueprints -> artifacts -> relationships -> impact -> verification -> query_ops
+
+Per size and step the report holds wall/CPU seconds (best of `repeat`
+untraced runs) and the Python heap peak of one extra tracemalloc run.
+The process max RSS is recorded per size (it only ever grows).
+
+With memory on, each size also reports how much the loaded graph retains
+(tracemalloc, after gc): the query index with and without compaction
+(core.records.Compactor), and the pipeline payloads built from slotted
+records (to_dict, shared relationship ends) against the asdict-style
+copies they replaced.
+
+Reports are written as bench.json + bench.md. compare() diffs a report
+against a saved baseline (same sizes/steps) and lists slowdowns above a
+relative threshold; `crs bench --baseline` exits 1 when there are any.
+"""
+import dataclasses
+import gc
+import json
+import os
+import platform
+import shutil
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from core.fs import WorkspaceFS
+from core.impact_engine import ImpactEngine
+from core.query_api import CRSQueryAPI
+from core.query_runner import CRSQueryRunner
+from core.run_context import RunContext
+from core.step_metrics import max_rss_mb
+from core.verification_engine import VerificationEngine
+from crs_main import (
+    _ensure_python_path,
+    _get_tool_path,
+    _load_module_from_path,
+    _run_artifact_extractor,
+    _run_blueprint_builder,
+    _run_relationship_builder,
+)
+
+BENCH_VERSION = "crs-bench-v1"
+BENCH_SUITE_ID = "vs:bench"
+STEPS = ("blueprints", "artifacts", "relationships", "impact", "verification", "query_ops")
+DEFAULT_SIZES = (10, 30, 100)
+TOOLS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tools")
+
+
+def _utc_iso() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+
+# ---------------------------
+# Synthetic project generator
+# ---------------------------
+_FIELD_KINDS = (
+    'models.CharField(max_length=120)',
+    'models.IntegerField(default=0)',
+    'models.BooleanField(default=False)',
+    'models.DateTimeField(auto_now_add=True)',
+    'models.TextField(blank=True)',
+    'models.DecimalField(max_digits=10, decimal_places=2)',
+)
+
+
+def _model_name(i: int) -> str:
+    return f"Item{i:04d}"
+
+
+def _route(i: int) -> str:
+    return f"item{i:04d}"
+
+
+def _field_names(i: int, count: int) -> List[str]:
+    # one name shared by every model (like "name"/"created_at" in real projects),
+    # the rest model-specific, so heuristic field mentions don't degenerate to N x N
+    return ["name"] + [f"attr{i:04d}_{f:02d}" for f in range(1, count)][: max(0, count - 1)]
+
+
+def generate_django_project(
+    src_dir: str,
+    *,
+    models: int,
+    fields_per_model: int = 8,
+    models_per_app: int = 20,
+) -> Dict[str, Any]:
+    """
+    Write a synthetic Django/DRF project under src_dir. Each app gets
+    models.py (with FKs to the previous model), serializers.py (ModelSerializer),
+    views.py (ModelViewSet + APIView), urls.py (DefaultRouter + urlpatterns);
+    config/urls.py includes every app.
+    """
+    os.makedirs(src_dir, exist_ok=True)
+    apps: List[str] = []
+    files = 0
+    total_bytes = 0
+
+    def _write(rel: str, text: str) -> None:
+        nonlocal files, total_bytes
+        p = os.path.join(src_dir, rel)
+        os.makedirs(os.path.dirname(p), exist_ok=True)
+        with open(p, "w", encoding="utf-8") as f:
+            f.write(text)
+        files += 1
+        total_bytes += len(text.encode("utf-8"))
+
+    for start in range(0, models, max(1, models_per_app)):
+        app = f"app{len(apps):03d}"
+        apps.append(app)
+        idx = list(range(start, min(models, start + models_per_app)))
+        names = [_model_name(i) for i in idx]
+
+        m = ["from django.db import models", ""]
+        for i in idx:
+            m += ["", f"class {_model_name(i)}(models.Model):"]
+            for f, field in enumerate(_field_names(i, fields_per_model)):
+                m.append(f"    {field} = {_FIELD_KINDS[f % len(_FIELD_KINDS)]}")
+            if i > start:
+                m.append(f'    parent = models.ForeignKey("{_model_name(i - 1)}", on_delete=models.CASCADE, null=True)')
+            m += ["", "    class Meta:", '        ordering = ["-id"]', ""]
+        _write(f"{app}/__init__.py", "")
+        _write(f"{app}/models.py", "\n".join(m) + "\n")
+
+        s = ["from rest_framework import serializers", f"from .models import {', '.join(names)}", ""]
+        for i in idx:
+            fields = ", ".join(f'"{field}"' for field in _field_names(i, fields_per_model))
+            s += [
+                "",
+                f"class {_model_name(i)}Serializer(serializers.ModelSerializer):",
+                "    class Meta:",
+                f"        model = {_model_name(i)}",
+                f'        fields = ["id", {fields}]',
+                "",
+                "    def validate_name(self, value):",
+                "        return value",
+                "",
+            ]
+        _write(f"{app}/serializers.py", "\n".join(s) + "\n")
+
+        v = [
+            "from rest_framework import viewsets",
+            "from rest_framework.response import Response",
+            "from rest_framework.views import APIView",
+            f"from .models import {', '.join(names)}",
+            f"from .serializers import {', '.join(n + 'Serializer' for n in names)}",
+            "",
+        ]
+        for i in idx:
+            n = _model_name(i)
+            v += [
+                "",
+                f"class {n}ViewSet(viewsets.ModelViewSet):",
+                f"    queryset = {n}.objects.all()",
+                f"    serializer_class = {n}Serializer",
+                "",
+                "",
+                f"class {n}SummaryView(APIView):",
+                f"    serializer_class = {n}Serializer",
+                "",
+                "    def get(self, request):",
+                f"        return Response({{'count': {n}.objects.count()}})",
+                "",
+            ]
+        _write(f"{app}/views.py", "\n".join(v) + "\n")
+
+        u = [
+            "from django.urls import include, path",
+            "from rest_framework.routers import DefaultRouter",
+            f"from .views import {', '.join(n + 'ViewSet' for n in names)}, {', '.join(n + 'SummaryView' for n in names)}",
+            "",
+            "router = DefaultRouter()",
+        ]
+        u += [f'router.register(r"{_route(i)}", {_model_name(i)}ViewSet)' for i in idx]
+        u += ["", "urlpatterns = [", '    path("", include(router.urls)),']
+        u += [f'    path("{_route(i)}-summary/", {_model_name(i)}SummaryView.as_view()),' for i in idx]
+        u += ["]"]
+        _write(f"{app}/urls.py", "\n".join(u) + "\n")
+
+    root_urls = ["from django.urls import include, path", "", "urlpatterns = ["]
+    root_urls += [f'    path("api/{a}/", include("{a}.urls")),' for a in apps]
+    root_urls += ["]"]
+    _write("config/__init__.py", "")
+    _write("config/urls.py", "\n".join(root_urls) + "\n")
+
+    return {"models": models, "apps": len(apps), "files": files, "source_bytes": total_bytes}
+
+
+def make_bench_workspace(root: str, *, models: int, **gen_kwargs) -> Tuple[WorkspaceFS, Dict[str, Any]]:
+    """Fresh workspace under root: config.json + synthetic src/ + a bench verification suite."""
+    shutil.rmtree(root, ignore_errors=True)
+    os.makedirs(root)
+    info = generate_django_project(os.path.join(root, "src"), models=models, **gen_kwargs)
+    with open(os.path.join(root, "config.json"), "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "version": "crs-workspace-config-v1",
+                "paths": {"src_dir": "src", "state_dir": "state", "inputs_dir": "inputs", "tools_dir": TOOLS_DIR},
+                "blueprints": {"store_lines": True, "store_raw_text": True},
+            },
+            f,
+            indent=2,
+        )
+    fs = WorkspaceFS(config_path=os.path.join(root, "config.json"))
+    fs.write_json(
+        os.path.join(fs.paths.state_dir, "specs", "verification_suite.json"),
+        {
+            "version": "crs-verification-suite-v1",
+            "generated_at": _utc_iso(),
+            "suites": [
+                {
+                    "id": BENCH_SUITE_ID,
+                    "description": "Benchmark suite: outputs, invariants and queries",
+                    "checks": [
+                        {"id": "artifacts_exist", "type": "file_exists", "params": {"path_key": "fs.paths.artifacts_json"}},
+                        {"id": "relationships_exist", "type": "file_exists", "params": {"path_key": "fs.paths.relationships_json"}},
+                        {"id": "artifact_ids_unique", "type": "invariant", "params": {"invariant_id": "inv:artifact_id_unique"}},
+                        {"id": "rel_endpoint_types", "type": "invariant", "params": {"invariant_id": "inv:relationship_endpoints_have_types"}},
+                        {"id": "models_found", "type": "query", "params": {"op": "find_artifacts", "args": {"type": "django_model", "limit": 5}}},
+                        {"id": "trace_first_route", "type": "query", "params": {"op": "trace_route_to_model", "args": {"route": _route(0)}}},
+                    ],
+                }
+            ],
+        },
+    )
+    return fs, info
+
+
+# ---------------------------
+# Measurement
+# ---------------------------
+def _measure(fn: Callable[[], Any], *, repeat: int, memory: bool) -> Tuple[Any, Dict[str, Any]]:
+    """Best-of-`repeat` wall/CPU time, plus one tracemalloc run for the heap peak."""
+    runs: List[Dict[str, float]] = []
+    result = None
+    for _ in range(max(1, repeat)):
+        gc.collect()
+        t0, c0 = time.perf_counter(), time.process_time()
+        result = fn()
+        runs.append({"wall_s": time.perf_counter() - t0, "cpu_s": time.process_time() - c0})
+    best = min(runs, key=lambda r: r["wall_s"])
+    out: Dict[str, Any] = {
+        "wall_s": round(best["wall_s"], 6),
+        "cpu_s": round(best["cpu_s"], 6),
+        "runs": [round(r["wall_s"], 6) for r in runs],
+    }
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            fn()
+            out["peak_mb"] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 2)
+        finally:
+            tracemalloc.stop()
+    return result, out
+
+
+def _retained_mb(fn: Callable[[], Any]) -> float:
+    """MB still allocated (after gc) by whatever fn() returns."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        kept = fn()
+        gc.collect()
+        size = tracemalloc.get_traced_memory()[0]
+        del kept
+    finally:
+        tracemalloc.stop()
+    return round(size / (1024 * 1024), 2)
+
+
+def _saved(before: float, after: float) -> Dict[str, Any]:
+    return {
+        "before_mb": before,
+        "after_mb": after,
+        "saved_mb": round(before - after, 2),
+        "saved_pct": round(100 * (before - after) / before, 1) if before else None,
+    }
+
+
+def bench_graph_memory(fs: WorkspaceFS) -> Dict[str, Any]:
+    """
+    Retained memory of the loaded graph (see module docstring):
+      - query_index:   CRSQueryAPI index over artifacts.json + relationships.json
+      - artifacts:     payload from Artifact records, asdict() vs to_dict()
+      - relationships: payload with one end dict per relationship vs shared ends
+    """
+    arts_raw = fs.read_text(fs.paths.artifacts_json)
+    rels_raw = fs.read_text(fs.paths.relationships_json)
+
+    def _index(compact: bool) -> CRSQueryAPI:
+        api = CRSQueryAPI(fs)
+        api.load_payloads(json.loads(arts_raw), json.loads(rels_raw), compact=compact)
+        return api
+
+    ax = _load_module_from_path("crs_artifact_extractor", _get_tool_path(fs, "artifact_extractor_v1_workspace.py"))
+    blueprints = fs.read_json(fs.paths.blueprints_json).get("blueprints") or []
+    records = [a for bp in blueprints for a in ax.extract_artifacts_from_file(bp["file_path"], bp["raw_text"])]
+    arts_payload = {"artifacts": [a.to_dict() for a in records]}
+    rel_builder = _load_module_from_path("crs_relationship_builder", _get_tool_path(fs, "relationship_builder_v1_workspace.py"))
+
+    def _rels_per_end_dicts() -> List[Dict[str, Any]]:
+        rels = rel_builder.build_relationships(arts_payload)["relationships"]
+        return [{**r, "from": dict(r["from"]), "to": dict(r["to"])} for r in rels]
+
+    out = {
+        "query_index": _saved(_retained_mb(lambda: _index(False)), _retained_mb(lambda: _index(True))),
+        "artifacts": _saved(
+            _retained_mb(lambda: [dataclasses.asdict(a) for a in records]),
+            _retained_mb(lambda: [a.to_dict() for a in records]),
+        ),
+        "relationships": _saved(
+            _retained_mb(_rels_per_end_dicts),
+            _retained_mb(lambda: rel_builder.build_relationships(arts_payload)["relationships"]),
+        ),
+    }
+    return out
+
+
+def _query_ops(models: int) -> List[Dict[str, Any]]:
+    mid = _model_name(models // 2)
+    return [
+        {"op": "stats", "args": {}},
+        {"op": "find_models", "args": {"contains": "item00", "limit": 50}},
+        {"op": "find_model", "args": {"model_name": mid}},
+        {"op": "get_model_fields", "args": {"model": mid}},
+        {"op": "trace_route_to_model", "args": {"route": _route(models // 2)}},
+        {"op": "trace_model_to_routes", "args": {"model_name_or_id": mid}},
+        {"op": "search", "args": {"q": mid, "limit": 20}},
+    ]
+
+
+def bench_size(
+    root: str,
+    models: int,
+    *,
+    repeat: int = 3,
+    memory: bool = True,
+    query_rounds: int = 20,
+    log: Callable[[str], None] = print,
+    **gen_kwargs,
+) -> Dict[str, Any]:
+    fs, info = make_bench_workspace(root, models=models, **gen_kwargs)
+    _ensure_python_path(fs)
+    ctx = RunContext(fs=fs, run_id=f"bench_{models}")
+    steps: Dict[str, Dict[str, Any]] = {}
+
+    bp, steps["blueprints"] = _measure(lambda: _run_blueprint_builder(fs, ctx), repeat=repeat, memory=memory)
+    arts, steps["artifacts"] = _measure(lambda: _run_artifact_extractor(fs, ctx), repeat=repeat, memory=memory)
+    rels, steps["relationships"] = _measure(lambda: _run_relationship_builder(fs, arts, ctx), repeat=repeat, memory=memory)
+
+    src_files = sorted(f for f in fs.list_files(fs.paths.src_dir, suffix=".py") if f.endswith("models.py"))
+    changed = [os.path.relpath(f, fs.paths.src_dir).replace("\\", "/") for f in src_files[: max(1, len(src_files) // 10)]]
+    _, steps["impact"] = _measure(
+        lambda: ImpactEngine(fs).build_workspace_impact(patch_payload={"changed_files": changed}, patch_id="bench"),
+        repeat=repeat,
+        memory=memory,
+    )
+    verification, steps["verification"] = _measure(
+        lambda: VerificationEngine(fs).run_suite(BENCH_SUITE_ID), repeat=repeat, memory=memory
+    )
+
+    ops = _query_ops(models)
+    runner = CRSQueryRunner(fs)
+    _, load = _measure(lambda: runner.load(force=True), repeat=repeat, memory=memory)
+    batch, steps["query_ops"] = _measure(
+        lambda: [runner.run_ops(ops) for _ in range(query_rounds)][-1], repeat=repeat, memory=memory
+    )
+    steps["query_ops"]["index_load_s"] = load["wall_s"]
+    steps["query_ops"]["ops_per_s"] = round(len(ops) * query_rounds / max(steps["query_ops"]["wall_s"], 1e-9), 1)
+
+    graph_memory = bench_graph_memory(fs) if memory else None
+
+    rss = max_rss_mb()
+    out = {
+        **info,
+        "artifacts": len(arts.get("artifacts") or []),
+        "relationships": len(rels.get("relationships") or []),
+        "verification_ok": bool(verification.get("ok")),
+        "query_errors": (batch.get("summary") or {}).get("errors"),
+        "steps": steps,
+        "graph_memory": graph_memory,
+        "max_rss_mb": round(rss, 1) if rss is not None else None,
+    }
+    log(
+        f"📏 models={models} files={info['files']} artifacts={out['artifacts']} relationships={out['relationships']} "
+        + " ".join(f"{s}={steps[s]['wall_s'] * 1000:.0f}ms" for s in STEPS)
+    )
+    return out
+
+
+def run_bench(
+    sizes: Sequence[int] = DEFAULT_SIZES,
+    *,
+    work_dir: Optional[str] = None,
+    repeat: int = 3,
+    memory: bool = True,
+    log: Callable[[str], None] = print,
+    **gen_kwargs,
+) -> Dict[str, Any]:
+    """Benchmark every size; workspaces go to work_dir (default: a temp dir, removed afterwards)."""
+    tmp = None
+    if work_dir is None:
+        tmp = work_dir = tempfile.mkdtemp(prefix="crs_bench_")
+    try:
+        results = [
+            bench_size(os.path.join(work_dir, f"models_{n}"), n, repeat=repeat, memory=memory, log=log, **gen_kwargs)
+            for n in sizes
+        ]
+    finally:
+        if tmp:
+            shutil.rmtree(tmp, ignore_errors=True)
+    return {
+        "version": BENCH_VERSION,
+        "generated_at": _utc_iso(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {"sizes": list(sizes), "repeat": repeat, "memory": memory, **gen_kwargs},
+        "results": results,
+    }
+
+
+# ---------------------------
+# Baseline comparison / reports
+# ---------------------------
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], *, threshold: float = 0.25, min_delta_s: float = 0.005) -> Dict[str, Any]:
+    """
+    Step-by-step wall time against a baseline report (matched by model count).
+    A regression is ratio > 1 + threshold AND an absolute slowdown above
+    min_delta_s (keeps millisecond noise on tiny sizes out).
+    """
+    base_by_size = {r.get("models"): r for r in baseline.get("results") or []}
+    rows: List[Dict[str, Any]] = []
+    for r in report.get("results") or []:
+        b = base_by_size.get(r.get("models"))
+        if not b:
+            continue
+        for step in STEPS:
+            cur = (r.get("steps") or {}).get(step, {}).get("wall_s")
+            old = (b.get("steps") or {}).get(step, {}).get("wall_s")
+            if cur is None or not old:
+                continue
+            ratio = cur / old
+            rows.append(
+                {
+                    "models": r.get("models"),
+                    "step": step,
+                    "baseline_s": old,
+                    "current_s": cur,
+                    "ratio": round(ratio, 3),
+                    "regression": ratio > 1 + threshold and cur - old > min_delta_s,
+                }
+            )
+    regressions = [row for row in rows if row["regression"]]
+    return {
+        "threshold": threshold,
+        "baseline_generated_at": baseline.get("generated_at"),
+        "compared": len(rows),
+        "ok": not regressions,
+        "regressions": regressions,
+        "rows": rows,
+    }
+
+
+def render_markdown(report: Dict[str, Any]) -> str:
+    lines = [
+        "# CRS pipeline benchmark",
+        "",
+        f"- generated: {report.get('generated_at')}",
+        f"- python: {report.get('python')} ({report.get('platform')})",
+        f"- params: `{json.dumps(report.get('params'), sort_keys=True)}`",
+        "",
+        "## Wall time (ms, best of repeat)",
+        "",
+        "| models | files | artifacts | relationships | " + " | ".join(STEPS) + " | max RSS MB |",
+        "|" + "---:|" * (5 + len(STEPS)),
+    ]
+    for r in report.get("results") or []:
+        st = r.get("steps") or {}
+        lines.append(
+            f"| {r['models']} | {r['files']} | {r['artifacts']} | {r['relationships']} | "
+            + " | ".join(f"{st.get(s, {}).get('wall_s', 0) * 1000:.1f}" for s in STEPS)
+            + f" | {r.get('max_rss_mb')} |"
+        )
+    if any("peak_mb" in s for r in report.get("results") or [] for s in (r.get("steps") or {}).values()):
+        lines += ["", "## Python heap peak (MB, tracemalloc)", "", "| models | " + " | ".join(STEPS) + " |", "|" + "---:|" * (1 + len(STEPS))]
+        for r in report.get("results") or []:
+            st = r.get("steps") or {}
+            lines.append(f"| {r['models']} | " + " | ".join(f"{st.get(s, {}).get('peak_mb', '-')}" for s in STEPS) + " |")
+
+    if any(r.get("graph_memory") for r in report.get("results") or []):
+        lines += [
+            "",
+            "## Graph memory (MB retained, before -> after compaction)",
+            "",
+            "| models | query index | artifacts payload | relationships payload |",
+            "|---:|---:|---:|---:|",
+        ]
+        for r in report.get("results") or []:
+            gm = r.get("graph_memory") or {}
+            lines.append(
+                f"| {r['models']} | "
+                + " | ".join(
+                    f"{gm[k]['before_mb']} -> {gm[k]['after_mb']} (-{gm[k]['saved_pct']}%)" if k in gm else "-"
+                    for k in ("query_index", "artifacts", "relationships")
+                )
+                + " |"
+            )
+
+    cmp_ = report.get("comparison")
+    if isinstance(cmp_, dict):
+        lines += [
+            "",
+            f"## Against baseline ({cmp_.get('baseline_generated_at')}, threshold +{cmp_.get('threshold', 0) * 100:.0f}%)",
+            "",
+            "| models | step | baseline ms | current ms | ratio | |",
+            "|---:|---|---:|---:|---:|---|",
+        ]
+        for row in cmp_.get("rows") or []:
+            flag = "❌ regression" if row["regression"] else ""
+            lines.append(
+                f"| {row['models']} | {row['step']} | {row['baseline_s'] * 1000:.1f} | {row['current_s'] * 1000:.1f} | {row['ratio']:.2f} | {flag} |"
+            )
+    return "\n".join(lines) + "\n"
+
+
+def write_report(report: Dict[str, Any], out_dir: str) -> Dict[str, str]:
+    os.makedirs(out_dir, exist_ok=True)
+    json_path = os.path.join(out_dir, "bench.json")
+    md_path = os.path.join(out_dir, "bench.md")
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    with open(md_path, "w", encoding="utf-8") as f:
+        f.write(render_markdown(report))
+    return {"json": json_path, "markdown": md_path}
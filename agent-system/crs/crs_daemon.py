@@ -0,0 +1,284 @@
+# crs_daemon.py
+"""
+CRS query daemon (v1)
+
+A long-running process that keeps one warm CRSQueryRunner (QueryIndex +
+relationship maps) per workspace and answers run_op / run_ops for any
+number of clients, so web workers neither re-read the JSON payloads nor
+each hold their own copy of the graph.
+
+Workspaces are addressed by their config.json path and loaded on first
+use. Before each request the (mtime_ns, size) of artifacts.json and
+relationships.json is compared with the loaded copy; when it changed the
+index is rebuilt and swapped in (requests in flight keep the old one).
+At most `max_workspaces` stay resident (least recently used is dropped).
+
+Wire format: one compact JSON object per request/response.
+
+  request:  {"id": 1, "ws": "/path/config.json", "op": "search", "args": {...}}
+            {"id": 2, "ws": "...", "ops": [{"op": ..., "args": ...}], "stop_on_error": false}
+            {"op": "ping"} | {"op": "workspaces"}
+  response: run_op/run_ops result without the echoed "args",
+            plus "id" and "gen" (index generation of the workspace)
+
+Transports:
+  - unix:///path/crs.sock  newline-delimited JSON, persistent connections
+  - http://host:port       POST /query (HTTP/1.1 keep-alive), GET /health
+"""
+import json
+import os
+import socketserver
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+from core.fs import WorkspaceFS
+from core.query_runner import CRSQueryRunner
+
+DEFAULT_ADDRESS = "unix:///tmp/crs-daemon.sock"
+MAX_REQUEST_BYTES = 16 * 1024 * 1024
+
+
+def encode(obj: Any) -> bytes:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+
+
+def _strip_args(resp: Dict[str, Any]) -> Dict[str, Any]:
+    """run_op echoes its args back; clients already have them."""
+    resp.pop("args", None)
+    for r in resp.get("results") or []:
+        if isinstance(r, dict):
+            r.pop("args", None)
+    return resp
+
+
+# ---------------------------
+# Warm workspaces
+# ---------------------------
+@dataclass
+class WarmWorkspace:
+    config_path: str
+    fs: WorkspaceFS
+    runner: Optional[CRSQueryRunner] = None
+    signature: Optional[Tuple] = None
+    generation: int = 0
+    loaded_at: float = 0.0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def _signature(self) -> Tuple:
+        sig = []
+        for p in (self.fs.paths.artifacts_json, self.fs.paths.relationships_json):
+            try:
+                st = os.stat(p)
+                sig.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                sig.append(None)
+        return tuple(sig)
+
+    def current(self) -> CRSQueryRunner:
+        """The runner for the latest state on disk (rebuilt if the payloads changed)."""
+        sig = self._signature()
+        runner = self.runner
+        if runner is not None and sig == self.signature:
+            return runner
+        with self.lock:
+            if self.runner is not None and sig == self.signature:
+                return self.runner
+            fresh = CRSQueryRunner(self.fs)
+            try:
+                fresh.api.load_payloads(
+                    self.fs.read_json(self.fs.paths.artifacts_json) if sig[0] else {},
+                    self.fs.read_json(self.fs.paths.relationships_json) if sig[1] else {},
+                )
+            except ValueError:
+                # payload replaced while reading; serve the old index, retry next request
+                if self.runner is not None:
+                    return self.runner
+                raise
+            self.runner, self.signature = fresh, sig
+            self.generation += 1
+            self.loaded_at = time.time()
+            return fresh
+
+
+class WorkspaceRegistry:
+    """config_path -> WarmWorkspace, bounded LRU."""
+
+    def __init__(self, max_workspaces: int = 32):
+        self.max_workspaces = max(1, max_workspaces)
+        self._items: "OrderedDict[str, WarmWorkspace]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, config_path: str) -> WarmWorkspace:
+        key = os.path.abspath(config_path)
+        with self._lock:
+            ws = self._items.get(key)
+            if ws is not None:
+                self._items.move_to_end(key)
+                return ws
+        ws = WarmWorkspace(config_path=key, fs=WorkspaceFS(config_path=key))
+        with self._lock:
+            ws = self._items.setdefault(key, ws)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_workspaces:
+                self._items.popitem(last=False)
+        return ws
+
+    def workspaces(self):
+        with self._lock:
+            items = list(self._items.values())
+        return [
+            {"ws": w.config_path, "gen": w.generation, "loaded_at": w.loaded_at}
+            for w in items
+        ]
+
+    def run_op(self, config_path: str, op: str, args: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        ws = self.get(config_path)
+        resp = ws.current().run_op(op, args)
+        resp["gen"] = ws.generation
+        return _strip_args(resp)
+
+    def run_ops(self, config_path: str, ops, *, stop_on_error: bool = False) -> Dict[str, Any]:
+        ws = self.get(config_path)
+        resp = ws.current().run_ops(ops, stop_on_error=stop_on_error)
+        resp["gen"] = ws.generation
+        return _strip_args(resp)
+
+    def handle(self, req: Any) -> Dict[str, Any]:
+        """One decoded request -> response dict (never raises)."""
+        if not isinstance(req, dict):
+            return {"ok": False, "error": "request must be a JSON object"}
+        rid = req.get("id")
+        op = str(req.get("op") or "")
+        ws = req.get("ws")
+        try:
+            if not ws:
+                if op == "ping":
+                    resp = {"ok": True, "result": "pong", "workspaces": len(self._items)}
+                elif op == "workspaces":
+                    resp = {"ok": True, "result": self.workspaces()}
+                else:
+                    resp = {"ok": False, "op": op, "error": "missing 'ws' (workspace config path)"}
+            elif "ops" in req:
+                resp = self.run_ops(str(ws), req.get("ops"), stop_on_error=bool(req.get("stop_on_error")))
+            else:
+                resp = self.run_op(str(ws), op, req.get("args"))
+        except Exception as e:
+            resp = {"ok": False, "op": op, "error": f"{type(e).__name__}: {e}"}
+        if rid is not None:
+            resp["id"] = rid
+        return resp
+
+    def handle_bytes(self, data: bytes) -> bytes:
+        try:
+            req = json.loads(data)
+        except ValueError as e:
+            return encode({"ok": False, "error": f"invalid JSON: {e}"})
+        return encode(self.handle(req))
+
+
+# ---------------------------
+# Transports
+# ---------------------------
+class _UnixHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        registry: WorkspaceRegistry = self.server.registry
+        while True:
+            line = self.rfile.readline(MAX_REQUEST_BYTES)
+            if not line:
+                return
+            if not line.strip():
+                continue
+            self.wfile.write(registry.handle_bytes(line) + b"\n")
+            self.wfile.flush()
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class _HTTPHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # headers and body are separate writes
+
+    def _send(self, status: int, body: bytes) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        if self.path.rstrip("/") == "/health":
+            self._send(200, encode(self.server.registry.handle({"op": "ping"})))
+        else:
+            self._send(404, encode({"ok": False, "error": "not found"}))
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        if self.path.rstrip("/") != "/query":
+            self.rfile.read(length)
+            self._send(404, encode({"ok": False, "error": "not found"}))
+            return
+        if length > MAX_REQUEST_BYTES:
+            self.close_connection = True
+            self._send(413, encode({"ok": False, "error": "request too large"}))
+            return
+        self._send(200, self.server.registry.handle_bytes(self.rfile.read(length)))
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+def make_server(address: str = DEFAULT_ADDRESS, registry: Optional[WorkspaceRegistry] = None):
+    """
+    Build (but do not start) a server for `address`:
+      unix:///path/to.sock | /path/to.sock | http://host:port
+    """
+    registry = registry or WorkspaceRegistry()
+    u = urlparse(address)
+    if u.scheme == "http":
+        server = _HTTPServer((u.hostname or "127.0.0.1", u.port or 8765), _HTTPHandler)
+    elif u.scheme in ("unix", ""):
+        path = u.path if u.scheme else address
+        if os.path.exists(path):
+            os.remove(path)  # stale socket from a previous run
+        server = _UnixServer(path, _UnixHandler)
+        os.chmod(path, 0o660)
+    else:
+        raise ValueError(f"Unsupported daemon address: {address}")
+    server.registry = registry
+    return server
+
+
+def serve(
+    address: str = DEFAULT_ADDRESS,
+    *,
+    max_workspaces: int = 32,
+    preload: Tuple[str, ...] = (),
+    log: Callable[[str], None] = print,
+) -> None:
+    """Run the daemon until interrupted."""
+    registry = WorkspaceRegistry(max_workspaces=max_workspaces)
+    for config_path in preload:
+        stats = registry.get(config_path).current().stats()
+        log(f"🔥 Warmed {config_path}: artifacts={stats.get('artifacts')} relationships={stats.get('relationships')}")
+    server = make_server(address, registry)
+    log(f"🚀 CRS daemon listening on {address}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        u = urlparse(address)
+        if u.scheme in ("unix", ""):
+            path = u.path if u.scheme else address
+            if os.path.exists(path):
+                os.remove(path)
@@ -3,29 +3,49 @@ import os
 import sys
 import time
 import json
+import inspect
+import threading
 import traceback
 import importlib.util
-import contextlib
-import io
 from typing import Any, Dict, Optional, Tuple
 
 from core.impact_engine import ImpactEngine
 from core.query_api import CRSQueryAPI
 from core.fs import WorkspaceFS
-from core.pipeline_state import PipelineState
-from core.patch_engine import apply_patch_from_file  # ✅ PATCH INTEGRATION (minimal)
+from core.git_changes import GitDiff
+from core.pipeline_state import PipelineState, StepDecision
+from core.records import iter_payload_records
+from core.patch_engine import apply_patch, apply_patch_from_file  # ✅ PATCH INTEGRATION (minimal)
 from core.spec_store import SpecStore
 from core.verification_engine import VerificationEngine
+from core.events import CRSEventEmitter, LogLevel
+from core.run_context import RunContext
+from core.step_metrics import StepMeter
+
+_tool_modules: Dict[Tuple[str, str], Tuple[float, Any]] = {}
+_tool_modules_lock = threading.Lock()
+
 
 def _load_module_from_path(name: str, abs_path: str):
+    """
+    Load a tool module by path. Cached per (name, path) and reloaded when the
+    file changes; the lock keeps concurrent pipelines from racing on exec.
+    """
     if not os.path.exists(abs_path):
         raise FileNotFoundError(f"Tool not found: {abs_path}")
-    spec = importlib.util.spec_from_file_location(name, abs_path)
-    if spec is None or spec.loader is None:
-        raise ImportError(f"Unable to load spec for {name} from {abs_path}")
-    mod = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(mod)  # type: ignore[attr-defined]
-    return mod
+    mtime = os.path.getmtime(abs_path)
+    key = (name, abs_path)
+    with _tool_modules_lock:
+        cached = _tool_modules.get(key)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        spec = importlib.util.spec_from_file_location(name, abs_path)
+        if spec is None or spec.loader is None:
+            raise ImportError(f"Unable to load spec for {name} from {abs_path}")
+        mod = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(mod)  # type: ignore[attr-defined]
+        _tool_modules[key] = (mtime, mod)
+        return mod
 
 
 def _get_tool_path(fs: WorkspaceFS, filename: str) -> str:
@@ -42,21 +62,28 @@ def _ensure_python_path(fs: WorkspaceFS) -> None:
         sys.path.insert(0, crs_root)
 
 
-def _capture_call(fn, *args, **kwargs) -> Tuple[Any, str, str, float]:
-    """
-    Capture stdout/stderr for any call (tools print a lot).
-    Returns: (result, stdout_text, stderr_text, duration_seconds)
-    """
-    out_buf = io.StringIO()
-    err_buf = io.StringIO()
+def _accepts_ctx(fn) -> bool:
+    try:
+        return "ctx" in inspect.signature(fn).parameters
+    except (TypeError, ValueError):
+        return False
+
+
+def _call_tool(fn, ctx: Optional[RunContext], *args, **kwargs):
+    """Call a tool entrypoint, handing it the run context when it accepts one."""
+    if ctx is not None and _accepts_ctx(fn):
+        kwargs["ctx"] = ctx
+    return fn(*args, **kwargs)
+
+
+def _timed_call(fn, *args, **kwargs) -> Tuple[Any, float]:
+    """Returns: (result, duration_seconds). Output goes through RunContext, not stdout."""
     t0 = time.time()
-    with contextlib.redirect_stdout(out_buf), contextlib.redirect_stderr(err_buf):
-        result = fn(*args, **kwargs)
-    dt = time.time() - t0
-    return result, out_buf.getvalue(), err_buf.getvalue(), dt
+    result = fn(*args, **kwargs)
+    return result, time.time() - t0
 
 
-def _run_blueprint_builder(fs: WorkspaceFS) -> Dict[str, Any]:
+def _run_blueprint_builder(fs: WorkspaceFS, ctx: Optional[RunContext] = None) -> Dict[str, Any]:
     bp_path = _get_tool_path(fs, "blueprint_builder_v1_workspace.py")
     mod = _load_module_from_path("crs_blueprint_builder", bp_path)
 
@@ -64,14 +91,45 @@ def _run_blueprint_builder(fs: WorkspaceFS) -> Dict[str, Any]:
     if not callable(fn):
         raise RuntimeError("Blueprint builder must expose index_workspace_blueprints()")
 
-    payload = fn()
+    payload = _call_tool(fn, ctx, fs)
     return payload if isinstance(payload, dict) else {"payload": payload}
 
 
-def _run_artifact_extractor(fs: WorkspaceFS) -> Dict[str, Any]:
+def _streaming(fs: WorkspaceFS) -> bool:
+    """config.json components.artifact_streaming: bounded-memory artifacts/relationships inputs."""
+    components = ((fs.get_cfg() or {}).get("components") or {})
+    return bool(components.get("artifact_streaming", False))
+
+
+def _include_heuristic(fs: WorkspaceFS) -> bool:
+    components = ((fs.get_cfg() or {}).get("components") or {})
+    return bool(components.get("relationship_include_heuristic_mentions", True))
+
+
+def _artifact_projector(fs: WorkspaceFS):
+    """relationship_builder.project_artifact bound to the workspace config (None if the tool lacks it)."""
+    rb_path = _get_tool_path(fs, "relationship_builder_v1_workspace.py")
+    project = getattr(_load_module_from_path("crs_relationship_builder", rb_path), "project_artifact", None)
+    if not callable(project):
+        return None
+    include_heuristic = _include_heuristic(fs)
+    return lambda a: project(a, include_heuristic_mentions=include_heuristic)
+
+
+def _run_artifact_extractor(fs: WorkspaceFS, ctx: Optional[RunContext] = None) -> Dict[str, Any]:
     ax_path = _get_tool_path(fs, "artifact_extractor_v1_workspace.py")
     mod = _load_module_from_path("crs_artifact_extractor", ax_path)
 
+    stream_fn = getattr(mod, "stream_workspace_artifacts", None)
+    if _streaming(fs) and callable(stream_fn):
+        return _call_tool(stream_fn, ctx, fs, project=_artifact_projector(fs))
+
+    # Prefer the fs-aware entrypoint so all IO goes through the backend (overlay safe)
+    ws_fn = getattr(mod, "build_workspace_artifacts", None)
+    if callable(ws_fn):
+        payload = _call_tool(ws_fn, ctx, fs)
+        return payload if isinstance(payload, dict) else {"payload": payload}
+
     fn = getattr(mod, "extract_all", None)
     if not callable(fn):
         raise RuntimeError("Artifact extractor must expose extract_all(blueprints_path, out_path)")
@@ -80,7 +138,11 @@ def _run_artifact_extractor(fs: WorkspaceFS) -> Dict[str, Any]:
     return payload if isinstance(payload, dict) else {"payload": payload}
 
 
-def _run_relationship_builder(fs: WorkspaceFS, artifacts_payload: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+def _run_relationship_builder(
+    fs: WorkspaceFS,
+    artifacts_payload: Optional[Dict[str, Any]] = None,
+    ctx: Optional[RunContext] = None,
+) -> Dict[str, Any]:
     rb_path = _get_tool_path(fs, "relationship_builder_v1_workspace.py")
     mod = _load_module_from_path("crs_relationship_builder", rb_path)
 
@@ -88,16 +150,22 @@ def _run_relationship_builder(fs: WorkspaceFS, artifacts_payload: Optional[Dict[
     if not callable(fn):
         raise RuntimeError("Relationship builder must expose build_relationships(artifacts_payload, ...)")
 
+    if artifacts_payload is None and _streaming(fs) and fs.backend.exists(fs.paths.artifacts_json):
+        project = _artifact_projector(fs)
+        if project is not None:
+            try:
+                records = iter_payload_records(fs.iter_lines(fs.paths.artifacts_json), "artifacts")
+                artifacts_payload = {"artifacts": [project(a) for a in records], "projection": True}
+            except ValueError:
+                artifacts_payload = None  # older layout: load it whole below
     if artifacts_payload is None:
         artifacts_payload = fs.read_json(fs.paths.artifacts_json)
         if not isinstance(artifacts_payload, dict):
             raise FileNotFoundError(f"Artifacts JSON not found/invalid: {fs.paths.artifacts_json}")
 
-    cfg = fs.get_cfg() or {}
-    components = (cfg.get("components") or {})
-    include_heuristic = bool(components.get("relationship_include_heuristic_mentions", True))
+    include_heuristic = _include_heuristic(fs)
 
-    rel_payload = fn(artifacts_payload, include_heuristic_mentions=include_heuristic)
+    rel_payload = _call_tool(fn, ctx, artifacts_payload, include_heuristic_mentions=include_heuristic)
     if not isinstance(rel_payload, dict):
         rel_payload = {"payload": rel_payload}
 
@@ -106,12 +174,67 @@ def _run_relationship_builder(fs: WorkspaceFS, artifacts_payload: Optional[Dict[
     return rel_payload
 
 
-def run_pipeline() -> None:
-    fs = WorkspaceFS()
+def _run_git_delta(
+    fs: WorkspaceFS,
+    git_diff: GitDiff,
+    src_fingerprint: str,
+    ctx: Optional[RunContext] = None,
+) -> Dict[str, Any]:
+    """Refresh only the .py files git reports as changed (renames: old + new path)."""
+    from crs_watch import IncrementalIndexer  # crs_watch imports this module
+
+    paths = [os.path.join(fs.paths.src_dir, p) for p in git_diff.paths() if p.endswith(".py")]
+    out = {**git_diff.summary(), "changed_paths": len(paths), "updated": [], "removed": []}
+    if not paths:
+        # nothing indexable changed: state (and its fingerprint) stays as recorded
+        return {**out, "src_fingerprint": src_fingerprint}
+
+    indexer = IncrementalIndexer(fs, log=(lambda m: ctx.log("git_delta", m)) if ctx else (lambda m: None))
+    indexer.load()
+    result = indexer.apply_changes(paths, patch_id=f"git:{git_diff.head[:12]}") or {}
+    return {
+        **out,
+        "updated": result.get("updated", []),
+        "removed": result.get("removed", []),
+        "src_fingerprint": indexer.fingerprint(),
+    }
+
+
+def run_pipeline(
+    fs: Optional[WorkspaceFS] = None,
+    *,
+    emitter: Optional[CRSEventEmitter] = None,
+    patch_in: Optional[str] = None,
+    verify_suite: Optional[str] = None,
+    run_id: Optional[str] = None,
+    echo: bool = False,
+    profile: bool = False,
+    force: bool = False,
+) -> str:
+    """
+    Runs the CRS pipeline on `fs` (default: WorkspaceFS() from CRS_CONFIG).
+
+    Re-entrant: everything is explicit (fs, emitter, patch, suite), output goes
+    through a per-run RunContext (logger + emitter + <step>.log files), and no
+    process globals (env, stdout) are touched, so several pipelines may run in
+    one process concurrently.
+
+    Pass an overlay fs (WorkspaceFS.overlay()) to run fully in memory.
+    When src_dir is a clean git checkout and the state was built from an
+    earlier commit, only the files in `git diff <recorded>..HEAD` are
+    re-indexed (step "git_delta"); otherwise the src tree is fingerprinted.
+    Every step records CPU/RSS/IO/throughput metrics in run.json; profile=True
+    adds tracemalloc peaks and per-step cProfile + sampled stacks (see
+    core.step_metrics). force=True rebuilds every step regardless of the
+    recorded state. Returns the run_id.
+    """
+    fs = fs or WorkspaceFS()
     _ensure_python_path(fs)
 
-    run_id = fs.new_run_id(prefix="pipeline")
+    run_id = run_id or fs.new_run_id(prefix="pipeline")
     fs.ensure_run_dir(run_id)
+    ctx = RunContext(fs=fs, run_id=run_id, emitter=emitter, echo=echo)
+    log = ctx.log
 
     # basic run header
     fs.write_run_json(
@@ -123,10 +246,14 @@ def run_pipeline() -> None:
             "tools_dir": fs.paths.tools_dir,
             "started_at_utc": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
             "status": "running",
+            "profile": bool(profile),
             "steps": {},
         },
     )
-        # ------------------------------------
+    if emitter:
+        emitter.emit_pipeline_start({"workspace_root": fs.paths.workspace_root})
+
+    # ------------------------------------
     # ✅ SPEC STORE INIT (non-fatal)
     # Creates state/specs/* if missing.
     # ------------------------------------
@@ -134,61 +261,46 @@ def run_pipeline() -> None:
         spec_store = SpecStore(fs)
         spec_result = spec_store.ensure_defaults(overwrite=False)
         fs.write_run_json(run_id, "spec_store_init.json", spec_result)
-        print(f"\n=== Step: SpecStore ===\n✅ SpecStore OK -> {spec_result.get('specs_dir')}")
+        log("spec_store", f"✅ SpecStore OK -> {spec_result.get('specs_dir')}")
     except Exception as e:
         # Do NOT fail pipeline for specs init
         fs.write_run_text(run_id, "spec_store_init_error.log", f"{type(e).__name__}: {e}")
-        print(f"\n=== Step: SpecStore ===\n⚠️ SpecStore init failed (non-fatal): {type(e).__name__}: {e}")
+        log("spec_store", f"⚠️ SpecStore init failed (non-fatal): {type(e).__name__}: {e}", LogLevel.WARNING)
 
     state = PipelineState(fs)
 
     # -------------------------------------------------
     # ✅ PATCH STEP (minimal integration)
-    # If CRS_PATCH_IN is set, apply patch now.
+    # If patch_in is given, apply patch now.
     # This will mark patch dirty in meta_state.json.
     # Then decision will correctly rerun downstream steps.
     # -------------------------------------------------
-    patch_in = os.environ.get("CRS_PATCH_IN")
     if patch_in:
-        print("\n=== Step: Patch ===")
         patch_record = apply_patch_from_file(fs, state, patch_in, run_id=run_id)
         summ = patch_record.get("summary", {}) if isinstance(patch_record, dict) else {}
-        print(
+        log(
+            "patch",
             f"✅ Patch applied -> id={patch_record.get('patch_id')} "
-            f"applied={summ.get('applied')} errors={summ.get('errors')}"
+            f"applied={summ.get('applied')} errors={summ.get('errors')}",
         )
 
-    decision = state.decide()
-
-    # persist decision for debugging
-    fs.write_run_json(
-        run_id,
-        "decision.json",
-        {
-            "reason": decision.reason,
-            "run_blueprints": bool(decision.run_blueprints),
-            "run_artifacts": bool(decision.run_artifacts),
-            "run_relationships": bool(decision.run_relationships),
-        },
-    )
-
-    print("\n=== CRS Pipeline Decision ===")
-    print(decision.reason)
-
-    src_info = state.compute_src_fingerprint()
-    cur_fp = src_info["src_fingerprint"]
-    fs.write_run_json(run_id, "src_fingerprint.json", src_info)
-
     steps_meta: Dict[str, Any] = {}
 
-    def _record_step(step: str, ok: bool, dt: float, out: str, err: str, extra: Optional[Dict[str, Any]] = None) -> None:
+    def _record_step(
+        step: str,
+        ok: bool,
+        dt: float,
+        extra: Optional[Dict[str, Any]] = None,
+        metrics: Optional[Dict[str, Any]] = None,
+    ) -> None:
         steps_meta[step] = {
             "ok": ok,
             "duration_seconds": dt,
-            "stdout_len": len(out or ""),
-            "stderr_len": len(err or ""),
+            "log_len": len(ctx.step_text(step)),
             "extra": extra or {},
         }
+        if metrics:
+            steps_meta[step]["metrics"] = metrics
         # update run.json each step (so if crash, you still have partial state)
         run_json_path = fs.run_path(run_id, "run.json")
         try:
@@ -200,12 +312,85 @@ def run_pipeline() -> None:
         current["steps"] = steps_meta
         fs.write_json(run_json_path, current)
 
+    def _run_step(step: str, fn, *args, **kwargs) -> Tuple[Any, float, StepMeter]:
+        ctx.step_start(step)
+        meter = StepMeter(fs, step, run_id=run_id, profile=profile)
+        try:
+            with meter:
+                payload, dt = _timed_call(fn, *args, ctx=ctx, **kwargs)
+        except Exception as e:
+            ctx.step_error(step, e, traceback.format_exc())
+            raise
+        finally:
+            fs.write_run_text(run_id, f"{step}.log", ctx.step_text(step))
+        return payload, dt, meter
+
+    # -------------------------------------------------
+    # ✅ GIT DELTA
+    # Clean checkout + state built from an earlier commit:
+    # re-index just the files git reports as changed.
+    # -------------------------------------------------
+    git_head = None if patch_in else state.git_snapshot()
+    if force:
+        git_diff, git_reason = None, "forced full rebuild"
+    else:
+        git_diff, git_reason = state.git_delta(git_head)
+    src_info: Optional[Dict[str, Any]] = None
+    decision: Optional[StepDecision] = None
+    if git_diff is not None:
+        try:
+            payload, dt, meter = _run_step(
+                "git_delta", _run_git_delta, fs, git_diff, state.load_meta()["git"]["src_fingerprint"]
+            )
+            changed = len(payload["updated"]) + len(payload["removed"])
+            metrics = meter.metrics(items=changed, files=changed)
+            _record_step("git_delta", True, dt, payload, metrics)
+            ctx.step_complete("git_delta", dt, payload, metrics)
+            log(
+                "git_delta",
+                f"✅ git {git_diff.base[:12]}..{git_diff.head[:12]} -> "
+                f"updated={len(payload['updated'])} removed={len(payload['removed'])}",
+            )
+            src_info = {"src_fingerprint": payload["src_fingerprint"], "git": git_diff.summary()}
+            decision = StepDecision(
+                False,
+                False,
+                False,
+                {"git_delta": git_diff.summary(), "src_fingerprint": payload["src_fingerprint"]},
+            )
+        except Exception as e:
+            _record_step("git_delta", False, 0.0, {"error": f"{type(e).__name__}: {e}"})
+            log("git_delta", f"⚠️ git delta failed, fingerprinting src (non-fatal): {type(e).__name__}: {e}", LogLevel.WARNING)
+    elif state.git_enabled():
+        log("git_delta", f"⏭️  Full fingerprint ({git_reason})")
+
+    if decision is None:
+        decision = state.decide()
+    if force:
+        decision = StepDecision(True, True, True, {**decision.reason, "forced": True})
+
+    # persist decision for debugging
+    fs.write_run_json(
+        run_id,
+        "decision.json",
+        {
+            "reason": decision.reason,
+            "run_blueprints": bool(decision.run_blueprints),
+            "run_artifacts": bool(decision.run_artifacts),
+            "run_relationships": bool(decision.run_relationships),
+        },
+    )
+    log("decision", decision.reason)
+
+    if src_info is None:
+        src_info = state.compute_src_fingerprint()
+    cur_fp = src_info["src_fingerprint"]
+    fs.write_run_json(run_id, "src_fingerprint.json", src_info)
+
     try:
         # Step 1: Blueprints
-        print("\n=== Step: Blueprints ===")
         if decision.run_blueprints:
-            payload, out, err, dt = _capture_call(_run_blueprint_builder, fs)
-            fs.write_run_text(run_id, "blueprints.log", out + ("\n\n[stderr]\n" + err if err else ""))
+            payload, dt, meter = _run_step("blueprints", _run_blueprint_builder, fs)
             fs.write_run_json(run_id, "blueprints_payload.json", payload)
 
             bp_sha = state.hash_output_file(fs.paths.blueprints_json)
@@ -215,85 +400,100 @@ def run_pipeline() -> None:
                 "file_count": payload.get("file_count") if isinstance(payload, dict) else None,
                 "output": fs.paths.blueprints_json,
             }
-            _record_step("blueprints", True, dt, out, err, extra)
-
-            print(f"✅ Blueprints OK -> {fs.paths.blueprints_json}")
-            if isinstance(payload, dict):
-                print(f"   Files: {payload.get('file_count')}")
+            metrics = meter.metrics(items=extra["file_count"], files=extra["file_count"])
+            log("blueprints", f"✅ Blueprints OK -> {fs.paths.blueprints_json} (files: {extra['file_count']})")
+            _record_step("blueprints", True, dt, extra, metrics)
+            ctx.step_complete("blueprints", dt, extra, metrics)
         else:
-            print("⏭️  Skipped (up-to-date)")
-            _record_step("blueprints", True, 0.0, "", "", {"skipped": True})
+            log("blueprints", "⏭️  Skipped (up-to-date)")
+            _record_step("blueprints", True, 0.0, {"skipped": True})
 
         # Step 2: Artifacts
-        print("\n=== Step: Artifacts ===")
+        artifacts_payload: Optional[Dict[str, Any]] = None
         if decision.run_artifacts:
-            payload, out, err, dt = _capture_call(_run_artifact_extractor, fs)
-            fs.write_run_text(run_id, "artifacts.log", out + ("\n\n[stderr]\n" + err if err else ""))
-            fs.write_run_json(run_id, "artifacts_payload.json", payload)
-
-            art_sha = state.hash_output_file(fs.paths.artifacts_json)
+            payload, dt, meter = _run_step("artifacts", _run_artifact_extractor, fs)
+            streamed = isinstance(payload, dict) and bool(payload.get("streamed"))
+            if streamed:
+                # artifacts.json was written directly; payload only holds the projection
+                fs.write_run_json(run_id, "artifacts_payload.json", {k: v for k, v in payload.items() if k != "artifacts"})
+            else:
+                fs.write_run_json(run_id, "artifacts_payload.json", payload)
+            artifacts_payload = payload if isinstance(payload, dict) else None
+
+            art_sha = state.hash_output_file(fs.paths.artifacts_json, stream=streamed)
             state.mark_step_done("artifacts", src_fingerprint=cur_fp, output_sha1=art_sha)
 
             arts_count = None
-            if isinstance(payload, dict) and isinstance(payload.get("artifacts"), list):
+            if streamed:
+                arts_count = payload.get("artifact_count")
+            elif isinstance(payload, dict) and isinstance(payload.get("artifacts"), list):
                 arts_count = len(payload["artifacts"])
             extra = {"artifacts": arts_count, "output": fs.paths.artifacts_json}
-            _record_step("artifacts", True, dt, out, err, extra)
-
-            print(f"✅ Artifacts OK -> {fs.paths.artifacts_json}")
-            if arts_count is not None:
-                print(f"   Artifacts: {arts_count}")
+            metrics = meter.metrics(
+                items=arts_count, files=payload.get("file_count") if isinstance(payload, dict) else None
+            )
+            log("artifacts", f"✅ Artifacts OK -> {fs.paths.artifacts_json} (artifacts: {arts_count})")
+            _record_step("artifacts", True, dt, extra, metrics)
+            ctx.step_complete("artifacts", dt, extra, metrics)
         else:
-            print("⏭️  Skipped (up-to-date)")
-            _record_step("artifacts", True, 0.0, "", "", {"skipped": True})
+            log("artifacts", "⏭️  Skipped (up-to-date)")
+            _record_step("artifacts", True, 0.0, {"skipped": True})
 
         # Step 3: Relationships
-        print("\n=== Step: Relationships ===")
         if decision.run_relationships:
-            artifacts_payload = fs.read_json(fs.paths.artifacts_json)
-            payload, out, err, dt = _capture_call(
+            if artifacts_payload is not None and artifacts_payload.get("streamed") and not artifacts_payload.get("projection"):
+                artifacts_payload = None  # streamed without a projection: re-read from disk
+            payload, dt, meter = _run_step(
+                "relationships",
                 _run_relationship_builder,
                 fs,
-                artifacts_payload=artifacts_payload if isinstance(artifacts_payload, dict) else None,
+                artifacts_payload=artifacts_payload,
             )
-            fs.write_run_text(run_id, "relationships.log", out + ("\n\n[stderr]\n" + err if err else ""))
             fs.write_run_json(run_id, "relationships_payload.json", payload)
 
             rel_sha = state.hash_output_file(fs.paths.relationships_json)
             state.mark_step_done("relationships", src_fingerprint=cur_fp, output_sha1=rel_sha)
 
             rel_count = None
+            by_type = None
+            rel_files = None
             if isinstance(payload, dict) and isinstance(payload.get("summary"), dict):
                 rel_count = payload["summary"].get("relationships")
+                by_type = payload["summary"].get("by_type")
+                rel_files = payload["summary"].get("files")
             extra = {"relationships": rel_count, "output": fs.paths.relationships_json}
-            _record_step("relationships", True, dt, out, err, extra)
-
-            print(f"✅ Relationships OK -> {fs.paths.relationships_json}")
-            if isinstance(payload, dict):
-                summary = payload.get("summary")
-                if isinstance(summary, dict):
-                    print(f"   Relationships: {summary.get('relationships')}  by_type={summary.get('by_type')}")
+            metrics = meter.metrics(items=rel_count, files=rel_files)
+            log("relationships", f"✅ Relationships OK -> {fs.paths.relationships_json} (relationships: {rel_count} by_type={by_type})")
+            _record_step("relationships", True, dt, extra, metrics)
+            ctx.step_complete("relationships", dt, extra, metrics)
         else:
-            print("⏭️  Skipped (up-to-date)")
-            _record_step("relationships", True, 0.0, "", "", {"skipped": True})
-        # In run_pipeline(), near the end (after relationships + impact + query index), append this block:
+            log("relationships", "⏭️  Skipped (up-to-date)")
+            _record_step("relationships", True, 0.0, {"skipped": True})
+
         # -----------------------------
         # NEW (non-fatal): Verification Suite
-        # Runs if env CRS_VERIFY_SUITE is set (default: none)
+        # Runs if verify_suite is given (default: none)
         # -----------------------------
-        suite_id = (os.environ.get("CRS_VERIFY_SUITE") or "").strip()
+        suite_id = (verify_suite or "").strip()
         if suite_id:
             try:
-                print("\n=== Step: Verification ===")
-                v = VerificationEngine(fs)
-                v_payload = v.run_suite(suite_id, run_id=run_id)
+                with StepMeter(fs, "verification", run_id=run_id, profile=profile) as meter:
+                    v = VerificationEngine(fs)
+                    v_payload = v.run_suite(suite_id, run_id=run_id)
+                metrics = meter.metrics(items=(v_payload.get("summary") or {}).get("total"))
                 # record it in run.json steps summary
-                _record_step("verification", bool(v_payload.get("ok")), 0.0, "", "", {"suite_id": suite_id, "summary": v_payload.get("summary")})
-                print(f"✅ Verification done -> suite={suite_id} ok={v_payload.get('ok')}")
+                _record_step(
+                    "verification",
+                    bool(v_payload.get("ok")),
+                    metrics["wall_s"],
+                    {"suite_id": suite_id, "summary": v_payload.get("summary")},
+                    metrics,
+                )
+                log("verification", f"✅ Verification done -> suite={suite_id} ok={v_payload.get('ok')}")
             except Exception as e:
                 fs.write_run_text(run_id, "verification_error.log", f"{type(e).__name__}: {e}")
-                _record_step("verification", False, 0.0, "", "", {"suite_id": suite_id, "error": f"{type(e).__name__}: {e}"})
-                print(f"⚠️ Verification failed (non-fatal): {type(e).__name__}: {e}")
+                _record_step("verification", False, 0.0, {"suite_id": suite_id, "error": f"{type(e).__name__}: {e}"})
+                log("verification", f"⚠️ Verification failed (non-fatal): {type(e).__name__}: {e}", LogLevel.WARNING)
 
         # Clear patch dirty if needed (we need meta for impact step too)
         meta = state.load_meta()
@@ -307,9 +507,11 @@ def run_pipeline() -> None:
         # -----------------------------
         if patch_dirty or patch_id:
             try:
-                print("\n=== Step: Impact ===")
-                impact_engine = ImpactEngine(fs)
-                impact_payload = impact_engine.build_workspace_impact(run_id=run_id)
+                with StepMeter(fs, "impact", run_id=run_id, profile=profile) as meter:
+                    impact_engine = ImpactEngine(fs)
+                    impact_payload = impact_engine.build_workspace_impact(run_id=run_id)
+                changed_files = (impact_payload.get("summary") or {}).get("changed_files")
+                metrics = meter.metrics(items=changed_files, files=changed_files)
                 fs.write_run_json(
                     run_id,
                     "impact_summary.json",
@@ -318,17 +520,16 @@ def run_pipeline() -> None:
                 _record_step(
                     "impact",
                     True,
-                    0.0,
-                    "",
-                    "",
+                    metrics["wall_s"],
                     {"patch_id": impact_payload.get("patch_id"), "summary": impact_payload.get("summary")},
+                    metrics,
                 )
-                print(f"✅ Impact written (patch_id={impact_payload.get('patch_id')})")
+                log("impact", f"✅ Impact written (patch_id={impact_payload.get('patch_id')})")
             except Exception as e:
                 # Do NOT fail pipeline for impact; it’s diagnostic.
                 fs.write_run_text(run_id, "impact_error.log", f"{type(e).__name__}: {e}")
-                _record_step("impact", False, 0.0, "", "", {"error": f"{type(e).__name__}: {e}"})
-                print(f"⚠️ Impact step failed (non-fatal): {type(e).__name__}: {e}")
+                _record_step("impact", False, 0.0, {"error": f"{type(e).__name__}: {e}"})
+                log("impact", f"⚠️ Impact step failed (non-fatal): {type(e).__name__}: {e}", LogLevel.WARNING)
 
         # Optional: warm-load the QueryAPI index and store a tiny snapshot (non-fatal)
         try:
@@ -349,6 +550,11 @@ def run_pipeline() -> None:
         if bool(patch.get("dirty", False)):
             state.clear_patch_dirty()
 
+        # remember the commit this state was built from (only if src stayed clean and on it)
+        if state.git_enabled():
+            still_head = git_head is not None and state.git_snapshot() == git_head
+            state.record_src_commit(git_head if still_head else None, cur_fp)
+
         # finish run.json
         run_json_path = fs.run_path(run_id, "run.json")
         final_run = fs.read_json(run_json_path)
@@ -358,8 +564,11 @@ def run_pipeline() -> None:
         final_run["ended_at_utc"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
         fs.write_json(run_json_path, final_run)
 
-        print("\n✅ Pipeline OK")
-        print(f"🧾 Run logs -> {fs.run_dir(run_id)}")
+        log("pipeline", "✅ Pipeline OK")
+        log("pipeline", f"🧾 Run logs -> {fs.run_dir(run_id)}")
+        if emitter:
+            emitter.emit_pipeline_complete({"run_id": run_id, "steps": steps_meta})
+        return run_id
 
     except Exception as e:
         tb = traceback.format_exc()
@@ -379,14 +588,63 @@ def run_pipeline() -> None:
         cur["steps"] = steps_meta
         fs.write_json(run_json_path, cur)
 
-        print("\n❌ Pipeline failed")
-        print(f"Error: {type(e).__name__}: {e}")
-        print(f"🧾 Run logs -> {fs.run_dir(run_id)}")
+        log("pipeline", "❌ Pipeline failed", LogLevel.ERROR)
+        log("pipeline", f"Error: {type(e).__name__}: {e}", LogLevel.ERROR)
+        log("pipeline", f"🧾 Run logs -> {fs.run_dir(run_id)}", LogLevel.ERROR)
+        if emitter:
+            emitter.emit_pipeline_error(str(e), type(e).__name__)
         raise
 
 
+def evaluate_patch(
+    fs: WorkspaceFS,
+    patch_payload: Dict[str, Any],
+    *,
+    suite_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Speculative patch evaluation (v1):
+      - forks an in-memory overlay of the workspace
+      - applies the patch, runs the pipeline (incl. impact) and optional suite
+      - returns impact + verification; nothing is written to disk
+
+    The returned "fs" is the overlay; callers may commit it
+    (fs.backend.commit()) or simply drop it.
+    """
+    ov = fs.overlay()
+    state = PipelineState(ov)
+
+    patch_record = apply_patch(ov, state, patch_payload)
+    run_id = run_pipeline(ov)
+
+    impact_path = os.path.join(ov.paths.state_dir, "impact.json")
+    impact = ov.read_json(impact_path) if ov.backend.exists(impact_path) else None
+
+    verification: Optional[Dict[str, Any]] = None
+    if suite_id:
+        verification = VerificationEngine(ov).run_suite(suite_id, run_id=run_id)
+
+    return {
+        "patch_id": patch_record.get("patch_id"),
+        "patch_summary": patch_record.get("summary"),
+        "run_id": run_id,
+        "impact": impact,
+        "verification": verification,
+        "ok": bool(verification.get("ok")) if isinstance(verification, dict) else True,
+        "pending_src_paths": ov.backend.pending_paths(under=ov.paths.src_dir),  # type: ignore[attr-defined]
+        "deleted_src_paths": ov.backend.pending_deletes(under=ov.paths.src_dir),  # type: ignore[attr-defined]
+        "fs": ov,
+    }
+
+
 def main() -> None:
-    run_pipeline()
+    # CLI entrypoint: env is read here only, never inside run_pipeline()
+    run_pipeline(
+        patch_in=os.environ.get("CRS_PATCH_IN") or None,
+        verify_suite=os.environ.get("CRS_VERIFY_SUITE") or None,
+        echo=True,
+        profile=os.environ.get("CRS_PROFILE", "").lower() in ("1", "true", "yes"),
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,296 @@
+# crs_watch.py
+"""
+Continuous indexing for `crs watch` (v1)
+
+IncrementalIndexer keeps the workspace state in memory (blueprints and
+artifacts per file, the relationship payload and a warm CRSQueryRunner)
+and applies batches of changed files:
+
+  - changed/new files: re-blueprint + re-extract just those files
+  - deleted files: drop their blueprints/artifacts
+  - relationships: rebuilt from the in-memory artifacts (no re-parse), and
+    only when the batch changed some file's artifacts; edits that leave the
+    artifacts as they were (bodies, comments) skip artifacts.json and the
+    relationship pass entirely
+  - impact: state/impact.json for the changed files (patch_id "watch")
+  - meta_state step fingerprints are updated, so a later `crs run`
+    sees the state as up-to-date
+
+Limitation: blueprints.json, artifacts.json and relationships.json are
+single documents, so a batch that does change them still rewrites them
+whole, and relationships are relinked over every artifact (name resolution
+is global: a renamed model changes edges in files that did not change).
+
+crs_main also uses it to apply `git diff` results after a pull.
+
+watch() wires it to core.watcher (inotify, or polling as fallback).
+"""
+import hashlib
+import os
+import threading
+import time
+from dataclasses import asdict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from core.fs import WorkspaceFS
+from core.impact_engine import ImpactEngine
+from core.pipeline_state import PipelineState
+from core.query_runner import CRSQueryRunner
+from core.watcher import make_watcher
+from crs_main import (
+    _ensure_python_path,
+    _get_tool_path,
+    _load_module_from_path,
+    _run_relationship_builder,
+    run_pipeline,
+)
+
+WATCH_PATCH_ID = "watch"
+
+
+def _sha1_text(txt: str) -> str:
+    h = hashlib.sha1()
+    h.update(txt.encode("utf-8", errors="replace"))
+    return h.hexdigest()
+
+
+def _norm(p: str) -> str:
+    return p.replace("\\", "/")
+
+
+class IncrementalIndexer:
+    def __init__(self, fs: WorkspaceFS, *, log: Callable[[str], None] = print):
+        self.fs = fs
+        self.log = log
+        self.state = PipelineState(fs)
+        self.query = CRSQueryRunner(fs)
+        self.src_root = os.path.abspath(fs.paths.src_dir)
+
+        bp_cfg = (fs.get_cfg() or {}).get("blueprints", {}) or {}
+        self.store_lines = bool(bp_cfg.get("store_lines", True))
+        self.store_raw_text = bool(bp_cfg.get("store_raw_text", True))
+
+        _ensure_python_path(fs)
+        self._bp_tool = _load_module_from_path(
+            "crs_blueprint_builder", _get_tool_path(fs, "blueprint_builder_v1_workspace.py")
+        )
+        self._ax_tool = _load_module_from_path(
+            "crs_artifact_extractor", _get_tool_path(fs, "artifact_extractor_v1_workspace.py")
+        )
+
+        self._bp_header: Dict[str, Any] = {}
+        self._blueprints: Dict[str, Dict[str, Any]] = {}
+        self._artifacts: Dict[str, List[Dict[str, Any]]] = {}
+        self._arts_payload: Dict[str, Any] = {}
+        self._rel_payload: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self.batches = 0
+
+    # ---------------------------
+    # bootstrap
+    # ---------------------------
+    def bootstrap(self) -> Dict[str, Any]:
+        """Run the full pipeline only if state is stale, then load it into memory."""
+        decision = self.state.decide()
+        if decision.run_blueprints or decision.run_artifacts or decision.run_relationships:
+            self.log("🔄 State is stale -> full pipeline run")
+            run_pipeline(self.fs)
+        return self.load()
+
+    def load(self) -> Dict[str, Any]:
+        """Load the persisted state into memory as-is."""
+        bp_payload = self.fs.read_json(self.fs.paths.blueprints_json)
+        arts_payload = self.fs.read_json(self.fs.paths.artifacts_json)
+        rel_payload = self.fs.read_json(self.fs.paths.relationships_json)
+
+        self._bp_header = {k: v for k, v in bp_payload.items() if k not in ("blueprints", "file_count")}
+        self._blueprints = {
+            _norm(str(b.get("file_path"))): b for b in bp_payload.get("blueprints") or [] if isinstance(b, dict)
+        }
+        self._artifacts = {}
+        for a in arts_payload.get("artifacts") or []:
+            if isinstance(a, dict):
+                self._artifacts.setdefault(_norm(str(a.get("file_path") or "")), []).append(a)
+
+        self._arts_payload, self._rel_payload = arts_payload, rel_payload
+        self.query.api.load_payloads(arts_payload, rel_payload)
+        return self.query.stats()
+
+    # ---------------------------
+    # incremental update
+    # ---------------------------
+    def _rel(self, abs_path: str) -> Optional[str]:
+        rel = _norm(os.path.relpath(abs_path, self.src_root))
+        return None if rel.startswith("../") or rel == ".." else rel
+
+    def _expand(self, paths: Iterable[str]) -> Set[str]:
+        """Changed paths -> relative .py files to refresh (directories rescan their subtree)."""
+        targets: Set[str] = set()
+        for p in paths:
+            p = os.path.abspath(p)
+            rel = "" if p == self.src_root else self._rel(p)
+            if rel is None:
+                continue
+            if rel and p.endswith(".py") and not os.path.isdir(p):
+                if rel in self._blueprints or not self.fs.scanner.is_excluded(p):
+                    targets.add(rel)
+                continue
+            prefix = f"{rel}/" if rel else ""
+            targets.update(r for r in self._blueprints if r.startswith(prefix))
+            if self.fs.backend.exists(p):
+                targets.update(filter(None, (self._rel(f) for f in self.fs.list_files(p, suffix=".py"))))
+        return targets
+
+    def apply_changes(self, paths: Iterable[str], *, patch_id: str = WATCH_PATCH_ID) -> Optional[Dict[str, Any]]:
+        """
+        Refresh state for the given changed paths.
+        Returns a summary, or None when no file content actually changed.
+        """
+        with self._lock:
+            t0 = time.time()
+            updated: List[str] = []
+            removed: List[str] = []
+            artifacts_changed = False
+
+            for rel in sorted(self._expand(paths)):
+                abs_fp = os.path.join(self.src_root, rel)
+                text: Optional[str] = None
+                if self.fs.backend.exists(abs_fp):
+                    try:
+                        text = self.fs.read_text(abs_fp)
+                    except (OSError, UnicodeDecodeError):
+                        continue  # unreadable mid-write; the next event retries
+
+                if text is None:
+                    if rel in self._blueprints:
+                        self._blueprints.pop(rel, None)
+                        artifacts_changed |= bool(self._artifacts.pop(rel, None))
+                        removed.append(rel)
+                    continue
+
+                old = self._blueprints.get(rel)
+                if old is not None and old.get("sha1") == _sha1_text(text):
+                    continue  # touched/saved without changes
+
+                bp = self._bp_tool.blueprint_file_from_text(
+                    text=text,
+                    file_path_for_ids=rel,
+                    store_lines=self.store_lines,
+                    store_raw_text=self.store_raw_text,
+                )
+                self._blueprints[rel] = asdict(bp)
+                arts = [a.to_dict() for a in self._ax_tool.extract_artifacts_from_file(rel, text)]
+                if arts != self._artifacts.get(rel, []):
+                    self._artifacts[rel] = arts
+                    artifacts_changed = True
+                updated.append(rel)
+
+            if not updated and not removed:
+                return None
+
+            arts_payload, rel_payload = self._persist(artifacts_changed)
+            changed = updated + removed
+            impact = ImpactEngine(self.fs).build_workspace_impact(
+                patch_payload={"changed_files": changed},
+                patch_id=patch_id,
+            )
+            if artifacts_changed:
+                self.query.api.load_payloads(arts_payload, rel_payload)
+            self.batches += 1
+
+            return {
+                "batch": self.batches,
+                "src_fingerprint": self.fingerprint(),
+                "updated": updated,
+                "removed": removed,
+                "artifacts": len(arts_payload["artifacts"]),
+                "relationships": len(rel_payload.get("relationships") or []),
+                "artifacts_changed": artifacts_changed,
+                "impact": impact.get("summary"),
+                "duration_seconds": time.time() - t0,
+            }
+
+    def _persist(self, artifacts_changed: bool = True) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Write the in-memory state. blueprints.json always changes (file sha1s);
+        artifacts/relationships are only rewritten when some artifact changed.
+        """
+        files = sorted(self._blueprints)
+        bp_payload = {
+            **self._bp_header,
+            "src_root": self.src_root,
+            "file_count": len(files),
+            "blueprints": [self._blueprints[f] for f in files],
+        }
+        self.fs.save_blueprints(bp_payload)
+
+        if artifacts_changed or not self._arts_payload:
+            arts_payload = {
+                "version": "crs-artifacts-v2",
+                "blueprints": "(in-memory-payload)",
+                "artifacts": [a for f in sorted(self._artifacts) for a in self._artifacts[f]],
+            }
+            self.fs.save_artifacts(arts_payload)
+            rel_payload = _run_relationship_builder(self.fs, arts_payload)
+            self._arts_payload, self._rel_payload = arts_payload, rel_payload
+        else:
+            arts_payload, rel_payload = self._arts_payload, self._rel_payload
+
+        fp = self.fingerprint()
+        for step in ("blueprints", "artifacts", "relationships"):
+            self.state.mark_step_done(step, src_fingerprint=fp)
+        return arts_payload, rel_payload
+
+    def fingerprint(self) -> str:
+        """Same fingerprint PipelineState.compute_src_fingerprint() would produce."""
+        return _sha1_text("\n".join(f"{f}:{self._blueprints[f].get('sha1')}" for f in sorted(self._blueprints)))
+
+
+def watch(
+    fs: Optional[WorkspaceFS] = None,
+    *,
+    debounce: float = 0.15,
+    poll_interval: float = 0.5,
+    force_polling: bool = False,
+    stop: Optional[threading.Event] = None,
+    on_update: Optional[Callable[[Dict[str, Any]], None]] = None,
+    log: Callable[[str], None] = print,
+) -> IncrementalIndexer:
+    """
+    Watch src_dir and keep CRS state fresh until `stop` is set (or Ctrl-C).
+    Returns the indexer (its `query` runner stays warm for the whole session).
+    """
+    fs = fs or WorkspaceFS()
+    indexer = IncrementalIndexer(fs, log=log)
+    stats = indexer.bootstrap()
+    watcher = make_watcher(
+        fs.paths.src_dir,
+        debounce=debounce,
+        poll_interval=poll_interval,
+        force_polling=force_polling,
+        scanner=fs.scanner,
+    )
+    log(f"👀 Watching {watcher.root} ({watcher.kind}); artifacts={stats.get('artifacts')} relationships={stats.get('relationships')}")
+
+    try:
+        while stop is None or not stop.is_set():
+            batch = watcher.next_batch(timeout=0.5)
+            if not batch:
+                continue
+            try:
+                summary = indexer.apply_changes(batch)
+            except Exception as e:
+                log(f"⚠️ Incremental update failed: {type(e).__name__}: {e}")
+                continue
+            if summary is None:
+                continue
+            log(
+                f"✅ #{summary['batch']} updated={len(summary['updated'])} removed={len(summary['removed'])} "
+                f"artifacts={summary['artifacts']} relationships={summary['relationships']} "
+                f"({summary['duration_seconds'] * 1000:.0f} ms)"
+            )
+            if on_update:
+                on_update(summary)
+    finally:
+        watcher.close()
+    return indexer
@@ -3,10 +3,11 @@
 import ast
 import json
 import os
-from dataclasses import dataclass, asdict
-from typing import Any, Dict, List, Optional, Set, Tuple, Union
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple, Union
 
 from core.fs import WorkspaceFS
+from core.records import dumps_payload, intern_str, iter_payload_chunks, iter_payload_records
 
 """
 CRS Artifact Extractor (v2) - workspace-first refactor
@@ -47,7 +48,7 @@ A_REQUIREMENT = "requirement"
 # -----------------------------
 # Data structures
 # -----------------------------
-@dataclass
+@dataclass(slots=True)
 class Artifact:
     artifact_id: str
     type: str
@@ -58,6 +59,25 @@ class Artifact:
     evidence: List[Dict[str, Any]]
     meta: Dict[str, Any]
 
+    def __post_init__(self) -> None:
+        self.type = intern_str(self.type)
+        self.name = intern_str(self.name)
+        self.file_path = intern_str(self.file_path)
+        self.confidence = intern_str(self.confidence)
+
+    def to_dict(self) -> Dict[str, Any]:
+        # shallow: anchor/evidence/meta are built per artifact and not shared, so no deep copy (asdict)
+        return {
+            "artifact_id": self.artifact_id,
+            "type": self.type,
+            "name": self.name,
+            "file_path": self.file_path,
+            "anchor": self.anchor,
+            "confidence": self.confidence,
+            "evidence": self.evidence,
+            "meta": self.meta,
+        }
+
 
 # -----------------------------
 # Helpers: AST / name resolution
@@ -667,6 +687,18 @@ def _extract_get_serializer_class_targets(func: ast.FunctionDef) -> List[str]:
     return uniq
 
 
+def _include_ref(node: ast.AST) -> Optional[str]:
+    """include("app.urls") / include(("app.urls", "app")) / include(router.urls) -> "app.urls" / "router.urls" """
+    if not (isinstance(node, ast.Call) and _get_full_attr_name(node.func) in ("include", "django.urls.include")):
+        return None
+    if not node.args:
+        return None
+    arg = node.args[0]
+    if isinstance(arg, (ast.Tuple, ast.List)) and arg.elts:
+        arg = arg.elts[0]
+    return _const_str(arg) or _get_full_attr_name(arg)
+
+
 def _extract_urlconf(tree: ast.Module, file_path: str) -> Tuple[List[Artifact], bool]:
     artifacts: List[Artifact] = []
 
@@ -727,6 +759,11 @@ def _extract_urlconf(tree: ast.Module, file_path: str) -> Tuple[List[Artifact],
                                 if nnode:
                                     name = _const_str(nnode)
                                 pa = _anchor_for_node(file_path, el)
+                                meta = {"fn": fn, "route": route, "target": target, "name": name}
+                                # ✅ NEW: path("api/", include("app.urls")) -> included urlconf (route prefixes)
+                                inc = _include_ref(el.args[1]) if len(el.args) >= 2 else None
+                                if inc:
+                                    meta["include"] = inc
                                 artifacts.append(
                                     Artifact(
                                         artifact_id=make_artifact_id(A_URL_PATTERN, route or "path", pa),
@@ -736,7 +773,7 @@ def _extract_urlconf(tree: ast.Module, file_path: str) -> Tuple[List[Artifact],
                                         anchor=pa,
                                         confidence="probable",
                                         evidence=[{"anchor": pa, "note": f"{fn}(...) in urlpatterns"}],
-                                        meta={"fn": fn, "route": route, "target": target, "name": name},
+                                        meta=meta,
                                     )
                                 )
                             elif fn == "include":
@@ -1055,11 +1092,12 @@ def _load_blueprints_payload(blueprints_in: Any) -> Dict[str, Any]:
 
     raise TypeError(f"blueprints_in must be dict or str path. Got: {type(blueprints_in).__name__}")
 
-def extract_all(blueprints_in: Any, out_path: str) -> Dict[str, Any]:
+def extract_all(blueprints_in: Any, out_path: Optional[str] = None) -> Dict[str, Any]:
     """
     blueprints_in can be:
       - path to blueprints json (str)
       - already loaded blueprints payload (dict)
+    out_path=None => payload is only returned (caller persists via WorkspaceFS)
     """
     blueprints_payload = _load_blueprints_payload(blueprints_in)
 
@@ -1121,29 +1159,33 @@ def extract_all(blueprints_in: Any, out_path: str) -> Dict[str, Any]:
     payload = {
         "version": "crs-artifacts-v2",
         "blueprints": blueprints_in if isinstance(blueprints_in, str) else "(in-memory-payload)",
-        "artifacts": [asdict(a) for a in artifacts],
+        "artifacts": [a.to_dict() for a in artifacts],
     }
 
-    with open(out_path, "w", encoding="utf-8") as f:
-        json.dump(payload, f, indent=2)
+    if isinstance(out_path, str):
+        with open(out_path, "w", encoding="utf-8") as f:
+            f.write(dumps_payload(payload))
 
     return payload
 
-def build_workspace_artifacts(fs: Optional[WorkspaceFS] = None) -> Dict[str, Any]:
+def build_workspace_artifacts(fs: Optional[WorkspaceFS] = None, ctx: Any = None) -> Dict[str, Any]:
     """
     Main pipeline entrypoint:
       - loads blueprints from workspace state
       - extracts artifacts
       - saves artifacts into workspace state
+    ctx (core.run_context.RunContext, optional): per-run logging/events
     """
     fs = fs or WorkspaceFS()
 
     bp_path = fs.paths.blueprints_json
-    if not os.path.exists(bp_path):
+    if not fs.backend.exists(bp_path):
         raise FileNotFoundError(f"Blueprints not found: {bp_path}. Run blueprint builder first.")
 
     blueprints_payload = fs.read_json(bp_path) if hasattr(fs, "read_json") else json.loads(fs.read_text(bp_path))
-    artifacts_payload = extract_all(blueprints_payload, fs)
+    if ctx is not None:
+        ctx.log("artifacts", f"Extracting artifacts from {len(blueprints_payload.get('blueprints') or [])} blueprint files")
+    artifacts_payload = extract_all(blueprints_payload)
 
     # Prefer dedicated helper if exists
     if hasattr(fs, "save_artifacts"):
@@ -1152,7 +1194,84 @@ def build_workspace_artifacts(fs: Optional[WorkspaceFS] = None) -> Dict[str, Any
         out_path = getattr(fs.paths, "artifacts_json", os.path.join(fs.paths.state_dir, "artifacts.json"))
         fs.write_json(out_path, artifacts_payload)
 
-    return artifacts_payload
+    # source files processed (not persisted; the streaming path reports the same key)
+    file_count = len(blueprints_payload.get("blueprints") or blueprints_payload.get("files") or [])
+    return {**artifacts_payload, "file_count": file_count}
+
+
+def _iter_blueprints(fs: WorkspaceFS, bp_path: str) -> Iterator[Dict[str, Any]]:
+    """Blueprint records read lazily (one per line); older indent=2 files are loaded whole."""
+    records = iter_payload_records(fs.iter_lines(bp_path), "blueprints")
+    try:
+        first = next(records)
+    except StopIteration:
+        return
+    except ValueError:
+        yield from fs.read_json(bp_path).get("blueprints") or []
+        return
+    yield first
+    yield from records
+
+
+def stream_workspace_artifacts(
+    fs: Optional[WorkspaceFS] = None,
+    ctx: Any = None,
+    project: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    """
+    Bounded-memory variant of build_workspace_artifacts():
+      - blueprints are read from disk one record at a time
+      - artifacts are extracted one file at a time and written straight to
+        artifacts.json (same content as the in-memory path)
+      - only project(artifact) is kept (e.g. relationship_builder.project_artifact);
+        returned as payload["artifacts"] with "projection": True
+    """
+    fs = fs or WorkspaceFS()
+
+    bp_path = fs.paths.blueprints_json
+    if not fs.backend.exists(bp_path):
+        raise FileNotFoundError(f"Blueprints not found: {bp_path}. Run blueprint builder first.")
+
+    projection: List[Dict[str, Any]] = []
+    counts = {"files": 0, "artifacts": 0}
+
+    def _artifacts() -> Iterator[Dict[str, Any]]:
+        for info in _iter_blueprints(fs, bp_path):
+            fp = info.get("file_path") or info.get("path")
+            raw = info.get("raw_text")
+            if fp is None:
+                continue
+            if raw is None:
+                raise RuntimeError(
+                    f"Blueprint missing raw_text for file: {fp}. "
+                    f"Enable blueprints.store_raw_text in config.json."
+                )
+            counts["files"] += 1
+            for a in extract_artifacts_from_file(fp, raw):
+                d = a.to_dict()
+                counts["artifacts"] += 1
+                if project is not None:
+                    projection.append(project(d))
+                yield d
+
+    if ctx is not None:
+        ctx.log("artifacts", f"Streaming artifact extraction from {bp_path}")
+    fs.write_chunks(
+        fs.paths.artifacts_json,
+        iter_payload_chunks({"version": "crs-artifacts-v2", "blueprints": bp_path}, "artifacts", _artifacts()),
+    )
+    if ctx is not None:
+        ctx.log("artifacts", f"Extracted {counts['artifacts']} artifacts from {counts['files']} blueprint files (streamed)")
+
+    return {
+        "version": "crs-artifacts-v2",
+        "blueprints": bp_path,
+        "streamed": True,
+        "projection": project is not None,
+        "file_count": counts["files"],
+        "artifact_count": counts["artifacts"],
+        "artifacts": projection,
+    }
 
 
 if __name__ == "__main__":
@@ -8,6 +8,7 @@ from dataclasses import dataclass, asdict
 from typing import Any, Dict, List, Optional, Tuple
 
 from core.fs import WorkspaceFS
+from core.source_scanner import SourceScanner
 
 
 SEG_IMPORT = "import"
@@ -163,13 +164,8 @@ def _extract_segments_fallback(file_path: str, text: str, err: str) -> List[Segm
     return segments
 
 
-def _iter_py_files(root: str) -> List[str]:
-    out: List[str] = []
-    for dirpath, _, filenames in os.walk(root):
-        for fn in filenames:
-            if fn.endswith(".py"):
-                out.append(os.path.join(dirpath, fn))
-    return sorted(out)
+def _iter_py_files(root: str, cfg: Optional[Dict[str, Any]] = None) -> List[str]:
+    return SourceScanner.from_config(root, cfg).list_files(suffix=".py")
 
 
 def blueprint_file_from_text(
@@ -212,11 +208,12 @@ def blueprint_file_from_text(
         )
 
 
-def index_workspace_blueprints(fs: Optional[WorkspaceFS] = None) -> Dict[str, Any]:
+def index_workspace_blueprints(fs: Optional[WorkspaceFS] = None, ctx: Any = None) -> Dict[str, Any]:
     """
     Workspace runner (no args):
     - Uses core/fs.py as the single source of truth for:
       config, paths, reads, writes, directory creation.
+    - ctx (core.run_context.RunContext, optional): per-run logging/events
     """
     fs = fs or WorkspaceFS()
     cfg = fs.get_cfg()
@@ -226,12 +223,15 @@ def index_workspace_blueprints(fs: Optional[WorkspaceFS] = None) -> Dict[str, An
     store_lines = bool(cfg.get("blueprints", {}).get("store_lines", True))
     store_raw_text = bool(cfg.get("blueprints", {}).get("store_raw_text", True))
 
-    files = _iter_py_files(src_dir)
+    # list through fs so overlay (in-memory) workspaces include pending files
+    files = fs.list_files(src_dir, suffix=".py")
     if not files:
         raise RuntimeError(f"No .py files found in workspace src_dir: {src_dir}")
 
     blueprints: List[BlueprintFile] = []
     src_abs = os.path.abspath(src_dir)
+    if ctx is not None:
+        ctx.log("blueprints", f"Indexing {len(files)} .py files under {src_abs}")
 
     for fp in files:
         fp_abs = os.path.abspath(fp)
@@ -273,7 +273,7 @@ def index_blueprints(root: str, out_json: str, fs: Optional[WorkspaceFS] = None)
     """
     fs = fs or WorkspaceFS()
 
-    files = _iter_py_files(root)
+    files = _iter_py_files(root, fs.get_cfg())
     blueprints: List[BlueprintFile] = []
 
     root_abs = os.path.abspath(root)
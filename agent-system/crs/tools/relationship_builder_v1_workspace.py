@@ -1,8 +1,9 @@
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional
 
 from core.fs import WorkspaceFS
+from core.records import intern_str
 
 
 # Must match artifact extractor output types
@@ -18,14 +19,21 @@ A_URL_PATTERN = "url_pattern"
 A_ROUTER_REGISTER = "router_register"
 
 
-@dataclass
+@dataclass(slots=True)
 class RelEnd:
     artifact_id: Optional[str]
     type: str
     name: str
 
+    def __post_init__(self) -> None:
+        self.type = intern_str(self.type)
+        self.name = intern_str(self.name)
 
-@dataclass
+    def to_dict(self) -> Dict[str, Any]:
+        return {"artifact_id": self.artifact_id, "type": self.type, "name": self.name}
+
+
+@dataclass(slots=True)
 class Relationship:
     rel_id: str
     type: str
@@ -35,6 +43,34 @@ class Relationship:
     evidence: List[Dict[str, Any]]
     meta: Dict[str, Any]
 
+    def __post_init__(self) -> None:
+        self.type = intern_str(self.type)
+        self.confidence = intern_str(self.confidence)
+
+    def to_dict(self, end_dicts: Optional[Dict[int, Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """
+        Payload form (no asdict deep copy). Pass one `end_dicts` cache for a
+        whole payload so relationships sharing a RelEnd share its dict too.
+        """
+        def _end(e: RelEnd) -> Dict[str, Any]:
+            if end_dicts is None:
+                return e.to_dict()
+            d = end_dicts.get(id(e))
+            if d is None:
+                d = end_dicts[id(e)] = e.to_dict()
+            return d
+
+        fr, to = _end(self.from_end), _end(self.to_end)
+        return {
+            "rel_id": self.rel_id,
+            "type": self.type,
+            "from": fr,
+            "to": to,
+            "confidence": self.confidence,
+            "evidence": self.evidence,
+            "meta": self.meta,
+        }
+
 
 def _utc_now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
@@ -59,10 +95,61 @@ def _end_from_art(a: Dict[str, Any]) -> RelEnd:
     )
 
 
+def _end_cache() -> Any:
+    """Per-build _end_from_art: one RelEnd per artifact instead of one per relationship."""
+    ends: Dict[int, RelEnd] = {}
+
+    def end_for(a: Dict[str, Any]) -> RelEnd:
+        e = ends.get(id(a))
+        if e is None:
+            e = ends[id(a)] = _end_from_art(a)
+        return e
+
+    return end_for
+
+
 def _end_unresolved(name: str) -> RelEnd:
     return RelEnd(artifact_id=None, type="unresolved_ref", name=name)
 
 
+# meta keys build_relationships resolves against; the rest of meta only feeds heuristic mentions
+RESOLUTION_META_KEYS = (
+    "model",
+    "serializer",
+    "meta_model",
+    "serializer_class",
+    "get_serializer_class_targets",
+    "viewset",
+    "router",
+    "prefix",
+    "basename",
+    "target",
+    "route",
+    "fn",
+    "name",
+)
+
+
+def project_artifact(a: Dict[str, Any], include_heuristic_mentions: bool = True) -> Dict[str, Any]:
+    """
+    The part of an artifact build_relationships reads: ids/type/name/location,
+    the resolution meta keys and (for heuristic mentions) meta flattened to
+    one string. Streaming extraction keeps only these in memory.
+    """
+    meta = a.get("meta") or {}
+    out = {
+        "artifact_id": a.get("artifact_id"),
+        "type": intern_str(a.get("type")),
+        "name": intern_str(a.get("name")),
+        "file_path": intern_str(a.get("file_path")),
+        "anchor": a.get("anchor"),
+        "meta": {k: meta[k] for k in RESOLUTION_META_KEYS if k in meta},
+    }
+    if include_heuristic_mentions and a.get("type") != A_PARSE_ERROR:
+        out["mentions"] = "\n".join(_iter_strings(meta))
+    return out
+
+
 def _mk_rel_id(rel_type: str, from_id: str, to_key: str) -> str:
     return f"rel:{rel_type}:{from_id}->{to_key}"
 
@@ -86,8 +173,14 @@ def _iter_strings(obj: Any) -> List[str]:
     return out
 
 
-def build_relationships(artifacts_payload: Dict[str, Any], include_heuristic_mentions: bool = True) -> Dict[str, Any]:
+def build_relationships(
+    artifacts_payload: Dict[str, Any],
+    include_heuristic_mentions: bool = True,
+    ctx: Any = None,
+) -> Dict[str, Any]:
     arts: List[Dict[str, Any]] = artifacts_payload.get("artifacts", []) or []
+    if ctx is not None:
+        ctx.log("relationships", f"Linking {len(arts)} artifacts (heuristic mentions: {include_heuristic_mentions})")
 
     models_by_name: Dict[str, Dict[str, Any]] = {}
     fields_by_fullname: Dict[str, Dict[str, Any]] = {}
@@ -114,6 +207,7 @@ def build_relationships(artifacts_payload: Dict[str, Any], include_heuristic_men
 
     rels: List[Relationship] = []
     seen = set()
+    end_of = _end_cache()
 
     def emit(rel: Relationship) -> None:
         if rel.rel_id in seen:
@@ -123,7 +217,7 @@ def build_relationships(artifacts_payload: Dict[str, Any], include_heuristic_men
 
     # (1) declares: model -> model_field
     for _, model_art in models_by_name.items():
-        from_end = _end_from_art(model_art)
+        from_end = end_of(model_art)
         for field_art in arts:
             if field_art.get("type") != A_MODEL_FIELD:
                 continue
@@ -131,7 +225,7 @@ def build_relationships(artifacts_payload: Dict[str, Any], include_heuristic_men
             if meta.get("model") != model_art.get("name"):
                 continue
 
-            to_end = _end_from_art(field_art)
+            to_end = end_of(field_art)
             rel_id = _mk_rel_id("declares", from_end.artifact_id or "", to_end.artifact_id or to_end.name)
             emit(
                 Relationship(
@@ -147,10 +241,10 @@ def build_relationships(artifacts_payload: Dict[str, Any], include_heuristic_men
 
     # (2) declares: serializer -> serializer_field/validator
     for _, ser_art in serializers_by_name.items():
-        from_end = _end_from_art(ser_art)
+        from_end = end_of(ser_art)
         for a in arts:
             if a.get("type") == A_SERIALIZER_FIELD and (a.get("meta") or {}).get("serializer") == ser_art.get("name"):
-                to_end = _end_from_art(a)
+                to_end = end_of(a)
                 rel_id = _mk_rel_id("declares", from_end.artifact_id or "", to_end.artifact_id or to_end.name)
                 emit(
                     Relationship(
@@ -165,7 +259,7 @@ def build_relationships(artifacts_payload: Dict[str, Any], include_heuristic_men
                 )
 
             if a.get("type") == A_SERIALIZER_VALIDATOR and (a.get("meta") or {}).get("serializer") == ser_art.get("name"):
-                to_end = _end_from_art(a)
+                to_end = end_of(a)
                 rel_id = _mk_rel_id("declares", from_end.artifact_id or "", to_end.artifact_id or to_end.name)
                 emit(
                     Relationship(
@@ -186,12 +280,12 @@ def build_relationships(artifacts_payload: Dict[str, Any], include_heuristic_men
         if not mm:
             continue
 
-        from_end = _end_from_art(ser_art)
+        from_end = end_of(ser_art)
         mm_norm = _norm_ref(mm) or str(mm)
         model_art = models_by_name.get(mm_norm)
 
         if model_art:
-            to_end = _end_from_art(model_art)
+            to_end = end_of(model_art)
             rel_id = _mk_rel_id("serializes_model", from_end.artifact_id or "", to_end.artifact_id or to_end.name)
             emit(
                 Relationship(
@@ -222,14 +316,14 @@ def build_relationships(artifacts_payload: Dict[str, Any], include_heuristic_men
     # (4) view_uses_serializer: view -> serializer
     for _, view_art in views_by_name.items():
         meta = view_art.get("meta") or {}
-        from_end = _end_from_art(view_art)
+        from_end = end_of(view_art)
 
         sc = meta.get("serializer_class")
         if sc:
             sc_norm = _norm_ref(sc) or str(sc)
             ser_target = serializers_by_name.get(sc_norm)
             if ser_target:
-                to_end = _end_from_art(ser_target)
+                to_end = end_of(ser_target)
                 rel_id = _mk_rel_id("view_uses_serializer", from_end.artifact_id or "", to_end.artifact_id or to_end.name)
                 emit(
                     Relationship(
@@ -261,7 +355,7 @@ def build_relationships(artifacts_payload: Dict[str, Any], include_heuristic_men
             tgt_norm = _norm_ref(tgt) or str(tgt)
             ser_target = serializers_by_name.get(tgt_norm)
             if ser_target:
-                to_end = _end_from_art(ser_target)
+                to_end = end_of(ser_target)
                 rel_id = _mk_rel_id("view_uses_serializer", from_end.artifact_id or "", to_end.artifact_id or to_end.name)
                 emit(
                     Relationship(
@@ -282,12 +376,12 @@ def build_relationships(artifacts_payload: Dict[str, Any], include_heuristic_men
         if not vs:
             continue
 
-        from_end = _end_from_art(rr)
+        from_end = end_of(rr)
         vs_norm = _norm_ref(vs) or str(vs)
         view_art = views_by_name.get(vs_norm)
 
         if view_art:
-            to_end = _end_from_art(view_art)
+            to_end = end_of(view_art)
             rel_id = _mk_rel_id("registers", from_end.artifact_id or "", to_end.artifact_id or to_end.name)
             emit(
                 Relationship(
@@ -322,12 +416,12 @@ def build_relationships(artifacts_payload: Dict[str, Any], include_heuristic_men
         if not tgt:
             continue
 
-        from_end = _end_from_art(up)
+        from_end = end_of(up)
         tgt_norm = _norm_ref(tgt) or str(tgt)
         view_art = views_by_name.get(tgt_norm)
 
         if view_art:
-            to_end = _end_from_art(view_art)
+            to_end = end_of(view_art)
             rel_id = _mk_rel_id("routes_to", from_end.artifact_id or "", to_end.artifact_id or to_end.name)
             emit(
                 Relationship(
@@ -365,15 +459,18 @@ def build_relationships(artifacts_payload: Dict[str, Any], include_heuristic_men
         for a in arts:
             if a.get("type") == A_PARSE_ERROR:
                 continue
-            strings = _iter_strings(a.get("meta") or {})
-            if not strings:
-                continue
-            blob = "\n".join(strings)
-            from_end = _end_from_art(a)
+            if "mentions" in a:  # projected artifact (project_artifact)
+                blob = a["mentions"]
+            else:
+                strings = _iter_strings(a.get("meta") or {})
+                if not strings:
+                    continue
+                blob = "\n".join(strings)
+            from_end = end_of(a)
 
             for fullname, short, field_art in field_tokens:
                 if short and short in blob:
-                    to_end = _end_from_art(field_art)
+                    to_end = end_of(field_art)
                     rel_id = _mk_rel_id("mentions_field_string", from_end.artifact_id or "", to_end.artifact_id or to_end.name)
                     emit(
                         Relationship(
@@ -390,23 +487,18 @@ def build_relationships(artifacts_payload: Dict[str, Any], include_heuristic_men
     by_type: Dict[str, int] = {}
     for r in rels:
         by_type[r.type] = by_type.get(r.type, 0) + 1
+    end_dicts: Dict[int, Dict[str, Any]] = {}
 
     return {
         "version": "crs-relationships-v1",
         "generated_at": _utc_now_iso(),
-        "summary": {"artifacts": len(arts), "relationships": len(rels), "by_type": by_type},
-        "relationships": [
-            {
-                "rel_id": r.rel_id,
-                "type": r.type,
-                "from": asdict(r.from_end),
-                "to": asdict(r.to_end),
-                "confidence": r.confidence,
-                "evidence": r.evidence,
-                "meta": r.meta,
-            }
-            for r in rels
-        ],
+        "summary": {
+            "artifacts": len(arts),
+            "files": len({a.get("file_path") for a in arts if a.get("file_path")}),
+            "relationships": len(rels),
+            "by_type": by_type,
+        },
+        "relationships": [r.to_dict(end_dicts) for r in rels],
     }
 
 
@@ -172,6 +172,7 @@ export default {
 
   // CRS outputs
   runCrs: (systemId, repoId) => api.post(`/systems/${systemId}/repositories/${repoId}/crs/run/`),
+  getCrsJob: (systemId, repoId, jobId) => api.get(`/systems/${systemId}/repositories/${repoId}/crs/jobs/${jobId}/`),
   getCrsSummary: (systemId, repoId) => api.get(`/systems/${systemId}/repositories/${repoId}/crs/summary/`),
   getCrsBlueprints: (systemId, repoId) => api.get(`/systems/${systemId}/repositories/${repoId}/crs/blueprints/`),
   getCrsArtifacts: (systemId, repoId) => api.get(`/systems/${systemId}/repositories/${repoId}/crs/artifacts/`),
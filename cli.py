@@ -16,7 +16,10 @@ from core.query_runner import CRSQueryRunner
 
 # Import your crs_main.run_pipeline without refactor:
 
+import crs_bench
+import crs_daemon
 import crs_main
+import crs_watch
 
 
 def main():
@@ -24,7 +27,32 @@ def main():
     sub = ap.add_subparsers(dest="cmd", required=True)
 
     p_run = sub.add_parser("run", help="Run CRS pipeline (patch+pipeline+impact as implemented in crs_main)")
-    p_run.add_argument("--patch", default=None, help="Path to patch.json (sets CRS_PATCH_IN for this run)")
+    p_run.add_argument("--patch", default=None, help="Path to patch.json (default: $CRS_PATCH_IN)")
+    p_run.add_argument("--profile", action="store_true",
+                       help="Per-step cProfile + sampled stacks + tracemalloc into the run dir (default: $CRS_PROFILE)")
+
+    p_watch = sub.add_parser("watch", help="Watch src_dir and keep CRS state fresh incrementally")
+    p_watch.add_argument("--debounce", type=float, default=0.15, help="Seconds of quiet before a batch is applied")
+    p_watch.add_argument("--poll", action="store_true", help="Force polling instead of inotify")
+    p_watch.add_argument("--poll-interval", type=float, default=0.5, help="Polling interval in seconds")
+
+    p_daemon = sub.add_parser("daemon", help="Serve run_op/run_ops from warm in-memory indexes")
+    p_daemon.add_argument("--listen", default=os.environ.get("CRS_DAEMON_URL") or crs_daemon.DEFAULT_ADDRESS,
+                          help="unix:///path/crs.sock or http://host:port (default: $CRS_DAEMON_URL)")
+    p_daemon.add_argument("--max-workspaces", type=int, default=32, help="Warm workspaces kept in memory")
+    p_daemon.add_argument("--preload", action="append", default=[], help="Workspace config.json to load at startup")
+
+    p_bench = sub.add_parser("bench", help="Benchmark the pipeline on synthetic Django/DRF projects")
+    p_bench.add_argument("--sizes", default=",".join(str(n) for n in crs_bench.DEFAULT_SIZES), help="Model counts, e.g. 10,30,100")
+    p_bench.add_argument("--fields", type=int, default=8, help="Fields per model")
+    p_bench.add_argument("--models-per-app", type=int, default=20, help="Models per generated app")
+    p_bench.add_argument("--repeat", type=int, default=3, help="Timed runs per step (best is reported)")
+    p_bench.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc pass")
+    p_bench.add_argument("--out", default="crs_bench", help="Directory for bench.json / bench.md")
+    p_bench.add_argument("--work-dir", default=None, help="Keep generated workspaces here (default: temp dir)")
+    p_bench.add_argument("--baseline", default=None, help="Baseline bench.json to compare against (exit 1 on regression)")
+    p_bench.add_argument("--threshold", type=float, default=0.25, help="Allowed relative slowdown vs baseline")
+    p_bench.add_argument("--save-baseline", default=None, help="Also copy this report's JSON to the given path")
 
     p_suite = sub.add_parser("suite", help="Run verification suite")
     p_suite.add_argument("suite_id", help="e.g. vs:post_patch_smoke")
@@ -37,13 +65,59 @@ def main():
     args = ap.parse_args()
 
     if args.cmd == "run":
-        if args.patch:
-            os.environ["CRS_PATCH_IN"] = args.patch
-        crs_main.run_pipeline()
+        crs_main.run_pipeline(
+            patch_in=args.patch or os.environ.get("CRS_PATCH_IN"),
+            verify_suite=os.environ.get("CRS_VERIFY_SUITE"),
+            echo=True,
+            profile=args.profile or os.environ.get("CRS_PROFILE", "").lower() in ("1", "true", "yes"),
+        )
+        return
+
+    if args.cmd == "daemon":
+        try:
+            crs_daemon.serve(args.listen, max_workspaces=args.max_workspaces, preload=tuple(args.preload))
+        except KeyboardInterrupt:
+            print("👋 Daemon stopped")
+        return
+
+    if args.cmd == "bench":
+        report = crs_bench.run_bench(
+            [int(n) for n in args.sizes.split(",") if n.strip()],
+            work_dir=args.work_dir,
+            repeat=args.repeat,
+            memory=not args.no_memory,
+            fields_per_model=args.fields,
+            models_per_app=args.models_per_app,
+        )
+        if args.baseline:
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                report["comparison"] = crs_bench.compare(report, json.load(f), threshold=args.threshold)
+        paths = crs_bench.write_report(report, args.out)
+        if args.save_baseline:
+            with open(args.save_baseline, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+        print(f"🧾 Report -> {paths['json']} / {paths['markdown']}")
+        cmp_ = report.get("comparison")
+        if cmp_ and not cmp_["ok"]:
+            for row in cmp_["regressions"]:
+                print(f"❌ models={row['models']} {row['step']}: {row['baseline_s']:.4f}s -> {row['current_s']:.4f}s (x{row['ratio']})")
+            raise SystemExit(1)
         return
 
     fs = WorkspaceFS()
 
+    if args.cmd == "watch":
+        try:
+            crs_watch.watch(
+                fs,
+                debounce=args.debounce,
+                poll_interval=args.poll_interval,
+                force_polling=args.poll,
+            )
+        except KeyboardInterrupt:
+            print("👋 Stopped watching")
+        return
+
     if args.cmd == "suite":
         t = CRSTester(fs)
         out = t.run_suite(args.suite_id, run_id=args.run_id)